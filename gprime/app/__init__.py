@@ -18,4 +18,13 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 
-from .app import main
+def main():
+    """
+    Run gPrime, after starting to time the startup if --profile-startup
+    is on the command line (before the imports of gprime.app.app).
+    """
+    from . import startup
+    if startup.requested():
+        startup.start_profile()
+    from .app import main as app_main
+    app_main()
@@ -18,5 +18,5 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 
-from gprime.app.app import main
+from gprime.app import main
 main()
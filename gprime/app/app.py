@@ -19,7 +19,6 @@
 #
 
 ## Python imports
-import re
 import os
 import sys
 import base64
@@ -30,28 +29,25 @@ import signal
 import shutil
 import webbrowser
 import threading
-from passlib.hash import sha256_crypt as crypt
+import tempfile
 from collections import defaultdict
 
-from .handlers import *
-from .forms import *
-from .forms.actionform import import_file
-from ..db import DbTxn
+from .jobs import JobQueue
+from .executor import RequestExecutor
+from .changebus import ChangeBus
+from .fragmentcache import FragmentCache
+from .recordscache import RecordsCache
+from .tiler import Tiler
+from .imagecache import ImageCache
+from .mediaingest import ingest_media
+from . import startup
+from ..db.dbconst import KEY_TO_NAME_MAP
 from ..version import VERSION
 
+import tornado.ioloop
+import tornado.log
 from tornado.web import Application, url, StaticFileHandler
 
-def make_path_relative(filename):
-    """
-    Given a filename, make it relative.
-    """
-    parts = re.split(r"[\\/]", filename)
-    if ":" in parts[0]:
-        return "/".join(
-            [p for p in parts[0].split(":")[1:] + parts[1:] if p])
-    else:
-        return "/".join([p for p in parts if p])
-
 def get_image_path_from_media(database, media):
     from gprime.utils.file import media_path_full
     if media:
@@ -61,16 +57,81 @@ def get_image_path_from_media(database, media):
 class GPrimeApp(Application):
     """
     Main webapp class
+
+    In a multi-process server, there is one GPrimeApp per worker
+    process: task_id is its number, and bus_dir the folder of the
+    ChangeBus through which the workers tell each other about changes.
     """
-    def __init__(self, options, database, **kwargs):
+    def __init__(self, options, database, task_id=None, bus_dir=None,
+                 **kwargs):
         import gprime.const
+        # The handlers (and their forms and templates) are only imported
+        # when serving, not for the command-line actions:
+        from .handlers import (
+            HomeHandler, LoginHandler, LogoutHandler, My404Handler,
+            PersonHandler, FamilyHandler, ImageHandler, JsonHandler,
+            ActionHandler, JobHandler, AdminHandler, NoteHandler,
+            CitationHandler, EventHandler, MediaHandler, PlaceHandler,
+            RepositoryHandler, SourceHandler, TagHandler, SettingsHandler,
+            NameHandler, AttributeHandler, MediaRefHandler, AddressHandler,
+            ChildRefHandler, EventRefHandler, LDSHandler, PersonRefHandler,
+            PlaceRefHandler, RepoRefHandler, URLHandler, SurnameHandler)
         self.options = options
         self.prefix = self.options.prefix
         self.user_data = {} # user to user_data map
+        self.user_data_lock = threading.Lock()
         self.database = database
         self.sitename = self.options.sitename
-        settings = kwargs
-        settings.update(self.default_settings())
+        self.task_id = task_id
+        self.change_callbacks = [self.user_changed]
+        self.io_loop = None
+        self.bus = None
+        if bus_dir:
+            self.bus = ChangeBus(bus_dir, "worker-%s-%s" % (task_id,
+                                                            os.getpid()))
+            self.bus.subscribe(self.receive_change)
+        self.fragments = None
+        if self.options.fragment_cache_size > 0:
+            self.fragments = FragmentCache(self.options.fragment_cache_size)
+            self.on_change(self.fragments.database_changed)
+        self.records = None
+        if self.options.home_records > 0:
+            self.records = RecordsCache(
+                self.options.home_records,
+                os.path.join(self.options.site_dir, "database"))
+        cache_dir = os.path.join(self.options.site_dir, "media", "cache")
+        self.image_cache = ImageCache(
+            cache_dir, self.options.image_cache_size * 1024 * 1024,
+            self.options.image_cache_memory * 1024 * 1024)
+        # The first worker makes the tiles of images that are added:
+        self.tiler = None
+        if self.options.tile_workers > 0 and not task_id:
+            self.tiler = Tiler(cache_dir, self.options.tile_workers,
+                               callback=self.image_cache.scan,
+                               database_dir=os.path.join(
+                                   self.options.site_dir, "database"))
+        self.on_change(self.media_changed)
+        self.connect_database(database)
+        self.jobs = JobQueue(self.options.site_dir, self.options.job_workers,
+                             restart=not task_id)
+        if self.options.request_workers:
+            self.executor = RequestExecutor(
+                os.path.join(self.options.site_dir, "database"),
+                self.options.request_workers, self.options.image_workers,
+                self.options.request_timeout,
+                on_open=self.connect_database)
+        else: # run requests on the IOLoop
+            self.executor = None
+        # URL prefix to folder of static files:
+        self.static_dirs = {
+            "/data/": gprime.const.DATA_DIR,
+            "/css/": os.path.join(gprime.const.DATA_DIR, "css"),
+            "/js/": os.path.join(gprime.const.DATA_DIR, "javascript"),
+            "/images/": gprime.const.IMAGE_DIR,
+            "/img/": os.path.join(gprime.const.DATA_DIR, "img"),
+        }
+        settings = self.default_settings()
+        settings.update(kwargs)
         handlers = [
             (self.make_url(r"/(.*)/attribute_list/(.*)"),
              AttributeHandler, "attribute_list", self.make_env({})),
@@ -102,6 +163,8 @@ class GPrimeApp(Application):
              LogoutHandler, "logout", self.make_env({})),
             (self.make_url(r'/action/?(.*)'),
              ActionHandler, "action", self.make_env({})),
+            (self.make_url(r'/job/?(.*)'),
+             JobHandler, "job", self.make_env({})),
             (self.make_url(r'/person/(.*)/name/(.*)/surname/(.*)'),
              SurnameHandler, "surname", self.make_env({})),
             (self.make_url(r'/person/(.*)/name/(.*)/?(.*)'),
@@ -135,25 +198,27 @@ class GPrimeApp(Application):
             })),
             (self.make_url(r"/json/"),
              JsonHandler, "json", self.make_env({})),
+            (self.make_url(r"/admin/?(.*)"),
+             AdminHandler, "admin", self.make_env({})),
             (self.make_url(r"/data/(.*)"),
              StaticFileHandler, "data", {
-                'path': gprime.const.DATA_DIR,
+                'path': self.static_dirs["/data/"],
             }),
             (self.make_url(r"/css/(.*)"),
              StaticFileHandler, "css", {
-                'path': os.path.join(gprime.const.DATA_DIR, "css"),
+                'path': self.static_dirs["/css/"],
             }),
             (self.make_url(r"/js/(.*)"),
              StaticFileHandler, "javascript", {
-                'path': os.path.join(gprime.const.DATA_DIR, "javascript"),
+                'path': self.static_dirs["/js/"],
             }),
             (self.make_url(r"/images/(.*)"),
              StaticFileHandler, "images", {
-                'path': gprime.const.IMAGE_DIR,
+                'path': self.static_dirs["/images/"],
             }),
             (self.make_url(r"/img/(.*)"),
              StaticFileHandler, "css_img", {
-                'path': os.path.join(gprime.const.DATA_DIR, "img"),
+                'path': self.static_dirs["/img/"],
             }),
             (self.make_url(r"/(.*)"),
              My404Handler, "my404", self.make_env({})),
@@ -170,6 +235,24 @@ class GPrimeApp(Application):
         else:
             return "%s%s" % (self.prefix, pattern)
 
+    def static_url(self, url):
+        """
+        Return the URL of a static file, such as "/css/Web_Mainz.css",
+        with a fingerprint of its content as "v" argument. The static
+        file handlers let browsers cache such URLs for ever: when the
+        file changes, so does its URL.
+        """
+        for prefix, path in self.static_dirs.items():
+            if url.startswith(prefix):
+                if not self.settings.get("static_hash_cache", True):
+                    StaticFileHandler.reset()
+                version = StaticFileHandler.get_version(
+                    {"static_path": path}, url[len(prefix):])
+                if version:
+                    return "%s?v=%s" % (self.make_url(url), version)
+                break
+        return self.make_url(url)
+
     def make_env(self, handler_env):
         env = {
             "database": self.database,
@@ -180,48 +263,134 @@ class GPrimeApp(Application):
         env.update(handler_env)
         return env
 
+    def get_database(self):
+        """
+        Return the database connection to use in the current thread:
+        the worker's own when running in the request executor.
+        """
+        if self.executor:
+            database = self.executor.get_database()
+            if database is not None:
+                return database
+        return self.database
+
+    def connect_database(self, database):
+        """
+        Pass the change signals of a database connection on to
+        changed().
+        """
+        # (the database only calls functions and methods back)
+        def make_callback(signal):
+            def callback(handles=None):
+                self.database_changed(signal, handles)
+            return callback
+        for name in KEY_TO_NAME_MAP.values():
+            for op in ["add", "update", "delete", "rebuild"]:
+                signal = "%s-%s" % (name, op)
+                database.connect(signal, make_callback(signal))
+
+    def database_changed(self, signal, handles):
+        """
+        Signal callback; may be called in a worker thread.
+        """
+        if self.io_loop:
+            self.io_loop.add_callback(self.changed, signal, handles)
+        else:
+            self.changed(signal, handles)
+
+    def on_change(self, callback):
+        """
+        Call callback(signal, handles) on each change, in this or
+        another worker process; signal is like "person-update", and
+        handles a list of handles, or None for a whole table.
+        """
+        self.change_callbacks.append(callback)
+
+    def changed(self, signal, handles=None, publish=True):
+        """
+        Tell the change callbacks, and the other worker processes, about
+        a change.
+        """
+        for callback in self.change_callbacks:
+            try:
+                callback(signal, handles)
+            except Exception:
+                tornado.log.logging.error("Error in change callback",
+                                          exc_info=True)
+        if publish and self.bus:
+            # keep the messages small:
+            for start in range(0, len(handles or [None]), 1000):
+                self.bus.publish({"signal": signal,
+                                  "handles": (handles[start:start + 1000]
+                                              if handles else handles)})
+
+    def receive_change(self, message):
+        self.changed(message["signal"], message["handles"], publish=False)
+
+    def user_changed(self, signal, handles):
+        if signal == "user-update":
+            with self.user_data_lock:
+                for user in handles:
+                    self.user_data.pop(user, None)
+
+    def media_changed(self, signal, handles):
+        """
+        Make the tiles of images that are added or changed, and remove
+        the cached images of media that are deleted.
+        """
+        if not signal.startswith("media-"):
+            return
+        elif signal == "media-delete":
+            for handle in handles:
+                self.image_cache.remove(handle)
+        else:
+            self.scan_images()
+
+    def scan_images(self):
+        """
+        Make the tiles of the images added or changed since the last
+        scan, by this or any other process (see Tiler.scan).
+        """
+        if self.tiler:
+            self.tiler.scan(self.database.get_change_stamp())
+
     def clear_user_data(self, user):
-        if user in self.user_data:
-            del self.user_data[user]
+        self.user_changed("user-update", [user])
+        self.database_changed("user-update", [user])
 
-    def get_translate_func(self, user):
+    def get_user_data(self, user):
+        """
+        Return the settings of a user, with defaults, and the user's
+        locale and translation function. They are cached until the user
+        changes them (in any worker).
+        """
         from gprime.utils.locale import Locale, _
+        user_data = self.user_data.get(user)
+        if user_data is not None:
+            return user_data
+        try:
+            user_data = dict(self.get_database().get_user_data(user) or {})
+        except:
+            user_data = {}
+        if user_data.get("language"):
+            user_data["glocale"] = Locale(lang=user_data["language"])
+            user_data["_"] = user_data["glocale"].translation.gettext
+        else:
+            user_data["language"] = "en"
+            user_data["glocale"] = Locale
+            user_data["_"] = _
+        if not user_data.get("css"):
+            user_data["css"] = "Web_Mainz.css"
+        with self.user_data_lock:
+            return self.user_data.setdefault(user, user_data)
+
+    def get_translate_func(self, user):
         def func(*args, **kwargs):
-            if user not in self.user_data:
-                try:
-                    user_data = self.database.get_user_data(user)
-                except:
-                    user_data = {}
-                if user_data:
-                    self.user_data[user] = user_data
-                else:
-                    self.user_data[user] = {}
-            if "language" in self.user_data[user] and self.user_data[user]["language"]:
-                self.user_data[user]["glocale"] = Locale(lang=self.user_data[user]["language"])
-                self.user_data[user]["_"] = self.user_data[user]["glocale"].translation.gettext
-            else:
-                self.user_data[user]["language"] = "en"
-                self.user_data[user]["glocale"] = Locale
-                self.user_data[user]["_"] = _
-            return self.user_data[user]["_"](*args, **kwargs)
+            return self.get_user_data(user)["_"](*args, **kwargs)
         return func
 
     def get_css(self, user):
-        if user not in self.user_data:
-            try:
-                user_data = self.database.get_user_data(user)
-            except:
-                user_data = {}
-            if user_data:
-                self.user_data[user] = user_data
-            else:
-                self.user_data[user] = {}
-        if "css" in self.user_data[user]:
-            if not self.user_data[user]["css"]:
-                self.user_data[user]["css"] = "Web_Mainz.css"
-        else:
-            self.user_data[user]["css"] = "Web_Mainz.css"
-        return self.user_data[user]["css"]
+        return self.get_user_data(user)["css"]
 
     def default_settings(self):
         """
@@ -239,17 +408,65 @@ class GPrimeApp(Application):
         """
         Given an image handle, return the full path/filename.
         """
-        media = self.database.get_media_from_handle(identifier)
-        return get_image_path_from_media(self.database, media)
+        database = self.get_database()
+        media = database.get_media_from_handle(identifier)
+        return get_image_path_from_media(database, media)
 
     def get_object_from_url(self, prefix):
         if prefix.count("/") == 1:
             view, handle = prefix.split("/", 1)
         elif prefix.count("/") > 1:
             view, handle, extra = prefix.split("/", 2)
-        obj = self.database.get_table_func(view.title(), "handle_func")(handle)
+        obj = self.get_database().get_table_func(view.title(), "handle_func")(handle)
         return obj
 
+    def start(self, sockets=None):
+        """
+        Start serving on the given (shared, pre-forked) sockets, or on
+        the port of the options.
+        """
+        import tornado.httpserver
+        self.io_loop = tornado.ioloop.IOLoop.current()
+        if sockets:
+            server = tornado.httpserver.HTTPServer(self)
+            server.add_sockets(sockets)
+        else:
+            self.listen(self.options.port)
+        if self.bus:
+            self.bus.start()
+        if self.tiler:
+            # images added by other processes send no signals:
+            self.scan_images()
+            tornado.ioloop.PeriodicCallback(self.scan_images, 60000).start()
+        if self.task_id is not None:
+            self.parent_pid = os.getppid()
+            tornado.ioloop.PeriodicCallback(self._check_parent, 5000).start()
+
+    def _check_parent(self):
+        """
+        Stop a worker process whose parent is gone.
+        """
+        if os.getppid() != self.parent_pid:
+            tornado.log.logging.critical("server process is gone, stopping")
+            self.io_loop.stop()
+
+    def stop(self):
+        """
+        Stop the workers, and close the database.
+        """
+        self.jobs.shutdown()
+        if self.tiler:
+            self.tiler.shutdown()
+        self.image_cache.close()
+        if self.executor:
+            self.executor.shutdown()
+        if self.bus:
+            self.bus.close()
+        if self.database:
+            tornado.log.logging.info("gPrime closing database...")
+            # only one worker saves the metadata:
+            self.database.close(update=not self.task_id)
+
     def server_info(self):
         """
         Return the server url information
@@ -261,7 +478,10 @@ class GPrimeApp(Application):
         print(self.server_info())
 
     def init_signal(self):
-        if not sys.platform.startswith('win') and sys.stdin.isatty():
+        if self.task_id is not None:
+            # a worker process; ^C stops all workers at once
+            signal.signal(signal.SIGINT, self._signal_stop)
+        elif not sys.platform.startswith('win') and sys.stdin.isatty():
             signal.signal(signal.SIGINT, self._handle_sigint)
         signal.signal(signal.SIGTERM, self._signal_stop)
         if hasattr(signal, 'SIGUSR1'):
@@ -363,10 +583,42 @@ def main():
            help="Import a file", type=str)
     define("import-media", default=True,
            help="Attempt to import associated media with --import-file", type=bool)
+    define("export-file", default=None,
+           help="Export to a file; the format is given by the extension", type=str)
+    define("since", default=None,
+           help="With --export-file, only export the changes since this time (in seconds, the 'until' of the previous delta)", type=int)
+    define("resume", default=False,
+           help="Resume an interrupted --import-file from its last checkpoint", type=bool)
+    define("job-workers", default=2,
+           help="Number of worker processes for reports, imports and exports", type=int)
+    define("workers", default=1,
+           help="Number of server processes, sharing the port", type=int)
+    define("request-workers", default=4,
+           help="Number of worker threads (each with a database connection) for requests; 0 runs them on the server loop", type=int)
+    define("image-workers", default=2,
+           help="Number of worker processes for image processing", type=int)
+    define("tile-workers", default=1,
+           help="Number of worker processes that make the tiles of images as they are added; 0 for none", type=int)
+    define("image-cache-size", default=10240,
+           help="Size of the cache of resized images, in megabytes; the least recently used are removed beyond it; 0 for no limit", type=int)
+    define("image-cache-memory", default=64,
+           help="Size of the small cached images (such as thumbnails) kept in memory, in megabytes", type=int)
+    define("accel-redirect", default="",
+           help="Behind nginx, the internal URL prefix of the site folder; nginx then sends its files (such as images and downloads)", type=str)
+    define("x-sendfile", default=False,
+           help="Behind Apache or lighttpd with X-Sendfile, let the server send files (such as images and downloads)", type=bool)
+    define("request-timeout", default=60,
+           help="Time limit of a request, in seconds; 0 for none", type=int)
+    define("fragment-cache-size", default=5000,
+           help="Number of rendered page fragments (such as the tables of a person page) to cache; 0 for none", type=int)
+    define("home-records", default=0,
+           help="Number of ranks of each record (as in the Records report) on the home page; 0 for none", type=int)
     define("open-browser", default=True,
            help="Open default web browser", type=bool)
     define("prefix", default="",
            help="Site URL prefix", type=str)
+    define("profile-startup", default=False,
+           help="Print the time taken by each phase of the startup, and by the slowest imports", type=bool)
     define("version", default=False,
            help="Show the version of gprime (%s)" % VERSION, type=bool)
     # Let's go!
@@ -405,6 +657,7 @@ def main():
     gprime.const.set_site_dir(options.site_dir) ## when we don't have options
     from gprime.dbstate import DbState
     from gprime.cli.user import User
+    startup.mark("options")
     ### Handle site options:
     database_dir = os.path.join(options.site_dir, "database")
     users_dir = os.path.join(options.site_dir, "users")
@@ -426,7 +679,9 @@ def main():
                     os.path.join(media_dir, "image-missing.png"))
     ## Open the database:
     database = DbState().open_database(database_dir)
+    startup.mark("database")
     if options.add_user:
+        from passlib.hash import sha256_crypt as crypt
         if options.password:
             plaintext = options.password
         else:
@@ -444,6 +699,7 @@ def main():
         options.server = False
         database.remove_user(username=options.remove_user)
     if options.change_password:
+        from passlib.hash import sha256_crypt as crypt
         if options.password:
             plaintext = options.password
         else:
@@ -456,40 +712,34 @@ def main():
         options.server = False
         user = User()
         options.import_file = os.path.expanduser(options.import_file)
-        import_file(database, options.import_file, user)
+        from .forms.actionform import import_file
+        import_file(database, options.import_file, user,
+                    resume=options.resume)
         # copy images to media subdirectory
         if options.import_media:
             media_dir = os.path.join(options.site_dir, "media")
-            media_copies = set()
-            with DbTxn("gPrime initial import", database) as transaction:
-                for media in database.iter_media():
-                    if media.path == "image-missing.png":
-                        continue # already there
-                    src = get_image_path_from_media(database, media)
-                    relative = make_path_relative(media.path)
-                    dst = os.path.join(media_dir, relative)
-                    if not os.path.exists(src):
-                        # try where import-file was
-                        src = os.path.join(os.path.dirname(options.import_file),
-                                           relative)
-                    if os.path.exists(src):
-                        os.makedirs(os.path.dirname(dst), exist_ok=True)
-                        if dst not in media_copies:
-                            shutil.copy(src, dst)
-                            tornado.log.logging.info("Media copied to `%s`" % dst)
-                            media_copies.add(dst)
-                        media.path = relative
-                        database.commit_media(media, transaction)
-                    else:
-                        tornado.log.logging.warning("Media file not found: `%s`" % media.path)
-                database.set_mediapath(os.path.abspath(media_dir)) # relative or absolute
+            # try where import-file was, for files that are not found:
+            stored, missing = ingest_media(
+                database, media_dir,
+                [os.path.dirname(os.path.abspath(options.import_file))])
+            tornado.log.logging.info("%s media files stored, %s missing",
+                                     stored, missing)
+    if options.export_file:
+        options.server = False
+        from .forms.actionform import export_file
+        export_file(database, os.path.expanduser(options.export_file),
+                    User(), since=options.since)
     # Start server up, or exit:
     if not options.server:
         database.close()
+        startup.mark("command-line actions")
+        startup.report()
         return
     ############################ Starting server:
     media_dir = os.path.join(options.site_dir, "media")
     database.set_mediapath(os.path.abspath(media_dir)) # relative or absolute
+    # Don't keep the write lock, so that the workers' connections can write:
+    database.transaction_backend_commit()
     define("database", default="Untitled Family Tree", type=str)
     options.database = database.get_dbname()
     tornado.log.logging.info("gPrime starting...")
@@ -503,17 +753,47 @@ def main():
                 template_filename = os.path.join(dirpath, filename)
                 tornado.log.logging.info("   watching: " + os.path.relpath(template_filename))
                 tornado.autoreload.watch(template_filename)
-    app = GPrimeApp(options, database)
-    app.listen(options.port)
+    task_id = None
+    bus_dir = None
+    sockets = None
+    cookie_secret = base64.b64encode(uuid.uuid4().bytes + uuid.uuid4().bytes)
+    if options.workers > 1 and options.debug:
+        tornado.log.logging.warning("Ignoring --workers in debug mode...")
+        options.workers = 1
+    if options.workers > 1:
+        import tornado.netutil
+        import tornado.process
+        sockets = tornado.netutil.bind_sockets(options.port)
+        bus_dir = tempfile.mkdtemp(prefix="gprime-")
+        # Each worker opens its own connection:
+        database.close()
+        # (the workers set their own handlers in init_signal)
+        signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+        try:
+            task_id = tornado.process.fork_processes(options.workers)
+        except KeyboardInterrupt:
+            tornado.log.logging.info("gPrime received interrupt...")
+            return
+        finally:
+            if task_id is None: # the parent process
+                shutil.rmtree(bus_dir, ignore_errors=True)
+        database = DbState().open_database(database_dir)
+    app = GPrimeApp(options, database, task_id=task_id, bus_dir=bus_dir,
+                    cookie_secret=cookie_secret)
+    startup.mark("application")
+    app.start(sockets)
+    startup.mark("server")
+    if not task_id:
+        startup.report()
     tornado.log.logging.info("Starting with the folowing settings:")
     tornado.log.logging.info("    DATA_DIR = " + gprime.const.DATA_DIR)
     tornado.log.logging.info("    serving  = http://%s:%s%s" % (options.hostname, options.port, options.prefix))
     for key in ["port", "site_dir", "hostname", "sitename",
-                "debug", "xsrf", "config_file"]:
+                "debug", "xsrf", "config_file", "workers"]:
         tornado.log.logging.info("    " + key + " = " + repr(getattr(options, key)))
     tornado.log.logging.info("Control+C twice to stop server. Running...")
     # Open up a browser window:
-    if options.open_browser:
+    if options.open_browser and not task_id:
         try:
             browser = webbrowser.get(None)
         except webbrowser.Error as e:
@@ -537,6 +817,4 @@ def main():
     except KeyboardInterrupt:
         tornado.log.logging.info("gPrime received interrupt...")
     tornado.log.logging.info("gPrime shutting down...")
-    if app.database:
-        tornado.log.logging.info("gPrime closing database...")
-        app.database.close()
+    app.stop()
@@ -0,0 +1,124 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Change notifications between the worker processes of a server.
+
+Each worker binds a Unix datagram socket in a directory shared by all
+workers, and publishes a message by sending it to every other socket
+in that directory. There is no broker: a worker that goes away simply
+stops receiving, and its socket is removed by the next publisher.
+"""
+
+## Python imports
+import os
+import glob
+import json
+import socket
+import logging
+
+import tornado.ioloop
+
+LOG = logging.getLogger(".changebus")
+
+class ChangeBus(object):
+    """
+    Publish/subscribe of small JSON messages between processes.
+
+    :param directory: the folder shared by all processes of the bus
+    :param name: the name of this process on the bus, unique within it
+    """
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.path = os.path.join(directory, "%s.sock" % name)
+        self.callbacks = []
+        self.socket = None
+        self.io_loop = None
+
+    def start(self):
+        """
+        Bind the socket of this process, and start receiving messages
+        on the current IOLoop.
+        """
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.socket.bind(self.path)
+        self.socket.setblocking(False)
+        self.io_loop = tornado.ioloop.IOLoop.current()
+        self.io_loop.add_handler(self.socket.fileno(), self._receive,
+                                 tornado.ioloop.IOLoop.READ)
+
+    def subscribe(self, callback):
+        """
+        Call callback(message) for each message from another process.
+        """
+        self.callbacks.append(callback)
+
+    def publish(self, message):
+        """
+        Send a message (a JSON-serializable dictionary) to all other
+        processes.
+        """
+        data = json.dumps(message).encode("utf-8")
+        for path in glob.glob(os.path.join(self.directory, "*.sock")):
+            if path == self.path:
+                continue
+            try:
+                self.socket.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The process is gone:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except OSError as exc:
+                LOG.warning("Change not sent to %s: %s", path, exc)
+
+    def _receive(self, fd, events):
+        while True:
+            try:
+                data = self.socket.recv(1 << 20)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data.decode("utf-8"))
+            except ValueError:
+                LOG.warning("Invalid change message: %r", data[:100])
+                continue
+            for callback in self.callbacks:
+                try:
+                    callback(message)
+                except Exception:
+                    LOG.error("Error handling change message", exc_info=True)
+
+    def close(self):
+        """
+        Stop receiving, and remove the socket of this process.
+        """
+        if self.socket is None:
+            return
+        self.io_loop.remove_handler(self.socket.fileno())
+        self.socket.close()
+        self.socket = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -131,6 +131,7 @@ class DictionaryDb(DbGeneric):
         Executed after a batch operation.
         """
         self.transaction = None
+        self.stamp_change()
         msg = txn.get_description()
         #self.undodb.commit(txn, msg)
         self._after_commit(txn)
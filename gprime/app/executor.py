@@ -0,0 +1,203 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Executors for the blocking work of requests.
+
+Database queries and page rendering run in a bounded pool of worker
+threads, each with its own connection to the family tree database, and
+image processing runs in a pool of worker processes. The IOLoop thread
+only parses requests and writes responses, so that one slow request
+does not hold up the others.
+"""
+
+## Python imports
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+LOG = logging.getLogger(".executor")
+
+class RequestTimeout(Exception):
+    """
+    Raised when a request takes longer than its time limit.
+    """
+
+class Request(object):
+    """
+    The state of one piece of work given to the executor.
+    """
+    def __init__(self):
+        self.cancelled = False
+        self.database = None # set while running
+
+class RequestExecutor(object):
+    """
+    Runs request work off the IOLoop, with a time limit. Work that
+    times out, or whose awaiting task is cancelled (for example, when
+    the client disconnects), is skipped if it has not started, and its
+    database query is interrupted if it has.
+
+    :param database_dir: the family tree, opened once per worker thread
+    :param workers: number of worker threads (and database connections)
+    :param image_workers: number of worker processes for images; if 0,
+        images are processed in the worker threads
+    :param timeout: default time limit of a request, in seconds (0 for
+        none)
+    :param on_open: called with each database connection opened
+    """
+    def __init__(self, database_dir, workers=4, image_workers=2, timeout=60,
+                 on_open=None):
+        self.database_dir = database_dir
+        self.on_open = on_open
+        self.workers = workers
+        self.timeout = timeout
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="gprime-request")
+        self.image_executor = (ProcessPoolExecutor(max_workers=image_workers)
+                               if image_workers else None)
+
+    def get_database(self):
+        """
+        Return the database connection of the current worker thread, or
+        None if this is not a worker thread.
+        """
+        return getattr(self.local, "database", None)
+
+    def open_database(self):
+        """
+        Open the database connection of the current worker thread.
+        """
+        from gprime.dbstate import DbState
+        database = DbState().open_database(self.database_dir)
+        self.local.database = database
+        if self.on_open:
+            self.on_open(database)
+        return database
+
+    def close_database(self, barrier):
+        """
+        Close the database connection of the current worker thread. The
+        barrier makes each worker thread run this once.
+        """
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        database = self.get_database()
+        if database is not None:
+            self.local.database = None
+            database.close(update=False)
+
+    def _call(self, request, function, args, kwargs):
+        if request.cancelled:
+            return None
+        database = self.get_database() or self.open_database()
+        request.database = database
+        try:
+            return function(database, *args, **kwargs)
+        finally:
+            request.database = None
+
+    async def run(self, function, *args, timeout=None, **kwargs):
+        """
+        Run function(database, *args, **kwargs) in a worker thread, with
+        the thread's database connection, and return its result.
+
+        Raises RequestTimeout if it takes longer than timeout seconds
+        (default: the executor's timeout).
+        """
+        request = Request()
+        future = self.executor.submit(self._call, request, function,
+                                      args, kwargs)
+        return await self._wait(request, future, timeout)
+
+    async def run_process(self, function, *args, timeout=None):
+        """
+        Run function(*args) in a worker process, and return its result.
+        The function, its arguments and its result must be picklable.
+        """
+        if self.image_executor is None:
+            future = self.executor.submit(function, *args)
+        else:
+            future = self.image_executor.submit(function, *args)
+        return await self._wait(None, future, timeout)
+
+    async def _wait(self, request, future, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.wrap_future(future)
+        try:
+            done, pending = await asyncio.wait([future],
+                                               timeout=timeout or None)
+        except asyncio.CancelledError:
+            self.interrupt(request)
+            future.add_done_callback(self.discard)
+            raise
+        if pending:
+            self.interrupt(request)
+            future.add_done_callback(self.discard)
+            raise RequestTimeout("Request took longer than %s seconds" %
+                                 timeout)
+        return future.result()
+
+    @staticmethod
+    def discard(future):
+        """
+        Retrieve the result of abandoned work, so that its errors (such
+        as an interrupted query) are not reported.
+        """
+        if not future.cancelled():
+            future.exception()
+
+    def interrupt(self, request):
+        """
+        Stop the work of a request: if it has not started yet, it will
+        be skipped; if it is running a database query, the query is
+        interrupted.
+        """
+        if request is None:
+            return
+        request.cancelled = True
+        database = request.database
+        if database is not None:
+            interrupt = getattr(getattr(database, "dbapi", None),
+                                "interrupt", None)
+            if interrupt:
+                LOG.info("Interrupting database query")
+                interrupt()
+
+    def shutdown(self):
+        """
+        Close the database connections of the workers, and stop them.
+        """
+        # Connections can only be closed by the thread that opened them:
+        barrier = threading.Barrier(self.workers, timeout=5)
+        futures = [self.executor.submit(self.close_database, barrier)
+                   for i in range(self.workers)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                LOG.warning("Error closing database", exc_info=True)
+        self.executor.shutdown(wait=True)
+        if self.image_executor:
+            self.image_executor.shutdown(wait=False)
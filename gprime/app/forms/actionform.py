@@ -21,6 +21,7 @@
 # Python imports:
 import time
 import os
+import inspect
 
 # Gramps Connect imports:
 from .forms import Form, Column, Row
@@ -29,6 +30,8 @@ from .forms import Form, Column, Row
 from gprime.cli.plug import BasePluginManager, run_report
 from ..dictionarydb import DictionaryDb
 from gprime.cli.user import User
+from gprime.const import LOCALE as glocale
+_ = glocale.translation.gettext
 
 # Classes:
 class Action(object):
@@ -219,64 +222,46 @@ class ActionForm(Form):
         return action.name
 
     def run_action(self, action, handler):
+        """
+        Queue the action as a background job, and send the user to
+        the job's status page.
+        """
         options, options_help = self.get_plugin_options(action.handle)
         args = {}
         for key, default_value in options.items():
             args[key] = handler.get_argument(key)
-        if action.ptype == "Report":
-            output_file = "/tmp/%s.pdf" % action.name
-            clr = run_report(self.gramps_database,
-                             action.handle,
-                             username=self.handler.current_user,
-                             of=output_file,
-                             off="pdf", **args)
-            # can check for results with clr
-            if clr:
-                download_to_user(output_file, self.handler)
-            else:
-                handler.send_message("Error in report")
-                handler.redirect(self.handler.app.make_url("/action"))
-        elif action.ptype == "Import":
-            filename = upload(args["i"], "/tmp/%s-%s-%s.%s" % (str(profile.user.username),
-                                                                 str(handle),
-                                                                 timestamp(),
-                                                                 args["iff"]))
-            if filename is not None:
-                result = import_file(self.gramps_database, filename, User()) # callback
-                if result:
-                    handler.redirect(self.handler.app.make_url("/action"))
-                else:
-                    handler.send_message("Error in import")
-                    handler.redirect(self.handler.app.make_url("/action"))
-        elif action.ptype == "Export":
+        if action.ptype == "Export":
             pmgr = BasePluginManager.get_instance()
             pdata = pmgr.get_plugin(action.handle)
-            output_file = "/tmp/export." + pdata.extension
-            result = export_file(self.gramps_database, output_file, User()) # callback
-            if result:
-                download_to_user(output_file, self.handler)
-            else:
-                handler.send_message("Error in export")
-                handler.redirect(self.handler.app.make_url("/action"))
+            args["extension"] = pdata.extension
+        elif action.ptype not in ["Report", "Import"]:
+            handler.send_message("Unsupported action: %s" % action.ptype)
+            handler.redirect(self.handler.app.make_url("/action"))
+            return
+        job_id = handler.app.jobs.submit(self.handler.current_user,
+                                         action.ptype,
+                                         action.name,
+                                         action.handle,
+                                         args)
+        handler.redirect(self.handler.app.make_url("/job/%s" % job_id))
 
 def download_to_user(file_name, header, content_type='application/octet-stream'):
-    buf_size = 4096
-    header.set_header('Content-Type', content_type)
-    header.set_header('Content-Disposition', 'attachment; filename=' + os.path.basename(file_name))
-    with open(file_name, 'rb') as f:
-        while True:
-            data = f.read(buf_size)
-            if not data:
-                break
-            header.write(data)
-    header.finish()
+    """
+    Send a file as a download, from a request method of handler header
+    (see BaseHandler.send_file_response).
+    """
+    header.send_file_response(file_name, content_type,
+                              download_name=os.path.basename(file_name))
 
 ## Copied from django-webapp; need to integrate:
 
-def import_file(db, filename, user):
+def import_file(db, filename, user, resume=False):
     """
     Import a file (such as a GEDCOM file) into the given db.
 
+    If resume is True, an interrupted import of the same file continues
+    from its last checkpoint, if the importer supports checkpoints.
+
     >>> import_file(DbDjango(), "/home/user/Untitled_1.ged", User())
     """
     from gprime.dbstate import DbState
@@ -299,6 +284,14 @@ def import_file(db, filename, user):
                     print("ERROR:", name, exception)
                 return False
             import_function = getattr(mod, pdata.import_function)
+            if resume:
+                # Importers without checkpoints commit nothing before they
+                # complete, so they simply start again:
+                if "resume" in inspect.signature(import_function).parameters:
+                    return import_function(db, filename, user, resume=True)
+                user.warn(_("Cannot resume import"),
+                          _("The %s importer does not support checkpoints; "
+                            "importing from the start") % pdata.name)
             retval = import_function(db, filename, user)
             return retval
     return False
@@ -328,10 +321,13 @@ def upload(url, filename=None):
         r.close()
     return success
 
-def export_file(db, filename, user):
+def export_file(db, filename, user, since=None):
     """
     Export the db to a file (such as a GEDCOM file).
 
+    If since (a time in seconds) is given, export only the changes made
+    since then; this is supported by the JSON and Gramps XML exporters.
+
     >>> export_file(DbDjango(), "/home/user/Untitled_1.ged", User())
     """
     from gprime.dbstate import DbState
@@ -353,6 +349,14 @@ def export_file(db, filename, user):
                     print("ERROR:", name, exception)
                 return False
             export_function = getattr(mod, pdata.export_function)
+            if since is not None:
+                if "since" not in inspect.signature(export_function).parameters:
+                    user.notify_error(_("Cannot export changes"),
+                                      _("The %s exporter can only export the "
+                                        "whole family tree") % pdata.name)
+                    return False
+                export_function(db, filename, user, since=since)
+                return True
             export_function(db, filename, user)
             return True
     return False
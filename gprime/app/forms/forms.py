@@ -30,6 +30,8 @@ from gprime.display.name import NameDisplay
 from gprime.datehandler import displayer, parser
 from gprime.simple import SimpleAccess
 from gprime.utils.id import create_id
+from gprime.db import fulltext
+from gprime.db import phonetic
 
 nd = NameDisplay().display
 dd = displayer.display
@@ -171,6 +173,10 @@ class Form(object):
         elif "&" in search_pair:  # second level and
             search_pairs = [s.strip() for s in search_pair.split("&")]
             return ["AND", [self.parse_where(pair) for pair in search_pairs]]
+        elif search_pair.startswith("~"): # full-text
+            if self.table not in fulltext.FULLTEXT_TABLES:
+                raise Exception(self._("Full-text search is not available here"))
+            return ("text", "MATCH", search_pair[1:].strip())
         elif "!=" in search_pair:
             field, term = [s.strip() for s in search_pair.split("!=", 1)]
             if "%" in term:
@@ -183,6 +189,12 @@ class Form(object):
                 return self.expand_fields(field, "LIKE", term)
             else:
                 return self.expand_fields(field, "=", term)
+        elif "~" in search_pair: # name variants
+            field, term = [s.strip() for s in search_pair.split("~", 1)]
+            field = self.search_terms.get(field, field)
+            if self.table != "Person" or field not in phonetic.FIELDS:
+                raise Exception(self._("Variants can only be searched for in surname and given"))
+            return ["OR", [(field, "SOUNDS", term), (field, "SIMILAR", term)]]
         else: # search all defaults, OR
             or_where = []
             for field in self.default_search_fields:
@@ -290,6 +302,8 @@ class Form(object):
         queryset = self.database.get_queryset_by_table_name(self.table)
         queryset.limit(start=self.page * self.page_size, count=self.page_size)
         queryset.order_by = self.order_by
+        if fulltext.find_match(self.where): # best matches first
+            queryset.order_by = [("rank", "ASC")] + self.order_by
         queryset.where_by = self.where
         class Result(list):
             time = 0
@@ -652,8 +666,9 @@ class Form(object):
         """
         Used for revent_ref_index lookups.
         """
-        if 0 <= index < len(env["event_ref_list"]):
-            event_ref = env["event_ref_list"][index]
+        event_ref_list = env.get("event_ref_list", [])
+        if 0 <= index < len(event_ref_list):
+            event_ref = event_ref_list[index]
             if event_ref.ref:
                 event = self.database.get_event_from_handle(event_ref.ref)
                 if event:
@@ -690,13 +705,13 @@ class Form(object):
     def make_icon_button(self, text, link, **kwargs):
         if "icon" in kwargs:
             if kwargs["icon"] == "+":
-                img_src = self.handler.app.make_url("/images/add.png")
+                img_src = self.handler.app.static_url("/images/add.png")
             elif kwargs["icon"] == "?":
-                img_src = self.handler.app.make_url("/images/text-editor.png")
+                img_src = self.handler.app.static_url("/images/text-editor.png")
             elif kwargs["icon"] == "-":
-                img_src = self.handler.app.make_url("/images/gtk-remove.png")
+                img_src = self.handler.app.static_url("/images/gtk-remove.png")
             elif kwargs["icon"] == "p": # pick
-                img_src = self.handler.app.make_url("/images/stock_index_24.png")
+                img_src = self.handler.app.static_url("/images/stock_index_24.png")
             else:
                 raise Exception("invalid icon: %s" % kwargs["icon"])
             return ("""<img height="22" width="22" alt="%(text)s" title="%(text)s"
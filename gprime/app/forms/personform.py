@@ -22,6 +22,7 @@
 from gprime.lib.person import Person
 from gprime.display.name import NameDisplay
 from gprime.db import DbTxn
+from gprime.db import phonetic
 
 # Gramps Connect imports:
 from .forms import Form
@@ -71,8 +72,8 @@ class PersonForm(Form):
         "given": "given",
         "id": "gid",
         "gender": "gender",
-        "birth": "birth",
-        "death": "death",
+        "birth": "birth_date",
+        "death": "death_date",
     }
 
     order_by = [("surname", "ASC"), ("given", "ASC")]
@@ -83,16 +84,35 @@ class PersonForm(Form):
         ("primary_name.first_name", 20),
         ("gid", 10),
         ("gender", 10),
-        ("birth_ref_index", 15),
-        ("death_ref_index", 15),
+        ("birth_date", 15),
+        ("death_date", 15),
     ]
 
     # Other fields needed to select:
     env_fields = [
         "handle",
-        "event_ref_list",
     ]
 
+    def parse_where(self, search_pair):
+        """
+        Adds the search "duplicate=I0001", for the person I0001 and the
+        people who may be the same person, and "duplicate=%", for all
+        the people who may have a duplicate (see
+        DbReadBase.get_duplicate_candidates).
+        """
+        field, equals, term = search_pair.partition("=")
+        if (equals and field.strip() == "duplicate" and
+                not any(c in search_pair for c in "|,^&")):
+            term = term.strip()
+            if term == "%":
+                handle = None
+            elif self.database.has_gid_for_person(term):
+                handle = self.database.get_person_from_gid(term).handle
+            else:
+                raise Exception(self._("No person with ID %s") % term)
+            return ("handle", phonetic.DUPLICATE, handle)
+        return super().parse_where(search_pair)
+
     def delete(self):
         person_handle = self.instance.handle
         with DbTxn(self._("Delete person"), self.database) as transaction:
@@ -18,8 +18,6 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 #
 
-from passlib.hash import sha256_crypt as crypt
-
 class SettingsForm():
     """
     A form for listing, viewing, and editing user settings.
@@ -38,6 +36,7 @@ class SettingsForm():
         for field in ["css", "language", "email", "name"]:
             update[field] = self.handler.get_argument(field)
         if self.handler.get_argument("password") and self.handler.current_user != "demo":
+            from passlib.hash import sha256_crypt as crypt
             update["password"] = crypt.hash(self.handler.get_argument("password"))
         self.database.update_user_data(self.handler.current_user, update)
         self.handler.app.clear_user_data(self.handler.current_user)
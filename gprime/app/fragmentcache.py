@@ -0,0 +1,164 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of rendered HTML fragments, such as the tables of a person page.
+
+A fragment is recorded with the handles of all of the objects that were
+read to render it, and is dropped when any of those objects changes.
+Fragments that read whole tables, or the back references of an object,
+depend on every object, and are dropped on any change.
+
+Changes made by other processes, such as job workers, imports and the
+command line, send no signals to this one; so each fragment also keeps
+the change stamp of the database it was rendered from, and is not used
+once the stamp has moved on (see DbGeneric.get_change_stamp).
+"""
+
+## Python imports
+import threading
+
+## gPrime imports
+from gprime.utils.lru import LRU
+
+EVERYTHING = "*" # the dependency of fragments that depend on all objects
+
+class DependencyRecorder(object):
+    """
+    Wraps a database, and records the handles of the objects read
+    through it.
+    """
+    def __init__(self, database):
+        self.database = database
+        self.handles = set()
+
+    def _record(self, function, position):
+        def wrapper(*args, **kwargs):
+            if len(args) > position:
+                self.handles.add(args[position])
+            return function(*args, **kwargs)
+        return wrapper
+
+    def get_table_func(self, table, func):
+        function = self.database.get_table_func(table, func)
+        if func == "handle_func":
+            return self._record(function, 0)
+        return function
+
+    def __getattr__(self, name):
+        attr = getattr(self.database, name)
+        if name.endswith("_from_handle"):
+            return self._record(attr, 0)
+        elif name == "get_from_name_and_handle":
+            return self._record(attr, 1)
+        elif (name.startswith(("find_backlink", "iter_", "get_number_of")) or
+              name.endswith("_cursor")):
+            self.handles.add(EVERYTHING)
+        return attr
+
+class FragmentCache(object):
+    """
+    A least-recently-used cache of fragments, with the handles each
+    depends on. Safe to use from several threads.
+
+    :param size: the maximum number of fragments kept
+    """
+    def __init__(self, size=5000):
+        self.size = size
+        self.lock = threading.Lock()
+        # key -> (html, handles, change stamp)
+        self.fragments = LRU(size, self._evicted)
+        self.dependents = {} # handle -> set of keys
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, stamp):
+        """
+        Return the fragment of key, or None if it is not cached, or was
+        rendered before the database change stamp.
+        """
+        with self.lock:
+            entry = self.fragments[key] if key in self.fragments else None
+            if entry is None or entry[2] != stamp:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.fragments[key] = entry # make it the most recently used
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, html, handles, stamp):
+        """
+        Cache a fragment, which depends on the given handles, rendered
+        at the given database change stamp.
+        """
+        if self.size <= 1:
+            return
+        with self.lock:
+            self._remove(key)
+            self.fragments[key] = (html, frozenset(handles), stamp)
+            for handle in handles:
+                self.dependents.setdefault(handle, set()).add(key)
+
+    def _evicted(self, key, entry):
+        self._forget(key, entry[1])
+
+    def _remove(self, key):
+        if key in self.fragments:
+            handles = self.fragments[key][1]
+            del self.fragments[key]
+            self._forget(key, handles)
+
+    def _forget(self, key, handles):
+        for handle in handles:
+            keys = self.dependents.get(handle)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.dependents[handle]
+
+    def invalidate(self, handles=None):
+        """
+        Drop the fragments that depend on any of the handles, or all
+        fragments if handles is None.
+        """
+        with self.lock:
+            if handles is None:
+                self.fragments.clear()
+                self.dependents.clear()
+                return
+            keys = set(self.dependents.get(EVERYTHING, ()))
+            for handle in handles:
+                keys.update(self.dependents.get(handle, ()))
+            for key in keys:
+                self._remove(key)
+
+    def database_changed(self, signal, handles):
+        """
+        Change callback of the app (see GPrimeApp.on_change).
+        """
+        if signal.startswith("user-"):
+            return
+        self.invalidate(handles)
+
+    def get_stats(self):
+        with self.lock:
+            return {"size": len(self.fragments.data), "max_size": self.size,
+                    "hits": self.hits, "misses": self.misses}
@@ -24,6 +24,8 @@ from .familyhandler import FamilyHandler
 from .imagehandler import ImageHandler
 from .jsonhandler import JsonHandler
 from .actionhandler import ActionHandler
+from .jobhandler import JobHandler
+from .adminhandler import AdminHandler
 from .notehandler import NoteHandler
 from .citationhandler import CitationHandler
 from .eventhandler import EventHandler
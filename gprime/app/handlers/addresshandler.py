@@ -20,11 +20,12 @@
 
 import tornado.web
 
-from .handlers import BaseHandler
+from .handlers import BaseHandler, run_in_executor
 from ..forms import AddressForm
 
 class AddressHandler(BaseHandler):
     @tornado.web.authenticated
+    @run_in_executor
     def get(self, prefix="", suffix=""):
         """
         prefix = 'person/b2cfa6ca14d1f274465'
@@ -53,6 +54,7 @@ class AddressHandler(BaseHandler):
         return
 
     @tornado.web.authenticated
+    @run_in_executor
     def post(self, prefix="", suffix=""):
         """
         prefix = 'person/b2cfa6ca14d1f274465'
@@ -0,0 +1,54 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import os
+import tornado.web
+import simplejson
+
+from .handlers import BaseHandler, run_in_executor
+
+class AdminHandler(BaseHandler):
+    """
+    Status of the server, for admin users.
+    """
+    @tornado.web.authenticated
+    @run_in_executor
+    def get(self, path=""):
+        """
+        admin/cache             - json statistics of the caches of this
+                                  server process
+        """
+        if not self.app.get_user_data(self.current_user).get("admin"):
+            self.clear()
+            self.set_status(403)
+            self.finish("<html><body>Not an admin user</body></html>")
+            return
+        if path == "cache":
+            stats = {"pid": os.getpid(),
+                     "image_cache": self.app.image_cache.get_stats(),
+                     "fragment_cache": None}
+            if self.app.fragments:
+                stats["fragment_cache"] = self.app.fragments.get_stats()
+            self.set_header('Content-Type', 'application/json')
+            self.write(simplejson.dumps(stats))
+        else:
+            self.clear()
+            self.set_status(404)
+            self.finish("<html><body>No such page</body></html>")
@@ -25,11 +25,12 @@ import tornado.web
 import json
 import html
 
-from .handlers import BaseHandler
+from .handlers import BaseHandler, run_in_executor
 from ..forms import FamilyForm
 
 class FamilyHandler(BaseHandler):
     @tornado.web.authenticated
+    @run_in_executor
     def get(self, path=""):
         """
         HANDLE
@@ -56,6 +57,8 @@ class FamilyHandler(BaseHandler):
                     form.delete()
                     return
                 else:
+                    if handle != "add" and self.check_not_modified():
+                        return
                     self.render("family.html",
                                 **self.get_template_dict(tview=_("family detail"),
                                                          page=page,
@@ -84,6 +87,7 @@ class FamilyHandler(BaseHandler):
                 )
 
     @tornado.web.authenticated
+    @run_in_executor
     def post(self, path):
         _ = self.app.get_translate_func(self.current_user)
         page = int(self.get_argument("page", 1) or 1)
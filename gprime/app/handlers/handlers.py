@@ -19,18 +19,129 @@
 #
 
 import tornado.web
+import tornado.iostream
+import os
 import sys
 import logging
 import hmac
 import json
-from passlib.hash import sha256_crypt as crypt
+import asyncio
+import functools
+import threading
+import hashlib
+import datetime
+import math
+import time
+import email.utils
+import urllib.parse
 
 from gprime.utils.locale import Locale, _
 from gprime.const import VERSION
+from ..executor import RequestTimeout
+
+CHUNK_SIZE = 64 * 1024 # bytes of a file sent at a time
 
 template_functions = {}
-exec("from gprime.app.template_functions import *",
-     globals(), template_functions)
+
+def get_template_functions():
+    """
+    Return the names that the templates use (see template_functions.py).
+    They are imported when the first page is rendered, rather than at
+    startup.
+    """
+    if not template_functions:
+        functions = {}
+        exec("from gprime.app.template_functions import *",
+             globals(), functions)
+        template_functions.update(functions)
+    return template_functions
+
+def run_in_executor(method):
+    """
+    Decorator for the get/post methods of a BaseHandler, which runs the
+    (blocking) method in a worker thread of the app's executor, with the
+    worker's database connection as self.database. The response is
+    sent from the IOLoop when the method returns.
+
+    Use below @tornado.web.authenticated.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        executor = getattr(self.app, "executor", None)
+        if executor is None:
+            method(self, *args, **kwargs)
+            if self.file_pending and not self._finished:
+                await self.stream_file(*self.file_pending)
+            return
+        database = self.database
+        def call(worker_database):
+            self.worker_thread = threading.get_ident()
+            self.database = worker_database
+            return method(self, *args, **kwargs)
+        self.request_task = asyncio.ensure_future(executor.run(call))
+        try:
+            await self.request_task
+        except asyncio.CancelledError:
+            self.log.info("Request cancelled: %s", self.request.uri)
+            self.abandon()
+            return
+        except RequestTimeout:
+            self.abandon()
+            raise tornado.web.HTTPError(504, "Request took too long")
+        finally:
+            self.request_task = None
+            if not self.abandoned: # else it may still be running
+                self.worker_thread = None
+                self.database = database
+        if self.file_pending and not self._finished:
+            await self.stream_file(*self.file_pending)
+        elif self.finish_pending and not self._finished:
+            self.finish_pending = False
+            super(BaseHandler, self).finish()
+    return wrapper
+
+def worker_safe(method):
+    """
+    Wrap a RequestHandler method that changes the response, so that it
+    does nothing when called from the worker thread of a request that
+    was abandoned (see run_in_executor): the response is then the
+    IOLoop's, which may be sending it.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if threading.get_ident() != self.worker_thread:
+            return method(self, *args, **kwargs)
+        with self.response_lock:
+            if self.abandoned:
+                return None
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def parse_range(header, size):
+    """
+    Return the (start, end) of the bytes (end excluded) that a Range
+    header asks for, of a file of size bytes, or None for the whole
+    file (several ranges are not supported, and get the whole file).
+    Raises ValueError if the range cannot be satisfied.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, dash, last = ranges.strip().partition("-")
+    try:
+        first = int(first) if first else None
+        last = int(last) if last else None
+    except ValueError:
+        return None
+    if not dash or (first is None and last is None):
+        return None
+    if first is None: # the last bytes
+        if last == 0:
+            raise ValueError("empty range")
+        return (max(size - last, 0), size)
+    if first >= size or (last is not None and last < first):
+        raise ValueError("range not in file")
+    return (first, size if last is None else min(last + 1, size))
 
 class BaseHandler(tornado.web.RequestHandler):
     def __init__(self, *args, **kwargs):
@@ -38,12 +149,58 @@ class BaseHandler(tornado.web.RequestHandler):
         self.database = None
         self.sitename = None
         self.opts = None
+        self.worker_thread = None # thread running the request method
+        self.request_task = None
+        self.finish_pending = False
+        self.file_pending = None # (filename, status) to send, see send_file_response
+        self.abandoned = False
+        self.response_lock = threading.RLock()
         for name in ["database", "sitename", "opts", "app"]:
             if name in kwargs:
                 setattr(self, name, kwargs[name])
                 del kwargs[name]
         super().__init__(*args, **kwargs)
 
+    # The worker thread of an abandoned request leaves the response alone:
+    write = worker_safe(tornado.web.RequestHandler.write)
+    flush = worker_safe(tornado.web.RequestHandler.flush)
+    clear = worker_safe(tornado.web.RequestHandler.clear)
+    set_status = worker_safe(tornado.web.RequestHandler.set_status)
+    set_header = worker_safe(tornado.web.RequestHandler.set_header)
+    add_header = worker_safe(tornado.web.RequestHandler.add_header)
+    clear_header = worker_safe(tornado.web.RequestHandler.clear_header)
+    set_cookie = worker_safe(tornado.web.RequestHandler.set_cookie)
+    clear_cookie = worker_safe(tornado.web.RequestHandler.clear_cookie)
+
+    def abandon(self):
+        """
+        Give up on the worker thread of the request, which may still be
+        running: from now on, it cannot change the response.
+        """
+        with self.response_lock:
+            self.abandoned = True
+
+    def finish(self, chunk=None):
+        """
+        Finish the response. In a worker thread (see run_in_executor),
+        the response is only buffered; it is sent from the IOLoop.
+        """
+        if threading.get_ident() != self.worker_thread:
+            return super().finish(chunk)
+        with self.response_lock:
+            if not self.abandoned:
+                if chunk is not None:
+                    self.write(chunk)
+                self.finish_pending = True
+
+    def on_connection_close(self):
+        """
+        The client went away; stop working on its request.
+        """
+        if self.request_task and not self.request_task.done():
+            self.request_task.cancel()
+        super().on_connection_close()
+
     def get_template_namespace(self):
         ns = super(BaseHandler, self).get_template_namespace()
         ns['_T_'] = lambda *x: '"{0}"'.format(ns['_'](*x))
@@ -78,13 +235,157 @@ class BaseHandler(tornado.web.RequestHandler):
             "next": self.get_argument("next", None),
             "make_url": self.make_url
         }
-        dict.update(template_functions)
+        dict.update(get_template_functions())
         dict.update(kwargs)
         return dict
 
     def make_url(self, url):
         return self.app.make_url(url)
 
+    def static_url(self, url, include_host=None, **kwargs):
+        """
+        Return the URL of a static file, such as "/css/Web_Mainz.css",
+        with a fingerprint of its content (see GPrimeApp.static_url).
+        """
+        return self.app.static_url(url)
+
+    def check_not_modified(self):
+        """
+        For a GET of a page that depends only on the URL, the user's
+        settings and the database, set its ETag and Last-Modified headers
+        from the database's change stamp. If the client's copy is still
+        current, answer 304 Not Modified and return True; the caller then
+        has nothing else to do.
+        """
+        if self.get_cookie("gprime-messages"): # shown once, on this page
+            return False
+        count, changed = self.database.get_change_stamp()
+        user_data = self.app.get_user_data(self.current_user)
+        key = repr((count, self.request.uri, self.current_user,
+                    user_data["language"], user_data["css"], VERSION))
+        self.set_header("Etag", 'W/"%s"' %
+                        hashlib.sha1(key.encode("utf-8")).hexdigest())
+        self.set_header("Cache-Control", "private, no-cache")
+        # HTTP dates are in whole seconds: the change is dated the end of
+        # its second, and only once that second is over, so that a later
+        # change always has a later date.
+        modified = math.ceil(changed)
+        if changed and modified <= time.time():
+            self.set_header("Last-Modified", datetime.datetime.fromtimestamp(
+                modified, datetime.timezone.utc))
+        if "If-None-Match" in self.request.headers:
+            not_modified = self.check_etag_header()
+        else:
+            not_modified = False
+            since = self.request.headers.get("If-Modified-Since")
+            if since and changed:
+                try:
+                    since = email.utils.parsedate_to_datetime(since)
+                except (TypeError, ValueError):
+                    since = None
+                if since:
+                    since = since.replace(tzinfo=since.tzinfo or
+                                          datetime.timezone.utc)
+                    not_modified = since.timestamp() >= modified
+        if not_modified:
+            self.set_status(304)
+            self.finish()
+        return not_modified
+
+    def send_file_response(self, filename, content_type="application/octet-stream",
+                           download_name=None, status=200):
+        """
+        Answer with the content of a file, as a download named
+        download_name if given. The file is sent when the request method
+        returns (see run_in_executor), by stream_file.
+        """
+        self.set_header("Content-Type", content_type)
+        if download_name:
+            self.set_header("Content-Disposition",
+                            "attachment; filename*=UTF-8''%s" %
+                            urllib.parse.quote(download_name))
+        self.file_pending = (filename, status)
+
+    async def stream_file(self, filename, status=200):
+        """
+        Send a file, a chunk at a time so that memory use does not depend
+        on its size, answering Range requests with the part asked for.
+
+        Behind a reverse proxy, it can send the files of the site folder
+        itself: with --accel-redirect (nginx) or --x-sendfile (Apache,
+        lighttpd), only a header naming the file is sent.
+        """
+        self.file_pending = None
+        self.finish_pending = False
+        opts = self.opts
+        if status == 200 and opts is not None:
+            site_dir = os.path.join(os.path.abspath(opts.site_dir), "")
+            path = os.path.abspath(filename)
+            if opts.accel_redirect and path.startswith(site_dir):
+                self.set_header("X-Accel-Redirect", "%s/%s" % (
+                    opts.accel_redirect.rstrip("/"),
+                    urllib.parse.quote(path[len(site_dir):])))
+                return self.finish()
+            elif opts.x_sendfile:
+                self.set_header("X-Sendfile", path)
+                return self.finish()
+        try:
+            fp = open(filename, "rb")
+        except (IOError, OSError):
+            self.clear_header("Content-Disposition")
+            self.set_status(404)
+            return self.finish("<html><body>File not found</body></html>")
+        with fp:
+            stat = os.fstat(fp.fileno())
+            size = stat.st_size
+            modified = datetime.datetime.fromtimestamp(
+                int(stat.st_mtime), datetime.timezone.utc)
+            etag = '"%x-%x"' % (int(stat.st_mtime), size)
+            self.set_header("Accept-Ranges", "bytes")
+            self.set_header("Etag", etag)
+            self.set_header("Last-Modified", modified)
+            self.set_status(status)
+            (start, end) = (0, size)
+            header = self.request.headers.get("Range")
+            if_range = self.request.headers.get("If-Range")
+            if (status == 200 and header and
+                    if_range in [None, etag, email.utils.format_datetime(
+                        modified, usegmt=True)]):
+                try:
+                    (start, end) = parse_range(header, size) or (0, size)
+                except ValueError:
+                    self.clear_header("Content-Disposition")
+                    self.set_status(416)
+                    self.set_header("Content-Range", "bytes */%s" % size)
+                    return self.finish()
+                if (start, end) != (0, size):
+                    self.set_status(206)
+                    self.set_header("Content-Range", "bytes %s-%s/%s" %
+                                    (start, end - 1, size))
+            elif status == 200 and self.check_etag_header():
+                self.set_status(304)
+                return self.finish()
+            self.set_header("Content-Length", end - start)
+            if self.request.method == "HEAD":
+                return self.finish()
+            fp.seek(start)
+            remaining = end - start
+            try:
+                while remaining > 0:
+                    chunk = fp.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        # the file got shorter: the response cannot have
+                        # its Content-Length, so the client must see it
+                        # cut short
+                        self.request.connection.close()
+                        return
+                    remaining -= len(chunk)
+                    self.write(chunk)
+                    await self.flush()
+            except tornado.iostream.StreamClosedError:
+                return
+        self.finish()
+
     def send_message(self, message):
         self.set_secure_cookie("gprime-messages",
                                json.dumps([message]).encode())
@@ -126,14 +427,23 @@ class BaseHandler(tornado.web.RequestHandler):
 
 class HomeHandler(BaseHandler):
     @tornado.web.authenticated
+    @run_in_executor
     def get(self):
-        self.render('home.html', **self.get_template_dict())
+        records = []
+        if self.app.records is not None:
+            records = self.app.records.get(
+                self.database, self.app.get_user_data(self.current_user))
+        self.render('home.html', records=records, **self.get_template_dict())
 
 class LoginHandler(BaseHandler):
+    @run_in_executor
     def get(self):
         self.render('login.html',
                     **self.get_template_dict())
+
+    @run_in_executor
     def post(self):
+        from passlib.hash import sha256_crypt as crypt
         getusername = self.get_argument("username")
         getpassword = self.get_argument("password")
         user_data = self.database.get_user_data(getusername)
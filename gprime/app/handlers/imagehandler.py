@@ -24,6 +24,7 @@
 import tornado
 
 import os
+import asyncio
 import json
 import urllib
 import glob
@@ -33,6 +34,8 @@ import re
 from PIL import Image
 
 from .handlers import BaseHandler
+from ..executor import RequestTimeout
+from ..tiler import TILE_SIZE, MIN_SIZE, JPEG_QUALITY, get_scale_factors
 
 class Abort(Exception):
     """
@@ -713,6 +716,72 @@ class Config(object):
         # cf.AUTH_TYPE = "oauth"
         # cf.CLIENT_SECRETS = {'name1':'secret1'}
 
+def process_image(filename, width, height, region, size, mirror, rot,
+                  quality, nformat, degraded_size, degraded_quality,
+                  jpeg_quality):
+    """
+    Crop, scale, mirror, rotate and convert an image, and return it as
+    bytes in the format nformat. Raises Abort501(param, message) if the
+    image cannot be processed.
+
+    This runs in a worker process, so all arguments are plain values.
+    """
+    (x, y, w, h) = region
+    (sizeW, sizeH) = size
+    try:
+        image = Image.open(filename)
+    except IOError:
+        raise Abort501('identifier', 'Unsupported format for base image')
+
+    scale = 1.0
+    if degraded_size > 0:
+        # resize max size
+        image = image.resize((width, height))
+    elif image.format == "JPEG" and sizeW < w and sizeH < h:
+        # decode at the smallest scale (1/2, 1/4 or 1/8) that is still
+        # larger than the output:
+        image.draft(image.mode, (max(1, width * sizeW // w),
+                                 max(1, height * sizeH // h)))
+        scale = image.size[0] / float(width)
+    if degraded_quality:
+        nquality = {'gray':'L','bitonal':'1'}[degraded_quality]
+        image = image.convert(nquality)
+
+    if (w != width or h != height):
+        box = (int(x * scale), int(y * scale),
+               int(round((x + w) * scale)), int(round((y + h) * scale)))
+        image = image.crop(box)
+
+    if image.size != (sizeW, sizeH):
+        image = image.resize((sizeW, sizeH))
+    if mirror:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+
+    if rot != 0:
+        # NB Rotation in PIL can introduce extra pixels on edges, even for square
+        # PIL is counter-clockwise, so need to reverse
+        rot = 360 - rot
+        image = image.rotate(rot, expand=1)
+
+    if quality != 'default':
+        nquality = {'color':'RGB','gray':'L','bitonal':'1'}[quality]
+        image = image.convert(nquality)
+
+    # Can't save alpha mode in jpeg
+    if nformat == 'JPEG' and image.mode == 'P':
+        image = image.convert('RGB')
+
+    output = io.BytesIO()
+    try:
+        image.save(output,format=nformat, quality=jpeg_quality)
+    except SystemError:
+        raise Abort501('size', 'Unsupported size... tile cannot extend outside image')
+    except IOError:
+        raise Abort501('format', 'Unsupported format for format')
+    contents = output.getvalue()
+    output.close()
+    return contents
+
 class ImageHandler(BaseHandler):
     def __init__(self, *args, **kwargs):
         """
@@ -743,8 +812,8 @@ class ImageHandler(BaseHandler):
         self.BASEPREF = self.BASEURL + self.PREFIX + '/'
 
         # info.json settings
-        self.TILE_SIZE = 512
-        self.MIN_SIZE = 50
+        self.TILE_SIZE = TILE_SIZE
+        self.MIN_SIZE = MIN_SIZE
         self.USE_LD_JSON = True
         self.ATTRIBUTION = "Provided by Example Organization"
         self.LICENSE = "http://license.example.com/license"
@@ -820,16 +889,30 @@ class ImageHandler(BaseHandler):
         self.badcharRe= re.compile('[\[\]?@#/]')
 
         # encoding param for PIL
-        self.jpegQuality = 90
+        self.jpegQuality = JPEG_QUALITY
         self.identifiers = {}
 
-    def send_file(self, filename, mt, status=200):
-        if not filename.startswith(self.CACHEDIR):
-            filename = os.path.join(self.CACHEDIR, filename)
-        fh = open(filename, "rb")
-        data = fh.read()
-        fh.close()
-        return self.send(data, status=status, ct=mt)
+    async def send_file(self, filename, mt, status=200):
+        if not await self.send_cached(filename, mt, status):
+            return self.error_msg("identifier", "Not found: {0}".format(filename), status=404)
+
+    async def send_cached(self, filename, mt, status=200):
+        """
+        Send a file of the cache, if it is cached: from memory if it is
+        small, else streamed from the file (see BaseHandler.stream_file).
+        Returns False if it is not cached.
+        """
+        if filename.startswith(self.CACHEDIR):
+            filename = filename[len(self.CACHEDIR):]
+        (data, path) = self.app.image_cache.lookup(filename)
+        if data is not None:
+            self.send(data, status=status, ct=mt)
+        elif path is not None:
+            self.set_header("Content-Type", mt)
+            await self.stream_file(path, status=status)
+        else:
+            return False
+        return True
 
     def send(self, data, status=200, ct="text/plain"):
         self.set_header("Content-Type", ct)
@@ -890,13 +973,7 @@ class ImageHandler(BaseHandler):
                 imageW = int(imageW * ratio)
                 imageH = self.DEGRADED_SIZE
 
-        all_scales = []
-        sfn = 0
-        sf = 1
-        while float(imageH)/sf > self.MIN_SIZE and float(imageW)/sf > self.MIN_SIZE:
-            all_scales.append(sf)
-            sfn += 1
-            sf = 2**sfn
+        all_scales = get_scale_factors(imageW, imageH, self.MIN_SIZE)
 
         if image.mode == '' or (self.DEGRADE_IMAGES and self.DEGRADED_QUALITY == 'bitonal'):
             qualities = []
@@ -958,23 +1035,52 @@ class ImageHandler(BaseHandler):
                 'profile': 'http://iiif.io/api/auth/0/token'})
 
         data = json.dumps(info, sort_keys=True)
-
-        try:
-            os.makedirs(os.path.join(self.CACHEDIR,infoId), exist_ok=True)
-        except OSError:
-            # directory already exists
-            pass
-        fh = open(os.path.join(self.CACHEDIR, infoId, 'info.json'), 'w')
-        fh.write(data)
-        fh.close()
+        self.app.image_cache.put(infoId + '/info.json', data.encode("utf-8"))
         return info
 
     def watermark(self, image):
         # Do watermarking here
         return image
 
+    async def run_worker(self, function, *args):
+        """
+        Run function(*args), which uses the database, in a worker
+        thread.
+        """
+        executor = self.app.executor
+        if executor is None:
+            return function(*args)
+        return await self.wait_for(executor.run(
+            lambda database: function(*args)))
+
+    async def run_process(self, function, *args):
+        """
+        Run function(*args), which processes an image, in a worker
+        process.
+        """
+        executor = self.app.executor
+        if executor is None:
+            return function(*args)
+        return await self.wait_for(executor.run_process(function, *args))
+
+    async def wait_for(self, coroutine):
+        """
+        Wait for work in the executor, which is cancelled if the client
+        disconnects.
+        """
+        self.request_task = asyncio.ensure_future(coroutine)
+        try:
+            return await self.request_task
+        except asyncio.CancelledError:
+            self.log.info("Request cancelled: %s", self.request.uri)
+            raise tornado.web.Finish()
+        except RequestTimeout:
+            raise tornado.web.HTTPError(504, "Request took too long")
+        finally:
+            self.request_task = None
+
     @tornado.web.authenticated
-    def get(self, path):
+    async def get(self, path):
         """
         Path is an IIIF image server set of parameters:
 
@@ -1002,6 +1108,16 @@ class ImageHandler(BaseHandler):
         # http://{server}{/prefix}   /{identifier}/{region}/{size}/{rotation}/{quality}{.format}
         bits = path.split('/')
 
+        # Images in the cache (such as precomputed tiles) are canonical,
+        # and are sent without looking up the original:
+        if len(bits) == 5 and ".." not in path:
+            mimetype = self.extensions.get(path.rsplit(".", 1)[-1])
+            if mimetype:
+                self.set_header("Link", '<{0}>;rel="profile", <{1}{2}>;rel="canonical"'.format(
+                    self.compliance, self.BASEPREF, path))
+                if await self.send_cached(path, mimetype):
+                    return
+
         ## self.set_header('Access-Control-Allow-Origin', '*')
 
         # Nasty but useful debugging hack
@@ -1024,7 +1140,8 @@ class ImageHandler(BaseHandler):
                     return self.error_msg('identifier', 'Unescaped Characters', status=400)
                 identifier = urllib.parse.unquote(identifier)
                 infoId = urllib.parse.quote(identifier, '')
-                filename = self.get_image_file(undegraded)
+                filename = await self.run_worker(self.get_image_file,
+                                                 undegraded)
                 if not filename:
                     return self.error_msg('identifier', 'Not found: {0}'.format(identifier), status=404)
         else:
@@ -1057,7 +1174,7 @@ class ImageHandler(BaseHandler):
                 if not hasToken:
                     if self.DEGRADED_NOACCESS:
                         # No access is special degraded
-                        return self.send_file(fp, mimetype, status=401)
+                        return await self.send_file(fp, mimetype, status=401)
 
                         # self.error_msg('auth', 'auth test', status=401)
                         # redirect('%sno-access/info.json' % BASEPREF)
@@ -1068,12 +1185,13 @@ class ImageHandler(BaseHandler):
                 # Block access to images
                 return self.error_msg('auth', 'Not authenticated', status=401)
 
-        if os.path.exists(self.CACHEDIR + fp):
-            # Will only ever be canonical, otherwise would redirect
-            self.set_header('Link',
-                            self.request.headers.get("Link", "") +
-                            ', <{0}{1}>;rel="canonical"'.format(self.BASEPREF, fp))
-            return self.send_file(fp, mimetype)
+        # Will only ever be canonical, otherwise would redirect
+        self.set_header('Link',
+                        self.request.headers.get("Link", "") +
+                        ', <{0}{1}>;rel="canonical"'.format(self.BASEPREF, fp))
+        if await self.send_cached(fp, mimetype):
+            return
+        self.set_header("Link", '<{0}>;rel="profile"'.format(self.compliance))
 
         if bits:
             region = bits.pop(0)
@@ -1086,14 +1204,14 @@ class ImageHandler(BaseHandler):
                         mt = "application/ld+json"
                     else:
                         mt = "application/json"
-                    if not os.path.exists(infoId +'/'+region):
+                    if not self.app.image_cache.exists(infoId +'/'+region):
                         image = Image.open(filename)
                         self.make_info(infoId, image)
                         try:
                             image.close()
                         except:
                             pass
-                    return self.send_file(infoId +'/' + region, mt)
+                    return await self.send_file(infoId +'/' + region, mt)
                 else:
                     return self.error_msg("region", "Region invalid: {0}".format(region), status = 400)
         # else is caught by checking identifier in early cache check
@@ -1133,11 +1251,10 @@ class ImageHandler(BaseHandler):
 
         # MUCH quicker to load JSON than the image to find h/w
         # Does json already exist?
-        if os.path.exists(self.CACHEDIR+infoId):
+        data = self.app.image_cache.get(infoId + '/info.json')
+        if data is not None:
             # load JSON info file or image?
-            fh = open(os.path.join(self.CACHEDIR, infoId, 'info.json'))
-            info = json.load(fh)
-            fh.close()
+            info = json.loads(data.decode("utf-8"))
             image = None
         else:
             # Need to load it up for the first time!
@@ -1317,76 +1434,21 @@ class ImageHandler(BaseHandler):
         # Won't regenerate needlessly as earlier cache check would have found it
         # if we're canonical already
 
-        # And finally, process the image!
-        if image == None:
-            try:
-                image = Image.open(filename)
-            except IOError:
-                return self.error_msg('identifier', 'Unsupported format for base image', status=501)
-
-        if identifier.endswith(self.DEGRADED_IDENTIFIER):
-            if self.DEGRADED_SIZE > 0:
-                # resize max size
-                image = image.resize((info['width'], info['height']))
-            if self.DEGRADED_QUALITY:
-                nquality = {'gray':'L','bitonal':'1'}[self.DEGRADED_QUALITY]
-                image = image.convert(nquality)
-
-        if (w != info['width'] or h != info['height']):
-            box = (x,y,x+w,y+h)
-            image = image.crop(box)
-
-        if sizeW != w or sizeH != h:
-            image = image.resize((sizeW, sizeH))
-        if mirror:
-            image = image.transpose(Image.FLIP_LEFT_RIGHT)
-
-        if rot != 0:
-            # NB Rotation in PIL can introduce extra pixels on edges, even for square
-            # PIL is counter-clockwise, so need to reverse
-            rot = 360 - rot
-            try:
-                image = image.rotate(rot, expand=1)
-            except:
-                # old version of PIL without expand
-                segx = image.size[0]
-                segy = image.size[1]
-                angle = radians(rot)
-                rx = abs(segx * cos(angle)) + abs(segy * sin(angle))
-                ry = abs(segy * cos(angle)) + abs(segx * sin(angle))
-
-                bg = Image.new("RGB", (rx, ry), (0, 0, 0))
-                tx = int((rx - segx)/2)
-                ty = int((ry - segy)/2)
-                bg.paste(image, (tx ,ty, tx + segx, ty + segy))
-                image = bg.rotate(rot)
-
-        if quality != 'default':
-            nquality = {'color':'RGB','gray':'L','bitonal':'1'}[quality]
-            image = image.convert(nquality)
-
-        # Can't save alpha mode in jpeg
-        if nformat == 'JPEG' and image.mode == 'P':
-            image = image.convert('RGB')
-
-        output = io.BytesIO()
+        # And finally, process the image, in a worker process:
+        if image is not None:
+            image.close()
         try:
-            image.save(output,format=nformat, quality=self.jpegQuality)
-        except SystemError:
-            return self.error_msg('size', 'Unsupported size... tile cannot extend outside image', status=501)
-        except IOError:
-            return self.error_msg('format', 'Unsupported format for format', status=501)
-        contents = output.getvalue()
-        output.close()
+            contents = await self.run_process(
+                process_image, filename, info['width'], info['height'],
+                (x, y, w, h), (sizeW, sizeH), mirror, rot, quality, nformat,
+                self.DEGRADED_SIZE if identifier.endswith(self.DEGRADED_IDENTIFIER) else 0,
+                self.DEGRADED_QUALITY if identifier.endswith(self.DEGRADED_IDENTIFIER) else "",
+                self.jpegQuality)
+        except Abort501 as exp:
+            return self.error_msg(*exp.args, status=501)
 
         # Write to disk cache
-        for p in range(1,len(paths)):
-            pth = os.path.join(self.CACHEDIR, *paths[:p])
-            if not os.path.exists(pth):
-                os.makedirs(pth, exist_ok=True)
-        fh = open(self.CACHEDIR + fn, 'wb')
-        fh.write(contents)
-        fh.close()
+        self.app.image_cache.put(fn, contents)
 
         return self.send(contents, ct=mimetype)
 
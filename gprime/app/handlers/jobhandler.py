@@ -0,0 +1,88 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import os
+import tornado.web
+import simplejson
+
+from .handlers import BaseHandler, run_in_executor
+from ..forms.actionform import download_to_user
+from ..jobs import FINISHED
+
+class JobHandler(BaseHandler):
+    """
+    Status, progress and results of background jobs.
+    """
+    @tornado.web.authenticated
+    @run_in_executor
+    def get(self, path=""):
+        """
+        job/                    - json list of the user's jobs
+        job/JOBID               - status page
+        job/JOBID/status        - json status of job
+        job/JOBID/download      - download the result of a finished job
+        """
+        _ = self.app.get_translate_func(self.current_user)
+        if not path:
+            self.send_json([self.make_status(job) for job in
+                            self.app.jobs.get_jobs(self.current_user)])
+            return
+        if "/" in path:
+            job_id, action = path.split("/", 1)
+        else:
+            job_id, action = path, "view"
+        job = self.app.jobs.get_job(job_id, self.current_user)
+        if job is None:
+            self.clear()
+            self.set_status(404)
+            self.finish("<html><body>No such job</body></html>")
+            return
+        if action == "status":
+            self.send_json(self.make_status(job))
+        elif action == "download":
+            if job["status"] == FINISHED and os.path.exists(job["result"]):
+                download_to_user(job["result"], self)
+            else:
+                self.clear()
+                self.set_status(404)
+                self.finish("<html><body>No result for job</body></html>")
+        else:
+            self.render("job.html",
+                        **self.get_template_dict(tview=_("job"),
+                                                 job=self.make_status(job)))
+
+    def make_status(self, job):
+        """
+        The publicly visible parts of a job.
+        """
+        status = {key: job[key] for key in ["job_id", "ptype", "name",
+                                             "status", "progress", "message",
+                                             "created", "started", "finished"]}
+        status["url"] = self.app.make_url("/job/%s" % job["job_id"])
+        if job["status"] == FINISHED and job["ptype"] != "Import":
+            status["download"] = self.app.make_url("/job/%s/download" %
+                                                   job["job_id"])
+        else:
+            status["download"] = None
+        return status
+
+    def send_json(self, data):
+        self.set_header('Content-Type', 'application/json')
+        self.write(simplejson.dumps(data))
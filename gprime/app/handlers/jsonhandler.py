@@ -22,7 +22,7 @@ import tornado.web
 import simplejson
 import re
 
-from .handlers import BaseHandler
+from .handlers import BaseHandler, run_in_executor
 from gprime.lib.gendertype import GenderType
 
 class JsonHandler(BaseHandler):
@@ -30,7 +30,10 @@ class JsonHandler(BaseHandler):
     Process an Ajax/Json query request.
     """
     @tornado.web.authenticated
+    @run_in_executor
     def get(self):
+        if self.check_not_modified():
+            return
         field = self.get_argument("field", None)
         query = self.get_argument("q", "").strip()
         page = int(self.get_argument("p", "1"))
@@ -87,10 +90,14 @@ class JsonHandler(BaseHandler):
                     else:
                         where = ("gender", "IN", codes)
             ### Done parsing
+            # birth and death come from the summary columns, without
+            # looking up any events:
             return_fields = ['primary_name.surname_list.0.surname',
                              'primary_name.first_name',
-                             'gid']
-            return_pattern = "%(primary_name.surname_list.0.surname)s, %(primary_name.first_name)s [%(gid)s]"
+                             'gid',
+                             'birth_date',
+                             'death_date']
+            return_pattern = "%(primary_name.surname_list.0.surname)s, %(primary_name.first_name)s [%(gid)s]%(lifespan)s"
         elif field == "person":
             pass
         elif field == "place":
@@ -111,6 +118,11 @@ class JsonHandler(BaseHandler):
         rows.total = queryset.count()
         response_data = {"results": [], "total": rows.total}
         for row in rows:
+            if row.get("birth_date") or row.get("death_date"):
+                row["lifespan"] = " (%s - %s)" % (row.get("birth_date") or "",
+                                                  row.get("death_date") or "")
+            else:
+                row["lifespan"] = ""
             name = return_pattern % row
             response_data["results"].append({"id": row["handle"], "name": name})
         self.set_header('Content-Type', 'application/json')
@@ -25,11 +25,12 @@ import tornado.web
 import json
 import html
 
-from .handlers import BaseHandler
+from .handlers import BaseHandler, run_in_executor
 from ..forms import PersonForm
 
 class PersonHandler(BaseHandler):
     @tornado.web.authenticated
+    @run_in_executor
     def get(self, path=""):
         """
         person
@@ -65,6 +66,8 @@ class PersonHandler(BaseHandler):
                     return
                 else:
                     ## Action can be edit or view
+                    if handle != "add" and self.check_not_modified():
+                        return
                     self.render("person.html",
                             **self.get_template_dict(tview=_("person detail"),
                                                      action=action,
@@ -95,6 +98,7 @@ class PersonHandler(BaseHandler):
         )
 
     @tornado.web.authenticated
+    @run_in_executor
     def post(self, path):
         """
         """
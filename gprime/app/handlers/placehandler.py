@@ -25,11 +25,12 @@ import tornado.web
 import json
 import html
 
-from .handlers import BaseHandler
+from .handlers import BaseHandler, run_in_executor
 from ..forms import PlaceForm
 
 class PlaceHandler(BaseHandler):
     @tornado.web.authenticated
+    @run_in_executor
     def get(self, path=""):
         """
         HANDLE
@@ -84,6 +85,7 @@ class PlaceHandler(BaseHandler):
                 )
 
     @tornado.web.authenticated
+    @run_in_executor
     def post(self, path):
         _ = self.app.get_translate_func(self.current_user)
         if "/" in path:
@@ -0,0 +1,307 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the images (and info.json) that the image server derives from
+media files.
+
+The files are kept under the cache folder, by their canonical URL
+relative to the image server, and an index (a SQLite database in the
+same folder, shared by all server processes) records the size and last
+access of each. When the files take more than the byte budget, the
+least recently used ones are removed. Small files, such as thumbnails
+and info.json, are also kept in memory.
+"""
+
+## Python imports
+import os
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+from .tiler import write_file
+
+LOG = logging.getLogger(".imagecache")
+
+INDEX_FILE = "index.db"
+HOT_FILE_SIZE = 64 * 1024     # largest file kept in memory, in bytes
+TOUCH_BATCH = 100             # accesses recorded in the index at once
+TOUCH_DELAY = 5               # seconds before accesses are recorded
+EVICT_RATIO = 0.9             # eviction frees the cache down to this
+SIZE_CHECK = 100              # writes between checks of the total size
+
+class ImageCache(object):
+    """
+    A byte-bounded, least-recently-used cache of files. Safe to use
+    from several threads and processes.
+
+    :param directory: the cache folder
+    :param max_bytes: the budget of the files; 0 for no limit
+    :param hot_bytes: the budget of the files kept in memory
+    """
+    def __init__(self, directory, max_bytes=0, hot_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_bytes = hot_bytes
+        self.lock = threading.RLock()
+        self.hot = OrderedDict() # path -> data
+        self.hot_size = 0
+        self.touched = {} # path -> time of last access, not yet recorded
+        self.last_flush = time.time()
+        self.hits = 0
+        self.hot_hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_written = 0
+        self.evictions = 0
+        self.writes = 0
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, INDEX_FILE)
+        self.connection = sqlite3.connect(filename, timeout=30,
+                                          check_same_thread=False,
+                                          isolation_level=None)
+        with self.lock:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS entry (
+                                         path TEXT PRIMARY KEY,
+                                         size INTEGER,
+                                         last_access REAL);""")
+            self.connection.execute("""CREATE INDEX IF NOT EXISTS
+                                         entry_last_access
+                                         ON entry(last_access);""")
+            count = self.connection.execute(
+                "SELECT count(1) FROM entry;").fetchone()[0]
+        if count == 0:
+            # New index, of an existing cache:
+            self.scan()
+        # An estimate of the total size (other processes write too):
+        self.size = self.get_size()
+
+    def _filename(self, path):
+        return os.path.join(self.directory, path)
+
+    def get(self, path):
+        """
+        Return the data of a cached file, or None if it is not cached.
+        """
+        (data, filename) = self.lookup(path)
+        if filename is not None:
+            try:
+                with open(filename, "rb") as fp:
+                    data = fp.read()
+            except (IOError, OSError):
+                return None
+        return data
+
+    def lookup(self, path):
+        """
+        Return (data, filename) of a cached file: its data if it is kept
+        in memory, else the name of the file, to be sent from the file.
+        Returns (None, None) if it is not cached.
+        """
+        filename = None
+        with self.lock:
+            data = self.hot.get(path)
+            if data is not None:
+                self.hot.move_to_end(path)
+                self.hot_hits += 1
+                size = len(data)
+        if data is None:
+            filename = self._filename(path)
+            try:
+                size = os.path.getsize(filename)
+                if size <= HOT_FILE_SIZE or path.endswith("info.json"):
+                    with open(filename, "rb") as fp:
+                        data = fp.read()
+                    self._keep(path, data)
+                    filename = None
+            except (IOError, OSError):
+                with self.lock:
+                    self.misses += 1
+                return (None, None)
+        with self.lock:
+            self.hits += 1
+            self.bytes_served += size
+            self.touched[path] = time.time()
+            if (len(self.touched) >= TOUCH_BATCH or
+                    time.time() - self.last_flush > TOUCH_DELAY):
+                self.flush()
+        return (data, filename)
+
+    def exists(self, path):
+        with self.lock:
+            if path in self.hot:
+                return True
+        return os.path.isfile(self._filename(path))
+
+    def put(self, path, data):
+        """
+        Cache the data of a file, and remove the least recently used
+        files if the cache is over budget.
+        """
+        write_file(self._filename(path), data)
+        self._keep(path, data)
+        with self.lock:
+            self.bytes_written += len(data)
+            self.touched.pop(path, None)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entry (path, size, last_access) "
+                "VALUES (?, ?, ?);", [path, len(data), time.time()])
+            self.size += len(data)
+            self.writes += 1
+            if self.size > self.max_bytes or self.writes % SIZE_CHECK == 0:
+                self.evict()
+
+    def _keep(self, path, data):
+        """
+        Keep small files in memory.
+        """
+        if len(data) > self.hot_bytes or (len(data) > HOT_FILE_SIZE and
+                                          not path.endswith("info.json")):
+            return
+        with self.lock:
+            old = self.hot.pop(path, None)
+            if old is not None:
+                self.hot_size -= len(old)
+            self.hot[path] = data
+            self.hot_size += len(data)
+            while self.hot_size > self.hot_bytes and self.hot:
+                self.hot_size -= len(self.hot.popitem(last=False)[1])
+
+    def _forget(self, path):
+        with self.lock:
+            old = self.hot.pop(path, None)
+            if old is not None:
+                self.hot_size -= len(old)
+            self.touched.pop(path, None)
+
+    def flush(self):
+        """
+        Record the accesses of files in the index.
+        """
+        with self.lock:
+            touched = self.touched
+            self.touched = {}
+            self.last_flush = time.time()
+            if touched:
+                self.connection.executemany(
+                    "UPDATE entry SET last_access = ? WHERE path = ?;",
+                    [(atime, path) for (path, atime) in touched.items()])
+
+    def get_size(self):
+        """
+        Return the number of bytes of the cached files.
+        """
+        with self.lock:
+            return self.connection.execute(
+                "SELECT total(size) FROM entry;").fetchone()[0]
+
+    def evict(self):
+        """
+        Remove the least recently used files, if the cache is over
+        budget, until it is below EVICT_RATIO of it.
+        """
+        if self.max_bytes <= 0:
+            return
+        with self.lock:
+            size = self.size = self.get_size()
+            if size <= self.max_bytes:
+                return
+            self.flush()
+            target = self.max_bytes * EVICT_RATIO
+            while size > target:
+                rows = self.connection.execute(
+                    "SELECT path, size FROM entry "
+                    "ORDER BY last_access LIMIT 100;").fetchall()
+                if not rows:
+                    break
+                for (path, file_size) in rows:
+                    try:
+                        os.remove(self._filename(path))
+                    except OSError:
+                        pass
+                    self._forget(path)
+                    size -= file_size
+                    self.evictions += 1
+                    if size <= target:
+                        rows = rows[:rows.index((path, file_size)) + 1]
+                        break
+                self.connection.executemany(
+                    "DELETE FROM entry WHERE path = ?;",
+                    [(path,) for (path, file_size) in rows])
+            self.size = size
+        LOG.info("Evicted image cache down to %s bytes", int(size))
+
+    def scan(self, prefix=""):
+        """
+        Add the files under a folder of the cache (such as the tiles
+        made by the Tiler) to the index.
+        """
+        folder = self._filename(prefix)
+        entries = []
+        for (dirpath, dirnames, filenames) in os.walk(folder):
+            for filename in filenames:
+                if filename.startswith(INDEX_FILE) or filename.endswith(".tmp"):
+                    continue
+                fullname = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(fullname)
+                except OSError:
+                    continue
+                entries.append((os.path.relpath(fullname, self.directory),
+                                stat.st_size, stat.st_mtime))
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO entry (path, size, last_access) "
+                "VALUES (?, ?, ?);", entries)
+        self.evict()
+
+    def remove(self, identifier):
+        """
+        Remove the cached files of an identifier.
+        """
+        shutil.rmtree(self._filename(identifier), ignore_errors=True)
+        prefix = identifier + "/"
+        with self.lock:
+            for path in [path for path in self.hot if path.startswith(prefix)]:
+                self._forget(path)
+            self.connection.execute(
+                "DELETE FROM entry WHERE substr(path, 1, ?) = ?;",
+                [len(prefix), prefix])
+
+    def get_stats(self):
+        with self.lock:
+            files = self.connection.execute(
+                "SELECT count(1) FROM entry;").fetchone()[0]
+            return {"size": int(self.get_size()), "max_size": self.max_bytes,
+                    "files": files, "hot_size": self.hot_size,
+                    "hot_max_size": self.hot_bytes,
+                    "hot_files": len(self.hot), "hits": self.hits,
+                    "hot_hits": self.hot_hits, "misses": self.misses,
+                    "bytes_served": self.bytes_served,
+                    "bytes_written": self.bytes_written,
+                    "evictions": self.evictions}
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.connection.close()
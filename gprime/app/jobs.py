@@ -0,0 +1,359 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Background jobs for long-running actions (reports, imports, exports).
+
+Jobs are recorded in a small sqlite database in SITE-DIR/jobs, so that
+the queue survives a server restart. Each job runs in a separate worker
+process, which opens its own connection to the family tree database and
+reports progress back through the job store.
+"""
+
+## Python imports
+import os
+import time
+import uuid
+import json
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from gprime.cli.user import User
+
+LOG = logging.getLogger(".jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+class JobStore(object):
+    """
+    Persistent record of jobs, kept in SITE-DIR/jobs/jobs.db.
+
+    A new connection is made for each operation, so that the store can
+    be shared between the server, its threads and the worker processes.
+    """
+    FIELDS = ["job_id", "username", "ptype", "name", "plugin", "options",
+              "status", "progress", "message", "result",
+              "created", "started", "finished"]
+
+    def __init__(self, site_dir):
+        self.directory = os.path.join(site_dir, "jobs")
+        self.filename = os.path.join(self.directory, "jobs.db")
+        os.makedirs(self.directory, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS job (
+                                job_id VARCHAR(50) PRIMARY KEY,
+                                username TEXT,
+                                ptype TEXT,
+                                name TEXT,
+                                plugin TEXT,
+                                options TEXT,
+                                status TEXT,
+                                progress INTEGER,
+                                message TEXT,
+                                result TEXT,
+                                created REAL,
+                                started REAL,
+                                finished REAL);""")
+            conn.execute("""CREATE INDEX IF NOT EXISTS job_username
+                                ON job(username);""")
+
+    def connect(self):
+        """
+        Return a new connection to the job store.
+        """
+        return sqlite3.connect(self.filename, timeout=30)
+
+    def get_job_dir(self, job_id):
+        """
+        Return the folder where a job keeps its input and output files.
+        """
+        path = os.path.join(self.directory, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add(self, username, ptype, name, plugin, options):
+        """
+        Add a new, queued job. Returns the job id.
+        """
+        job_id = uuid.uuid4().hex
+        with self.connect() as conn:
+            conn.execute("""INSERT INTO job (job_id, username, ptype, name,
+                                             plugin, options, status,
+                                             progress, message, created)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);""",
+                         [job_id, username, ptype, name, plugin,
+                          json.dumps(options), QUEUED, 0, "", time.time()])
+        return job_id
+
+    def update(self, job_id, **kwargs):
+        """
+        Update the given fields of a job.
+        """
+        fields = sorted(kwargs.keys())
+        with self.connect() as conn:
+            conn.execute("UPDATE job SET %s WHERE job_id = ?;" %
+                         ", ".join(["%s = ?" % field for field in fields]),
+                         [kwargs[field] for field in fields] + [job_id])
+
+    def get(self, job_id):
+        """
+        Return the job as a dictionary, or None if there is no such job.
+        """
+        with self.connect() as conn:
+            row = conn.execute("SELECT %s FROM job WHERE job_id = ?;" %
+                               ", ".join(self.FIELDS), [job_id]).fetchone()
+        if row:
+            return self._make_job(row)
+        return None
+
+    def get_jobs(self, username=None, status=None):
+        """
+        Return all jobs, most recent first, optionally limited to a
+        user and/or status.
+        """
+        where, args = [], []
+        if username is not None:
+            where.append("username = ?")
+            args.append(username)
+        if status is not None:
+            where.append("status = ?")
+            args.append(status)
+        query = "SELECT %s FROM job" % ", ".join(self.FIELDS)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY created DESC;"
+        with self.connect() as conn:
+            rows = conn.execute(query, args).fetchall()
+        return [self._make_job(row) for row in rows]
+
+    def _make_job(self, row):
+        job = dict(zip(self.FIELDS, row))
+        job["options"] = json.loads(job["options"] or "{}")
+        return job
+
+class JobUser(User):
+    """
+    A CLI user that records progress in the job store, and accepts
+    all prompts, as there is nobody to answer them.
+    """
+    def __init__(self, store, job_id):
+        super().__init__(callback=self.set_progress, auto_accept=True)
+        self.store = store
+        self.job_id = job_id
+        self.percent = None
+        self.steps = 0
+        self.current_step = 0
+
+    def set_progress(self, percent, text=None):
+        """
+        Callback for UpdateCallback-based importers and exporters.
+        """
+        percent = max(0, min(int(percent), 100))
+        if percent != self.percent:
+            self.percent = percent
+            kwargs = {"progress": percent}
+            if text:
+                kwargs["message"] = text
+            self.store.update(self.job_id, **kwargs)
+
+    def begin_progress(self, title, message, steps):
+        self.steps = steps
+        self.current_step = 0
+        self.store.update(self.job_id, message=message)
+
+    def step_progress(self):
+        self.current_step += 1
+        if self.steps:
+            self.set_progress(100 * self.current_step / self.steps)
+
+    def end_progress(self):
+        pass
+
+def run_job(site_dir, job_id):
+    """
+    Run a job. This is the entry point of the worker processes.
+    """
+    from gprime.dbstate import DbState
+    from gprime.cli.plug import run_report
+    from .forms.actionform import import_file, export_file, upload
+    import gprime.const
+    gprime.const.set_site_dir(site_dir)
+    store = JobStore(site_dir)
+    job = store.get(job_id)
+    if job is None:
+        return
+    # A job that was already started was interrupted by a restart; an
+    # import can then continue from its last checkpoint:
+    restarted = job["started"] is not None
+    store.update(job_id, status=RUNNING, started=time.time(), progress=0)
+    user = JobUser(store, job_id)
+    options = job["options"]
+    job_dir = store.get_job_dir(job_id)
+    database = None
+    result = None
+    try:
+        database = DbState().open_database(os.path.join(site_dir, "database"))
+        database.set_mediapath(os.path.abspath(os.path.join(site_dir, "media")))
+        if job["ptype"] == "Report":
+            output_file = os.path.join(job_dir, "%s.pdf" % job["plugin"])
+            if run_report(database, job["plugin"], username=job["username"],
+                          of=output_file, off="pdf", **options):
+                result = output_file
+        elif job["ptype"] == "Import":
+            filename = options["i"]
+            if "://" in filename:
+                local_file = os.path.join(
+                    job_dir, "import.%s" % options.get("iff", "gramps"))
+                # keep a previous download, which the checkpoint refers to
+                if restarted and os.path.exists(local_file):
+                    filename = local_file
+                else:
+                    filename = upload(filename, local_file)
+            if filename and import_file(database, filename, user,
+                                        resume=restarted):
+                result = filename
+        elif job["ptype"] == "Export":
+            output_file = os.path.join(job_dir,
+                                       "export.%s" % options["extension"])
+            if export_file(database, output_file, user):
+                result = output_file
+        else:
+            raise Exception("Invalid job type: '%s'" % job["ptype"])
+    except Exception as exc:
+        LOG.error("Job %s failed", job_id, exc_info=True)
+        store.update(job_id, status=FAILED, message=str(exc),
+                     finished=time.time())
+        return
+    finally:
+        if database:
+            database.close()
+    if result:
+        store.update(job_id, status=FINISHED, progress=100, result=result,
+                     finished=time.time())
+    else:
+        store.update(job_id, status=FAILED, finished=time.time(),
+                     message="Error in %s" % job["ptype"].lower())
+
+class JobQueue(object):
+    """
+    Queue of background jobs, run by a pool of worker processes.
+
+    Jobs that were queued or running when the server stopped are
+    started again when the queue is created, if restart is True (in a
+    multi-process server, only the first process restarts them).
+
+    When a worker process dies (out of memory, a crash in a plugin), the
+    pool is replaced, and the jobs that had not started yet are queued
+    again in the new one.
+    """
+    def __init__(self, site_dir, workers=2, restart=True):
+        self.site_dir = site_dir
+        self.workers = workers
+        self.store = JobStore(site_dir)
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.executor = self._make_executor()
+        for status in ([RUNNING, QUEUED] if restart else []):
+            for job in reversed(self.store.get_jobs(status=status)):
+                LOG.info("Restarting job %s", job["job_id"])
+                self.store.update(job["job_id"], status=QUEUED, progress=0)
+                self._start(job["job_id"])
+
+    def submit(self, username, ptype, name, plugin, options):
+        """
+        Queue a job, and return its id immediately.
+        """
+        job_id = self.store.add(username, ptype, name, plugin, options)
+        self._start(job_id)
+        return job_id
+
+    def _make_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def _replace_executor(self, broken):
+        """
+        Replace the pool of worker processes, if it is still the broken
+        one (each of its jobs calls this).
+        """
+        with self.lock:
+            if self.executor is broken and not self.stopped:
+                LOG.warning("A job worker died; starting new workers")
+                self.executor = self._make_executor()
+                broken.shutdown(wait=False)
+
+    def _start(self, job_id):
+        executor = self.executor
+        try:
+            future = executor.submit(run_job, self.site_dir, job_id)
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            executor = self.executor
+            future = executor.submit(run_job, self.site_dir, job_id)
+        future.add_done_callback(
+            lambda future: self._job_done(job_id, future, executor))
+
+    def _job_done(self, job_id, future, executor):
+        """
+        Mark a job as failed if its worker process died, and queue it
+        again if it had not started.
+        """
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            return
+        if isinstance(exc, BrokenProcessPool):
+            if self.stopped: # the job stays queued for the next start
+                return
+            self._replace_executor(executor)
+            job = self.store.get(job_id)
+            if job and job["status"] == QUEUED:
+                LOG.info("Requeueing job %s", job_id)
+                self._start(job_id)
+                return
+        LOG.error("Worker for job %s died: %s", job_id, exc)
+        self.store.update(job_id, status=FAILED, message=str(exc),
+                          finished=time.time())
+
+    def get_job(self, job_id, username=None):
+        """
+        Return a job, if it exists and belongs to username.
+        """
+        job = self.store.get(job_id)
+        if job and (username is None or job["username"] == username):
+            return job
+        return None
+
+    def get_jobs(self, username=None):
+        return self.store.get_jobs(username=username)
+
+    def shutdown(self):
+        """
+        Stop the workers. Unfinished jobs stay queued for the next start.
+        """
+        with self.lock:
+            self.stopped = True
+        self.executor.shutdown(wait=False)
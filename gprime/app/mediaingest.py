@@ -0,0 +1,177 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Ingestion of the media files of an imported family tree.
+
+Files are stored content-addressed in SITE-DIR/media: a file is named
+after its checksum, so the same file referred to by several media
+objects (or imported twice) is stored only once. Hashing and copying
+run in a thread pool, and the media objects (and the media path) are
+updated in a single batch transaction.
+"""
+
+## Python imports
+import os
+import re
+import uuid
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from gprime.lib import Attribute, AttributeType
+from gprime.utils.file import media_path_full
+from ..db import DbTxn
+
+LOG = logging.getLogger(".mediaingest")
+
+CHUNK_SIZE = 1024 * 1024
+
+def make_path_relative(filename):
+    """
+    Given a filename, make it relative.
+    """
+    parts = re.split(r"[\\/]", filename)
+    if ":" in parts[0]:
+        return "/".join(
+            [p for p in parts[0].split(":")[1:] + parts[1:] if p])
+    else:
+        return "/".join([p for p in parts if p])
+
+def get_content_path(checksum, filename):
+    """
+    Return the path, relative to the media folder, of a file with the
+    given checksum. The original extension is kept, so that the mime
+    type can still be guessed from the name.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    return "%s/%s%s" % (checksum[:2], checksum, ext)
+
+def get_image_dimensions(filename):
+    """
+    Return (width, height) of an image file, or None if it is not an
+    image that PIL can read. Only the header of the file is read.
+    """
+    try:
+        import PIL.Image
+    except ImportError:
+        return None
+    try:
+        with PIL.Image.open(filename) as img:
+            return img.size
+    except Exception:
+        return None
+
+def ingest_file(src, media_dir):
+    """
+    Hash a file and copy it into the media folder under its checksum,
+    unless it is already there. Runs in a worker thread.
+
+    Returns (checksum, relative path, dimensions).
+    """
+    md5 = hashlib.md5()
+    with open(src, "rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            md5.update(chunk)
+    checksum = md5.hexdigest()
+    relative = get_content_path(checksum, src)
+    dst = os.path.join(media_dir, relative)
+    if not os.path.exists(dst):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        # copy under a temporary name, so that a partial file is never
+        # mistaken for the content:
+        temp = "%s.%s.tmp" % (dst, uuid.uuid4().hex)
+        shutil.copyfile(src, temp)
+        os.replace(temp, dst)
+        LOG.info("Media copied to `%s`", dst)
+    return (checksum, relative, get_image_dimensions(dst))
+
+def set_attribute(media, name, value):
+    """
+    Set a custom attribute of the media object, replacing an existing
+    attribute of the same name.
+    """
+    for attr in media.get_attribute_list():
+        if attr.get_type().xml_str() == name:
+            attr.set_value(value)
+            return
+    attr = Attribute()
+    attr.set_type(AttributeType((AttributeType.CUSTOM, name)))
+    attr.set_value(value)
+    media.add_attribute(attr)
+
+def ingest_media(database, media_dir, search_dirs=None, workers=None):
+    """
+    Copy the files of all media objects of the database into media_dir,
+    content-addressed, and update the media objects with the new
+    path, the checksum and, for images, the dimensions. media_dir
+    becomes the media path of the database.
+
+    :param search_dirs: other folders in which to look for files that are
+                        not found at their media path
+    :param workers: number of threads that hash and copy files
+    :returns: the number of files stored, and the number of missing files
+    """
+    search_dirs = search_dirs or []
+    sources = {}
+    media_list = []
+    missing = 0
+    for media in database.iter_media():
+        if media.path == "image-missing.png":
+            continue # already there
+        src = media_path_full(database, media.path)
+        if not os.path.exists(src):
+            relative = make_path_relative(media.path)
+            for directory in search_dirs:
+                if os.path.exists(os.path.join(directory, relative)):
+                    src = os.path.join(directory, relative)
+                    break
+            else:
+                LOG.warning("Media file not found: `%s`", media.path)
+                missing += 1
+                continue
+        src = os.path.realpath(src)
+        sources[src] = None
+        media_list.append((media, src))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {src: executor.submit(ingest_file, src, media_dir)
+                   for src in sources}
+        for src, future in futures.items():
+            try:
+                sources[src] = future.result()
+            except (IOError, OSError) as exc:
+                LOG.warning("Media file could not be copied: `%s`: %s",
+                            src, exc)
+    stored = set()
+    with DbTxn("gPrime media import", database, batch=True) as transaction:
+        for media, src in media_list:
+            if sources[src] is None:
+                continue
+            checksum, relative, dimensions = sources[src]
+            stored.add(relative)
+            media.set_path(relative)
+            media.set_checksum(checksum)
+            if dimensions:
+                set_attribute(media, "Width", str(dimensions[0]))
+                set_attribute(media, "Height", str(dimensions[1]))
+            database.commit_media(media, transaction)
+        database.set_mediapath(os.path.abspath(media_dir))
+    return (len(stored), missing)
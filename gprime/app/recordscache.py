@@ -0,0 +1,134 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the records of the database (as in the Records report), for the
+summary of the home page.
+
+The records are found again when the database has changed since, in
+this or another worker process (see DbGeneric.get_change_stamp). They
+are found in a background thread, as this reads every person and family:
+meanwhile, the home page shows the records found before (or none).
+"""
+
+## Python imports
+import logging
+import threading
+
+LOG = logging.getLogger(".recordscache")
+
+class RecordsCache(object):
+    """
+    The records of a database, by language. Safe to use from several
+    threads: the records of a language are found by one background
+    thread at a time.
+
+    :param top_size: the number of ranks of each record
+    :param database_dir: the family tree, opened by the background thread
+        for its own connection; if None, the thread uses the database
+        given to get() (which must then allow it)
+    """
+    def __init__(self, top_size=1, database_dir=None):
+        self.top_size = top_size
+        self.database_dir = database_dir
+        self.lock = threading.Lock()
+        self.records = {} # language -> (change stamp, records)
+        self.threads = {} # language -> thread finding its records
+
+    def get(self, database, user_data):
+        """
+        Return the records of the database, in the language of the user,
+        as a list of (title, [(name, url, value), ...]). If they are not
+        up to date, they are found again in the background, and those
+        found before are returned.
+        """
+        stamp = database.get_change_stamp()
+        language = user_data["language"]
+        with self.lock:
+            entry = self.records.get(language)
+            if ((entry is None or entry[0] != stamp) and
+                    language not in self.threads):
+                thread = threading.Thread(
+                    target=self.update, args=(database, user_data, stamp),
+                    name="gprime-records-%s" % language, daemon=True)
+                self.threads[language] = thread
+                thread.start()
+            return entry[1] if entry else []
+
+    def update(self, database, user_data, stamp):
+        """
+        Find the records of the database as of the change stamp, in the
+        language of the user. On error, the records found before are
+        kept until the database changes again.
+        """
+        language = user_data["language"]
+        records = None
+        try:
+            if self.database_dir:
+                from gprime.dbstate import DbState
+                database = DbState().open_database(self.database_dir)
+                if database is None:
+                    raise Exception("family tree is locked")
+                try:
+                    records = self.find(database, user_data)
+                finally:
+                    database.close(update=False)
+            else:
+                records = self.find(database, user_data)
+        except Exception:
+            LOG.warning("Error finding the records", exc_info=True)
+        with self.lock:
+            if records is None:
+                entry = self.records.get(language)
+                records = entry[1] if entry else []
+            self.records[language] = (stamp, records)
+            del self.threads[language]
+
+    def wait(self, timeout=None):
+        """
+        Wait for the background threads to be done.
+        """
+        with self.lock:
+            threads = list(self.threads.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def find(self, database, user_data):
+        from gprime.lib import Span
+        from gprime.const import LOCALE
+        from gprime.plugins.lib.librecords import (find_records,
+                                                   CALLNAME_DONTUSE)
+        locale = user_data["glocale"]
+        if isinstance(locale, type): # the default one
+            locale = LOCALE
+        records = []
+        for (title, varname, top) in find_records(
+                database, None, self.top_size, CALLNAME_DONTUSE,
+                trans_text=locale.translation.sgettext):
+            rows = []
+            for (sort, value, name, handle_type, handle) in top:
+                if isinstance(value, Span):
+                    value = value.get_repr(dlocale=locale)
+                rows.append((str(name),
+                             "/%s/%s" % (handle_type.lower(), handle),
+                             str(value)))
+            if rows:
+                records.append((title, rows))
+        return records
@@ -0,0 +1,141 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Profile of the startup of gPrime (see --profile-startup): the time taken
+by each phase of the startup, and to import each module.
+"""
+
+## Python imports
+import sys
+import time
+
+FLAG = "--profile-startup"
+FALSE_VALUES = ["false", "f", "no", "n", "off", "0"]
+
+_PROFILER = None
+
+class ImportProfiler:
+    """
+    A finder on sys.meta_path, that times the loading of the modules the
+    other finders find: in total, and by itself (without the modules it
+    imports).
+    """
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases = [] # (name, seconds)
+        self.modules = [] # (name, seconds in total, seconds by itself)
+        self.nested = [] # seconds of the nested imports, per level
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Built-in and frozen modules share their (class) loader:
+            if (loader is not None and not isinstance(loader, type) and
+                    hasattr(loader, "exec_module")):
+                loader.exec_module = self.timed(fullname, loader.exec_module)
+            return spec
+        return None
+
+    def timed(self, fullname, exec_module):
+        def timed_exec_module(module):
+            self.nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                nested = self.nested.pop()
+                if self.nested:
+                    self.nested[-1] += total
+                self.modules.append((fullname, total, total - nested))
+        return timed_exec_module
+
+    def mark(self, phase):
+        """
+        End a phase of the startup.
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, top=25, file=None):
+        file = file or sys.stdout
+        print("Startup profile (seconds):", file=file)
+        for (phase, seconds) in self.phases:
+            print("  %-24s %8.3f" % (phase, seconds), file=file)
+        print("  %-24s %8.3f" % ("total", self.last - self.start),
+              file=file)
+        print("Imports: %s modules in %.3f seconds; the slowest (in total, "
+              "by itself):" % (len(self.modules),
+                               sum([own for (name, total, own)
+                                    in self.modules])),
+              file=file)
+        for (name, total, own) in sorted(self.modules,
+                                         key=lambda module: module[1],
+                                         reverse=True)[:top]:
+            print("  %8.3f %8.3f  %s" % (total, own, name), file=file)
+
+def requested(argv=None):
+    """
+    Is --profile-startup on the command line? Answered before the options
+    are parsed, as the imports have to be timed from the start.
+    """
+    for arg in (sys.argv[1:] if argv is None else argv):
+        if arg == FLAG:
+            return True
+        if arg.startswith(FLAG + "="):
+            return arg.split("=", 1)[1].lower() not in FALSE_VALUES
+    return False
+
+def start_profile():
+    global _PROFILER
+    if _PROFILER is None:
+        _PROFILER = ImportProfiler()
+        _PROFILER.install()
+    return _PROFILER
+
+def mark(phase):
+    """
+    End a phase of the startup, if it is profiled.
+    """
+    if _PROFILER is not None:
+        _PROFILER.mark(phase)
+
+def report(top=25):
+    """
+    Print the profile of the startup, if it is profiled, and stop timing
+    the imports.
+    """
+    if _PROFILER is not None:
+        _PROFILER.uninstall()
+        _PROFILER.report(top)
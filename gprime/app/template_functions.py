@@ -25,8 +25,11 @@ from gprime.lib import *
 from gprime.lib.struct import Struct
 from gprime.display.name import NameDisplay
 from gprime.datehandler import displayer
+from gprime.simple import SimpleAccess
+from gprime.app.fragmentcache import DependencyRecorder
 
 # Python imports:
+import functools
 import tornado.log
 
 # Globals and functions:
@@ -115,9 +118,9 @@ class Table(object):
             else:
                 disabled = ""
             url = self.edit_url(row_count - 1)
-            img_remove = self.form.handler.app.make_url("/images/gtk-remove.png")
-            img_up = self.form.handler.app.make_url("/images/up.png")
-            img_down = self.form.handler.app.make_url("/images/down.png")
+            img_remove = self.form.handler.app.static_url("/images/gtk-remove.png")
+            img_up = self.form.handler.app.static_url("/images/up.png")
+            img_down = self.form.handler.app.static_url("/images/down.png")
             div += """<input type="submit"
 name="update_json"
 value="%s/remove"
@@ -144,7 +147,39 @@ style="background:url(%s) no-repeat; font-size:0; width: 30px; height: 30px;" %s
         html += table
         return str(html) #.replace("&amp;nbsp;", "&nbsp;")
 
+def cached_fragment(function):
+    """
+    Decorator of the table functions of person and family pages, which
+    caches their HTML in the app's FragmentCache, until an object that
+    they read changes, or the database is changed by another process.
+    """
+    @functools.wraps(function)
+    def wrapper(form, user, action):
+        app = form.handler.app
+        cache = getattr(app, "fragments", None)
+        handle = form.instance.handle if form.instance else None
+        if (cache is None or not handle or
+                form.handler.request.method != "GET"):
+            return function(form, user, action)
+        user_data = app.get_user_data(user)
+        key = (handle, form.view, function.__name__, action, bool(user),
+               user_data["language"], user_data["css"])
+        stamp = form.database.get_change_stamp()
+        html = cache.get(key, stamp)
+        if html is None:
+            recorder = DependencyRecorder(form.database)
+            database, sa = form.database, form.sa
+            form.database, form.sa = recorder, SimpleAccess(recorder)
+            try:
+                html = function(form, user, action)
+            finally:
+                form.database, form.sa = database, sa
+            cache.put(key, html, recorder.handles | {handle}, stamp)
+        return html
+    return wrapper
+
 #TODO: Ensure user and privacy levels are accounted for in tables
+@cached_fragment
 def event_table(form, user, action):
     retval = ""
     has_data = False
@@ -193,6 +228,7 @@ def event_table(form, user, action):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def name_table(form, user, action):
     retval = ""
     has_data = False
@@ -639,6 +675,7 @@ def internet_table(form, user, action, urls):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def association_table(form, user, action):
     retval = ""
     has_data = False
@@ -765,6 +802,7 @@ def lds_table(form, user, action, lds_ord_list):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def person_reference_table(form, user, action):
     from gprime.simple import SimpleAccess
     sa = SimpleAccess(form.database)
@@ -835,6 +873,7 @@ def person_reference_table(form, user, action):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def reference_table(form, user, action):
     from gprime.simple import SimpleAccess
     sa = SimpleAccess(form.database)
@@ -862,6 +901,7 @@ def reference_table(form, user, action):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def children_table(form, user, action):
     retval = ""
     has_data = False
@@ -0,0 +1,62 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the change bus between worker processes """
+
+import os
+import asyncio
+import shutil
+import tempfile
+import unittest
+
+from ..changebus import ChangeBus
+
+class ChangeBusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_publish(self):
+        received = {"a": [], "b": [], "c": []}
+        async def run():
+            buses = {}
+            for name in received:
+                buses[name] = ChangeBus(self.directory, name)
+                buses[name].subscribe(received[name].append)
+                buses[name].start()
+            buses["c"].close()
+            # a stale socket, from a process that is gone:
+            open(os.path.join(self.directory, "d.sock"), "w").close()
+            buses["a"].publish({"signal": "person-update", "handles": ["H1"]})
+            await asyncio.sleep(0.1)
+            buses["a"].close()
+            buses["b"].close()
+        asyncio.new_event_loop().run_until_complete(run())
+        self.assertEqual(received["a"], [])
+        self.assertEqual(received["b"], [{"signal": "person-update",
+                                          "handles": ["H1"]}])
+        self.assertEqual(received["c"], [])
+        self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the request executor """
+
+import asyncio
+import threading
+import unittest
+
+import tornado.web
+from tornado.httputil import HTTPServerRequest
+
+from gprime.app.dictionarydb import DictionaryDb
+from ..executor import RequestExecutor, RequestTimeout
+from ..handlers.handlers import BaseHandler
+
+class DictionaryExecutor(RequestExecutor):
+    """
+    Gives each worker thread an empty in-memory database.
+    """
+    def open_database(self):
+        database = DictionaryDb()
+        database.load(None)
+        self.local.database = database
+        return database
+
+class RequestExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = DictionaryExecutor(None, workers=2, image_workers=0,
+                                           timeout=0.2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def run_async(self, coroutine):
+        return asyncio.new_event_loop().run_until_complete(coroutine)
+
+    def test_run(self):
+        def work(database, value):
+            return (database.get_number_of_people(), value,
+                    threading.current_thread().name)
+        count, value, name = self.run_async(self.executor.run(work, 42))
+        self.assertEqual((count, value), (0, 42))
+        self.assertTrue(name.startswith("gprime-request"))
+        self.assertIsNone(self.executor.get_database())
+
+    def test_timeout(self):
+        event = threading.Event()
+        self.assertRaises(RequestTimeout, self.run_async,
+                          self.executor.run(lambda database: event.wait(5)))
+        event.set()
+
+    def test_cancel_queued(self):
+        event = threading.Event()
+        started = []
+        ran = []
+        def block(database):
+            started.append(True)
+            return event.wait(5)
+        async def requests():
+            blockers = [asyncio.ensure_future(self.executor.run(
+                block, timeout=0)) for i in range(2)]
+            queued = asyncio.ensure_future(self.executor.run(
+                lambda database: ran.append(True), timeout=0))
+            # both workers are busy, and the last request is queued:
+            while len(started) < 2:
+                await asyncio.sleep(0.01)
+            queued.cancel() # as when the client disconnects
+            result = await asyncio.gather(queued, return_exceptions=True)
+            event.set()
+            await asyncio.gather(*blockers)
+            return result
+        result = self.run_async(requests())
+        self.assertIsInstance(result[0], asyncio.CancelledError)
+        self.assertEqual(ran, [])
+
+class Connection(object):
+    def set_close_callback(self, callback):
+        pass
+
+class AbandonedRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        request = HTTPServerRequest(method="GET", uri="/",
+                                    connection=Connection())
+        self.handler = BaseHandler(tornado.web.Application(), request)
+
+    def in_worker(self, function):
+        def run():
+            self.handler.worker_thread = threading.get_ident()
+            function()
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+    def respond(self):
+        self.handler.set_status(500)
+        self.handler.set_header("X-Worker", "1")
+        self.handler.write("from the worker")
+        self.handler.finish()
+
+    def test_worker(self):
+        self.in_worker(self.respond)
+        self.assertEqual(self.handler.get_status(), 500)
+        self.assertEqual(self.handler._headers.get("X-Worker"), "1")
+        self.assertEqual(self.handler._write_buffer, [b"from the worker"])
+        self.assertTrue(self.handler.finish_pending)
+
+    def test_abandoned(self):
+        self.handler.abandon()
+        self.in_worker(self.respond)
+        self.assertEqual(self.handler.get_status(), 200)
+        self.assertNotIn("X-Worker", self.handler._headers)
+        self.assertEqual(self.handler._write_buffer, [])
+        self.assertFalse(self.handler.finish_pending)
+        # the IOLoop still answers:
+        self.handler.set_status(504)
+        self.assertEqual(self.handler.get_status(), 504)
+
+if __name__ == "__main__":
+    unittest.main()
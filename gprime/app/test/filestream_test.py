@@ -0,0 +1,135 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for sending files """
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import tornado.web
+import tornado.testing
+import tornado.httpclient
+from tornado.concurrent import Future
+
+from ..handlers.handlers import BaseHandler, run_in_executor, parse_range
+from ..forms.actionform import download_to_user
+
+class DownloadHandler(BaseHandler):
+    @run_in_executor
+    def get(self, filename):
+        download_to_user(os.path.join(self.opts.site_dir, filename), self)
+
+class ShrinkingHandler(DownloadHandler):
+    """
+    The file gets shorter after its first chunk is sent.
+    """
+    def initialize(self, done=None, **kwargs):
+        super().initialize(**kwargs)
+        self.done = done
+
+    def flush(self, *args, **kwargs):
+        with open(os.path.join(self.opts.site_dir, "export.ged"), "r+b") as fp:
+            fp.truncate(1000)
+        return super().flush(*args, **kwargs)
+
+    async def get(self, filename):
+        try:
+            await super().get(filename)
+        except Exception as exc:
+            self.done.set_result(exc)
+            raise
+        self.done.set_result(None)
+
+class FileStreamTest(tornado.testing.AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = bytes(range(256)) * 1000
+        with open(os.path.join(self.directory, "export.ged"), "wb") as fp:
+            fp.write(self.data)
+        self.opts = SimpleNamespace(site_dir=self.directory, accel_redirect="",
+                                    x_sendfile=False)
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory)
+
+    def get_app(self):
+        self.done = Future()
+        return tornado.web.Application([
+            (r"/download/(.*)", DownloadHandler,
+             {"app": SimpleNamespace(executor=None), "opts": self.opts}),
+            (r"/shrinking/(.*)", ShrinkingHandler,
+             {"app": SimpleNamespace(executor=None), "opts": self.opts,
+              "done": self.done})])
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=10-19", 100), (10, 20))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 100))
+        self.assertEqual(parse_range("bytes=-5", 100), (95, 100))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("lines=1-2", 100))
+        self.assertRaises(ValueError, parse_range, "bytes=100-", 100)
+
+    def test_download(self):
+        response = self.fetch("/download/export.ged")
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, self.data)
+        self.assertEqual(response.headers["Content-Disposition"],
+                         "attachment; filename*=UTF-8''export.ged")
+        etag = response.headers["Etag"]
+        # resume:
+        response = self.fetch("/download/export.ged", headers={
+            "Range": "bytes=100000-", "If-Range": etag})
+        self.assertEqual(response.code, 206)
+        self.assertEqual(response.body, self.data[100000:])
+        self.assertEqual(response.headers["Content-Range"],
+                         "bytes 100000-255999/256000")
+        # the file changed since:
+        response = self.fetch("/download/export.ged", headers={
+            "Range": "bytes=100000-", "If-Range": '"0-0"'})
+        self.assertEqual(response.code, 200)
+        response = self.fetch("/download/export.ged", headers={
+            "Range": "bytes=300000-"})
+        self.assertEqual(response.code, 416)
+        self.assertEqual(self.fetch("/download/none.ged").code, 404)
+
+    def test_shorter_file(self):
+        # the response is cut short, rather than finished without all of
+        # its Content-Length:
+        self.assertRaises(tornado.httpclient.HTTPClientError, self.fetch,
+                          "/shrinking/export.ged")
+        self.assertIsNone(self.io_loop.run_sync(lambda: self.done))
+
+    def test_accel_redirect(self):
+        self.opts.accel_redirect = "/protected/"
+        response = self.fetch("/download/export.ged")
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.headers["X-Accel-Redirect"],
+                         "/protected/export.ged")
+
+if __name__ == "__main__":
+    unittest.main()
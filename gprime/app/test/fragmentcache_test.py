@@ -0,0 +1,148 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the fragment cache """
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from gprime.lib import Person, Note
+from gprime.db import DbTxn
+from gprime.dbstate import DbState
+from gprime.app.dictionarydb import DictionaryDb
+from ..fragmentcache import FragmentCache, DependencyRecorder, EVERYTHING
+from ..template_functions import cached_fragment
+
+STAMP = (1, 0)
+
+class FragmentCacheTest(unittest.TestCase):
+
+    def test_lru(self):
+        cache = FragmentCache(2)
+        cache.put("a", "A", ["h1"], STAMP)
+        cache.put("b", "B", ["h2"], STAMP)
+        self.assertEqual(cache.get("a", STAMP), "A")
+        cache.put("c", "C", ["h3"], STAMP)
+        self.assertEqual(cache.get("a", STAMP), "A")
+        self.assertIsNone(cache.get("b", STAMP))
+        self.assertNotIn("h2", cache.dependents)
+
+    def test_invalidate(self):
+        cache = FragmentCache()
+        cache.put("a", "A", ["h1", "h2"], STAMP)
+        cache.put("b", "B", ["h3"], STAMP)
+        cache.put("c", "C", [EVERYTHING], STAMP)
+        cache.invalidate(["h2"])
+        self.assertIsNone(cache.get("a", STAMP))
+        self.assertIsNone(cache.get("c", STAMP))
+        self.assertEqual(cache.get("b", STAMP), "B")
+        cache.database_changed("person-update", None)
+        self.assertIsNone(cache.get("b", STAMP))
+
+    def test_change_stamp(self):
+        """
+        A change that sends no signal, as from another process, drops
+        the fragments rendered before it.
+        """
+        db = DictionaryDb()
+        db.load(None)
+        cache = FragmentCache()
+        stamp = db.get_change_stamp()
+        cache.put("a", "A", ["h1"], stamp)
+        self.assertEqual(cache.get("a", db.get_change_stamp()), "A")
+        with DbTxn("Add", db, batch=True) as trans:
+            db.add_note(Note(), trans)
+        self.assertIsNone(cache.get("a", db.get_change_stamp()))
+        self.assertEqual(cache.dependents, {})
+
+    def test_recorder(self):
+        db = DictionaryDb()
+        db.load(None)
+        note = Note()
+        person = Person()
+        with DbTxn("Add", db, batch=True) as trans:
+            db.add_note(note, trans)
+            person.add_note(note.handle)
+            db.add_person(person, trans)
+        recorder = DependencyRecorder(db)
+        recorder.get_person_from_handle(person.handle)
+        recorder.get_table_func("Note", "handle_func")(note.handle)
+        self.assertEqual(recorder.handles, {person.handle, note.handle})
+        recorder.find_backlink_handles(note.handle)
+        self.assertIn(EVERYTHING, recorder.handles)
+
+    def test_worker_thread(self):
+        """
+        Fragments rendered in a request worker thread, with its own
+        connection to a SQLite database, as with --request-workers.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        dbdir = os.path.join(directory, "db")
+        db = DbState().create_database(dbdir)
+        self.addCleanup(db.close, update=False)
+        person = Person()
+        with DbTxn("Add", db, batch=True) as trans:
+            db.add_person(person, trans)
+        db.transaction_backend_commit()
+        calls = []
+        @cached_fragment
+        def note_count(form, user, action):
+            calls.append(action)
+            person = form.database.get_person_from_handle(form.instance.handle)
+            return str(len(person.get_note_list()))
+        app = SimpleNamespace(
+            database=db, fragments=FragmentCache(),
+            get_user_data=lambda user: {"language": "en", "css": "Web"})
+        handler = SimpleNamespace(app=app,
+                                  request=SimpleNamespace(method="GET"))
+        def render(database):
+            form = SimpleNamespace(handler=handler, instance=person,
+                                   view="person", database=database,
+                                   sa=None)
+            return note_count(form, "user", "view")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            database = executor.submit(
+                lambda: DbState().open_database(dbdir)).result()
+            try:
+                self.assertEqual(executor.submit(render, database).result(),
+                                 "0")
+                self.assertEqual(executor.submit(render, database).result(),
+                                 "0")
+                self.assertEqual(len(calls), 1)
+                # changed through the connection of another worker:
+                with DbTxn("Edit", db, batch=True) as trans:
+                    note = Note()
+                    db.add_note(note, trans)
+                    person.add_note(note.handle)
+                    db.commit_person(person, trans)
+                db.transaction_backend_commit()
+                self.assertEqual(executor.submit(render, database).result(),
+                                 "1")
+                self.assertEqual(len(calls), 2)
+            finally:
+                executor.submit(database.close, update=False).result()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the image cache """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ..imagecache import ImageCache, HOT_FILE_SIZE
+
+class ImageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_evict(self):
+        cache = ImageCache(self.directory, max_bytes=11000, hot_bytes=2500)
+        for name in ["a", "b", "c"]:
+            cache.put("H1/full/%s/0/default.jpg" % name, b"x" * 3000)
+        cache.put("H1/info.json", b"{}")
+        # recently used are kept:
+        self.assertEqual(cache.get("H1/full/a/0/default.jpg"), b"x" * 3000)
+        self.assertIsNone(cache.get("H1/full/none/0/default.jpg"))
+        cache.put("H2/full/a/0/default.jpg", b"y" * 3000)
+        self.assertFalse(cache.exists("H1/full/b/0/default.jpg"))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, "H1/full/b/0/default.jpg")))
+        for path in ["H1/full/a/0/default.jpg", "H1/full/c/0/default.jpg",
+                     "H1/info.json", "H2/full/a/0/default.jpg"]:
+            self.assertTrue(cache.exists(path))
+        stats = cache.get_stats()
+        self.assertEqual((stats["size"], stats["files"], stats["evictions"]),
+                         (9002, 4, 1))
+        self.assertEqual((stats["hits"], stats["misses"],
+                          stats["bytes_served"]), (1, 1, 3000))
+        # only the most recent small files are in memory:
+        self.assertEqual(stats["hot_size"], 2)
+        cache.put("H1/full/small/0/default.jpg", b"z" * 2000)
+        os.remove(os.path.join(self.directory, "H1/full/small/0/default.jpg"))
+        self.assertEqual(cache.get("H1/full/small/0/default.jpg"), b"z" * 2000)
+        self.assertEqual(cache.get_stats()["hot_hits"], 1)
+        cache.remove("H1")
+        self.assertFalse(cache.exists("H1/full/small/0/default.jpg"))
+        self.assertEqual(cache.get_stats()["files"], 1)
+        cache.close()
+
+    def test_scan(self):
+        os.makedirs(os.path.join(self.directory, "H1", "full"))
+        with open(os.path.join(self.directory, "H1", "full", "tile.jpg"),
+                  "wb") as fp:
+            fp.write(b"x" * (HOT_FILE_SIZE + 1))
+        cache = ImageCache(self.directory)
+        self.assertEqual(cache.get_stats()["files"], 1)
+        self.assertEqual(len(cache.get("H1/full/tile.jpg")), HOT_FILE_SIZE + 1)
+        self.assertEqual(cache.get_stats()["hot_files"], 0)
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
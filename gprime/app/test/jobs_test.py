@@ -0,0 +1,116 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the background job store """
+
+import unittest
+import tempfile
+import shutil
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from ..jobs import JobStore, JobUser, JobQueue, QUEUED, RUNNING, FAILED
+
+class JobStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.site_dir = tempfile.mkdtemp()
+        self.store = JobStore(self.site_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.site_dir)
+
+    def test_add_get(self):
+        job_id = self.store.add("demo", "Report", "Summary", "summary",
+                                {"off": "pdf"})
+        job = self.store.get(job_id)
+        self.assertEqual(job["status"], QUEUED)
+        self.assertEqual(job["options"], {"off": "pdf"})
+        self.assertEqual(job["progress"], 0)
+
+    def test_persistent(self):
+        job_id = self.store.add("demo", "Export", "JSON", "ex_json", {})
+        store = JobStore(self.site_dir)
+        self.assertEqual(store.get(job_id)["name"], "JSON")
+
+    def test_get_jobs(self):
+        self.store.add("demo", "Report", "Summary", "summary", {})
+        job_id = self.store.add("other", "Report", "Summary", "summary", {})
+        self.store.update(job_id, status=RUNNING)
+        self.assertEqual(len(self.store.get_jobs()), 2)
+        self.assertEqual(len(self.store.get_jobs(username="demo")), 1)
+        self.assertEqual([job["job_id"] for job in
+                          self.store.get_jobs(status=RUNNING)], [job_id])
+
+    def test_progress(self):
+        job_id = self.store.add("demo", "Import", "GEDCOM", "ged", {})
+        user = JobUser(self.store, job_id)
+        user.callback(42)
+        self.assertEqual(self.store.get(job_id)["progress"], 42)
+        with user.progress("Title", "Importing", 4) as step:
+            step()
+        job = self.store.get(job_id)
+        self.assertEqual(job["progress"], 25)
+        self.assertEqual(job["message"], "Importing")
+
+class FakeExecutor(object):
+    """ Keeps the futures of the jobs, rather than running them """
+    def __init__(self):
+        self.futures = {}
+        self.stopped = False
+
+    def submit(self, function, site_dir, job_id):
+        self.futures[job_id] = Future()
+        return self.futures[job_id]
+
+    def shutdown(self, wait=True):
+        self.stopped = True
+
+class FakeJobQueue(JobQueue):
+    def _make_executor(self):
+        return FakeExecutor()
+
+class JobQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.site_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.site_dir)
+
+    def test_broken_pool(self):
+        queue = FakeJobQueue(self.site_dir, restart=False)
+        running = queue.submit("demo", "Report", "Summary", "summary", {})
+        queued = queue.submit("demo", "Export", "JSON", "ex_json", {})
+        queue.store.update(running, status=RUNNING)
+        broken = queue.executor
+        for future in broken.futures.values():
+            future.set_exception(BrokenProcessPool("A worker died"))
+        self.assertIsNot(queue.executor, broken)
+        self.assertTrue(broken.stopped)
+        # the job that had not started runs in the new pool:
+        self.assertEqual(list(queue.executor.futures), [queued])
+        self.assertEqual(queue.store.get(queued)["status"], QUEUED)
+        self.assertEqual(queue.store.get(running)["status"], FAILED)
+        queue.submit("demo", "Report", "Summary", "summary", {})
+        self.assertEqual(len(queue.executor.futures), 2)
+
+if __name__ == "__main__":
+    unittest.main()
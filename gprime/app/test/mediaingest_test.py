@@ -0,0 +1,101 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for content-addressed media ingestion """
+
+import os
+import unittest
+import tempfile
+import shutil
+
+from gprime.lib import Media
+from gprime.db import DbTxn
+from gprime.dbstate import DbState
+from ..mediaingest import (ingest_file, ingest_media, set_attribute,
+                           make_path_relative, get_content_path)
+
+class MediaIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.media_dir = os.path.join(self.directory, "media")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_file(self, name, data):
+        filename = os.path.join(self.directory, name)
+        with open(filename, "wb") as fp:
+            fp.write(data)
+        return filename
+
+    def test_make_path_relative(self):
+        self.assertEqual(make_path_relative("C:\\photos\\a.jpg"),
+                         "photos/a.jpg")
+        self.assertEqual(make_path_relative("/home/me/a.jpg"), "home/me/a.jpg")
+
+    def test_content_path(self):
+        self.assertEqual(get_content_path("0123abcd", "/x/Scan.JPG"),
+                         "01/0123abcd.jpg")
+
+    def test_duplicates_stored_once(self):
+        first = self.make_file("a.txt", b"same content")
+        second = self.make_file("b.txt", b"same content")
+        checksum1, relative1, dimensions = ingest_file(first, self.media_dir)
+        checksum2, relative2, dimensions = ingest_file(second, self.media_dir)
+        self.assertEqual(checksum1, checksum2)
+        self.assertEqual(relative1, relative2)
+        self.assertIsNone(dimensions)
+        files = [filename for (path, dirs, filenames)
+                 in os.walk(self.media_dir) for filename in filenames]
+        self.assertEqual(len(files), 1)
+
+    def test_set_attribute(self):
+        media = Media()
+        set_attribute(media, "Width", "10")
+        set_attribute(media, "Width", "20")
+        attributes = media.get_attribute_list()
+        self.assertEqual(len(attributes), 1)
+        self.assertEqual(attributes[0].get_value(), "20")
+
+    def test_ingest_media(self):
+        dbdir = os.path.join(self.directory, "db")
+        database = DbState().create_database(dbdir)
+        filename = self.make_file("scan.txt", b"content")
+        with DbTxn("Add", database, batch=True) as trans:
+            media = Media()
+            media.set_path(filename)
+            database.add_media(media, trans)
+        self.assertEqual(ingest_media(database, self.media_dir), (1, 0))
+        database.close()
+        # the media path and objects were committed:
+        database = DbState().make_database("dbapi")
+        database.load(dbdir)
+        try:
+            self.assertEqual(database.get_mediapath(),
+                             os.path.abspath(self.media_dir))
+            media = database.get_media_from_handle(media.handle)
+            self.assertEqual(media.get_path(),
+                             get_content_path(media.get_checksum(), filename))
+        finally:
+            database.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the conditional GET of pages """
+
+import email.utils
+import threading
+import time
+import unittest
+
+import tornado.web
+from tornado.httputil import HTTPServerRequest, HTTPHeaders
+
+from gprime.app.dictionarydb import DictionaryDb
+from ..handlers.handlers import BaseHandler
+
+class App(tornado.web.Application):
+    def get_user_data(self, user):
+        return {"language": "en", "css": "Web_Mainz.css"}
+
+class Connection(object):
+    def set_close_callback(self, callback):
+        pass
+
+class NotModifiedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database = DictionaryDb()
+        self.database.load(None)
+
+    def get(self, **headers):
+        """
+        Run check_not_modified for a GET with the given headers, in a
+        worker thread, and return the handler.
+        """
+        request = HTTPServerRequest(method="GET", uri="/person/",
+                                    headers=HTTPHeaders(headers),
+                                    connection=Connection())
+        handler = BaseHandler(App(), request, app=App(),
+                              database=self.database)
+        handler.current_user = None
+        def run():
+            handler.worker_thread = threading.get_ident()
+            handler.not_modified = handler.check_not_modified()
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(handler.not_modified, handler.finish_pending)
+        return handler
+
+    def set_changed(self, changed):
+        count = self.database.get_change_stamp()[0]
+        self.database.set_metadata("change_stamp", [count + 1, changed])
+
+    def test_etag(self):
+        etag = self.get()._headers["Etag"]
+        handler = self.get(**{"If-None-Match": etag})
+        self.assertTrue(handler.not_modified)
+        self.assertEqual(handler.get_status(), 304)
+        self.database.stamp_change()
+        handler = self.get(**{"If-None-Match": etag})
+        self.assertFalse(handler.not_modified)
+        self.assertNotEqual(handler._headers["Etag"], etag)
+
+    def test_if_modified_since(self):
+        self.set_changed(1000.5)
+        modified = self.get()._headers["Last-Modified"]
+        self.assertEqual(email.utils.parsedate_to_datetime(
+            modified).timestamp(), 1001)
+        self.assertTrue(self.get(**{"If-Modified-Since": modified})
+                        .not_modified)
+        self.set_changed(1001.1)
+        self.assertFalse(self.get(**{"If-Modified-Since": modified})
+                         .not_modified)
+        self.assertFalse(self.get(**{"If-Modified-Since": "garbage"})
+                         .not_modified)
+
+    def test_current_second(self):
+        """
+        A change in the current second has no Last-Modified yet, since
+        another change may follow within the second.
+        """
+        self.set_changed(time.time() + 10)
+        self.assertNotIn("Last-Modified", self.get()._headers)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the searches of the person form """
+
+import unittest
+
+from gprime.db import DbTxn
+from gprime.db.test.phonetic_test import make_person
+from gprime.app.dictionarydb import DictionaryDb
+from gprime.plugins.db.dbapi.inmemorydb import InMemoryDB
+from ..forms.personform import PersonForm
+
+class App(object):
+    def get_translate_func(self, user):
+        return lambda text: text
+
+class Handler(object):
+    def __init__(self, database):
+        self.database = database
+        self.app = App()
+        self.current_user = None
+
+class PersonFormTest(unittest.TestCase):
+
+    def check_duplicates(self, db):
+        people = [make_person("Jon", "Smyth"),
+                  make_person("John", "Smith"),
+                  make_person("Jane", "Andersen"),
+                  make_person("Jean", "Anderson"),
+                  make_person("Peter", "Anderson"),
+                  make_person("Mary", "Smith")]
+        with DbTxn("Add", db, batch=True) as trans:
+            for person in people:
+                db.add_person(person, trans)
+        form = PersonForm(Handler(db))
+        def search(search):
+            form.select(search=search)
+            return sorted([row["gid"] for row in form.rows])
+        gids = [person.gid for person in people]
+        self.assertEqual(search("duplicate=%"), sorted(gids[:4]))
+        self.assertEqual(search("duplicate=%s" % gids[0]), sorted(gids[:2]))
+        self.assertEqual(search("duplicate=%s" % gids[4]), [gids[4]])
+        self.assertEqual(search("duplicate=%, given=Jane"), [gids[2]])
+        self.assertRaises(Exception, search, "duplicate=I9999")
+
+    def test_duplicates(self):
+        db = DictionaryDb()
+        db.load(None)
+        self.check_duplicates(db)
+
+    def test_duplicates_sqlite(self):
+        db = InMemoryDB()
+        db.load(None)
+        self.check_duplicates(db)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the records cache """
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from gprime.const import LOCALE
+from gprime.lib import Person, Event, EventRef, EventType, Date, Surname
+from gprime.db import DbTxn
+from gprime.dbstate import DbState
+from gprime.app.dictionarydb import DictionaryDb
+from ..recordscache import RecordsCache
+
+USER_DATA = {"language": "en", "glocale": LOCALE}
+
+class RecordsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = DictionaryDb()
+        self.db.load(None)
+
+    def add_person(self, name, born, died):
+        person = Person()
+        surname = Surname()
+        surname.set_surname(name)
+        person.primary_name.add_surname(surname)
+        with DbTxn("Add", self.db, batch=True) as trans:
+            for (event_type, year) in [(EventType.BIRTH, born),
+                                       (EventType.DEATH, died)]:
+                event = Event()
+                event.set_type(event_type)
+                event.set_date_object(Date(year, 1, 1))
+                self.db.add_event(event, trans)
+                ref = EventRef()
+                ref.set_reference_handle(event.handle)
+                person.add_event_ref(ref)
+                if event_type == EventType.BIRTH:
+                    person.set_birth_ref(ref)
+                else:
+                    person.set_death_ref(ref)
+            self.db.add_person(person, trans)
+
+    def oldest(self, cache):
+        # (the records are found in the background)
+        cache.get(self.db, USER_DATA)
+        cache.wait()
+        records = dict(cache.get(self.db, USER_DATA))
+        return sorted([name for (name, url, value)
+                       in records["Person died at oldest age"]])
+
+    def test_records(self):
+        cache = RecordsCache(1)
+        self.add_person("Smith", 1800, 1880)
+        self.add_person("Jones", 1810, 1850)
+        self.assertEqual(self.oldest(cache), ["Smith"])
+        records = cache.get(self.db, USER_DATA)
+        self.assertIs(cache.get(self.db, USER_DATA), records)
+        # ties with the first are records too:
+        self.add_person("Garner", 1900, 1980)
+        self.assertEqual(self.oldest(cache), ["Garner", "Smith"])
+        self.add_person("Lewis", 1700, 1790)
+        self.assertEqual(self.oldest(cache), ["Lewis"])
+
+    def test_background(self):
+        cache = RecordsCache(1)
+        self.add_person("Smith", 1800, 1880)
+        self.assertEqual(self.oldest(cache), ["Smith"])
+        records = cache.get(self.db, USER_DATA)
+        # while the records are found again, the old ones are returned:
+        started = threading.Event()
+        done = threading.Event()
+        find = cache.find
+        def slow_find(database, user_data):
+            started.set()
+            done.wait(10)
+            return find(database, user_data)
+        cache.find = slow_find
+        self.add_person("Lewis", 1700, 1790)
+        self.assertIs(cache.get(self.db, USER_DATA), records)
+        self.assertTrue(started.wait(10))
+        self.assertIs(cache.get(self.db, USER_DATA), records)
+        self.assertEqual(len(cache.threads), 1)
+        done.set()
+        self.assertEqual(self.oldest(cache), ["Lewis"])
+        # errors keep the old records:
+        cache.find = lambda database, user_data: 1 / 0
+        self.add_person("Jones", 1600, 1700)
+        self.assertEqual(self.oldest(cache), ["Lewis"])
+        self.assertEqual(cache.threads, {})
+
+    def test_database_dir(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.db = DbState().create_database(os.path.join(directory, "db"))
+        self.addCleanup(self.db.close, update=False)
+        self.add_person("Smith", 1800, 1880)
+        # the records are found with another connection:
+        cache = RecordsCache(1, os.path.join(directory, "db"))
+        self.assertEqual(cache.get(self.db, USER_DATA), [])
+        self.assertEqual(self.oldest(cache), ["Smith"])
+
+if __name__ == "__main__":
+    unittest.main()
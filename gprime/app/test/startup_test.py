@@ -0,0 +1,70 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+
+""" Unittest for the startup profile """
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from ..startup import ImportProfiler, requested
+
+class StartupTest(unittest.TestCase):
+
+    def test_requested(self):
+        self.assertTrue(requested(["--site-dir=x", "--profile-startup"]))
+        self.assertTrue(requested(["--profile-startup=True"]))
+        self.assertFalse(requested(["--profile-startup=false"]))
+        self.assertFalse(requested(["--site-dir=x"]))
+
+    def test_imports(self):
+        directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(directory, "startuppkg"))
+        with open(os.path.join(directory, "startuppkg", "__init__.py"),
+                  "w") as fp:
+            fp.write("from . import inner\n")
+        open(os.path.join(directory, "startuppkg", "inner.py"), "w").close()
+        sys.path.insert(0, directory)
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import startuppkg
+        finally:
+            profiler.uninstall()
+            sys.path.remove(directory)
+            shutil.rmtree(directory)
+        times = dict((name, (total, own))
+                     for (name, total, own) in profiler.modules)
+        self.assertEqual(set(times), {"startuppkg", "startuppkg.inner"})
+        # the package's own time excludes its inner module:
+        (total, own) = times["startuppkg"]
+        self.assertAlmostEqual(own, total - times["startuppkg.inner"][0])
+        profiler.mark("imports")
+        output = io.StringIO()
+        profiler.report(file=output)
+        self.assertIn("startuppkg.inner", output.getvalue())
+        self.assertIn("imports", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the image tiler """
+
+import os
+import shutil
+import tempfile
+import unittest
+import time
+
+from PIL import Image
+
+from gprime.lib import Media
+from gprime.db import DbTxn
+from gprime.dbstate import DbState
+from ..tiler import get_scale_factors, get_tiles, make_tiles, Tiler
+from ..handlers.imagehandler import process_image
+
+class TilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "scan.jpg")
+        Image.new("RGB", (1300, 700), (200, 100, 50)).save(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_tiles(self):
+        self.assertEqual(get_scale_factors(1300, 700), [1, 2, 4, 8])
+        self.assertEqual(
+            [path for (region, size, path) in get_tiles(1300, 700, 2)],
+            ["0,0,1024,700/512,/0/default.jpg",
+             "1024,0,276,700/138,/0/default.jpg"])
+        self.assertEqual(get_tiles(1300, 700, 4)[0][2],
+                         "full/325,/0/default.jpg")
+        cache_dir = os.path.join(self.directory, "cache")
+        count = make_tiles(self.filename, cache_dir, "H1")
+        self.assertEqual(count, 6 + 2 + 1 + 1)
+        with Image.open(os.path.join(
+                cache_dir, "H1", "1024,0,276,700/138,/0/default.jpg")) as tile:
+            self.assertEqual(tile.size, (138, 350))
+        with Image.open(os.path.join(
+                cache_dir, "H1", "0,512,512,188/full/0/default.jpg")) as tile:
+            self.assertEqual(tile.size, (512, 188))
+        # already made:
+        self.assertEqual(make_tiles(self.filename, cache_dir, "H1"), 0)
+
+    def test_scan(self):
+        """
+        The images added to the database by another process, which
+        sends no signal, are tiled when the change stamp moves.
+        """
+        database_dir = os.path.join(self.directory, "database")
+        database = DbState().create_database(database_dir)
+        media = Media()
+        media.set_path(self.filename)
+        media.set_mime_type("image/jpeg")
+        with DbTxn("Add", database, batch=True) as trans:
+            database.add_media(media, trans)
+        stamp = database.get_change_stamp()
+        database.close()
+        cache_dir = os.path.join(self.directory, "cache")
+        tiled = []
+        tiler = Tiler(cache_dir, 1, callback=tiled.append,
+                      database_dir=database_dir)
+        try:
+            tiler.scan(stamp)
+            for i in range(100):
+                if tiled:
+                    break
+                time.sleep(0.1)
+            self.assertEqual(tiled, [media.handle])
+            self.assertTrue(os.path.exists(os.path.join(
+                cache_dir, media.handle, "tiles.json")))
+            self.assertTrue(os.path.exists(tiler.since_file))
+            tiler.scan(stamp) # nothing changed
+            self.assertFalse(tiler.scanning)
+        finally:
+            tiler.shutdown()
+
+    def test_process_draft(self):
+        data = process_image(self.filename, 1300, 700, (650, 350, 650, 350),
+                             (100, 53), None, 0, "default", "PNG", 0, "",
+                             90)
+        path = os.path.join(self.directory, "out.png")
+        with open(path, "wb") as fp:
+            fp.write(data)
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (100, 53))
+            self.assertEqual(image.getpixel((50, 26)), (200, 100, 50))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Precomputed tiles of the image server.
+
+When an image is added, its tile pyramid (the tiles of each scale factor
+of its info.json) is made in a worker process, and written to the image
+cache under the canonical URL of each tile, so that deep-zoom viewers
+get them from the cache instead of having the original decoded again
+for each tile. The original is decoded once, and each scale factor is
+scaled down from the one before.
+
+Images may be added by other processes (job workers, --import-file and
+the command line), which send no signals to the server; so whenever the
+change stamp of the database moves, the media changed since the last
+scan are looked up in a worker process too.
+"""
+
+## Python imports
+import os
+import json
+import uuid
+import math
+import time
+import logging
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+LOG = logging.getLogger(".tiler")
+
+TILE_SIZE = 512    # width and height of tiles, in output pixels
+MIN_SIZE = 50      # smallest size of the image of a scale factor
+JPEG_QUALITY = 90
+# Objects are dated when they are made, and may be committed later (for
+# example, at the end of an import); so each scan looks back this many
+# seconds before the time of the last one:
+SCAN_MARGIN = 3600
+
+def get_scale_factors(width, height, min_size=MIN_SIZE):
+    """
+    Return the scale factors (1, 2, 4, ...) of an image, as advertised
+    in its info.json: down to a size of min_size.
+    """
+    retval = []
+    scale = 1
+    while (float(height) / scale > min_size and
+           float(width) / scale > min_size):
+        retval.append(scale)
+        scale *= 2
+    return retval
+
+def get_tiles(width, height, scale, tile_size=TILE_SIZE):
+    """
+    Return the tiles of a scale factor, as a list of ((x, y, w, h),
+    (sizeW, sizeH), path), where path is the canonical URL of the tile,
+    relative to the identifier (as ImageHandler makes it).
+    """
+    retval = []
+    step = tile_size * scale
+    for y in range(0, height, step):
+        for x in range(0, width, step):
+            w = min(step, width - x)
+            h = min(step, height - y)
+            sizeW = int(math.ceil(w / float(scale)))
+            sizeH = int(h * (sizeW / float(w)))
+            if x == 0 and y == 0 and w == width and h == height:
+                region = "full"
+            else:
+                region = "{0},{1},{2},{3}".format(x, y, w, h)
+            if (sizeW == width and sizeH == height) or (w == sizeW and
+                                                        h == sizeH):
+                size = "full"
+            else:
+                size = "{0},".format(sizeW)
+            retval.append(((x, y, w, h), (sizeW, sizeH),
+                           "{0}/{1}/0/default.jpg".format(region, size)))
+    return retval
+
+def write_file(filename, data):
+    """
+    Write a file under a temporary name first, so that a partial file
+    is never served.
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temp = "%s.%s.tmp" % (filename, uuid.uuid4().hex)
+    with open(temp, "wb") as fp:
+        fp.write(data)
+    os.replace(temp, filename)
+
+def make_tiles(filename, cache_dir, identifier, tile_size=TILE_SIZE,
+               min_size=MIN_SIZE, jpeg_quality=JPEG_QUALITY):
+    """
+    Make the tiles of all scale factors of an image, unless they were
+    made from this version of the file already. Returns the number of
+    tiles made.
+
+    This runs in a worker process, so all arguments are plain values.
+    """
+    import io
+    from PIL import Image
+    stat = os.stat(filename)
+    source = {"filename": filename, "mtime": stat.st_mtime,
+              "size": stat.st_size}
+    done_file = os.path.join(cache_dir, identifier, "tiles.json")
+    if os.path.exists(done_file):
+        with open(done_file) as fp:
+            if json.load(fp).get("source") == source:
+                return 0
+    image = Image.open(filename)
+    (width, height) = image.size
+    if width <= tile_size and height <= tile_size:
+        image.close()
+        return 0 # served whole
+    level = image.convert("RGB") if image.mode not in ["RGB", "L"] else image
+    level.load()
+    image = None
+    count = 0
+    for scale in get_scale_factors(width, height, min_size):
+        levelW = int(math.ceil(width / float(scale)))
+        levelH = int(math.ceil(height / float(scale)))
+        if level.size != (levelW, levelH):
+            level = level.resize((levelW, levelH))
+        for ((x, y, w, h), (sizeW, sizeH), path) in get_tiles(
+                width, height, scale, tile_size):
+            left = x // scale
+            top = y // scale
+            tile = level.crop((left, top,
+                               min(left + int(math.ceil(w / scale)), levelW),
+                               min(top + int(math.ceil(h / scale)), levelH)))
+            if tile.size != (sizeW, sizeH):
+                tile = tile.resize((sizeW, sizeH))
+            output = io.BytesIO()
+            tile.save(output, format="JPEG", quality=jpeg_quality)
+            write_file(os.path.join(cache_dir, identifier, path),
+                       output.getvalue())
+            count += 1
+    write_file(done_file, json.dumps({"source": source,
+                                      "tiles": count}).encode("utf-8"))
+    return count
+
+def find_images(database_dir, since):
+    """
+    Return (time, images), where images are the (handle, filename) of
+    the images of the family tree in database_dir that were changed at
+    or after since (in seconds), and time is when it looked.
+
+    This runs in a worker process, with a database connection of its own.
+    """
+    from gprime.dbstate import DbState
+    from gprime.utils.file import media_path_full
+    checked = int(time.time())
+    database = DbState().open_database(database_dir)
+    if database is None:
+        raise IOError("Unable to open %s" % database_dir)
+    images = []
+    try:
+        for media in database.iter_changed("Media", since):
+            if media.get_mime_type().startswith("image/"):
+                filename = media_path_full(database, media.get_path())
+                if os.path.isfile(filename):
+                    images.append((media.handle, filename))
+    finally:
+        database.close(update=False)
+    return (checked, images)
+
+class Tiler(object):
+    """
+    Makes the tiles of images in a pool of worker processes, one job
+    per image at a time.
+
+    :param cache_dir: the cache folder of the image server
+    :param workers: number of worker processes
+    :param callback: called with the identifier of an image, when tiles
+                     of it were made
+    :param database_dir: the family tree whose images scan() looks up
+    """
+    def __init__(self, cache_dir, workers=1, callback=None,
+                 database_dir=None):
+        self.cache_dir = cache_dir
+        self.callback = callback
+        self.database_dir = database_dir
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.stamp = None # database change stamp of the last scan
+        self.scanning = False
+        self.since_file = os.path.join(cache_dir, "tiles-since.json")
+
+    def scan(self, stamp):
+        """
+        Make the tiles of the images that were added or changed since
+        the last scan, in any process, if the database change stamp is
+        not the one of the last scan. The media are looked up in the
+        background.
+        """
+        with self.lock:
+            if self.scanning or stamp == self.stamp:
+                return
+            self.scanning = True
+            self.stamp = stamp
+        since = 0
+        if os.path.exists(self.since_file):
+            with open(self.since_file) as fp:
+                since = max(json.load(fp)["since"] - SCAN_MARGIN, 0)
+        future = self.executor.submit(find_images, self.database_dir, since)
+        future.add_done_callback(self._scanned)
+
+    def _scanned(self, future):
+        with self.lock:
+            self.scanning = False
+        if future.cancelled():
+            return
+        try:
+            (checked, images) = future.result()
+        except Exception:
+            LOG.warning("Unable to look up the images of %s",
+                        self.database_dir, exc_info=True)
+            with self.lock:
+                self.stamp = None # try again
+            return
+        for (identifier, filename) in images:
+            self.submit(identifier, filename)
+        write_file(self.since_file,
+                   json.dumps({"since": checked}).encode("utf-8"))
+
+    def submit(self, identifier, filename):
+        """
+        Make the tiles of an image, in the background.
+        """
+        with self.lock:
+            if identifier in self.pending:
+                return
+            self.pending.add(identifier)
+        future = self.executor.submit(make_tiles, filename, self.cache_dir,
+                                      identifier)
+        future.add_done_callback(functools.partial(self._done, identifier))
+
+    def _done(self, identifier, future):
+        with self.lock:
+            self.pending.discard(identifier)
+        if future.cancelled():
+            return
+        try:
+            count = future.result()
+        except Exception:
+            LOG.warning("Unable to make the tiles of %s", identifier,
+                        exc_info=True)
+        else:
+            if count:
+                LOG.info("Made %s tiles of %s", count, identifier)
+                if self.callback:
+                    self.callback(identifier)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
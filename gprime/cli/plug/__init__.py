@@ -36,6 +36,8 @@
 import traceback
 import os
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 import logging
 LOG = logging.getLogger(".")
@@ -47,7 +49,8 @@ LOG = logging.getLogger(".")
 #-------------------------------------------------------------------------
 from gprime.plug import BasePluginManager
 from gprime.plug.docgen import (StyleSheet, StyleSheetList, PaperStyle,
-                                    PAPER_PORTRAIT, PAPER_LANDSCAPE, graphdoc)
+                                    PAPER_PORTRAIT, PAPER_LANDSCAPE, graphdoc,
+                                    RecordDoc)
 from gprime.plug.menu import (FamilyOption, PersonOption, NoteOption,
                                   MediaOption, PersonListOption, NumberOption,
                                   BooleanOption, DestinationOption, Option,
@@ -753,7 +756,13 @@ def cl_book(database, name, book, options_str_dict, username):
     """
     function to actually run the selected book,
     which in turn runs whatever reports the book has in it
+
+    The items are run by "jobs" worker processes (one per CPU by default),
+    each on its own read-only connection to the database, and merged into
+    the document in order.
     """
+    jobs = options_str_dict.pop('jobs', None)
+    jobs = int(jobs) if jobs else (os.cpu_count() or 1)
 
     clr = CommandLineReport(database, name, CATEGORY_BOOK,
                             ReportOptions, options_str_dict, username)
@@ -763,13 +772,12 @@ def cl_book(database, name, book, options_str_dict, username):
         return
 
     # write report
-    doc = clr.format(None,
-                     PaperStyle(clr.paper, clr.orien, clr.marginl,
-                                clr.marginr, clr.margint, clr.marginb))
-    user = User()
-    rptlist = []
+    paper_style = PaperStyle(clr.paper, clr.orien, clr.marginl,
+                             clr.marginr, clr.margint, clr.marginb)
+    doc = clr.format(None, paper_style)
     selected_style = StyleSheet()
-    for item in book.get_item_list():
+    items = book.get_item_list()
+    for item in items:
 
         # The option values were loaded magically by the book parser.
         # But they still need to be applied to the menu options.
@@ -780,34 +788,85 @@ def cl_book(database, name, book, options_str_dict, username):
             if menu_option:
                 menu_option.set_value(opt_dict[optname])
 
-        item.option_class.set_document(doc)
-        report_class = item.get_write_item()
-        obj = (write_book_item(database,
-                               report_class, item.option_class, user),
-               item.get_translated_name())
-        if obj:
-            append_styles(selected_style, item)
-            rptlist.append(obj)
+        append_styles(selected_style, item)
 
     doc.set_style_sheet(selected_style)
     doc.open(clr.option_class.get_output())
     doc.init()
     newpage = 0
     err_msg = _("Failed to make '%s' report.")
+    if (jobs > 1 and len(items) > 1 and database.get_save_path()
+            and "fork" in multiprocessing.get_all_start_methods()):
+        # The workers get the book, and the format of the document, as
+        # forked, and send back what the items wrote:
+        executor = ProcessPoolExecutor(
+            min(jobs, len(items)), multiprocessing.get_context("fork"),
+            _init_book_worker, (database.get_save_path(), items,
+                                clr.format, selected_style, paper_style))
+        results = executor.map(_write_book_item_records, range(len(items)))
+    else:
+        executor = None
+        results = (_write_book_item(database, item, RecordDoc(doc))
+                   for item in items)
     try:
-        for (rpt, name) in rptlist:
+        for (item, (records, error)) in zip(items, results):
+            if records is None:
+                continue
             if newpage:
                 doc.page_break()
             newpage = 1
-            rpt.begin_report()
-            rpt.write_report()
+            RecordDoc.play(records, doc)
+            if error:
+                (msg1, msg2) = error
+                # which report has the error?
+                print(err_msg % item.get_translated_name(), file=sys.stderr)
+                print(msg1, file=sys.stderr)
+                if msg2:
+                    print(msg2, file=sys.stderr)
+                return
         doc.close()
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+def _write_book_item(database, item, doc):
+    """
+    Write a book item to a RecordDoc. Return the records and the messages
+    of the error that stopped it, if any, or (None, None) if it failed to
+    start.
+    """
+    item.option_class.set_document(doc)
+    report = write_book_item(database, item.get_write_item(),
+                             item.option_class, User())
+    if not report:
+        return (None, None)
+    try:
+        report.begin_report()
+        report.write_report()
     except ReportError as msg:
-        (msg1, msg2) = msg.messages()
-        print(err_msg % name, file=sys.stderr) # which report has the error?
-        print(msg1, file=sys.stderr)
-        if msg2:
-            print(msg2, file=sys.stderr)
+        return (doc.get_records(), msg.messages())
+    return (doc.get_records(), None)
+
+_BOOK_WORKER = {}
+
+def _init_book_worker(directory, items, doc_class, style_sheet, paper_style):
+    """
+    Set up a process to write book items, with a read-only connection to
+    the database.
+    """
+    database = DbState().open_database(directory, force_unlock=True)
+    database.readonly = True
+    _BOOK_WORKER.update(database=database, items=items, doc_class=doc_class,
+                        style_sheet=style_sheet, paper_style=paper_style)
+
+def _write_book_item_records(index):
+    """
+    Write a book item in a worker process (see _write_book_item).
+    """
+    doc = _BOOK_WORKER["doc_class"](_BOOK_WORKER["style_sheet"],
+                                    _BOOK_WORKER["paper_style"])
+    return _write_book_item(_BOOK_WORKER["database"],
+                            _BOOK_WORKER["items"][index], RecordDoc(doc))
 
 #------------------------------------------------------------------------
 #
@@ -0,0 +1,115 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for writing books """
+
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+from gprime.dbstate import DbState
+from gprime.db import DbTxn
+from gprime.lib import Person, Surname
+from gprime.plug.report._book import Book, BookItem
+from gprime.plug.docgen import RecordDoc
+from gprime.plug.menu import BooleanOption
+from ..grampscli import CLIManager
+from ..user import User
+from ..plug import cl_book
+
+ITEMS = ["table_of_contents", "indiv_complete", "summary", "records",
+         "alphabetical_index"]
+
+class BookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        dbstate = DbState()
+        CLIManager(dbstate, False, User()).do_reg_plugins(dbstate, None)
+        self.db = dbstate.create_database(os.path.join(self.directory, "db"))
+        with DbTxn("Add", self.db, batch=True) as trans:
+            for name in ["Smith", "Jones", "Garner"]:
+                person = Person()
+                surname = Surname()
+                surname.set_surname(name)
+                person.primary_name.add_surname(surname)
+                person.primary_name.set_first_name("Lewis")
+                self.db.add_person(person, trans)
+        self.gid = person.gid
+
+    def tearDown(self):
+        self.db.close(update=False)
+        shutil.rmtree(self.directory)
+
+    def write_book(self, jobs, names=ITEMS, part="content.xml"):
+        book = Book()
+        for name in names:
+            item = BookItem(self.db, name)
+            if "pid" in item.option_class.options_dict:
+                item.option_class.options_dict["pid"] = self.gid
+            if name == "ancestor_chart,BKI":
+                # resize the page to fit the tree, as outside of books:
+                item.option_class.menu.add_option(
+                    "Tree Options", "resize_page", BooleanOption("", True))
+            book.append_item(item)
+        filename = os.path.join(self.directory, "book%s.odt" % jobs)
+        cl_book(self.db, "Test", book, {"off": "odt", "of": filename,
+                                        "jobs": str(jobs)}, None)
+        with zipfile.ZipFile(filename) as odt:
+            return odt.read(part).decode("utf-8")
+
+    def test_parallel(self):
+        content = self.write_book(1)
+        self.assertIn("Garner, Lewis", content)
+        self.assertIn("text:table-of-content", content)
+        self.assertEqual(self.write_book(3), content)
+
+    def test_tree(self):
+        """
+        A tree chart reads the paper style of the document to resize the
+        page to fit the tree, and the document gets the new size.
+        """
+        names = ["ancestor_chart,BKI", "summary"]
+        styles = self.write_book(1, names, "styles.xml")
+        self.assertNotIn('fo:page-width="21.59cm"', styles)
+        self.assertEqual(self.write_book(3, names, "styles.xml"), styles)
+        self.assertIn("Garner, Lewis", self.write_book(3, names))
+
+    def test_record(self):
+        class Doc:
+            def __init__(self):
+                self.written = []
+            def get_usable_width(self):
+                return 10
+            def write_text(self, text, mark=None):
+                self.written.append(text)
+        doc = RecordDoc(Doc())
+        self.assertEqual(doc.get_usable_width(), 10)
+        doc.write_text("Lewis")
+        doc.toc_title = "Contents"
+        target = Doc()
+        RecordDoc.play(doc.records, target)
+        self.assertEqual(target.written, ["Lewis"])
+        self.assertEqual(target.toc_title, "Contents")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -286,6 +286,7 @@ register('paths.recent-export-dir', '')
 register('paths.recent-import-dir', '')
 register('paths.website-cms-uri', '')
 register('paths.website-cal-uri', '')
+register('paths.website-directory', '')
 register('paths.quick-backup-filename',
          "%(filename)s_%(year)d-%(month)02d-%(day)02d.%(extension)s")
 
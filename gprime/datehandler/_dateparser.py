@@ -332,7 +332,8 @@ class DateParser:
                 _generate_variants(zip(ds.calendar)))
 
     def __init__(self):
-        self.init_strings()
+        # The regular expressions are compiled when first used:
+        self.__init_prefix_tables()
         self.parser = {
             Date.CAL_GREGORIAN : self._parse_gregorian,
             Date.CAL_JULIAN    : self._parse_julian,
@@ -355,6 +356,19 @@ class DateParser:
             self.dmy = True
             self.ymd = False
 
+    def __getattr__(self, attr):
+        """
+        Compile the regular expressions (see init_strings) on the first
+        use of one of them, which saves the time of compiling those of
+        parsers that are never used, such as at startup.
+        """
+        if attr.startswith("_") and not attr.startswith("__"):
+            if not self.__dict__.get("_strings_ready"):
+                self._strings_ready = True
+                self.init_strings()
+                return getattr(self, attr)
+        raise AttributeError(attr)
+
     def re_longest_first(self, keys):
         """
         returns a string for a RE group which contains the given keys
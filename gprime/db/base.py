@@ -47,6 +47,8 @@ from ..lib.childreftype import ChildRefType
 from ..lib.childref import ChildRef
 from .txn import DbTxn
 from .exceptions import DbTransactionCancel
+from . import fulltext
+from . import phonetic
 
 _LOG = logging.getLogger(DBLOGNAME)
 
@@ -688,6 +690,18 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def iter_raw_data(self, table, handles):
+        """
+        Return an iterator over (handle, raw data) of the objects of table
+        (such as "Person") with the given handles, skipping those that do
+        not exist. Databases can override it to fetch many at once.
+        """
+        get_raw_data = self.get_table_func(table, "raw_func")
+        for handle in handles:
+            data = get_raw_data(handle)
+            if data:
+                yield (handle, data)
+
     def get_repo_bookmarks(self):
         """
         Return the list of Repository handles in the bookmarks.
@@ -1214,6 +1228,38 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def get_duplicate_candidates(self, handle=None):
+        """
+        Return the pairs of handles of people who may be the same person:
+        who have a surname and a given name that sound alike (see
+        gprime.db.phonetic). If handle is given, return the pairs
+        (handle, other) of that person, else each pair once, as
+        (handle1, handle2) with handle1 < handle2.
+
+        Default implementation, that looks at all people.
+        """
+        people = {} # handle -> set of (field, method, key)
+        index = {}  # (field, method, key) -> set of handles
+        for person in self.iter_people():
+            keys = set()
+            for field in phonetic.FIELDS:
+                for name in phonetic.get_names(person, field):
+                    keys.update([(field, method, key) for (method, key)
+                                 in phonetic.get_phonetic_keys(name)])
+            people[person.handle] = keys
+            for key in keys:
+                index.setdefault(key, set()).add(person.handle)
+        pairs = set()
+        for handle1 in ([handle] if handle else people):
+            alike = {}
+            for key in people.get(handle1, []):
+                alike.setdefault(key[0], set()).update(index[key])
+            for handle2 in (alike.get("surname", set()) &
+                            alike.get("given", set())):
+                if handle2 != handle1 and (handle or handle1 < handle2):
+                    pairs.add((handle1, handle2))
+        return sorted(pairs)
+
     def _select(self, table, fields=None, start=0, limit=-1,
                 where=None, order_by=None):
         """
@@ -1277,6 +1323,8 @@ class DbReadBase:
                     matched = re.search(value, v, re.MULTILINE) is not None
                 else:
                     matched = False
+            elif op == "MATCH":
+                matched = fulltext.matches(value, v)
             else:
                 raise Exception("invalid select operator: '%s'" % op)
             return True if matched else False
@@ -1296,8 +1344,14 @@ class DbReadBase:
                 (name, op, value) = condition
                 # just the ones we need for where
                 hname = self._hash_name(table, name)
-                if hname not in env:
-                    value = item.get_field(name, db, ignore_errors=True)
+                if op in phonetic.OPERATORS:
+                    if ("names", hname) not in env:
+                        env["names", hname] = phonetic.get_names(item, name)
+                elif hname not in env:
+                    if op == "MATCH":
+                        value = fulltext.get_text(db, item)
+                    else:
+                        value = item.get_field(name, db, ignore_errors=True)
                     env[hname] = value
 
         def evaluate_truth(condition, item, db, table, env):
@@ -1319,9 +1373,25 @@ class DbReadBase:
                     raise Exception("No such connector: '%s'" % connector)
             elif len(condition) == 3: # (name, op, value)
                 (name, op, value) = condition
+                if op in phonetic.OPERATORS:
+                    return phonetic.matches(
+                        op, value, env["names", self._hash_name(table, name)])
                 v = env.get(self._hash_name(table, name))
+                if op == phonetic.DUPLICATE:
+                    if value not in duplicates:
+                        duplicates[value] = set([value] if value else [])
+                        for pair in self.get_duplicate_candidates(value):
+                            duplicates[value].update(pair)
+                    return v in duplicates[value]
                 return compare(v, op, value)
 
+        # The people who may be the same person, by handle (see
+        # phonetic.DUPLICATE):
+        duplicates = {}
+        # There is no relevance without a full-text index:
+        if order_by:
+            order_by = [(field, direction) for (field, direction) in order_by
+                        if field != "rank"]
         # Fields is None or list, maybe containing "*":
         if fields is None:
             pass # ok
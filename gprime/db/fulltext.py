@@ -0,0 +1,147 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Full-text search: the text of each indexed object, and full-text queries.
+
+In a where clause, ("text", "MATCH", query) matches the objects whose
+text has all of the words of query; a word ending with "*" matches any
+word that starts with it. Matching ignores case and accents. In an
+order_by, the pseudo-field "rank" orders by relevance to that query.
+
+Databases with a full-text index (see DBAPI) answer such queries from
+it; the others match the text of each object (see DbReadBase._select).
+"""
+
+## Python imports
+import re
+import unicodedata
+
+# The tables with full-text search:
+FULLTEXT_TABLES = ["Person", "Note", "Place", "Source", "Citation"]
+
+def get_text(db, obj):
+    """
+    Return the text of an object that full-text search looks at:
+
+    * Person: all parts of all of its names
+    * Note: its text
+    * Place: all of its names, and those of the places that enclose it
+    * Source: title, author, abbreviation and publication information
+    * Citation: volume/page, and the title of its source
+    """
+    table = obj.__class__.__name__
+    parts = []
+    if table == "Person":
+        for name in [obj.primary_name] + obj.alternate_names:
+            parts += [name.title, name.first_name, name.call, name.nick,
+                      name.famnick, name.suffix]
+            for surname in name.surname_list:
+                parts += [surname.prefix, surname.surname]
+    elif table == "Note":
+        parts.append(str(obj.text))
+    elif table == "Place":
+        seen = set([obj.handle])
+        places = [obj]
+        while places:
+            place = places.pop()
+            parts += [name.value for name in [place.name] + place.alt_names]
+            for placeref in place.placeref_list:
+                if (placeref.ref not in seen and
+                        db.has_handle_for_place(placeref.ref)):
+                    seen.add(placeref.ref)
+                    places.append(db.get_place_from_handle(placeref.ref))
+    elif table == "Source":
+        parts += [obj.title, obj.author, obj.abbrev, obj.pubinfo]
+    elif table == "Citation":
+        parts.append(obj.page)
+        if db.has_handle_for_source(obj.source_handle):
+            parts.append(db.get_source_from_handle(obj.source_handle).title)
+    return " ".join([part for part in parts if part])
+
+def get_dependents(db, table, handle):
+    """
+    Return the (table, handle) of the objects whose text includes that of
+    the given object: the places it encloses, or the citations of a
+    source.
+    """
+    if table == "Place":
+        retval = []
+        seen = set([handle])
+        handles = [handle]
+        while handles:
+            for (obj_class, enclosed) in db.find_backlink_handles(
+                    handles.pop(), ["Place"]):
+                if enclosed not in seen:
+                    seen.add(enclosed)
+                    handles.append(enclosed)
+                    retval.append(("Place", enclosed))
+        return retval
+    elif table == "Source":
+        return list(db.find_backlink_handles(handle, ["Citation"]))
+    return []
+
+def normalize(text):
+    """
+    Return text in lower case, without accents.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join([char for char in text if not unicodedata.combining(char)])
+
+def parse_query(query):
+    """
+    Return the words of a full-text query, as a list of (word, prefix),
+    where prefix is True for a word that ends with "*".
+    """
+    return [(word, bool(star)) for (word, star)
+            in re.findall(r"([^\W_]+)(\*?)", normalize(query))]
+
+def matches(query, text):
+    """
+    Does text match the full-text query?
+    """
+    words = parse_query(query)
+    if not words or not text:
+        return False
+    tokens = set(re.findall(r"[^\W_]+", normalize(text)))
+    for (word, prefix) in words:
+        if prefix:
+            if not any(token.startswith(word) for token in tokens):
+                return False
+        elif word not in tokens:
+            return False
+    return True
+
+def find_match(where):
+    """
+    Return the query of the full-text term of a where clause, if it has
+    one that all results must match (that is, at the top, or in the top
+    "AND"), or None.
+    """
+    if where is None:
+        return None
+    elif len(where) == 3:
+        if where[1] == "MATCH":
+            return where[2]
+    elif where[0] == "AND":
+        for part in where[1]:
+            if len(part) == 3 and part[1] == "MATCH":
+                return part[2]
+    return None
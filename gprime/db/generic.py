@@ -895,6 +895,15 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         self.transaction = transaction
         return transaction
 
+    def transaction_checkpoint(self, transaction):
+        """
+        Make the changes made so far in a batch transaction durable,
+        so that an interrupted import can be resumed.
+
+        Returns True if the backend supports checkpoints.
+        """
+        return False
+
     def _after_commit(self, transaction):
         """
         Post-transaction commit processing
@@ -2061,6 +2070,38 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     def get_repo_bookmarks(self):
         return self.repo_bookmarks
 
+    def iter_changed(self, table_name, since):
+        """
+        Iterate over the objects of a table ("Person", "Family", etc.)
+        that were changed at or after the given time (in seconds).
+        """
+        return self._select(table_name, where=("change", ">=", since))
+
+    def get_tombstones(self, since):
+        """
+        Return a list of (table_name, handle, time) of the objects that
+        were removed at or after the given time (in seconds).
+
+        Backends that do not record removals return an empty list.
+        """
+        return []
+
+    def get_change_stamp(self):
+        """
+        Return (count, time) of the last committed transaction, where
+        count goes up by one with each commit, in any process, and time
+        is in seconds (0 if there has been no commit).
+        """
+        return tuple(self.get_metadata("change_stamp", [0, 0]))
+
+    def stamp_change(self):
+        """
+        Record a commit in the change stamp. Called by the backend,
+        within the transaction being committed.
+        """
+        count = self.get_change_stamp()[0]
+        self.set_metadata("change_stamp", [count + 1, time.time()])
+
     def get_save_path(self):
         return self._directory
 
@@ -0,0 +1,255 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Name variants: phonetic keys (Soundex and Metaphone) and trigrams of the
+surnames and given names of people.
+
+In a where clause on people, (field, "SOUNDS", query) matches the people
+with a name in field ("surname" or "given") that has the same Soundex or
+Metaphone key as each word of query, and (field, "SIMILAR", query) the
+people with a name that is spelled like each word of query: that shares
+at least THRESHOLD of their trigrams. ("handle", "DUPLICATE", handle)
+matches the person with handle and the people who may be the same person
+(see DbReadBase.get_duplicate_candidates), and ("handle", "DUPLICATE",
+None) all the people who may have a duplicate.
+
+Databases with a name index (see DBAPI) answer such queries from it;
+the others compare the names of each person (see DbReadBase._select).
+"""
+
+## Python imports
+import re
+
+## gPrime imports
+from .fulltext import normalize
+
+# The fields that can be searched for variants:
+FIELDS = ["surname", "given"]
+# The operators:
+OPERATORS = ["SOUNDS", "SIMILAR"]
+# The operator of the people who may be the same person:
+DUPLICATE = "DUPLICATE"
+# The minimum trigram similarity (shared / all trigrams) of SIMILAR:
+THRESHOLD = 0.3
+
+VOWELS = frozenset("AEIOU")
+
+SOUNDEX_CODES = {}
+for (letters, code) in [("BFPV", "1"), ("CGJKQSXZ", "2"), ("DT", "3"),
+                        ("L", "4"), ("MN", "5"), ("R", "6")]:
+    for letter in letters:
+        SOUNDEX_CODES[letter] = code
+
+def get_words(text):
+    """
+    Return the words of text, in lower case and without accents.
+    """
+    return re.findall(r"[^\W\d_]+", normalize(text or ""))
+
+def _letters(word):
+    return "".join([char for char in normalize(word).upper()
+                    if "A" <= char <= "Z"])
+
+def soundex(word):
+    """
+    Return the (American) Soundex key of a word, such as "S530" for
+    "Smith", or "" if it has no latin letters.
+    """
+    word = _letters(word)
+    if not word:
+        return ""
+    retval = word[0]
+    last = SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        code = SOUNDEX_CODES.get(char, "")
+        if code and code != last:
+            retval += code
+        if char not in "HW": # they do not separate letters of a code
+            last = code
+    return (retval + "000")[:4]
+
+def metaphone(word):
+    """
+    Return the Metaphone key of a word (Lawrence Philips' original
+    rules), such as "SM0" for "Smith", or "" if it has no latin letters.
+    """
+    word = _letters(word)
+    if word[:2] in ["AE", "GN", "KN", "PN", "WR"]:
+        word = word[1:]
+    elif word[:1] == "X":
+        word = "S" + word[1:]
+    elif word[:2] == "WH":
+        word = "W" + word[2:]
+    size = len(word)
+    retval = []
+    for (i, char) in enumerate(word):
+        prev = word[i - 1] if i > 0 else ""
+        next1 = word[i + 1] if i + 1 < size else ""
+        next2 = word[i + 2] if i + 2 < size else ""
+        if char == prev and char != "C":
+            continue
+        if char in VOWELS:
+            if i == 0:
+                retval.append(char)
+        elif char == "B":
+            if not (prev == "M" and i + 1 == size):
+                retval.append("B")
+        elif char == "C":
+            if next1 == "H" or (next1 == "I" and next2 == "A"):
+                retval.append("K" if prev == "S" else "X")
+            elif next1 in ["E", "I", "Y"]:
+                if prev != "S":
+                    retval.append("S")
+            else:
+                retval.append("K")
+        elif char == "D":
+            if next1 == "G" and next2 in ["E", "I", "Y"]:
+                retval.append("J")
+            else:
+                retval.append("T")
+        elif char == "G":
+            if next1 == "H" and next2 and next2 not in VOWELS:
+                pass
+            elif next1 == "N" and word[i + 2:] in ["", "ED"]:
+                pass
+            elif next1 in ["E", "I", "Y"] and prev != "G":
+                retval.append("J")
+            else:
+                retval.append("K")
+        elif char == "H":
+            if prev in ["C", "G", "P", "S", "T"]:
+                pass
+            elif prev in VOWELS and next1 not in VOWELS:
+                pass
+            else:
+                retval.append("H")
+        elif char == "K":
+            if prev != "C":
+                retval.append("K")
+        elif char == "P":
+            retval.append("F" if next1 == "H" else "P")
+        elif char == "Q":
+            retval.append("K")
+        elif char == "S":
+            if next1 == "H" or (next1 == "I" and next2 in ["A", "O"]):
+                retval.append("X")
+            else:
+                retval.append("S")
+        elif char == "T":
+            if next1 == "I" and next2 in ["A", "O"]:
+                retval.append("X")
+            elif next1 == "H":
+                retval.append("0")
+            elif not (next1 == "C" and next2 == "H"):
+                retval.append("T")
+        elif char == "V":
+            retval.append("F")
+        elif char in ["W", "Y"]:
+            if next1 in VOWELS:
+                retval.append(char)
+        elif char == "X":
+            retval.append("KS")
+        elif char == "Z":
+            retval.append("S")
+        else:
+            retval.append(char)
+    return "".join(retval)
+
+def get_phonetic_keys(word):
+    """
+    Return the set of (method, key) of a word, for the methods
+    "soundex" and "metaphone".
+    """
+    return set([(method, key)
+                for (method, key) in [("soundex", soundex(word)),
+                                      ("metaphone", metaphone(word))]
+                if key])
+
+def get_trigrams(word):
+    """
+    Return the set of trigrams of a word, padded with spaces as with
+    PostgreSQL's pg_trgm, such as {"  s", " sm", "smi", "mit", "ith",
+    "th "} for "smith".
+    """
+    word = "  %s " % word.lower()
+    return set([word[i:i + 3] for i in range(len(word) - 2)])
+
+def is_similar(shared, size1, size2, threshold=THRESHOLD):
+    """
+    Do two words with size1 and size2 trigrams, of which they share
+    shared, have at least threshold of all their trigrams in common?
+    """
+    return shared * (1 + threshold) >= threshold * (size1 + size2)
+
+def get_names(person, field):
+    """
+    Return the words of the surnames (field "surname") or the given
+    names (field "given") of all of the names of a person.
+    """
+    retval = []
+    for name in [person.primary_name] + person.alternate_names:
+        if field == "surname":
+            texts = [surname.surname for surname in name.surname_list]
+        else:
+            texts = [name.first_name]
+        for text in texts:
+            for word in get_words(text):
+                if word not in retval:
+                    retval.append(word)
+    return retval
+
+def get_name_keys(person):
+    """
+    Return the rows of the name index of a person, as a list of (field,
+    name, method, key, trigrams) where trigrams is the number of
+    trigrams of name.
+    """
+    retval = []
+    for field in FIELDS:
+        for name in get_names(person, field):
+            trigrams = get_trigrams(name)
+            for (method, key) in sorted(get_phonetic_keys(name)):
+                retval.append((field, name, method, key, len(trigrams)))
+            for trigram in sorted(trigrams):
+                retval.append((field, name, "trigram", trigram,
+                               len(trigrams)))
+    return retval
+
+def matches(op, query, names):
+    """
+    Does one of names sound like ("SOUNDS"), or is one spelled like
+    ("SIMILAR"), each of the words of query?
+    """
+    words = get_words(query)
+    if not words or not names:
+        return False
+    for word in words:
+        if op == "SOUNDS":
+            keys = get_phonetic_keys(word)
+            if not any(keys & get_phonetic_keys(name) for name in names):
+                return False
+        else:
+            trigrams = get_trigrams(word)
+            if not any(is_similar(len(trigrams & get_trigrams(name)),
+                                  len(trigrams), len(get_trigrams(name)))
+                       for name in names):
+                return False
+    return True
@@ -0,0 +1,88 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for full-text search """
+
+import unittest
+
+from gprime.lib import Note, Place, PlaceName, PlaceRef
+from gprime.db import DbTxn
+from gprime.db.fulltext import parse_query, matches
+from gprime.app.dictionarydb import DictionaryDb
+from gprime.plugins.db.dbapi.inmemorydb import InMemoryDB
+
+def make_place(name, enclosed_by=None):
+    place = Place()
+    place.set_name(PlaceName(value=name))
+    if enclosed_by:
+        placeref = PlaceRef()
+        placeref.ref = enclosed_by.handle
+        place.add_placeref(placeref)
+    return place
+
+class FullTextTest(unittest.TestCase):
+
+    def test_matches(self):
+        self.assertEqual(parse_query("Zürich bro*"),
+                         [("zurich", False), ("bro", True)])
+        text = "The quick brown fox, in Zurich"
+        self.assertTrue(matches("zürich BRO*", text))
+        self.assertFalse(matches("bro", text))
+        self.assertFalse(matches("", text))
+
+    def check_select(self, db):
+        country = make_place("Sweden")
+        notes = [Note("A letter from Loderup"),
+                 Note("Loderup, Loderup and Loderup again"),
+                 Note("Nothing here")]
+        with DbTxn("Add", db, batch=True) as trans:
+            db.add_place(country, trans)
+            town = make_place("Loderup", enclosed_by=country)
+            db.add_place(town, trans)
+            for note in notes:
+                db.add_note(note, trans)
+        def select(table, query, order_by=None):
+            return [row["handle"] for row in db._select(
+                table, ["handle"], where=("text", "MATCH", query),
+                order_by=order_by)]
+        self.assertEqual(select("Place", "swed*"),
+                         [country.handle, town.handle])
+        self.assertEqual(
+            sorted(select("Note", "loderup", [("rank", "ASC")])),
+            sorted([notes[0].handle, notes[1].handle]))
+        self.assertEqual(select("Note", "letter loder*"), [notes[0].handle])
+        return select, notes
+
+    def test_select(self):
+        db = DictionaryDb()
+        db.load(None)
+        self.check_select(db)
+
+    def test_select_sqlite(self):
+        db = InMemoryDB()
+        db.load(None)
+        self.assertTrue(db.fulltext)
+        select, notes = self.check_select(db)
+        # ranked by relevance:
+        self.assertEqual(select("Note", "loderup", [("rank", "ASC")]),
+                         [notes[1].handle, notes[0].handle])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for name variants """
+
+import unittest
+
+from gprime.lib import Person, Name, Surname
+from gprime.db import DbTxn
+from gprime.db.phonetic import soundex, metaphone, matches
+from gprime.app.dictionarydb import DictionaryDb
+from gprime.plugins.db.dbapi.inmemorydb import InMemoryDB
+
+def make_person(first_name, surname):
+    person = Person()
+    name = Name()
+    name.set_first_name(first_name)
+    name_surname = Surname()
+    name_surname.set_surname(surname)
+    name.add_surname(name_surname)
+    person.set_primary_name(name)
+    return person
+
+class PhoneticTest(unittest.TestCase):
+
+    def test_keys(self):
+        for (word, key) in [("Robert", "R163"), ("Rupert", "R163"),
+                            ("Ashcraft", "A261"), ("Tymczak", "T522"),
+                            ("Pfister", "P236"), ("Müller", "M460"),
+                            ("", "")]:
+            self.assertEqual(soundex(word), key)
+        for (word, key) in [("Smith", "SM0"), ("Smyth", "SM0"),
+                            ("Knight", "NT"), ("Thompson", "0MPSN"),
+                            ("Schmidt", "SKMTT"), ("Phillips", "FLPS")]:
+            self.assertEqual(metaphone(word), key)
+        self.assertTrue(matches("SOUNDS", "Smyth", ["jones", "smith"]))
+        self.assertFalse(matches("SOUNDS", "Smyth Jonas", ["smith"]))
+        self.assertTrue(matches("SIMILAR", "Andersen", ["anderson"]))
+        self.assertFalse(matches("SIMILAR", "Anders", ["smith"]))
+
+    def check_select(self, db):
+        people = [make_person("Jon", "Smyth"),
+                  make_person("John", "Smith"),
+                  make_person("Jane", "Andersen"),
+                  make_person("Jean", "Anderson")]
+        with DbTxn("Add", db, batch=True) as trans:
+            for person in people:
+                db.add_person(person, trans)
+        def select(where):
+            return sorted([row["handle"] for row in db._select(
+                "Person", ["handle"], where=where)])
+        handles = [person.handle for person in people]
+        self.assertEqual(select(("surname", "SOUNDS", "smithe")),
+                         sorted(handles[:2]))
+        self.assertEqual(select(("surname", "SIMILAR", "anderssen")),
+                         sorted(handles[2:]))
+        self.assertEqual(select(["AND", [("surname", "SOUNDS", "smith"),
+                                         ("given", "SOUNDS", "john")]]),
+                         sorted(handles[:2]))
+        self.assertEqual(select(("given", "SOUNDS", "xyz")), [])
+        self.assertEqual(db.get_duplicate_candidates(),
+                         sorted([tuple(sorted(handles[:2])),
+                                 tuple(sorted(handles[2:]))]))
+        self.assertEqual(db.get_duplicate_candidates(handles[0]),
+                         [(handles[0], handles[1])])
+        self.assertEqual(select(("handle", "DUPLICATE", None)), sorted(handles))
+        self.assertEqual(select(("handle", "DUPLICATE", handles[2])),
+                         sorted(handles[2:]))
+        self.assertEqual(select(["AND", [("handle", "DUPLICATE", None),
+                                         ("surname", "SOUNDS", "smith")]]),
+                         sorted(handles[:2]))
+
+    def test_select(self):
+        db = DictionaryDb()
+        db.load(None)
+        self.check_select(db)
+
+    def test_select_sqlite(self):
+        db = InMemoryDB()
+        db.load(None)
+        self.check_select(db)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,7 +27,6 @@
 #-------------------------------------------------------------------------
 from xml.sax import make_parser, SAXParseException
 import os
-import collections
 
 #-------------------------------------------------------------------------
 #
@@ -78,7 +77,7 @@ class FilterList:
             plugin_filters = []
             try:
                 for plug in plugins:
-                    if isinstance(plug, collections.Callable):
+                    if callable(plug):
                         plug = plug(namespace)
                     if plug:
                         if isinstance(plug, (list, tuple)):
@@ -20,64 +20,76 @@
 #
 
 """The core library of Gramps objects
-"""
-# Dates
-from .date import Date, DateError, Span
 
-# Secondary objects
-from .secondaryobj import SecondaryObject
-from .address import Address
-from .location import Location
-from .attribute import Attribute
-from .srcattribute import SrcAttribute
-from .eventref import EventRef
-from .ldsord import LdsOrd
-from .mediaref import MediaRef
-from .name import Name
-from .placename import PlaceName
-from .placeref import PlaceRef
-from .reporef import RepoRef
-from .surname import Surname
-from .url import Url
-from .childref import ChildRef
+The objects are imported from their modules when they are first used, as
+importing them all (with the date handler) takes much of the startup.
+"""
 
-# Primary objects
-from .primaryobj import PrimaryObject
-from .person import Person
-from .personref import PersonRef
-from .family import Family
-from .event import Event
-from .place import Place
-from .src import Source
-from .media import Media
-from .repo import Repository
-from .note import Note
-from .citation import Citation
+## Python imports
+import importlib
 
-# Table objects
-from .tag import Tag
+# Name of the object to the module that defines it:
+_MODULES = {
+    "Date": "date",
+    "DateError": "date",
+    "Span": "date",
+    "SecondaryObject": "secondaryobj",
+    "Address": "address",
+    "Location": "location",
+    "Attribute": "attribute",
+    "SrcAttribute": "srcattribute",
+    "EventRef": "eventref",
+    "LdsOrd": "ldsord",
+    "MediaRef": "mediaref",
+    "Name": "name",
+    "PlaceName": "placename",
+    "PlaceRef": "placeref",
+    "RepoRef": "reporef",
+    "Surname": "surname",
+    "Url": "url",
+    "ChildRef": "childref",
+    "PrimaryObject": "primaryobj",
+    "Person": "person",
+    "PersonRef": "personref",
+    "Family": "family",
+    "Event": "event",
+    "Place": "place",
+    "Source": "src",
+    "Media": "media",
+    "Repository": "repo",
+    "Note": "note",
+    "Citation": "citation",
+    "Tag": "tag",
+    "Researcher": "researcher",
+    "GrampsType": "grampstype",
+    "NameType": "nametype",
+    "AttributeType": "attrtype",
+    "SrcAttributeType": "srcattrtype",
+    "UrlType": "urltype",
+    "ChildRefType": "childreftype",
+    "RepositoryType": "repotype",
+    "EventType": "eventtype",
+    "FamilyRelType": "familyreltype",
+    "SourceMediaType": "srcmediatype",
+    "EventRoleType": "eventroletype",
+    "MarkerType": "markertype",
+    "NameOriginType": "nameorigintype",
+    "NoteType": "notetype",
+    "StyledTextTagType": "styledtexttagtype",
+    "PlaceType": "placetype",
+    "StyledTextTag": "styledtexttag",
+    "StyledText": "styledtext",
+}
 
-# These are actually metadata
-from .researcher import Researcher
+__all__ = list(_MODULES)
 
-# Type classes
-from .grampstype import GrampsType
-from .nametype import NameType
-from .attrtype import AttributeType
-from .srcattrtype import SrcAttributeType
-from .urltype import UrlType
-from .childreftype import ChildRefType
-from .repotype import RepositoryType
-from .eventtype import EventType
-from .familyreltype import FamilyRelType
-from .srcmediatype import SourceMediaType
-from .eventroletype import EventRoleType
-from .markertype import MarkerType
-from .nameorigintype import NameOriginType
-from .notetype import NoteType
-from .styledtexttagtype import StyledTextTagType
-from .placetype import PlaceType
+def __getattr__(name):
+    if name in _MODULES:
+        value = getattr(importlib.import_module("." + _MODULES[name],
+                                                __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-# Text
-from .styledtexttag import StyledTextTag
-from .styledtext import StyledText
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
@@ -47,6 +47,7 @@ from .eventroletype import EventRoleType
 from .attribute import Attribute
 from .const import IDENTICAL, EQUAL, DIFFERENT
 from .handle import Handle
+from ..errors import HandleError
 from ..const import LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -217,6 +218,12 @@ class Person(CitationBase, NoteBase, AttributeBase, MediaBase,
             "private": _("Private"),
             "person_ref_list": _("Person references"),
             "probably_alive": _("Probably alive"),
+            "birth_date": _("Birth date"),
+            "birth_sortval": _("Birth sort value"),
+            "birth_place": _("Birth place"),
+            "death_date": _("Death date"),
+            "death_sortval": _("Death sort value"),
+            "death_place": _("Death place"),
         }
 
     @classmethod
@@ -322,7 +329,65 @@ class Person(CitationBase, NoteBase, AttributeBase, MediaBase,
              Column("gender_type", "INTEGER"),
              Column("order_by", "TEXT", index=True),
              Column("gid", "TEXT", index=True),
-             Column("json_data", "TEXT")])
+             Column("json_data", "TEXT"),
+             Column("birth_date", "TEXT"),
+             Column("birth_sortval", "INTEGER", index=True),
+             Column("birth_place", "TEXT"),
+             Column("death_date", "TEXT"),
+             Column("death_sortval", "INTEGER", index=True),
+             Column("death_place", "TEXT")])
+
+    @classmethod
+    def get_summary_fields(cls):
+        """
+        Return the names and types of the birth and death summary fields.
+        These are not stored on the person, but derived from its birth
+        and death events; a database may keep them in columns.
+        """
+        return [
+            ("birth_date", str),
+            ("birth_sortval", int),
+            ("birth_place", str),
+            ("death_date", str),
+            ("death_sortval", int),
+            ("death_place", str),
+        ]
+
+    def get_summary(self, db):
+        """
+        Return the birth and death summary fields as a dictionary: the
+        date text, date sort value and place title of each event. Events
+        and places that are not (yet) in the db are left out.
+        """
+        summary = {}
+        for (prefix, event_ref) in [("birth", self.get_birth_ref()),
+                                    ("death", self.get_death_ref())]:
+            date, sortval, place = "", 0, ""
+            try:
+                event = (db.get_event_from_handle(event_ref.ref)
+                         if event_ref and event_ref.ref else None)
+                if event and not event.date.is_empty():
+                    date = str(event.date)
+                    sortval = event.date.get_sort_value()
+                if event and event.place:
+                    place_obj = db.get_place_from_handle(event.place)
+                    place = (place_obj.get_title() or
+                             place_obj.get_name().get_value())
+            except HandleError:
+                pass
+            summary[prefix + "_date"] = date
+            summary[prefix + "_sortval"] = sortval
+            summary[prefix + "_place"] = place
+        return summary
+
+    def get_field(self, field, db=None, ignore_errors=False):
+        """
+        Get the value of a field, including the summary fields, which
+        need the db.
+        """
+        if field in dict(self.get_summary_fields()):
+            return self.get_summary(db)[field] if db else None
+        return super().get_field(field, db, ignore_errors)
 
     def _has_handle_reference(self, classname, handle):
         """
@@ -64,5 +64,69 @@ class FieldBaseTest(unittest.TestCase):
         self.assertEqual(family.get_field("father_handle.primary_name.surname_list.0.surname", self.db),
                          "Smith")
 
+class SummaryFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        db = make_database("inmemorydb")
+        db.load(None)
+        with db.get_transaction_class()("Test", db, batch=True) as trans:
+            # The person comes before its events, as in imports:
+            person = Person()
+            person.gid = "I0001"
+            event_ref = EventRef()
+            event_ref.ref = "E0001"
+            person.set_birth_ref(event_ref)
+            db.add_person(person, trans)
+            place = Place()
+            place.handle = "P0001"
+            place.set_title("Springfield")
+            db.add_place(place, trans)
+            event = Event()
+            event.handle = "E0001"
+            event.set_type(EventType(EventType.BIRTH))
+            event.date.set_yr_mon_day(1850, 3, 1)
+            event.set_place_handle(place.handle)
+            db.add_event(event, trans)
+        self.db = db
+
+    def test_summary_field(self):
+        person = self.db.get_person_from_gid("I0001")
+        self.assertEqual(person.get_field("birth_date", self.db), "1850-03-01")
+        self.assertEqual(person.get_field("birth_place", self.db),
+                         "Springfield")
+        self.assertEqual(person.get_field("death_date", self.db), "")
+
+    def test_summary_columns(self):
+        rows = list(self.db._select("Person", ["gid", "birth_date",
+                                               "birth_sortval",
+                                               "birth_place"]))
+        self.assertEqual(rows[0]["birth_date"], "1850-03-01")
+        self.assertEqual(rows[0]["birth_sortval"],
+                         Date(1850, 3, 1).get_sort_value())
+        self.assertEqual(rows[0]["birth_place"], "Springfield")
+
+    def test_touched_summaries(self):
+        with self.db.get_transaction_class()("Test", self.db,
+                                             batch=True) as trans:
+            person = Person()
+            person.gid = "I0002"
+            self.db.add_person(person, trans)
+        updated = []
+        update = self.db.update_person_summary
+        def update_person_summary(person):
+            updated.append(person.gid)
+            update(person)
+        self.db.update_person_summary = update_person_summary
+        # only the people of the events of the place are updated:
+        with self.db.get_transaction_class()("Test", self.db,
+                                             batch=True) as trans:
+            place = self.db.get_place_from_handle("P0001")
+            place.set_title("Shelbyville")
+            self.db.commit_place(place, trans)
+        self.assertEqual(updated, ["I0001"])
+        rows = list(self.db._select("Person", ["gid", "birth_place"],
+                                    where=("gid", "=", "I0001")))
+        self.assertEqual(rows[0]["birth_place"], "Shelbyville")
+
 if __name__ == "__main__":
     unittest.main()
@@ -101,6 +101,7 @@ class BasePluginManager:
 
         self.__pgr = PluginRegister.get_instance()
         self.__registereddir_set = set()
+        self.__registered_roots = set()
         self.__loaded_plugins = {}
 
     def reg_plugins(self, direct, dbstate=None, uistate=None,
@@ -111,12 +112,17 @@ class BasePluginManager:
 
         If a relationship calculator for env var LANG is present, it is
         immediately loaded so it is available for all.
+
+        A directory is only searched once in a process; the plugin modules
+        are imported when they are first used (see load_plugin).
         """
         # if the directory does not exist, do nothing
         if not os.path.isdir(direct):
             return False # return value is True for error
 
-        for (dirpath, dirnames, filenames) in os.walk(direct):
+        for (dirpath, dirnames, filenames) in ([] if direct in
+                                               self.__registered_roots
+                                               else os.walk(direct)):
             root, subdir = os.path.split(dirpath)
             if subdir.startswith("."):
                 dirnames[:] = []
@@ -129,6 +135,8 @@ class BasePluginManager:
             # registereddir_list list for use on reloading.
             self.__registereddir_set.add(dirpath)
             self.__pgr.scan_dir(dirpath, uistate=uistate)
+        self.__registered_roots.add(direct)
+        self.__pgr.save_cache()
 
         if load_on_reg:
             # Run plugins that request to be loaded on startup and
@@ -303,6 +311,8 @@ class BasePluginManager:
         # attempt to reload all plugins that have succeeded in the past
         self.empty_managed_plugins()
         self.__loaded_plugins = {}
+        # and search for changed registrations again:
+        self.__registered_roots = set()
 
         oldmodules = self.__modules
         self.__modules = {}
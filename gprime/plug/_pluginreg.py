@@ -32,6 +32,9 @@ and a register for the data of all plugins .
 import os
 import sys
 import re
+import pickle
+import logging
+import tempfile
 import traceback
 
 #-------------------------------------------------------------------------
@@ -40,10 +43,15 @@ import traceback
 #
 #-------------------------------------------------------------------------
 from gprime.version import VERSION as GPRIMEVERSION, VERSION_TUPLE
-from ..const import IMAGE_DIR
+from ..const import IMAGE_DIR, get_site_dir
 from ..const import LOCALE as glocale
 _ = glocale.translation.gettext
 
+LOG = logging.getLogger(".pluginreg")
+
+# The registrations of the plugins, kept in the site folder between runs:
+CACHE_FILE = "plugins.cache"
+
 #-------------------------------------------------------------------------
 #
 # PluginData
@@ -1104,20 +1112,82 @@ class PluginRegister:
         if __debug__:
             self.stable_only = False
         self.__plugindata  = []
+        # registration file -> ((mtime, size), [PluginData]):
+        self.__registered = {}
+        self.__cache = None
+        self.__cache_changed = False
 
     def add_plugindata(self, plugindata):
         self.__plugindata.append(plugindata)
 
+    def __cache_filename(self):
+        """
+        Only a site folder (with its database) keeps a cache, not the
+        current folder of scripts and tests that do not set one.
+        """
+        site_dir = get_site_dir()
+        if site_dir and os.path.isdir(os.path.join(site_dir, "database")):
+            return os.path.join(site_dir, CACHE_FILE)
+        return None
+
+    def __cache_key(self):
+        """
+        The registrations also depend on the version, language and mode.
+        """
+        return (GPRIMEVERSION, glocale.lang, self.stable_only, __debug__)
+
+    def __load_cache(self):
+        """
+        Return the registrations cached by an earlier run, if any.
+        """
+        filename = self.__cache_filename()
+        if filename and os.path.isfile(filename):
+            try:
+                with open(filename, "rb") as fp:
+                    (key, registered) = pickle.load(fp)
+                if key == self.__cache_key():
+                    return registered
+            except Exception:
+                LOG.warning("Ignoring invalid plugin cache %s", filename,
+                            exc_info=True)
+        return {}
+
+    def save_cache(self):
+        """
+        Save the registrations, with the modification times of their
+        files, for the next run.
+        """
+        filename = self.__cache_filename()
+        if not (filename and self.__cache_changed):
+            return
+        registered = dict(self.__cache)
+        registered.update(self.__registered)
+        try:
+            (fd, tempname) = tempfile.mkstemp(dir=os.path.dirname(filename),
+                                              suffix=".tmp")
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump((self.__cache_key(), registered), fp)
+            os.replace(tempname, filename)
+            self.__cache_changed = False
+        except Exception:
+            LOG.warning("Failed to save plugin cache %s", filename,
+                        exc_info=True)
+
     def scan_dir(self, dir, uistate=None):
         """
         The dir name will be scanned for plugin registration code, which will
         be loaded in :class:`PluginData` objects if they satisfy some checks.
 
+        Registration files are only run again if they changed since they
+        were registered, in this process or (see save_cache) an earlier one.
+
         :returns: A list with :class:`PluginData` objects
         """
         # if the directory does not exist, do nothing
         if not (os.path.isdir(dir) or os.path.islink(dir)):
             return []
+        if self.__cache is None:
+            self.__cache = self.__load_cache()
 
         ext = r".gpr.py"
         extlen = -len(ext)
@@ -1127,8 +1197,25 @@ class PluginRegister:
             name = os.path.split(filename)[1]
             if not name[extlen:] == ext:
                 continue
-            lenpd = len(self.__plugindata)
             full_filename = os.path.join(dir, filename)
+            try:
+                stat = os.stat(full_filename)
+            except OSError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if full_filename in self.__registered:
+                (old_stamp, plugins) = self.__registered[full_filename]
+                if old_stamp == stamp:
+                    continue
+                # changed since:
+                self.__plugindata = [plugin for plugin in self.__plugindata
+                                     if plugin not in plugins]
+            cached = self.__cache.get(full_filename)
+            if cached and cached[0] == stamp:
+                self.__plugindata.extend(cached[1])
+                self.__registered[full_filename] = cached
+                continue
+            lenpd = len(self.__plugindata)
             try:
                 with open(full_filename, "r", encoding='utf-8') as fd:
                     stream = fd.read()
@@ -1214,6 +1301,9 @@ class PluginRegister:
             rmlist.reverse()
             for ind in rmlist:
                 del self.__plugindata[ind]
+            self.__registered[full_filename] = (stamp,
+                                                self.__plugindata[lenpd:])
+            self.__cache_changed = True
 
     def get_plugin(self, id):
         """
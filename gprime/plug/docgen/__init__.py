@@ -37,3 +37,4 @@ from .textdoc import TextDoc, IndexMark,INDEX_TYPE_ALP, INDEX_TYPE_TOC,\
     URL_PATTERN, LOCAL_HYPERLINK, LOCAL_TARGET
 from .drawdoc import DrawDoc
 from .graphdoc import GVDoc
+from .recorddoc import RecordDoc
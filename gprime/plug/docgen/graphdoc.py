@@ -31,9 +31,8 @@
 #-------------------------------------------------------------------------
 from abc import ABCMeta, abstractmethod
 import os
-from io import BytesIO
+import shutil
 import tempfile
-from subprocess import Popen, PIPE
 import sys
 
 #-------------------------------------------------------------------------------
@@ -48,6 +47,7 @@ from . import BaseDoc
 from ..menu import NumberOption, TextOption, EnumeratedListOption, \
                           BooleanOption
 from ...constfunc import win
+from .graphlayout import DotWriter, layout, get_backends, get_cache
 
 #-------------------------------------------------------------------------
 #
@@ -92,8 +92,6 @@ _SPLINE = [ { 'name' : _("Straight"), 'value' : "false" },
             { 'name' : _("Orthogonal"), 'value' : 'ortho'} ]
 
 if win():
-    _DOT_FOUND = search_for("dot.exe")
-
     if search_for("gswin32c.exe") == 1:
         _GS_CMD = "gswin32c.exe"
     elif search_for("gswin32.exe") == 1:
@@ -101,13 +99,21 @@ if win():
     else:
         _GS_CMD = ""
 else:
-    _DOT_FOUND = search_for("dot")
-
     if search_for("gs") == 1:
         _GS_CMD = "gs"
     else:
         _GS_CMD = ""
 
+def _ps_format(pages):
+    """
+    Return the Graphviz output format of PostScript, for a graph of the
+    given number of pages.
+    """
+    # Problem with dot 2.26.3 and later and multiple pages, which gives
+    # "cairo: out of memory". If the :cairo is skipped for these cases it
+    # gives acceptable result.
+    return "ps" if pages > 1 else "ps:cairo"
+
 #-------------------------------------------------------------------------------
 #
 # GVOptions
@@ -389,7 +395,7 @@ class GVDocBase(BaseDoc, GVDoc):
         BaseDoc.__init__(self, None, paper_style)
 
         self._filename      = None
-        self._dot = BytesIO()
+        self._dot = DotWriter()
         self._paper         = paper_style
 
         get_option_by_name = options.menu.get_option_by_name
@@ -474,6 +480,16 @@ class GVDocBase(BaseDoc, GVDoc):
         """ Implement GVDocBase.open() """
         self._filename = os.path.normpath(os.path.abspath(filename))
 
+    def layout(self, fmt, filename):
+        """
+        Lay the graph out into filename, in the Graphviz output format
+        fmt (see graphlayout.layout), and delete the DOT file.
+        """
+        try:
+            layout(self._dot, fmt, filename, get_cache())
+        finally:
+            self._dot.remove()
+
     def close(self):
         """
         This isn't useful by itself. Other classes need to override this and
@@ -616,8 +632,9 @@ class GVDotDoc(GVDocBase):
         if self._filename[-3:] != ".gv":
             self._filename += ".gv"
 
-        with open(self._filename, "wb") as dotfile:
-            dotfile.write(self._dot.getvalue())
+        self._dot.close()
+        shutil.copyfile(self._dot.path, self._filename)
+        self._dot.remove()
 
 #-------------------------------------------------------------------------------
 #
@@ -631,7 +648,6 @@ class GVPsDoc(GVDocBase):
         # DPI must always be 72 for PDF.
         # GV documentation says dpi is only for image formats.
         options.menu.get_option_by_name('dpi').set_value(72)
-        GVDocBase.__init__(self, options, paper_style)
         # GV documentation allow multiple pages only for ps format,
         # But it does not work with -Tps:cairo in order to
         # show Non Latin-1 letters. Force to only 1 page.
@@ -648,12 +664,6 @@ class GVPsDoc(GVDocBase):
         if self._filename[-3:] != ".ps":
             self._filename += ".ps"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
-
         # Generate the PS file.
         # Reason for using -Tps:cairo. Needed for Non Latin-1 letters
         # Some testing with Tps:cairo. Non Latin-1 letters are OK i all cases:
@@ -666,17 +676,7 @@ class GVPsDoc(GVDocBase):
         # disappeared. I used 1 inch margins always.
         # See bug tracker issue 2815
         # :cairo does not work with Graphviz 2.26.3 and later See issue 4164
-
-        command = 'dot -Tps:cairo -o"%s" "%s"' % (self._filename, tmp_dot)
-        dotversion = str(Popen(['dot', '-V'], stderr=PIPE).communicate(input=None)[1])
-        # Problem with dot 2.26.3 and later and multiple pages, which gives "cairo: out of
-        # memory" If the :cairo is skipped for these cases it gives acceptable
-        # result.
-        if (dotversion.find('2.26.3') or dotversion.find('2.28.0') != -1) and (self.vpages * self.hpages) > 1:
-            command = command.replace(':cairo','')
-        os.system(command)
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout(_ps_format(self.vpages * self.hpages), self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -701,16 +701,8 @@ class GVSvgDoc(GVDocBase):
         if self._filename[-4:] != ".svg":
             self._filename += ".svg"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
         # Generate the SVG file.
-        os.system( 'dot -Tsvg:cairo -o"%s" "%s"' % (self._filename, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("svg:cairo", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -735,16 +727,8 @@ class GVSvgzDoc(GVDocBase):
         if self._filename[-5:] != ".svgz":
             self._filename += ".svgz"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
         # Generate the SVGZ file.
-        os.system( 'dot -Tsvgz -o"%s" "%s"' % (self._filename, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("svgz", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -769,16 +753,8 @@ class GVPngDoc(GVDocBase):
         if self._filename[-4:] != ".png":
             self._filename += ".png"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
         # Generate the PNG file.
-        os.system( 'dot -Tpng -o"%s" "%s"' % (self._filename, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("png", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -803,16 +779,8 @@ class GVJpegDoc(GVDocBase):
         if self._filename[-4:] != ".jpg":
             self._filename += ".jpg"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
         # Generate the JPEG file.
-        os.system( 'dot -Tjpg -o"%s" "%s"' % (self._filename, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("jpg", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -837,16 +805,8 @@ class GVGifDoc(GVDocBase):
         if self._filename[-4:] != ".gif":
             self._filename += ".gif"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
         # Generate the GIF file.
-        os.system( 'dot -Tgif -o"%s" "%s"' % (self._filename, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("gif", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -874,18 +834,8 @@ class GVPdfGvDoc(GVDocBase):
         if self._filename[-4:] != ".pdf":
             self._filename += ".pdf"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
-        fname = self._filename
-
         # Generate the PDF file.
-        os.system( 'dot -Tpdf -o"%s" "%s"' % (fname, tmp_dot) )
-
-        # Delete the temporary dot file
-        os.remove(tmp_dot)
+        self.layout("pdf", self._filename)
 
 #-------------------------------------------------------------------------------
 #
@@ -908,12 +858,6 @@ class GVPdfGsDoc(GVDocBase):
         if self._filename[-4:] != ".pdf":
             self._filename += ".pdf"
 
-        # Create a temporary dot file
-        (handle, tmp_dot) = tempfile.mkstemp(".gv" )
-        dotfile = os.fdopen(handle, "wb")
-        dotfile.write(self._dot.getvalue())
-        dotfile.close()
-
         # Create a temporary PostScript file
         (handle, tmp_ps) = tempfile.mkstemp(".ps" )
         os.close( handle )
@@ -922,29 +866,23 @@ class GVPdfGsDoc(GVDocBase):
         # Reason for using -Tps:cairo. Needed for Non Latin-1 letters
         # See bug tracker issue 2815
         # :cairo does not work with Graphviz 2.26.3 and later See issue 4164
-
-        command = 'dot -Tps:cairo -o"%s" "%s"' % ( tmp_ps, tmp_dot )
-        dotversion = str(Popen(['dot', '-V'], stderr=PIPE).communicate(input=None)[1])
-        # Problem with dot 2.26.3 and later and multiple pages, which gives "cairo: out
-        # of memory". If the :cairo is skipped for these cases it gives
-        # acceptable result.
-        if (dotversion.find('2.26.3') or dotversion.find('2.28.0') != -1) and (self.vpages * self.hpages) > 1:
-            command = command.replace(':cairo','')
-        os.system(command)
-
-        # Add .5 to remove rounding errors.
-        paper_size = self._paper.get_size()
-        width_pt = int( (paper_size.get_width_inches() * 72) + 0.5 )
-        height_pt = int( (paper_size.get_height_inches() * 72) + 0.5 )
-
-        # Convert to PDF using ghostscript
-        command = '%s -q -sDEVICE=pdfwrite -dNOPAUSE -dDEVICEWIDTHPOINTS=%d' \
-                  ' -dDEVICEHEIGHTPOINTS=%d -sOutputFile="%s" "%s" -c quit' \
-                  % ( _GS_CMD, width_pt, height_pt, self._filename, tmp_ps )
-        os.system(command)
-
-        os.remove(tmp_ps)
-        os.remove(tmp_dot)
+        try:
+            self.layout(_ps_format(self.vpages * self.hpages), tmp_ps)
+
+            # Add .5 to remove rounding errors.
+            paper_size = self._paper.get_size()
+            width_pt = int( (paper_size.get_width_inches() * 72) + 0.5 )
+            height_pt = int( (paper_size.get_height_inches() * 72) + 0.5 )
+
+            # Convert to PDF using ghostscript
+            command = '%s -q -sDEVICE=pdfwrite -dNOPAUSE ' \
+                      '-dDEVICEWIDTHPOINTS=%d -dDEVICEHEIGHTPOINTS=%d ' \
+                      '-sOutputFile="%s" "%s" -c quit' \
+                      % ( _GS_CMD, width_pt, height_pt, self._filename,
+                          tmp_ps )
+            os.system(command)
+        finally:
+            os.remove(tmp_ps)
 
 #-------------------------------------------------------------------------------
 #
@@ -953,7 +891,7 @@ class GVPdfGsDoc(GVDocBase):
 #-------------------------------------------------------------------------------
 FORMATS = []
 
-if _DOT_FOUND:
+if get_backends():
 
     if _GS_CMD != "":
         FORMATS += [{ 'type' : "gspdf",
@@ -0,0 +1,284 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+The layout of Graphviz graphs: turning the DOT source of a graph (see
+GVDocBase) into a file of a Graphviz output format, such as "svg" or
+"png".
+
+The layout is made by the first available of the backends: in the
+process with pygraphviz if it is installed, else by running the dot
+command. Other backends can be added with register_backend().
+
+The files made are cached, by a hash of the DOT source, the format and
+the backend, in the site folder; the same graph is then laid out once.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard Python modules
+#
+#-------------------------------------------------------------------------
+import os
+import hashlib
+import shutil
+import tempfile
+import subprocess
+import logging
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ... import const
+from ...utils.file import search_for
+from ...constfunc import win
+from ...errors import ReportError
+from ...const import LOCALE as glocale
+_ = glocale.translation.gettext
+
+log = logging.getLogger(".graphlayout")
+
+#-------------------------------------------------------------------------
+#
+# DotWriter
+#
+#-------------------------------------------------------------------------
+class DotWriter:
+    """
+    The DOT source of a graph, written to a temporary file as it is made
+    rather than kept in memory, and hashed on the way.
+    """
+    def __init__(self):
+        (handle, self.path) = tempfile.mkstemp(".gv")
+        self.file = os.fdopen(handle, "wb")
+        self.hash = hashlib.sha1()
+
+    def write(self, data):
+        """ Write bytes of the DOT source """
+        self.file.write(data)
+        self.hash.update(data)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+    def remove(self):
+        """ Close and delete the temporary file """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+#-------------------------------------------------------------------------
+#
+# Backends
+#
+#-------------------------------------------------------------------------
+class LayoutBackend:
+    """
+    A way to run Graphviz. Subclasses implement available() and render().
+    """
+    name = None
+
+    def available(self):
+        """ Return True if the backend can be used """
+        return False
+
+    def version(self):
+        """ Return the version of Graphviz the backend uses """
+        return ""
+
+    def render(self, dot_path, fmt, filename):
+        """
+        Lay out the graph of the DOT file dot_path, into filename in the
+        Graphviz output format fmt (like "svg" or "ps:cairo").
+        """
+        raise NotImplementedError
+
+class PygraphvizLayout(LayoutBackend):
+    """ Lays graphs out in the process, with pygraphviz """
+    name = "pygraphviz"
+
+    def available(self):
+        try:
+            import pygraphviz
+        except ImportError:
+            return False
+        return True
+
+    def version(self):
+        import pygraphviz
+        return pygraphviz.__version__
+
+    def render(self, dot_path, fmt, filename):
+        import pygraphviz
+        graph = pygraphviz.AGraph(filename=dot_path)
+        graph.draw(filename, format=fmt, prog="dot")
+
+class DotCommand(LayoutBackend):
+    """ Lays graphs out by running the dot command """
+    name = "dot"
+
+    def __init__(self):
+        self.command = "dot.exe" if win() else "dot"
+        self._version = None
+
+    def available(self):
+        return search_for(self.command) == 1
+
+    def version(self):
+        if self._version is None:
+            process = subprocess.run([self.command, "-V"],
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE)
+            self._version = process.stderr.decode("utf-8", "replace").strip()
+        return self._version
+
+    def render(self, dot_path, fmt, filename):
+        process = subprocess.run(
+            [self.command, "-T" + fmt, "-o" + filename, dot_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.decode("utf-8", "replace"))
+
+BACKENDS = [PygraphvizLayout(), DotCommand()]
+
+def register_backend(backend, first=True):
+    """
+    Add a LayoutBackend, to be used before (or after) the others.
+    """
+    if first:
+        BACKENDS.insert(0, backend)
+    else:
+        BACKENDS.append(backend)
+
+def get_backends():
+    """
+    Return the backends that are available, the preferred first.
+    """
+    return [backend for backend in BACKENDS if backend.available()]
+
+#-------------------------------------------------------------------------
+#
+# LayoutCache
+#
+#-------------------------------------------------------------------------
+class LayoutCache:
+    """
+    A folder of the files made by the layouts, by key. The least recently
+    used are removed beyond size files.
+    """
+    def __init__(self, directory, size=256):
+        self.directory = directory
+        self.size = size
+
+    def get(self, key, filename):
+        """
+        Copy the file of key to filename, and return True; or False if
+        it is not cached.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            shutil.copyfile(path, filename)
+            os.utime(path)
+        except OSError: # not cached, or removed by another process
+            return False
+        return True
+
+    def put(self, key, filename):
+        """
+        Cache a copy of filename as the file of key.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        (handle, tmp_path) = tempfile.mkstemp(dir=self.directory,
+                                              suffix=".tmp")
+        os.close(handle)
+        shutil.copyfile(filename, tmp_path)
+        os.replace(tmp_path, os.path.join(self.directory, key))
+        self.prune()
+
+    def prune(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".tmp"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError: # removed by another process
+                    pass
+        if len(files) > self.size:
+            files.sort()
+            for (mtime, path) in files[:len(files) - self.size]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def get_cache():
+    """
+    Return the LayoutCache of the site folder, or None if there is no
+    site folder (with its database).
+    """
+    site_dir = const.get_site_dir()
+    if site_dir and os.path.isdir(os.path.join(site_dir, "database")):
+        return LayoutCache(os.path.join(site_dir, "cache", "graphviz"))
+    return None
+
+#-------------------------------------------------------------------------
+#
+# Layout
+#
+#-------------------------------------------------------------------------
+def layout(dot, fmt, filename, cache=None):
+    """
+    Lay out the graph of dot (a DotWriter) into filename, in the Graphviz
+    output format fmt, with the first available backend that succeeds;
+    or copy the file from cache (a LayoutCache) if the same graph was
+    laid out before.
+
+    Raises ReportError if all of the available backends failed.
+    """
+    dot.close()
+    error = None
+    for backend in get_backends():
+        key = None
+        if cache is not None:
+            key = hashlib.sha1(("%s\n%s\n%s\n%s" % (
+                dot.hexdigest(), fmt, backend.name,
+                backend.version())).encode("utf-8")).hexdigest()
+            if cache.get(key, filename):
+                return
+        try:
+            backend.render(dot.path, fmt, filename)
+        except Exception as err:
+            log.warning("Graphviz layout with %s failed: %s",
+                        backend.name, err)
+            error = err
+            continue
+        if key is not None:
+            cache.put(key, filename)
+        return
+    if error is not None:
+        raise ReportError(_("Could not lay out the graph with Graphviz"),
+                          str(error))
+    log.error("Graphviz is not available to lay out %s", filename)
@@ -0,0 +1,107 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+A document that records what is written to it, to be written to another
+document later (such as a book item rendered in another process).
+"""
+
+#------------------------------------------------------------------------
+#
+# RecordDoc
+#
+#------------------------------------------------------------------------
+class RecordDoc:
+    """
+    Stands in for a TextDoc and DrawDoc, and records the calls of their
+    methods that write to the document, and the attributes set on it
+    (such as toc_title), as a picklable list.
+
+    All other attributes are those of a document of the real format that
+    is never opened: methods that query the document (get_usable_width,
+    string_width, get_style_sheet, ...), and its paper style, so that
+    reports lay out their output as they would on the real document.
+    Style sheet changes go to both.
+
+    Index marks are recorded with the text, so the table of contents and
+    the alphabetical index are made by the real document when the records
+    are played into it.
+    """
+    # the methods of TextDoc and DrawDoc that write to the document:
+    WRITES = frozenset([
+        "page_break", "start_bold", "end_bold", "start_superscript",
+        "end_superscript", "start_paragraph", "end_paragraph",
+        "start_table", "end_table", "start_row", "end_row", "start_cell",
+        "end_cell", "write_text", "write_markup", "write_styled_note",
+        "write_text_citation", "add_media", "start_link", "stop_link",
+        "start_underline", "stop_underline", "insert_toc", "insert_index",
+        "start_page", "end_page", "draw_path", "draw_box", "draw_text",
+        "center_text", "rotate_text", "draw_line"])
+
+    def __init__(self, doc):
+        """
+        :param doc: a document of the format of the real document, with
+                    the same style sheet and paper style
+        """
+        self.__dict__["doc"] = doc
+        self.__dict__["records"] = []
+        self.__dict__["page_size"] = self._get_page_size(doc)
+
+    def __getattr__(self, attr):
+        if attr not in self.WRITES:
+            return getattr(self.doc, attr)
+        def record(*args, **kwargs):
+            self.records.append((attr, args, kwargs))
+        return record
+
+    @staticmethod
+    def _get_page_size(doc):
+        paper = getattr(doc, "paper", None)
+        if paper is None:
+            return None
+        size = paper.get_size()
+        return (size.get_width(), size.get_height(), paper.get_orientation())
+
+    def get_records(self):
+        """
+        Return the records, with the paper style of the document if the
+        report changed its size (as reports that resize the page to fit
+        their output do).
+        """
+        if self._get_page_size(self.doc) != self.page_size:
+            self.records.append(("__setattr__", ("paper", self.doc.paper),
+                                 {}))
+        return self.records
+
+    def __setattr__(self, attr, value):
+        setattr(self.doc, attr, value)
+        self.records.append(("__setattr__", (attr, value), {}))
+
+    def set_style_sheet(self, style_sheet):
+        self.doc.set_style_sheet(style_sheet)
+        self.records.append(("set_style_sheet", (style_sheet,), {}))
+
+    @staticmethod
+    def play(records, doc):
+        """
+        Write the recorded calls to a document.
+        """
+        for (attr, args, kwargs) in records:
+            getattr(doc, attr)(*args, **kwargs)
@@ -0,0 +1,100 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the layout of Graphviz graphs """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from gprime.errors import ReportError
+from ..docgen import graphlayout
+from ..docgen.graphlayout import (DotWriter, LayoutBackend, LayoutCache,
+                                  layout, register_backend)
+
+class UpperLayout(LayoutBackend):
+    """ 'Lays out' a graph as its DOT source in upper case """
+    name = "upper"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.rendered = 0
+
+    def available(self):
+        return True
+
+    def render(self, dot_path, fmt, filename):
+        self.rendered += 1
+        if self.fail:
+            raise RuntimeError("no layout")
+        with open(dot_path, "rb") as dot, open(filename, "wb") as output:
+            output.write(dot.read().upper())
+
+class GraphLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backends = list(graphlayout.BACKENDS)
+        self.backend = UpperLayout()
+        register_backend(self.backend)
+
+    def tearDown(self):
+        graphlayout.BACKENDS[:] = self.backends
+        shutil.rmtree(self.directory)
+
+    def layout(self, source, cache=None):
+        dot = DotWriter()
+        dot.write(source)
+        filename = os.path.join(self.directory, "graph.svg")
+        try:
+            layout(dot, "svg", filename, cache)
+        finally:
+            dot.remove()
+        with open(filename, "rb") as output:
+            return output.read()
+
+    def test_layout(self):
+        self.assertEqual(self.layout(b"digraph a {}"), b"DIGRAPH A {}")
+        self.assertEqual(self.backend.rendered, 1)
+
+    def test_cache(self):
+        cache = LayoutCache(os.path.join(self.directory, "cache"), size=1)
+        self.assertEqual(self.layout(b"digraph a {}", cache), b"DIGRAPH A {}")
+        self.assertEqual(self.layout(b"digraph a {}", cache), b"DIGRAPH A {}")
+        self.assertEqual(self.backend.rendered, 1)
+        self.assertEqual(self.layout(b"digraph b {}", cache), b"DIGRAPH B {}")
+        self.assertEqual(self.backend.rendered, 2)
+        self.assertEqual(len(os.listdir(cache.directory)), 1)
+
+    def test_fallback(self):
+        failing = UpperLayout(fail=True)
+        register_backend(failing)
+        self.assertEqual(self.layout(b"digraph a {}"), b"DIGRAPH A {}")
+        self.assertEqual((failing.rendered, self.backend.rendered), (1, 1))
+
+    def test_failure(self):
+        graphlayout.BACKENDS[:] = [UpperLayout(fail=True)]
+        with self.assertRaises(ReportError) as context:
+            self.layout(b"digraph a {}")
+        self.assertEqual(context.exception.messages()[1], "no layout")
+
+if __name__ == "__main__":
+    unittest.main()
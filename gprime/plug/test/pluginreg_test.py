@@ -0,0 +1,83 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the plugin register """
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import gprime.const
+from gprime.version import VERSION
+from .._pluginreg import PluginRegister, CACHE_FILE
+
+REGISTRATION = """
+register(GENERAL,
+    id = "test_cache",
+    name = "%s",
+    version = "1.0",
+    gprime_target_version = "%s",
+    status = STABLE,
+    fname = "testcache.py",
+    category = "TEST_CACHE",
+)
+"""
+
+class PluginRegisterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.site_dir = gprime.const.get_site_dir()
+        gprime.const.set_site_dir(self.directory)
+        os.mkdir(os.path.join(self.directory, "database"))
+        open(os.path.join(self.directory, "testcache.py"), "w").close()
+
+    def tearDown(self):
+        gprime.const.set_site_dir(self.site_dir)
+        shutil.rmtree(self.directory)
+
+    def register(self, name):
+        filename = os.path.join(self.directory, "testcache.gpr.py")
+        with open(filename, "w") as fp:
+            fp.write(REGISTRATION % (name, ".".join(VERSION.split(".")[:2])))
+        pgr = PluginRegister.get_instance()
+        pgr.scan_dir(self.directory)
+        return [plugin.name for plugin in pgr.general_plugins("TEST_CACHE")]
+
+    def test_scan(self):
+        self.assertEqual(self.register("Test"), ["Test"])
+        pgr = PluginRegister.get_instance()
+        # not registered twice:
+        pgr.scan_dir(self.directory)
+        self.assertEqual(len([plugin for plugin in pgr.general_plugins()
+                              if plugin.id == "test_cache"]), 1)
+        pgr.save_cache()
+        with open(os.path.join(self.directory, CACHE_FILE), "rb") as fp:
+            (key, registered) = pickle.load(fp)
+        self.assertEqual(
+            [plugin.name for (stamp, plugins) in registered.values()
+             for plugin in plugins if plugin.id == "test_cache"], ["Test"])
+        # changed since:
+        self.assertEqual(self.register("Test, changed"), ["Test, changed"])
+
+if __name__ == "__main__":
+    unittest.main()
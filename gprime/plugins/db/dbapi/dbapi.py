@@ -43,6 +43,8 @@ from gprime.db.dbconst import (DBLOGNAME, DBBACKEND, KEY_TO_NAME_MAP,
                                    EVENT_KEY, MEDIA_KEY, PLACE_KEY, NOTE_KEY,
                                    TAG_KEY, CITATION_KEY, REPOSITORY_KEY)
 from gprime.db.generic import DbGeneric
+from gprime.db import fulltext
+from gprime.db import phonetic
 from gprime.lib import (Tag, Media, Person, Family, Source,
                             Citation, Event, Place, Repository, Note)
 from gprime.const import LOCALE as glocale
@@ -51,6 +53,10 @@ _ = glocale.translation.gettext
 LOG = logging.getLogger(".dbapi")
 _LOG = logging.getLogger(DBLOGNAME)
 
+# A batch transaction that changes more objects rebuilds the whole
+# full-text index, rather than keep track of them:
+FULLTEXT_REBUILD = 100000
+
 class DBAPI(DbGeneric):
     """
     Database backends class for DB-API 2.0 databases
@@ -172,6 +178,11 @@ class DBAPI(DbGeneric):
         Create and update schema.
         """
         from gprime.lib.struct import Table, Column
+        # the person summary columns of an older database are filled in
+        # once they have been added:
+        fill_summaries = (self.dbapi.table_exists("person") and
+                          not self.dbapi.table_column_exists("person",
+                                                             "birth_sortval"))
         # make sure schema is up to date:
         for primary_obj in [Person, Family, Event, Citation, Repository,
                             Tag, Note, Place, Media, Source]:
@@ -202,6 +213,12 @@ class DBAPI(DbGeneric):
                                       null=False),
                               Column("value", "TEXT")])
 
+        # Removed objects, for delta exports:
+        TombstoneTable = Table("tombstone",
+                               [Column("handle", "VARCHAR(50)", index=True),
+                                Column("obj_class", "TEXT"),
+                                Column("deleted", "INTEGER", index=True)])
+
         UserTable = Table("user",
                           [Column("username", "VARCHAR(50)", primary=True),
                            Column("password", "TEXT"),
@@ -214,8 +231,18 @@ class DBAPI(DbGeneric):
                            Column("language", "VARCHAR(20)"),
                           ])
 
+        # Phonetic keys and trigrams of the names of people:
+        NameKeyTable = Table("person_name_key",
+                             [Column("handle", "VARCHAR(50)", index=True),
+                              Column("field", "VARCHAR(10)"),
+                              Column("name", "TEXT"),
+                              Column("method", "VARCHAR(10)"),
+                              Column("name_key", "VARCHAR(50)", index=True),
+                              Column("trigrams", "INTEGER")])
+        fill_name_keys = not self.dbapi.table_exists(NameKeyTable.name)
+
         for table in [ReferenceTable, NamegroupTable, MetadataTable,
-                      UserTable]:
+                      TombstoneTable, UserTable, NameKeyTable]:
             if not self.dbapi.table_exists(table.name):
                 self.create_table(table)
             else:
@@ -228,6 +255,33 @@ class DBAPI(DbGeneric):
                                            % (index_name, table.name, column.name))
 
         self.rebuild_secondary_fields()
+        if fill_summaries:
+            LOG.info("Filling in person summary columns...")
+            self.update_person_summaries()
+            self.dbapi.commit()
+        if fill_name_keys:
+            LOG.info("Building name index...")
+            for person in self.iter_people():
+                self.update_name_keys(person)
+            self.dbapi.commit()
+
+        # Full-text indexes, built when they are created, or when a batch
+        # transaction did not finish updating them:
+        self.fulltext = hasattr(self.dbapi, "create_fulltext")
+        self._fulltext_stale = set()
+        fill_fulltext = []
+        for table in fulltext.FULLTEXT_TABLES if self.fulltext else []:
+            if not self.dbapi.table_exists("%s_fts" % table.lower()):
+                if not self.dbapi.create_fulltext(table.lower()):
+                    self.fulltext = False
+                    break
+                fill_fulltext.append(table)
+        if self.fulltext and self.get_metadata("fulltext_stale", False):
+            fill_fulltext = fulltext.FULLTEXT_TABLES
+        if self.fulltext and fill_fulltext:
+            LOG.info("Building full-text index...")
+            self.rebuild_fulltext(fill_fulltext)
+            self.dbapi.commit()
 
     def close_backend(self):
         self.dbapi.close()
@@ -263,9 +317,31 @@ class DBAPI(DbGeneric):
                    "Batch " if transaction.batch else "",
                    hex(id(self)), transaction.get_description())
         self.transaction = transaction
+        # (class, handle) of the objects committed in a batch, whose
+        # people need new summaries:
+        self._summaries_stale = set()
+        self._fulltext_stale = set()
         self.dbapi.begin()
         return transaction
 
+    def transaction_checkpoint(self, transaction):
+        """
+        Commit the changes of a batch transaction so far, and continue
+        the transaction. Only batch transactions can be checkpointed, as
+        they have no undo information.
+        """
+        if not transaction.batch:
+            return False
+        _LOG.debug("    DBAPI %s transaction checkpoint for '%s'",
+                   hex(id(self)), transaction.get_description())
+        if self._fulltext_stale:
+            # rebuilt on open, if the transaction never finishes:
+            self.set_metadata("fulltext_stale", True)
+        self.stamp_change()
+        self.dbapi.commit()
+        self.dbapi.begin()
+        return True
+
     def transaction_commit(self, txn):
         """
         Executed at the end of a transaction.
@@ -282,6 +358,11 @@ class DBAPI(DbGeneric):
             self.build_surname_list()
             # FIXME: need a User GUI update callback here:
             self.reindex_reference_map(lambda percent: percent)
+            if self._summaries_stale:
+                self.update_person_summaries(self.get_stale_people())
+            if self._fulltext_stale:
+                self.update_fulltext_stale()
+        self.stamp_change()
         self.dbapi.commit()
         if not txn.batch:
             # Now, emit signals:
@@ -674,7 +755,13 @@ class DBAPI(DbGeneric):
                  json.dumps(person.to_struct(), sort_keys=True),
                  given_name, surname, gender_type])
         self.update_secondary_values(person)
-        if not trans.batch:
+        self.update_name_keys(person)
+        self.update_fulltext("Person", person.handle, trans)
+        if trans.batch:
+            # its events may not be in yet; see transaction_commit
+            self._summaries_stale.add(("Person", person.handle))
+        else:
+            self.update_person_summary(person)
             self.update_backlinks(person)
             if old_person:
                 trans.add(PERSON_KEY, TXNUPD, person.handle,
@@ -802,6 +889,7 @@ class DBAPI(DbGeneric):
                  citation.gid,
                  json.dumps(citation.to_struct(), sort_keys=True)])
         self.update_secondary_values(citation)
+        self.update_fulltext("Citation", citation.handle, trans)
         if not trans.batch:
             self.update_backlinks(citation)
             db_op = TXNUPD if old_citation else TXNADD
@@ -845,6 +933,7 @@ class DBAPI(DbGeneric):
                  source.gid,
                  json.dumps(source.to_struct(), sort_keys=True)])
         self.update_secondary_values(source)
+        self.update_fulltext("Source", source.handle, trans)
         if not trans.batch:
             self.update_backlinks(source)
             db_op = TXNUPD if old_source else TXNADD
@@ -922,6 +1011,7 @@ class DBAPI(DbGeneric):
                                     VALUES(?, ?, ?);""",
                 [note.handle, note.gid, json.dumps(note.to_struct(), sort_keys=True)])
         self.update_secondary_values(note)
+        self.update_fulltext("Note", note.handle, trans)
         if not trans.batch:
             self.update_backlinks(note)
             db_op = TXNUPD if old_note else TXNADD
@@ -958,8 +1048,17 @@ class DBAPI(DbGeneric):
                  place.gid,
                  json.dumps(place.to_struct(), sort_keys=True)])
         self.update_secondary_values(place)
-        if not trans.batch:
+        self.update_fulltext("Place", place.handle, trans)
+        if trans.batch:
+            self._summaries_stale.add(("Place", place.handle))
+        else:
             self.update_backlinks(place)
+            events = [handle for (obj_class, handle)
+                      in self.find_backlink_handles(place.handle, ["Event"])]
+            self.update_person_summaries(
+                set(handle for event_handle in events
+                    for (obj_class, handle)
+                    in self.find_backlink_handles(event_handle, ["Person"])))
             db_op = TXNUPD if old_place else TXNADD
             trans.add(PLACE_KEY, db_op, place.handle,
                       old_place,
@@ -1000,8 +1099,13 @@ class DBAPI(DbGeneric):
                  event.gid,
                  json.dumps(event.to_struct(), sort_keys=True)])
         self.update_secondary_values(event)
-        if not trans.batch:
+        if trans.batch:
+            self._summaries_stale.add(("Event", event.handle))
+        else:
             self.update_backlinks(event)
+            self.update_person_summaries(
+                [handle for (obj_class, handle)
+                 in self.find_backlink_handles(event.handle, ["Person"])])
             db_op = TXNUPD if old_event else TXNADD
             trans.add(EVENT_KEY, db_op, event.handle,
                       old_event,
@@ -1143,9 +1247,27 @@ class DBAPI(DbGeneric):
             self.dbapi.execute(
                 "DELETE FROM %s WHERE handle = ?;" % key2table[key],
                 [handle])
+            self.dbapi.execute(
+                """INSERT INTO tombstone (handle, obj_class, deleted)
+                                  VALUES (?, ?, ?);""",
+                [handle, data["_class"], int(time.time())])
+            if key == PERSON_KEY:
+                self.dbapi.execute(
+                    "DELETE FROM person_name_key WHERE handle = ?;", [handle])
+            self.update_fulltext(data["_class"], handle, transaction)
             if not transaction.batch:
                 transaction.add(key, TXNDEL, handle, data, None)
 
+    def get_tombstones(self, since):
+        """
+        Return a list of (table_name, handle, time) of the objects that
+        were removed at or after the given time (in seconds).
+        """
+        self.dbapi.execute("""SELECT obj_class, handle, deleted
+                                  FROM tombstone WHERE deleted >= ?
+                                  ORDER BY deleted;""", [since])
+        return [tuple(row) for row in self.dbapi.fetchall()]
+
     def find_backlink_handles(self, handle, include_classes=None):
         """
         Find all objects that hold a reference to the object handle.
@@ -1225,7 +1347,12 @@ class DBAPI(DbGeneric):
         # if so, fine
         # else, use Python sorts
         if order_by:
-            secondary_fields = class_.get_secondary_fields()
+            secondary_fields = [self._hash_name(class_.__name__, field)
+                                for (field, ptype)
+                                in class_.get_secondary_fields()]
+            if class_ == Person:
+                secondary_fields += [field for (field, ptype)
+                                     in Person.get_summary_fields()]
             if not self._check_order_by_fields(class_.__name__,
                                                order_by, secondary_fields):
                 for item in self.iter_items_order_by_python(order_by, class_):
@@ -1740,6 +1867,20 @@ class DBAPI(DbGeneric):
         if row:
             return json.loads(row[0])
 
+    def iter_raw_data(self, table, handles):
+        """
+        Fetch the objects of table with the given handles, 500 at a time.
+        """
+        handles = [str(handle, "utf-8") if isinstance(handle, bytes)
+                   else handle for handle in handles]
+        for start in range(0, len(handles), 500):
+            chunk = handles[start:start + 500]
+            self.dbapi.execute(
+                "SELECT handle, json_data FROM %s WHERE handle IN (%s);" %
+                (table.lower(), ", ".join(["?"] * len(chunk))), chunk)
+            for (handle, json_data) in self.dbapi.fetchall():
+                yield (handle, json.loads(json_data))
+
     def get_surname_list(self):
         """
         Return the list of locale-sorted surnames contained in the database.
@@ -1785,6 +1926,7 @@ class DBAPI(DbGeneric):
         self.dbapi.execute("""DROP TABLE  reference;""")
         self.dbapi.execute("""DROP TABLE  name_group;""")
         self.dbapi.execute("""DROP TABLE  metadata;""")
+        self.dbapi.execute("""DROP TABLE  person_name_key;""")
 
     def _sql_type(self, python_type):
         """
@@ -1918,6 +2060,201 @@ class DBAPI(DbGeneric):
                                self._sql_cast_list(table, sets, values)
                                + [item.handle])
 
+    def update_person_summary(self, person):
+        """
+        Update the birth and death summary columns of a person, which
+        are derived from its events and their places.
+        Does not commit.
+        """
+        summary = person.get_summary(self)
+        fields = [field for (field, ptype) in Person.get_summary_fields()]
+        self.dbapi.execute("UPDATE person SET %s WHERE handle = ?;"
+                           % ", ".join(["%s = ?" % field for field in fields]),
+                           [summary[field] for field in fields]
+                           + [person.handle])
+
+    def update_person_summaries(self, handles=None):
+        """
+        Update the summary columns of the given people (all people if
+        handles is None), when their events or places have changed.
+        Does not commit.
+        """
+        if handles is None:
+            people = list(self.iter_people())
+        else:
+            people = [self.get_person_from_handle(handle)
+                      for handle in handles
+                      if self.has_person_handle(handle)] # not removed
+        for person in people:
+            self.update_person_summary(person)
+
+    def get_stale_people(self):
+        """
+        Return the handles of the people whose summaries are stale after
+        a batch transaction: the people committed, and those of the
+        events and places committed. The references must be up to date.
+        """
+        people = set()
+        events = set()
+        for (obj_class, handle) in self._summaries_stale:
+            if obj_class == "Person":
+                people.add(handle)
+            elif obj_class == "Event":
+                events.add(handle)
+            else:
+                events.update(event_handle for (obj_class, event_handle)
+                              in self.find_backlink_handles(handle,
+                                                            ["Event"]))
+        for event_handle in events:
+            people.update(person_handle for (obj_class, person_handle)
+                          in self.find_backlink_handles(event_handle,
+                                                        ["Person"]))
+        return people
+
+    def update_name_keys(self, person):
+        """
+        Update the rows of a person in the name index, which has the
+        phonetic keys and trigrams of each word of their names (see
+        gprime.db.phonetic).
+        Does not commit.
+        """
+        self.dbapi.execute("DELETE FROM person_name_key WHERE handle = ?;",
+                           [person.handle])
+        for row in phonetic.get_name_keys(person):
+            self.dbapi.execute(
+                """INSERT INTO person_name_key (handle, field, name, method,
+                                                name_key, trigrams)
+                                        VALUES (?, ?, ?, ?, ?, ?);""",
+                [person.handle] + list(row))
+
+    def _name_key_query(self, field, op, word):
+        """
+        Return a SELECT of the handles of the people with a name in field
+        that sounds like (op "SOUNDS") or is spelled like (op "SIMILAR")
+        word.
+        """
+        if op == "SOUNDS":
+            keys = phonetic.get_phonetic_keys(word)
+            return ("""SELECT handle FROM person_name_key
+                          WHERE field = %s AND (%s)""" %
+                    (self._sql_repr(field), " OR ".join(
+                        ["(method = %s AND name_key = %s)" %
+                         (self._sql_repr(method), self._sql_repr(key))
+                         for (method, key) in sorted(keys)]) or "1 = 0"))
+        trigrams = phonetic.get_trigrams(word)
+        # see phonetic.is_similar:
+        return ("""SELECT handle FROM person_name_key
+                      WHERE field = %s AND method = 'trigram'
+                            AND name_key IN (%s)
+                      GROUP BY handle, name
+                      HAVING count(1) * %r >= %r * (%d + max(trigrams))""" %
+                (self._sql_repr(field),
+                 ", ".join([self._sql_repr(trigram)
+                            for trigram in sorted(trigrams)]),
+                 1 + phonetic.THRESHOLD, phonetic.THRESHOLD, len(trigrams)))
+
+    def _duplicate_query(self, where):
+        """
+        Return a SELECT of the pairs (handle1, handle2) of people who may
+        be the same person (see get_duplicate_candidates) that match the
+        condition where, on surname1.handle and surname2.handle.
+        """
+        return ("""SELECT DISTINCT surname1.handle AS handle1,
+                                   surname2.handle AS handle2
+                     FROM person_name_key AS surname1
+                     JOIN person_name_key AS surname2
+                       ON surname2.name_key = surname1.name_key
+                      AND surname2.method = surname1.method
+                      AND surname2.field = 'surname'
+                      AND surname2.handle != surname1.handle
+                     JOIN person_name_key AS given1
+                       ON given1.handle = surname1.handle
+                      AND given1.field = 'given'
+                      AND given1.method != 'trigram'
+                     JOIN person_name_key AS given2
+                       ON given2.handle = surname2.handle
+                      AND given2.name_key = given1.name_key
+                      AND given2.method = given1.method
+                      AND given2.field = 'given'
+                    WHERE surname1.field = 'surname'
+                      AND surname1.method != 'trigram'
+                      AND %s""" % where)
+
+    def get_duplicate_candidates(self, handle=None):
+        """
+        Return the pairs of handles of people who may be the same person:
+        who have a surname and a given name that sound alike (see
+        gprime.db.phonetic). If handle is given, return the pairs
+        (handle, other) of that person, else each pair once, as
+        (handle1, handle2) with handle1 < handle2.
+        """
+        if handle:
+            where = "surname1.handle = %s" % self._sql_repr(handle)
+        else:
+            where = "surname1.handle < surname2.handle"
+        self.dbapi.execute("%s ORDER BY handle1, handle2;"
+                           % self._duplicate_query(where))
+        return [(row[0], row[1]) for row in self.dbapi.fetchall()]
+
+    def update_fulltext(self, table, handle, trans):
+        """
+        Update the full-text index of an object that was committed or
+        removed, and of the objects whose text includes its text. In a
+        batch transaction, this is done on commit, as the objects it
+        refers to may not be in yet.
+        Does not commit.
+        """
+        if not self.fulltext or table not in fulltext.FULLTEXT_TABLES:
+            return
+        if trans.batch:
+            if len(self._fulltext_stale) < FULLTEXT_REBUILD:
+                self._fulltext_stale.add((table, handle))
+            return
+        self._update_fulltext(table, handle)
+        for (dependent_table, dependent) in fulltext.get_dependents(
+                self, table, handle):
+            self._update_fulltext(dependent_table, dependent)
+
+    def _update_fulltext(self, table, handle):
+        if self.get_table_func(table, "has_handle_func")(handle):
+            obj = self.get_table_func(table, "handle_func")(handle)
+            self.dbapi.update_fulltext(
+                table.lower(), handle,
+                fulltext.normalize(fulltext.get_text(self, obj)))
+        else:
+            self.dbapi.delete_fulltext(table.lower(), handle)
+
+    def update_fulltext_stale(self):
+        """
+        Update the full-text index of the objects of a batch transaction.
+        Does not commit.
+        """
+        if len(self._fulltext_stale) >= FULLTEXT_REBUILD:
+            self.rebuild_fulltext()
+        else:
+            done = set()
+            for (table, handle) in self._fulltext_stale:
+                for item in [(table, handle)] + fulltext.get_dependents(
+                        self, table, handle):
+                    if item not in done:
+                        done.add(item)
+                        self._update_fulltext(*item)
+        self._fulltext_stale = set()
+        self.set_metadata("fulltext_stale", False)
+
+    def rebuild_fulltext(self, tables=None):
+        """
+        Rebuild the full-text index of the given tables (default: all).
+        Does not commit.
+        """
+        for table in tables or fulltext.FULLTEXT_TABLES:
+            self.dbapi.delete_fulltext(table.lower())
+            for obj in self.get_table_func(table, "iter_func")():
+                self.dbapi.update_fulltext(
+                    table.lower(), obj.handle,
+                    fulltext.normalize(fulltext.get_text(self, obj)))
+        self.set_metadata("fulltext_stale", False)
+
     def _sql_cast_list(self, table, fields, values):
         """
         Given a list of field names and values, return the values
@@ -1936,7 +2273,7 @@ class DBAPI(DbGeneric):
         elif value is None:
             return '""'
         elif isinstance(value, list):
-            return repr(tuple(value))
+            return "(%s)" % ", ".join([self._sql_repr(item) for item in value])
         else:
             return repr(value)
 
@@ -1951,6 +2288,34 @@ class DBAPI(DbGeneric):
             return ""
         elif len(where) == 3:
             field, db_op, value = where
+            if db_op in phonetic.OPERATORS:
+                words = phonetic.get_words(value)
+                if not words:
+                    return "(1 = 0)"
+                return "(%s)" % " AND ".join(
+                    ["(handle IN (%s))" % self._name_key_query(field, db_op,
+                                                                word)
+                     for word in words])
+            elif db_op == phonetic.DUPLICATE:
+                # every pair is in both orders, so the first handles
+                # are all the people who may have a duplicate:
+                if not value:
+                    return ("(handle IN (SELECT handle1 FROM (%s) "
+                            "AS duplicate))" % self._duplicate_query("1 = 1"))
+                return ("(handle = %s OR handle IN (SELECT handle2 FROM (%s) "
+                        "AS duplicate))" % (
+                            self._sql_repr(value),
+                            self._duplicate_query("surname1.handle = %s" %
+                                                  self._sql_repr(value))))
+            elif db_op == "IN" and not value:
+                return "(1 = 0)"
+            elif db_op == "MATCH":
+                words = fulltext.parse_query(value)
+                if not words:
+                    return "(1 = 0)"
+                return ("(handle IN (SELECT fulltext_handle FROM (%s) "
+                        "AS fulltext_match))"
+                        % self.dbapi.fulltext_query(table.lower(), words))
             return "(%s %s %s)" % (self._hash_name(table, field),
                                    db_op, self._sql_repr(value))
         elif where[0] in ["AND", "OR"]:
@@ -1977,8 +2342,10 @@ class DBAPI(DbGeneric):
         order_by - [(field, "ASC" | "DESC"), ...]
         """
         if order_by:
-            order_clause = ", ".join(["%s %s" % (self._hash_name(table, field),
-                                                 dir)
+            # rank is joined in by _select:
+            order_clause = ", ".join(["%s %s" % (
+                "fulltext_rank" if field == "rank"
+                else self._hash_name(table, field), dir)
                                       for (field, dir) in order_by])
             return "ORDER BY " + order_clause
         else:
@@ -2006,6 +2373,8 @@ class DBAPI(DbGeneric):
         """
         if order_by:
             for (field, directory) in order_by:
+                if field == "rank" and self.fulltext:
+                    continue
                 if self._hash_name(table, field) not in secondary_fields:
                     return False
         return True
@@ -2032,6 +2401,13 @@ class DBAPI(DbGeneric):
                 return self._check_where_fields(table, exprs, secondary_fields)
         elif len(where) == 3: # (name, db_op, value)
             (name, db_op, value) = where
+            if db_op in phonetic.OPERATORS:
+                return table == "Person" and name in phonetic.FIELDS
+            elif db_op == phonetic.DUPLICATE:
+                return table == "Person" and name == "handle"
+            elif db_op == "MATCH":
+                return (self.fulltext and
+                        table in fulltext.FULLTEXT_TABLES)
             # just the ones we need for where
             return self._hash_name(table, name) in secondary_fields
 
@@ -2058,6 +2434,9 @@ class DBAPI(DbGeneric):
                                  table, "class_func").get_secondary_fields()]
                             + ["handle"])
                         # handle is a sql field, but not listed in secondaries
+        if table == "Person": # and so are the summary fields
+            secondary_fields += [field for (field, ptype)
+                                 in Person.get_summary_fields()]
         # If no fields, then we need objects:
         # Check to see if where matches SQL fields:
         table_name = table.lower()
@@ -2084,6 +2463,19 @@ class DBAPI(DbGeneric):
             fields = hashed_fields
             select_fields = self._build_select_fields(table, fields,
                                                       secondary_fields)
+        from_clause = table_name
+        if order_by and "rank" in [field for (field, dir) in order_by]:
+            # order by relevance to the full-text query that all
+            # results match, if there is one:
+            words = fulltext.parse_query(fulltext.find_match(where) or "")
+            if words and not get_count_only:
+                from_clause = ("%s JOIN (%s) AS fulltext_rank "
+                               "ON handle = fulltext_handle" %
+                               (table_name, self.dbapi.fulltext_query(
+                                   table_name, words)))
+            else:
+                order_by = [(field, dir) for (field, dir) in order_by
+                            if field != "rank"]
         where_clause = self._build_where_clause(table, where)
         order_clause = self._build_order_clause(table, order_by)
         if get_count_only:
@@ -2091,12 +2483,12 @@ class DBAPI(DbGeneric):
         if start:
             query = "SELECT %s FROM %s %s %s LIMIT %s, %s " % (
                 ", ".join(select_fields),
-                table_name, where_clause, order_clause, start, limit
+                from_clause, where_clause, order_clause, start, limit
             )
         else:
             query = "SELECT %s FROM %s %s %s LIMIT %s" % (
                 ", ".join(select_fields),
-                table_name, where_clause, order_clause, limit
+                from_clause, where_clause, order_clause, limit
             )
         if get_count_only:
             self.dbapi.execute("SELECT count(1) from (%s) AS temp_select;"
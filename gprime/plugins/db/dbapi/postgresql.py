@@ -99,5 +99,40 @@ class Postgresql:
                             "WHERE table_name=?;", [table])
         return self.fetchone()[0] != 0
 
+    def create_fulltext(self, table):
+        """
+        Create the full-text index of a table: a table of tsvectors, with
+        a GIN index.
+        """
+        self.execute("CREATE TABLE %s_fts (handle VARCHAR(50) PRIMARY KEY, "
+                     "text_vector TSVECTOR);" % table)
+        self.execute("CREATE INDEX %s_fts_text_vector ON %s_fts "
+                     "USING GIN (text_vector);" % (table, table))
+        return True
+
+    def update_fulltext(self, table, handle, text):
+        self.execute("DELETE FROM %s_fts WHERE handle = ?;" % table, [handle])
+        self.execute("INSERT INTO %s_fts (handle, text_vector) "
+                     "VALUES (?, to_tsvector('simple', ?));" % table,
+                     [handle, text])
+
+    def delete_fulltext(self, table, handle=None):
+        if handle is None:
+            self.execute("DELETE FROM %s_fts;" % table)
+        else:
+            self.execute("DELETE FROM %s_fts WHERE handle = ?;" % table,
+                         [handle])
+
+    def fulltext_query(self, table, words):
+        query = " & ".join(["%s%s" % (word, ":*" if prefix else "")
+                            for (word, prefix) in words])
+        return ("SELECT handle AS fulltext_handle, "
+                "-ts_rank(text_vector, query) AS fulltext_rank "
+                "FROM %s_fts, to_tsquery('simple', '%s') AS query "
+                "WHERE text_vector @@ query" % (table, query))
+
+    def interrupt(self):
+        self.connection.cancel()
+
     def close(self):
         self.connection.close()
@@ -107,9 +107,13 @@ class Sqlite:
         """
         Start a transaction manually. This transactions usually persist until
         the next COMMIT or ROLLBACK command.
+
+        The write lock is taken at once, so that two connections (of
+        different server workers) writing at the same time wait for each
+        other, rather than fail.
         """
-        self.log.debug("BEGIN TRANSACTION;")
-        self.execute("BEGIN TRANSACTION;")
+        self.log.debug("BEGIN IMMEDIATE TRANSACTION;")
+        self.execute("BEGIN IMMEDIATE TRANSACTION;")
 
     def commit(self):
         """
@@ -165,6 +169,83 @@ class Sqlite:
         # (1, 'given_name', 'TEXT', 0, None, 0)
         return column in [row[1] for row in self.fetchall()]
 
+    def create_fulltext(self, table):
+        """
+        Create the full-text index of a table: an FTS5 table, and the map
+        from handles to its rows. Return False if this sqlite has no
+        FTS5.
+
+        :param table: the name of the table, such as "person"
+        """
+        try:
+            self.execute("CREATE VIRTUAL TABLE %s_fts USING fts5("
+                         "handle UNINDEXED, text, prefix = '2 3', "
+                         "tokenize = 'unicode61 remove_diacritics 2');"
+                         % table)
+        except sqlite3.OperationalError as exc:
+            self.log.warning("No full-text index: %s", exc)
+            return False
+        self.execute("CREATE TABLE %s_fts_handle "
+                     "(id INTEGER PRIMARY KEY, handle VARCHAR(50) UNIQUE);"
+                     % table)
+        return True
+
+    def update_fulltext(self, table, handle, text):
+        """
+        Set the text of an object in the full-text index of a table.
+        """
+        self.execute("SELECT id FROM %s_fts_handle WHERE handle = ?;" % table,
+                     [handle])
+        row = self.fetchone()
+        if row:
+            self.execute("UPDATE %s_fts SET text = ? WHERE rowid = ?;"
+                         % table, [text, row[0]])
+        else:
+            self.execute("INSERT INTO %s_fts_handle (handle) VALUES (?);"
+                         % table, [handle])
+            self.execute("INSERT INTO %s_fts (rowid, handle, text) "
+                         "VALUES (?, ?, ?);" % table,
+                         [self.cursor.lastrowid, handle, text])
+
+    def delete_fulltext(self, table, handle=None):
+        """
+        Remove an object (all objects if handle is None) from the
+        full-text index of a table.
+        """
+        if handle is None:
+            self.execute("DELETE FROM %s_fts;" % table)
+            self.execute("DELETE FROM %s_fts_handle;" % table)
+            return
+        self.execute("SELECT id FROM %s_fts_handle WHERE handle = ?;" % table,
+                     [handle])
+        row = self.fetchone()
+        if row:
+            self.execute("DELETE FROM %s_fts WHERE rowid = ?;" % table,
+                         [row[0]])
+            self.execute("DELETE FROM %s_fts_handle WHERE id = ?;" % table,
+                         [row[0]])
+
+    def fulltext_query(self, table, words):
+        """
+        Return a SELECT of (fulltext_handle, fulltext_rank) of the objects
+        of a table that match all the words, where a lower rank is a
+        better match.
+
+        :param words: list of (word, prefix), where word has only letters
+            and digits (see gprime.db.fulltext.parse_query)
+        """
+        query = " ".join(['"%s"%s' % (word, "*" if prefix else "")
+                          for (word, prefix) in words])
+        return ("SELECT handle AS fulltext_handle, rank AS fulltext_rank "
+                "FROM %s_fts WHERE %s_fts MATCH '%s'" % (table, table, query))
+
+    def interrupt(self):
+        """
+        Abort the query running on the connection (from another thread).
+        """
+        self.log.debug("interrupting query...")
+        self.connection.interrupt()
+
     def close(self):
         """
         Close the current database.
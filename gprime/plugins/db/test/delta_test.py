@@ -0,0 +1,161 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the delta export of the changes since a time """
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from gprime.db import make_database, DbTxn
+from gprime.lib import Person, Event, EventRef, EventType, Surname
+from gprime.cli.user import User
+from gprime.plugins.export import JSONExport, exportxml
+from gprime.plugins.importer import JSONImport, importxml
+
+class ErrorUser(User):
+    """ Keeps the errors, rather than printing them """
+    def __init__(self):
+        super().__init__(quiet=True)
+        self.errors = []
+
+    def notify_error(self, title, error=""):
+        self.errors.append(title)
+
+class DeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = self.make_db()
+        # the objects before the delta:
+        self.since = int(time.time()) - 100
+        with DbTxn("Add", self.db, batch=True) as trans:
+            for name in ["Smith", "Jones", "Lewis"]:
+                self.add_person(name, trans, self.since - 1000)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def make_db(self):
+        path = tempfile.mkdtemp(dir=self.directory)
+        db = make_database("dbapi")
+        db.write_version(path)
+        db.load(path)
+        return db
+
+    def add_person(self, name, trans, change_time=None):
+        event = Event()
+        event.set_type(EventType.BIRTH)
+        event.set_description("Birth of %s" % name)
+        self.db.add_event(event, trans)
+        person = Person()
+        surname = Surname()
+        surname.set_surname(name)
+        person.primary_name.add_surname(surname)
+        ref = EventRef()
+        ref.set_reference_handle(event.handle)
+        person.add_event_ref(ref)
+        self.db.add_person(person, trans)
+        if change_time is not None:
+            self.db.commit_event(event, trans, change_time)
+            self.db.commit_person(person, trans, change_time)
+        return person
+
+    def get_person(self, name):
+        for person in self.db.iter_people():
+            if person.get_primary_name().get_surname() == name:
+                return person
+
+    @staticmethod
+    def get_objects(db):
+        """
+        Return the objects of the database, by table and handle.
+        """
+        objects = {}
+        for table in db.get_table_names():
+            for obj in db.get_table_func(table, "iter_func")():
+                struct = obj.to_struct()
+                # the copy is made by an import, at its own time:
+                del struct["change"]
+                objects[(table, obj.handle)] = struct
+        return objects
+
+    def export(self, module, extension, since=None):
+        filename = os.path.join(self.directory, "export.%s" % extension)
+        if module is JSONExport:
+            module.exportData(self.db, filename, since=since)
+        else:
+            module.export_data(self.db, filename, User(quiet=True),
+                               since=since)
+        return filename
+
+    def change(self):
+        """
+        Add, edit and remove objects after since.
+        """
+        with DbTxn("Change", self.db, batch=True) as trans:
+            self.add_person("Garner", trans)
+            person = self.get_person("Smith")
+            person.get_primary_name().set_first_name("John")
+            self.db.commit_person(person, trans)
+            person = self.get_person("Jones")
+            self.db.remove_person(person.handle, trans)
+            self.db.remove_event(person.get_event_ref_list()[0].ref, trans)
+            # an object added and removed since, never in the copy:
+            person = self.add_person("Parker", trans)
+            self.db.remove_person(person.handle, trans)
+
+    def test_round_trip(self):
+        copy = self.make_db()
+        JSONImport.importData(copy, self.export(JSONExport, "json"),
+                              User(quiet=True))
+        self.assertEqual(self.get_objects(copy), self.get_objects(self.db))
+        self.change()
+        delta = self.export(JSONExport, "json", since=self.since)
+        with open(delta) as fp:
+            lines = fp.readlines()
+        # the delta header, Garner and Smith with their events, Parker's
+        # event, and the tombstones of Jones and their event:
+        self.assertEqual(len(lines), 1 + 4 + 1 + 2)
+        JSONImport.importData(copy, delta, User(quiet=True))
+        objects = self.get_objects(copy)
+        copy.close()
+        self.assertEqual(objects, self.get_objects(self.db))
+        names = sorted(person["primary_name"]["first_name"] +
+                       person["primary_name"]["surname_list"][0]["surname"]
+                       for ((table, handle), person) in objects.items()
+                       if table == "Person")
+        self.assertEqual(names, ["Garner", "JohnSmith", "Lewis"])
+
+    def test_xml_delta(self):
+        self.change()
+        delta = self.export(exportxml, "gramps", since=self.since)
+        copy = self.make_db()
+        user = ErrorUser()
+        importxml.importData(copy, delta, user)
+        self.assertEqual(user.errors, ["The file is a delta export"])
+        self.assertEqual(copy.get_number_of_people(), 0)
+        copy.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -75,126 +75,231 @@ DPI = 72.0
 #------------------------------------------------------------------------
 class CairoDocgen(libcairodoc.CairoDoc):
     """Render the document into a file using a Cairo surface.
+
+    The pages are drawn as soon as they are complete, while the document is
+    made, so that only the page being filled is kept in memory. But once a
+    table of contents or an alphabetical index is inserted, the pages are
+    kept until the end, when the pages they take are known.
     """
     def create_cairo_surface(self, fobj, width_in_points, height_in_points):
         # See
-# http://cairographics.org/documentation/pycairo/3/reference/surfaces.html#class-pssurface-surface
         # for the arg semantics.
         raise "Missing surface factory override!!!"
 
-    def run(self):
-        """Create the output file.
-        The derived class overrides EXT and create_cairo_surface
-        """
+    def open(self, filename):
+        libcairodoc.CairoDoc.open(self, filename)
+        self._pages_drawn = 0
+        self._marks = [] # the index marks of the pages drawn, and their page
+        self._held = False # are the pages kept until the end?
+        self._last_type = None # the type of the last element paginated
+
         # get paper dimensions
         paper_width = self.paper.get_size().get_width() * DPI / 2.54
         paper_height = self.paper.get_size().get_height() * DPI / 2.54
-        page_width = round(self.paper.get_usable_width() * DPI / 2.54)
-        page_height = round(self.paper.get_usable_height() * DPI / 2.54)
-        left_margin = self.paper.get_left_margin() * DPI / 2.54
-        top_margin = self.paper.get_top_margin() * DPI / 2.54
+        self._page_width = round(self.paper.get_usable_width() * DPI / 2.54)
+        self._page_height = round(self.paper.get_usable_height() * DPI / 2.54)
+        self._left_margin = self.paper.get_left_margin() * DPI / 2.54
+        self._top_margin = self.paper.get_top_margin() * DPI / 2.54
 
         # create cairo context and pango layout
         filename = self._backend.filename
         # Cairo can't reliably handle unicode filenames on Linux or
         # Windows, so open the file for it.
-        with open(filename, 'wb') as fd:
-            try:
-                surface = self.create_cairo_surface(fd, paper_width,
-                                                    paper_height)
-                surface.set_fallback_resolution(300, 300)
-                cr = cairo.Context(surface)
-                fontmap = PangoCairo.font_map_new()
-                fontmap.set_resolution(DPI)
-                pango_context = fontmap.create_context()
-                options = cairo.FontOptions()
-                options.set_hint_metrics(cairo.HINT_METRICS_OFF)
-                PangoCairo.context_set_font_options(pango_context, options)
-                layout = Pango.Layout(pango_context)
-                PangoCairo.update_context(cr, pango_context)
-                # paginate the document
-                self.paginate_document(layout, page_width, page_height,
-                                       DPI, DPI)
-                body_pages = self._pages
-
-                # build the table of contents and alphabetical index
-                toc_page = None
-                index_page = None
-                toc = []
-                index = {}
-                for page_nr, page in enumerate(body_pages):
-                    if page.has_toc():
-                        toc_page = page_nr
-                    if page.has_index():
-                        index_page = page_nr
-                    for mark in page.get_marks():
-                        if mark.type == INDEX_TYPE_ALP:
-                            if mark.key in index:
-                                if page_nr + 1 not in index[mark.key]:
-                                    index[mark.key].append(page_nr + 1)
-                            else:
-                                index[mark.key] = [page_nr + 1]
-                        elif mark.type == INDEX_TYPE_TOC:
-                            toc.append([mark, page_nr + 1])
-
-                # paginate the table of contents
-                rebuild_required = False
+        self._fd = None
+        try:
+            self._fd = open(filename, 'wb')
+            self._surface = self.create_cairo_surface(self._fd, paper_width,
+                                                      paper_height)
+            self._surface.set_fallback_resolution(300, 300)
+            self._cr = cairo.Context(self._surface)
+            fontmap = PangoCairo.font_map_new()
+            fontmap.set_resolution(DPI)
+            pango_context = fontmap.create_context()
+            options = cairo.FontOptions()
+            options.set_hint_metrics(cairo.HINT_METRICS_OFF)
+            PangoCairo.context_set_font_options(pango_context, options)
+            self._layout = Pango.Layout(pango_context)
+            PangoCairo.update_context(self._cr, pango_context)
+        except IOError as msg:
+            self.__close_file()
+            errmsg = "%s\n%s" % (_("Could not create %s") % filename, msg)
+            raise ReportError(errmsg)
+
+    def __close_file(self):
+        """
+        Close the output file, when the report fails.
+        """
+        if self._fd is not None and not self._fd.closed:
+            self._fd.close()
+
+    def end_paragraph(self):
+        libcairodoc.CairoDoc.end_paragraph(self)
+        self.__flush()
+
+    def end_table(self):
+        libcairodoc.CairoDoc.end_table(self)
+        self.__flush()
+
+    def end_page(self):
+        libcairodoc.CairoDoc.end_page(self)
+        self.__flush()
+
+    def page_break(self):
+        libcairodoc.CairoDoc.page_break(self)
+        self.__flush()
+
+    def start_page(self):
+        # "close" the previous page if it was paginated already:
+        if (not self._doc.get_children() and
+                self._last_type not in (None, 'PAGEBREAK')):
+            self._doc.add_child(libcairodoc.GtkDocPagebreak())
+        libcairodoc.CairoDoc.start_page(self)
+
+    def __flush(self):
+        """
+        Paginate the completed elements of the document, and draw the pages
+        that are complete.
+        """
+        if self._held or self._active_element is not self._doc:
+            return
+        if self._doc.has_toc() or self._doc.has_index():
+            self._held = True
+            return
+        try:
+            self.__paginate()
+            self.__draw_pages(len(self._pages) - 1)
+        except Exception as err:
+            self.__close_file()
+            errmsg = "%s\n%s" % (_("Could not create %s") %
+                                  self._backend.filename, err)
+            raise ReportError(errmsg)
+
+    def __paginate(self):
+        """
+        Paginate the elements of the document, after those paginated
+        already, and remove them from it.
+        """
+        children = self._doc.get_children()
+        if not self._pages:
+            self._pages.append(libcairodoc.GtkDocDocument())
+            self._available_height = self._page_height
+        if children:
+            self._last_type = children[-1].get_type()
+        self._elements_to_paginate.extend(children)
+        del children[:]
+        while self._elements_to_paginate:
+            self.paginate_next(self._layout, self._page_width,
+                               self._page_height, DPI, DPI)
+
+    def __draw_pages(self, count):
+        """
+        Draw the first pages, and remove them (keeping their index marks).
+        """
+        for page_nr in range(count):
+            for mark in self._pages[page_nr].get_marks():
+                self._marks.append((mark, self._pages_drawn + 1))
+            self._cr.save()
+            self._cr.translate(self._left_margin, self._top_margin)
+            self.draw_page(page_nr, self._cr, self._layout,
+                           self._page_width, self._page_height, DPI, DPI)
+            self._cr.show_page()
+            self._cr.restore()
+            self._pages_drawn += 1
+        del self._pages[:count]
+
+    def run(self):
+        """Create the output file.
+        The derived class overrides EXT and create_cairo_surface
+        """
+        filename = self._backend.filename
+        layout = self._layout
+        page_width, page_height = self._page_width, self._page_height
+        # (the table of contents and index are written as documents too)
+        self._held = True
+        try:
+            # paginate the rest of the document
+            self.__paginate()
+            body_pages = self._pages
+            first = self._pages_drawn # number of the first page, from 0
+
+            # build the table of contents and alphabetical index
+            toc_page = None
+            index_page = None
+            toc = []
+            index = {}
+            marks = self._marks + [
+                (mark, page_nr + 1)
+                for page_nr, page in enumerate(body_pages, first)
+                for mark in page.get_marks()]
+            for page_nr, page in enumerate(body_pages, first):
+                if page.has_toc():
+                    toc_page = page_nr
+                if page.has_index():
+                    index_page = page_nr
+            for mark, page_nr in marks:
+                if mark.type == INDEX_TYPE_ALP:
+                    if mark.key in index:
+                        if page_nr not in index[mark.key]:
+                            index[mark.key].append(page_nr)
+                    else:
+                        index[mark.key] = [page_nr]
+                elif mark.type == INDEX_TYPE_TOC:
+                    toc.append([mark, page_nr])
+
+            # paginate the table of contents
+            rebuild_required = False
+            if toc_page is not None:
+                toc_pages = self.__generate_toc(layout, page_width,
+                                                page_height, toc)
+                offset = len(toc_pages) - 1
+                if offset > 0:
+                    self.__increment_pages(toc, index, toc_page, offset)
+                    rebuild_required = True
+            else:
+                toc_pages = []
+
+            # paginate the index
+            if index_page is not None:
+                index_pages = self.__generate_index(layout, page_width,
+                                                    page_height, index)
+                offset = len(index_pages) - 1
+                if offset > 0:
+                    self.__increment_pages(toc, index, index_page, offset)
+                    rebuild_required = True
+            else:
+                index_pages = []
+
+            # rebuild the table of contents and index if required
+            if rebuild_required:
                 if toc_page is not None:
                     toc_pages = self.__generate_toc(layout, page_width,
                                                     page_height, toc)
-                    offset = len(toc_pages) - 1
-                    if offset > 0:
-                        self.__increment_pages(toc, index, toc_page, offset)
-                        rebuild_required = True
-                else:
-                    toc_pages = []
-
-                # paginate the index
                 if index_page is not None:
                     index_pages = self.__generate_index(layout, page_width,
                                                         page_height, index)
-                    offset = len(index_pages) - 1
-                    if offset > 0:
-                        self.__increment_pages(toc, index, index_page, offset)
-                        rebuild_required = True
-                else:
-                    index_pages = []
-
-                # rebuild the table of contents and index if required
-                if rebuild_required:
-                    if toc_page is not None:
-                        toc_pages = self.__generate_toc(layout, page_width,
-                                                        page_height, toc)
-                    if index_page is not None:
-                        index_pages = self.__generate_index(layout, page_width,
-                                                            page_height, index)
-
-                # render the pages
-                if toc_page is not None:
-                    body_pages = body_pages[:toc_page] + toc_pages + \
-                                 body_pages[toc_page+1:]
-                if index_page is not None:
-                    body_pages = body_pages[:index_page] + index_pages + \
-                                 body_pages[index_page+1:]
-                self._pages = body_pages
-                for page_nr in range(len(self._pages)):
-                    cr.save()
-                    cr.translate(left_margin, top_margin)
-                    self.draw_page(page_nr, cr, layout,
-                                   page_width, page_height,
-                                   DPI, DPI)
-                    cr.show_page()
-                    cr.restore()
-
-                # close the surface (file)
-                surface.finish()
-
-            except IOError as msg:
-                errmsg = "%s\n%s" % (_("Could not create %s") % filename, msg)
-                raise ReportError(errmsg)
-            except Exception as err:
-                errmsg = "%s\n%s" % (_("Could not create %s") % filename, err)
-                raise ReportError(errmsg)
+
+            # render the pages
+            if toc_page is not None:
+                body_pages = body_pages[:toc_page - first] + toc_pages + \
+                             body_pages[toc_page - first + 1:]
+            if index_page is not None:
+                body_pages = body_pages[:index_page - first] + index_pages + \
+                             body_pages[index_page - first + 1:]
+            self._pages = body_pages
+            self.__draw_pages(len(self._pages))
+
+            # close the surface (file)
+            self._surface.finish()
+            self._fd.close()
+
+        except IOError as msg:
+            self.__close_file()
+            errmsg = "%s\n%s" % (_("Could not create %s") % filename, msg)
+            raise ReportError(errmsg)
+        except Exception as err:
+            self.__close_file()
+            errmsg = "%s\n%s" % (_("Could not create %s") % filename, err)
+            raise ReportError(errmsg)
 
     def __increment_pages(self, toc, index, start_page, offset):
         """
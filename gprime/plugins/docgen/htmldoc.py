@@ -91,7 +91,13 @@ class HtmlDoc(BaseDoc, TextDoc):
     The styles as defined in the stylesheed of the textdoc, will be converted
     to css class. Color is removed to avoid conflicts with the css. Also
     Fontface is removed. Size, italic, bold, margins, borders are retained
+
+    The completed parts of the report (paragraphs, tables, ...) are written
+    to the file as they are made, once the title is in the header (or
+    after FLUSH_ITEMS parts, for a report without a title), so that the
+    page is not kept in memory.
     """
+    FLUSH_ITEMS = 100
 
     def __init__(self, styles, paper_style):
         BaseDoc.__init__(self, styles, None)
@@ -128,6 +134,7 @@ class HtmlDoc(BaseDoc, TextDoc):
         self.htmllist += [self._backend.html_body]
         #start a gramps report
         self.htmllist += [Html('div', id="grampstextdoc")]
+        self._backend.html_body += self.htmllist[-1]
 
         self.build_header()
 
@@ -243,7 +250,7 @@ class HtmlDoc(BaseDoc, TextDoc):
         """
         Overwrite base method
         """
-        while len(self.htmllist) > 1:
+        while len(self.htmllist) > 2:
             self.__reduce_list()
         #now write the actual file
         self._backend.close()
@@ -304,6 +311,21 @@ class HtmlDoc(BaseDoc, TextDoc):
         """
         self.htmllist[-2] += self.htmllist[-1]
         self.htmllist.pop()
+        if len(self.htmllist) == 2:
+            self.__flush()
+
+    def __flush(self):
+        """
+        Write the completed parts of the report to the file, unless the
+        title may still be added to the header
+        """
+        if not self._backend.is_streaming():
+            if self.__title_written == 0 or (
+                    self.__title_written == -1 and
+                    len(self.htmllist[1]) < self.FLUSH_ITEMS):
+                return
+            self._backend.open_stream(*self.htmllist)
+        self._backend.flush()
 
     def __write_text(self, text, mark=None, markup=False, links=False):
         """
@@ -438,9 +460,9 @@ class HtmlDoc(BaseDoc, TextDoc):
         self.__reduce_list()
         if self.__title_written == 0:
             self.__title_written = 1
+            self.write_title()
             #close div statement
             self.__reduce_list()
-            self.write_title()
 
     def start_bold(self):
         """
@@ -37,6 +37,7 @@ import os
 from hashlib import md5
 import zipfile
 import time
+import tempfile
 from io import StringIO
 from math import cos, sin, radians
 from xml.sax.saxutils import escape
@@ -71,6 +72,8 @@ _ = glocale.translation.gettext
 
 APP_TYPE = 'application/vnd.oasis.opendocument.text'
 
+CHUNK_SIZE = 64 * 1024 # characters of the body copied to the zip at a time
+
 ESC_MAP = {
     '\x1a'           : '',
     '\x0c'           : '',
@@ -413,7 +416,6 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
         self.cntnt = None
         self.cntnt1 = None
         self.cntnt2 = None
-        self.cntntx = None
         self.sfile = None
         self.mimetype = None
         self.meta = None
@@ -445,7 +447,10 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
 
         self.filename = os.path.normpath(os.path.abspath(self.filename))
         self._backend = OdfBackend()
-        self.cntnt = StringIO()
+        # The body is written to a file as it is made, and copied into the
+        # content.xml of the document at the end, after its header and
+        # styles (cntnt1 and cntnt2), which are only known then:
+        self.cntnt = tempfile.TemporaryFile("w+", encoding="utf-8")
         self.cntnt1 = StringIO()
         self.cntnt2 = StringIO()
 
@@ -736,19 +741,12 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
         """
         We have finished the document.
         So me must integrate the new fonts and styles where they should be.
-        The content.xml file is closed.
+        The content.xml file is written with the zip file.
         """
-        self.cntntx = StringIO()
         self.stylelist_notes = self.uniq(self.stylelist_notes)
         self.add_styled_notes_fonts()
         self.add_styled_notes_styles()
         self.add_styled_photo_styles()
-        self.cntntx.write(self.cntnt1.getvalue())
-        self.cntntx.write(self.cntnt2.getvalue())
-        self.cntntx.write(self.cntnt.getvalue())
-        self.cntnt1.close()
-        self.cntnt2.close()
-        self.cntnt.close()
 
     def close(self):
         """
@@ -1126,6 +1124,24 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
         zipinfo.external_attr = 0o644 << 16
         zfile.writestr(zipinfo, data)
 
+    def _add_zip_content(self, zfile, date_time):
+        """
+        Add the content.xml file to an archive, copying its body from the
+        temporary file a part at a time
+        """
+        zipinfo = zipfile.ZipInfo("content.xml")
+        zipinfo.date_time = date_time
+        zipinfo.compress_type = zipfile.ZIP_DEFLATED
+        zipinfo.external_attr = 0o644 << 16
+        # (the position in the body is in bytes)
+        large = self.cntnt.tell() > zipfile.ZIP64_LIMIT // 2
+        with zfile.open(zipinfo, "w", force_zip64=large) as zcontent:
+            zcontent.write(self.cntnt1.getvalue().encode("utf-8"))
+            zcontent.write(self.cntnt2.getvalue().encode("utf-8"))
+            self.cntnt.seek(0)
+            for part in iter(lambda: self.cntnt.read(CHUNK_SIZE), ""):
+                zcontent.write(part.encode("utf-8"))
+
     def _write_zip(self):
         """
         Create the odt file. This is a zip file
@@ -1142,7 +1158,7 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
 
         self._add_zip(zfile, "META-INF/manifest.xml", self.mfile.getvalue(),
                       now)
-        self._add_zip(zfile, "content.xml", self.cntntx.getvalue(), now)
+        self._add_zip_content(zfile, now)
         self._add_zip(zfile, "meta.xml", self.meta.getvalue(), now)
         self._add_zip(zfile, "settings.xml", self.stfile.getvalue(), now)
         self._add_zip(zfile, "styles.xml", self.sfile.getvalue(), now)
@@ -1150,6 +1166,8 @@ class ODFDoc(BaseDoc, TextDoc, DrawDoc):
 
         self.mfile.close()
         self.cntnt.close()
+        self.cntnt1.close()
+        self.cntnt2.close()
         self.meta.close()
         self.stfile.close()
         self.sfile.close()
@@ -0,0 +1,215 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2016  Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+
+""" Unittest for writing documents while they are made """
+
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+from gprime.plug.docgen import (StyleSheet, ParagraphStyle, TableStyle,
+                                TableCellStyle, PaperStyle, PaperSize,
+                                IndexMark, INDEX_TYPE_TOC)
+from gprime.errors import ReportError
+from gprime.plugins.docgen.htmldoc import HtmlDoc
+from gprime.plugins.docgen.odfdoc import ODFDoc
+try:
+    from gprime.plugins.docgen import cairodoc
+except (ImportError, ValueError): # needs Pango (gi) and cairo
+    cairodoc = None
+
+class StreamingDocTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.styles = StyleSheet()
+        title = ParagraphStyle()
+        title.set_header_level(1)
+        self.styles.add_paragraph_style("Title", title)
+        self.styles.add_paragraph_style("Normal", ParagraphStyle())
+        table = TableStyle()
+        table.set_columns(2)
+        self.styles.add_table_style("Table", table)
+        self.styles.add_cell_style("Cell", TableCellStyle())
+        self.paper = PaperStyle(PaperSize("A4", 29.7, 21.0), 0)
+        # as the Table Of Contents and Alphabetical Index items make them:
+        for (prefix, cell, names) in [("TOC", "TOC-Cell",
+                                       ["TOC-Title", "TOC-Heading1",
+                                        "TOC-Heading2", "TOC-Heading3"]),
+                                      ("IDX", "IDX-Cell",
+                                       ["IDX-Title", "IDX-Entry"])]:
+            for name in names:
+                self.styles.add_paragraph_style(name, ParagraphStyle())
+            table = TableStyle()
+            table.set_width(100)
+            table.set_columns(2)
+            table.set_column_width(0, 80)
+            table.set_column_width(1, 20)
+            self.styles.add_table_style(prefix + "-Table", table)
+            self.styles.add_cell_style(cell, TableCellStyle())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, doc, filename, title=None):
+        path = os.path.join(self.directory, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        doc.open(path)
+        doc.init()
+        if title:
+            doc.start_paragraph("Title")
+            doc.write_text(title)
+            doc.end_paragraph()
+        for number in range(200):
+            doc.start_paragraph("Normal")
+            doc.write_text("Paragraph %s" % number)
+            doc.end_paragraph()
+            if number % 50 == 0:
+                doc.start_table("table", "Table")
+                doc.start_row()
+                for column in range(2):
+                    doc.start_cell("Cell")
+                    doc.start_paragraph("Normal")
+                    doc.write_text("Cell %s.%s" % (number, column))
+                    doc.end_paragraph()
+                    doc.end_cell()
+                doc.end_row()
+                doc.end_table()
+        return doc
+
+    def read(self, filename):
+        with open(os.path.join(self.directory, filename)) as fp:
+            return fp.read()
+
+    def test_html(self):
+        doc = HtmlDoc(self.styles, self.paper)
+        doc.FLUSH_ITEMS = 10 ** 6
+        self.write(doc, "kept/test.html").close()
+        doc = HtmlDoc(self.styles, self.paper)
+        doc.FLUSH_ITEMS = 10
+        self.write(doc, "streamed/test.html")
+        # only the parts after the last ones written are kept:
+        self.assertTrue(doc._backend.is_streaming())
+        self.assertLessEqual(len(doc.htmllist[-1]), 2)
+        doc.close()
+        self.assertEqual(self.read("streamed/test.html"),
+                         self.read("kept/test.html"))
+        # the title is in the header, before the parts written:
+        doc = HtmlDoc(self.styles, self.paper)
+        self.write(doc, "title.html", "Streamed").close()
+        html = self.read("title.html")
+        self.assertLess(html.index("<title>Streamed</title>"),
+                        html.index("Paragraph 0"))
+        self.assertLess(html.index("Paragraph 199"), html.index("</html>"))
+
+    def test_odf(self):
+        doc = ODFDoc(self.styles, self.paper)
+        self.write(doc, "test.odt", "Streamed").close()
+        with zipfile.ZipFile(os.path.join(self.directory, "test.odt")) as odt:
+            content = odt.read("content.xml").decode("utf-8")
+        self.assertTrue(content.startswith("<?xml"))
+        self.assertLess(content.index("</office:automatic-styles>"),
+                        content.index("Paragraph 0"))
+        self.assertIn("Cell 150.1", content)
+        self.assertTrue(content.endswith("</office:document-content>\n"))
+
+    def write_marked(self, doc, filename, toc_at=200, chapters=40):
+        """
+        Write a document with a table of contents before paragraph
+        toc_at, a chapter every chapters paragraphs, and an alphabetical
+        index at the end. Return the pages, and the page numbers of the
+        table of contents and of the index.
+        """
+        found = {}
+        write_toc, write_index = cairodoc.write_toc, cairodoc.write_index
+        def record_toc(toc, doc):
+            found["toc"] = [(mark.key, page_nr) for (mark, page_nr) in toc]
+            write_toc(toc, doc)
+        def record_index(index, doc):
+            found["index"] = sorted(index.items())
+            write_index(index, doc)
+        cairodoc.write_toc, cairodoc.write_index = record_toc, record_index
+        try:
+            doc.open(os.path.join(self.directory, filename))
+            doc.init()
+            doc.toc_title = "Contents"
+            doc.index_title = "Index"
+            for number in range(600):
+                if number == toc_at:
+                    doc.insert_toc()
+                if number % chapters == 0:
+                    doc.start_paragraph("Title")
+                    doc.write_text("Chapter %s" % number, IndexMark(
+                        "Chapter %s" % number, INDEX_TYPE_TOC, 1))
+                    doc.end_paragraph()
+                doc.start_paragraph("Normal")
+                doc.write_text("Paragraph %s" % number,
+                               IndexMark("Word %s" % (number % 70)))
+                doc.end_paragraph()
+            doc.insert_index()
+            doc.close()
+        finally:
+            cairodoc.write_toc, cairodoc.write_index = write_toc, write_index
+        return (doc._pages_drawn, found["toc"], found["index"])
+
+    @unittest.skipIf(cairodoc is None, "needs Pango and cairo")
+    def test_cairo(self):
+        class PaginateAllDoc(cairodoc.PdfDoc):
+            """
+            Keeps all pages until the end, as before pages were drawn as
+            they were made.
+            """
+            def open(self, filename):
+                cairodoc.PdfDoc.open(self, filename)
+                self._held = True
+        # the table of contents in the middle, at the start, and at the
+        # end, over several pages:
+        for (toc_at, chapters, toc_size) in [(200, 40, 15), (0, 7, 86),
+                                             (599, 7, 86)]:
+            expected = self.write_marked(
+                PaginateAllDoc(self.styles, self.paper), "all.pdf",
+                toc_at, chapters)
+            doc = cairodoc.PdfDoc(self.styles, self.paper)
+            self.assertEqual(self.write_marked(doc, "streamed.pdf", toc_at,
+                                               chapters), expected)
+            (pages, toc, index) = expected
+            self.assertGreater(pages, 5)
+            self.assertEqual(len(toc), toc_size)
+            self.assertEqual(len(index), 70)
+            self.assertTrue(doc._fd.closed)
+            if toc_at:
+                # the pages before the table of contents were drawn as
+                # made:
+                self.assertTrue(doc._marks)
+
+    @unittest.skipIf(cairodoc is None, "needs Pango and cairo")
+    def test_cairo_failure(self):
+        doc = cairodoc.PdfDoc(self.styles, self.paper)
+        def draw_page(*args):
+            raise ValueError("no room")
+        doc.draw_page = draw_page
+        self.assertRaises(ReportError, self.write, doc, "failed.pdf")
+        self.assertTrue(doc._fd.closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,7 +47,7 @@ from gprime.plug.docgen import (FontStyle, ParagraphStyle, GraphicsStyle,
                                     FONT_SANS_SERIF, PARA_ALIGN_CENTER)
 from gprime.plugins.lib.libtreebase import *
 from gprime.plugins.lib.librecurse import AscendPerson
-from gprime.proxy import CacheProxyDb
+from gprime.proxy import CacheProxyDb, SnapshotDb
 from gprime.display.name import displayer as _nd
 
 PT2CM = utils.pt2cm
@@ -553,6 +553,8 @@ class AncestorTree(Report):
 
         lang = options.menu.get_option_by_name('trans').get_value()
         self._locale = self.set_locale(lang)
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, options.menu)
         stdoptions.run_living_people_option(self, options.menu, self._locale)
         self.database = CacheProxyDb(self.database)
@@ -605,6 +607,12 @@ class AncestorTree(Report):
             #make the tree onto the canvas
             ## inlc_marr = self.connect.get_val("inc_marr")
             self.max_generations = self.connect.get_val('maxgen')
+            center = self.database.get_person_from_gid(
+                self.connect.get_val('pid'))
+            if center is not None:
+                # Load the ancestors at once:
+                self.snapshot.prefetch([center.get_handle()],
+                                       ancestors=self.max_generations)
             tree = MakeAncestorTree(database, self.canvas)
             tree.start(self.connect.get_val('pid'))
             tree = None
@@ -43,7 +43,7 @@ from gprime.plug.report import utils
 from gprime.plug.docgen import (FontStyle, ParagraphStyle, GraphicsStyle,
                                     FONT_SANS_SERIF, PARA_ALIGN_CENTER)
 from gprime.plugins.lib.libtreebase import *
-from gprime.proxy import CacheProxyDb
+from gprime.proxy import CacheProxyDb, SnapshotDb
 from gprime.display.name import displayer as _nd
 from gprime.utils.db import family_name
 
@@ -1293,6 +1293,8 @@ class DescendTree(Report):
 
         lang = options.menu.get_option_by_name('trans').get_value()
         self._locale = self.set_locale(lang)
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, options.menu)
         stdoptions.run_living_people_option(self, options.menu, self._locale)
         self.database = CacheProxyDb(self.database)
@@ -1324,6 +1326,20 @@ class DescendTree(Report):
 
         center_id = self.Connect.get_val('pid')
 
+        # Load the descendants (and the parents of the center) at once:
+        max_generations = self.Connect.get_val('maxgen')
+        if self.Connect._which_report == _RPT_NAME:
+            center = database.get_person_from_gid(center_id)
+            if center is not None:
+                self.snapshot.prefetch([center.get_handle()], ancestors=2,
+                                       descendants=max_generations)
+        else:
+            family = database.get_family_from_gid(center_id)
+            if family is not None:
+                self.snapshot.prefetch(family_handles=[family.get_handle()],
+                                       ancestors=2,
+                                       descendants=max_generations + 1)
+
         #make the tree
         tree = self.Connect.Make_Tree(database, self.canvas)
         tree.start(center_id)
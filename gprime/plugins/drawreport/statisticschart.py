@@ -33,6 +33,8 @@
 #------------------------------------------------------------------------
 import time
 from functools import partial
+from collections import Counter
+from itertools import chain, compress
 
 #------------------------------------------------------------------------
 #
@@ -60,6 +62,7 @@ from gprime.plug.report import stdoptions
 from gprime.datehandler import parser
 from gprime.display.place import displayer as _pd
 from gprime.proxy import CacheProxyDb
+from gprime.plugins.lib.libpersontable import PersonTable
 
 #------------------------------------------------------------------------
 #
@@ -255,6 +258,21 @@ def estimate_age(dbase, person,
         else:
             return (-1, -1)
 
+    return estimate_date_age(bdata, ddata)
+
+def estimate_date_age(bdata, ddata):
+    """
+    Estimates the age between two dates, as estimate_age() does between
+    the birth and death dates of a person.
+
+    @param bdata: the date the age is counted from
+    @type bdata: Date
+    @param ddata: the date the age is counted to
+    @type ddata: Date
+    @returns: tuple containing the lower and upper bounds of the age,
+       or (-1, -1) if it could not be determined.
+    @rtype: tuple
+    """
     # if the date is not valid, return an error message
     if not bdata.get_valid() or not ddata.get_valid():
         return (-1, -1)
@@ -327,215 +345,205 @@ class Extract:
 
     def __init__(self):
         """Methods for extracting statistical data from the database"""
-        # key, non-localized name, localized name, type method, data method
+        # key, non-localized name, localized name, the columns of the
+        # PersonTable the data is extracted from, data method
         self.extractors = {
             'data_title':  ("Title", _T_("person|Title"),
-                            self.get_person, self.get_title),
+                            ("title",), self.get_title),
             'data_sname':  ("Surname", _T_("Surname"),
-                            self.get_person, self.get_surname),
+                            ("surname",), self.get_surname),
             'data_fname':  ("Forename", _T_("Forename"),
-                            self.get_person, self.get_forename),
+                            ("first_name",), self.get_forename),
             'data_gender': ("Gender", _T_("Gender"),
-                            self.get_person, self.get_gender),
+                            ("gender",), self.get_gender),
             'data_byear':  ("Birth year", _T_("Birth year"),
-                            self.get_birth, self.get_year),
+                            ("birth",), self.get_year),
             'data_dyear':  ("Death year", _T_("Death year"),
-                            self.get_death, self.get_year),
+                            ("death",), self.get_year),
             'data_bmonth': ("Birth month", _T_("Birth month"),
-                            self.get_birth, self.get_month),
+                            ("birth",), self.get_month),
             'data_dmonth': ("Death month", _T_("Death month"),
-                            self.get_death, self.get_month),
+                            ("death",), self.get_month),
             'data_bplace': ("Birth place", _T_("Birth place"),
-                            self.get_birth, self.get_place),
+                            ("birth", "birth_place"), self.get_place),
             'data_dplace': ("Death place", _T_("Death place"),
-                            self.get_death, self.get_place),
+                            ("death", "death_place"), self.get_place),
             'data_mplace': ("Marriage place", _T_("Marriage place"),
-                            self.get_marriage_handles, self.get_places),
+                            ("marriages",), self.get_places),
             'data_mcount': ("Number of relationships",
                             _T_("Number of relationships"),
-                            self.get_any_family_handles,
-                            self.get_handle_count),
+                            ("families",), self.get_handle_count),
             'data_fchild': ("Age when first child born",
                             _T_("Age when first child born"),
-                            self.get_child_handles,
-                            self.get_first_child_age),
+                            ("birth", "children"), self.get_first_child_age),
             'data_lchild': ("Age when last child born",
                             _T_("Age when last child born"),
-                            self.get_child_handles, self.get_last_child_age),
+                            ("birth", "children"), self.get_last_child_age),
             'data_ccount': ("Number of children", _T_("Number of children"),
-                            self.get_child_handles, self.get_handle_count),
+                            ("children",), self.get_handle_count),
             'data_mage':   ("Age at marriage", _T_("Age at marriage"),
-                            self.get_marriage_handles, self.get_event_ages),
+                            ("birth", "marriages"), self.get_event_ages),
             'data_dage':   ("Age at death", _T_("Age at death"),
-                            self.get_person, self.get_death_age),
+                            ("birth", "death"), self.get_death_age),
             'data_age':    ("Age", _T_("Age"),
-                            self.get_person, self.get_person_age),
+                            ("birth", "death"), self.get_person_age),
             'data_etypes': ("Event type", _T_("Event type"),
-                            self.get_event_handles, self.get_event_type)
+                            ("event_types",), self.get_event_type)
         }
 
     # ----------------- data extraction methods --------------------
-    # take an object and return a list of strings
+    # take the values of the columns for a person and return a list
+    # of strings
 
-    def get_title(self, person):
+    def get_title(self, title):
         "return title for given person"
         # TODO: return all titles, not just primary ones...
-        title = person.get_primary_name().get_title()
         if title:
             return [title]
         else:
             return [_T_("(Preferred) title missing")]
 
-    def get_forename(self, person):
+    def get_forename(self, firstnames):
         "return forenames for given person"
         # TODO: return all forenames, not just primary ones...
-        firstnames = person.get_primary_name().get_first_name().strip()
+        firstnames = firstnames.strip()
         if firstnames:
             return firstnames.split()
         else:
             return [_T_("(Preferred) forename missing")]
 
-    def get_surname(self, person):
+    def get_surname(self, surnames):
         "return surnames for given person"
         # TODO: return all surnames, not just primary ones...
         # TODO: have the surname formatted according to the name_format too
-        surnames = person.get_primary_name().get_surname().strip()
+        surnames = surnames.strip()
         if surnames:
             return surnames.split()
         else:
             return [_T_("(Preferred) surname missing")]
 
-    def get_gender(self, person):
+    def get_gender(self, gender):
         "return gender for given person"
         # TODO: why there's no Person.getGenderName?
         # It could be used by getDisplayInfo & this...
-        if person.gender == Person.MALE:
+        if gender == Person.MALE:
             return [_T_("Men")]
-        if person.gender == Person.FEMALE:
+        if gender == Person.FEMALE:
             return [_T_("Women")]
         return [_T_("Gender unknown")]
 
-    def get_year(self, event):
-        "return year for given event"
-        date = event.get_date_object()
-        if date:
-            year = date.get_year()
-            if year:
-                return [str(year)]
+    def get_year(self, date):
+        "return year for given event date"
+        if date is None:
+            return [_T_("Personal information missing")]
+        year = date.get_year()
+        if year:
+            return [str(year)]
         return [_T_("Date(s) missing")]
 
-    def get_month(self, event):
-        "return month for given event"
-        date = event.get_date_object()
-        if date:
-            month = date.get_month()
-            if month:
-                return [self._locale.date_displayer.long_months[month]]
+    def get_month(self, date):
+        "return month for given event date"
+        if date is None:
+            return [_T_("Personal information missing")]
+        month = date.get_month()
+        if month:
+            return [self._locale.date_displayer.long_months[month]]
         return [_T_("Date(s) missing")]
 
-    def get_place(self, event):
-        "return place for given event"
-        place_handle = event.get_place_handle()
-        if place_handle:
-            place = _pd.display_event(self.db, event)
-            if place:
-                return [place]
+    def get_place(self, date, place):
+        "return place for given event (date)"
+        if date is None:
+            return [_T_("Personal information missing")]
+        if place:
+            return [place]
         return [_T_("Place missing")]
 
-    def get_places(self, data):
-        "return places for given (person,event_handles)"
+    def get_places(self, marriages):
+        "return places for given marriages"
+        if not marriages:
+            return [_T_("Personal information missing")]
         places = []
-        person, event_handles = data
-        for event_handle in event_handles:
-            event = self.db.get_event_from_handle(event_handle)
-            place_handle = event.get_place_handle()
-            if place_handle:
-                place = _pd.display_event(self.db, event)
-                if place:
-                    places.append(place)
-            else:
+        for (date, place) in marriages:
+            if place is None:
                 places.append(_T_("Place missing"))
+            elif place:
+                places.append(place)
         return places
 
-    def get_person_age(self, person):
+    def get_person_age(self, birth, death):
         "return age for given person, if alive"
-        death_ref = person.get_death_ref()
-        if not death_ref:
-            return [self.estimate_age(person)]
+        if death is None:
+            return [self.estimate_age(birth, _TODAY)]
         return [_T_("Already dead")]
 
-    def get_death_age(self, person):
+    def get_death_age(self, birth, death):
         "return age at death for given person, if dead"
-        death_ref = person.get_death_ref()
-        if death_ref:
-            return [self.estimate_age(person, death_ref.ref)]
+        if death is not None:
+            return [self.estimate_age(birth, death)]
         return [_T_("Still alive")]
 
-    def get_event_ages(self, data):
-        "return ages at given (person,event_handles)"
-        person, event_handles = data
-        ages = [self.estimate_age(person, h) for h in event_handles]
-        if ages:
-            return ages
-        return [_T_("Events missing")]
-
-    def get_event_type(self, data):
-        "return event types at given (person,event_handles)"
-        types = []
-        person, event_handles = data
-        for event_handle in event_handles:
-            event = self.db.get_event_from_handle(event_handle)
-            event_type = self._(self._get_type(event.get_type()))
-            types.append(event_type)
-        if types:
-            return types
-        return [_T_("Events missing")]
-
-    def get_first_child_age(self, data):
-        "return age when first child in given (person,child_handles) was born"
-        ages, errors = self.get_sorted_child_ages(data)
+    def get_event_ages(self, birth, marriages):
+        "return ages at given marriages"
+        if not marriages:
+            return [_T_("Personal information missing")]
+        return [self.estimate_age(birth, date) for (date, place) in marriages]
+
+    def get_event_type(self, event_types):
+        "return event types at given event types"
+        if not event_types:
+            return [_T_("Personal information missing")]
+        return [self._(self._get_type(event_type))
+                for event_type in event_types]
+
+    def get_first_child_age(self, birth, children):
+        "return age when first child in given children was born"
+        if not children:
+            return [_T_("Personal information missing")]
+        ages, errors = self.get_sorted_child_ages(birth, children)
         if ages:
             errors.append(ages[0])
             return errors
         return [_T_("Children missing")]
 
-    def get_last_child_age(self, data):
-        "return age when last child in given (person,child_handles) was born"
-        ages, errors = self.get_sorted_child_ages(data)
+    def get_last_child_age(self, birth, children):
+        "return age when last child in given children was born"
+        if not children:
+            return [_T_("Personal information missing")]
+        ages, errors = self.get_sorted_child_ages(birth, children)
         if ages:
             errors.append(ages[-1])
             return errors
         return [_T_("Children missing")]
 
-    def get_handle_count(self, data):
+    def get_handle_count(self, handles):
         """
-        return number of handles in given (person, handle_list)
+        return number of given handles (or children)
         used for child count, family count
         """
-        return ["%3d" % len(data[1])]
+        if not handles:
+            return [_T_("Personal information missing")]
+        return ["%3d" % len(handles)]
 
     # ------------------- utility methods -------------------------
 
-    def get_sorted_child_ages(self, data):
-        "return (sorted_ages,errors) for given (person,child_handles)"
+    def get_sorted_child_ages(self, birth, children):
+        "return (sorted_ages,errors) for given birth and child birth dates"
         ages = []
         errors = []
-        person, child_handles = data
-        for child_handle in child_handles:
-            child = self.db.get_person_from_handle(child_handle)
-            birth_ref = child.get_birth_ref()
-            if birth_ref:
-                ages.append(self.estimate_age(person, birth_ref.ref))
+        for child_birth in children:
+            if child_birth is not None:
+                ages.append(self.estimate_age(birth, child_birth))
             else:
                 errors.append(_T_("Birth missing"))
-                continue
         ages.sort()
         return (ages, errors)
 
-    def estimate_age(self, person, end=None, begin=None):
-        """return estimated age (range) for given person or error message.
+    def estimate_age(self, birth, end):
+        """return estimated age (range) between given dates or error message.
            age string is padded with spaces so that it can be sorted"""
-        age = estimate_age(self.db, person, end, begin)
+        if birth is None:
+            return _T_("Date(s) missing")
+        age = estimate_date_age(birth, end)
         if age[0] < 0 or age[1] < 0:
             # inadequate information
             return _T_("Date(s) missing")
@@ -546,96 +554,29 @@ class Extract:
             # minimum and maximum
             return "%3d-%d" % (age[0], age[1])
 
-    # ------------------- type methods -------------------------
-    # take db and person and return suitable gramps object(s)
-
-    def get_person(self, person):
-        "return person"
-        return person
-
-    def get_birth(self, person):
-        "return birth event for given person or None"
-        birth_ref = person.get_birth_ref()
-        if birth_ref:
-            return self.db.get_event_from_handle(birth_ref.ref)
-        return None
-
-    def get_death(self, person):
-        "return death event for given person or None"
-        death_ref = person.get_death_ref()
-        if death_ref:
-            return self.db.get_event_from_handle(death_ref.ref)
-        return None
-
-    def get_child_handles(self, person):
-        "return list of child handles for given person or None"
-        children = []
-        for fam_handle in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_handle)
-            for child_ref in fam.get_child_ref_list():
-                children.append(child_ref.ref)
-        # TODO: it would be good to return only biological children,
-        # but GRAMPS doesn't offer any efficient way to check that
-        # (I don't want to check each children's parent family mother
-        # and father relations as that would make this *much* slower)
-        if children:
-            return (person, children)
-        return None
-
-    def get_marriage_handles(self, person):
-        "return list of marriage event handles for given person or None"
-        marriages = []
-        for family_handle in person.get_family_handle_list():
-            family = self.db.get_family_from_handle(family_handle)
-            if int(family.get_relationship()) == FamilyRelType.MARRIED:
-                for event_ref in family.get_event_ref_list():
-                    event = self.db.get_event_from_handle(event_ref.ref)
-                    if (event.get_type() == EventType.MARRIAGE and
-                            (event_ref.get_role() == EventRoleType.FAMILY or
-                             event_ref.get_role() == EventRoleType.PRIMARY)):
-                        marriages.append(event_ref.ref)
-        if marriages:
-            return (person, marriages)
-        return None
-
-    def get_any_family_handles(self, person):
-        "return list of family handles for given person or None"
-        families = person.get_family_handle_list()
-
-        if families:
-            return (person, families)
-        return None
-
-    def get_event_handles(self, person):
-        "return list of event handles for given person or None"
-        events = [ref.ref for ref in person.get_event_ref_list()]
-
-        if events:
-            return (person, events)
-        return None
-
-    # ----------------- data collection methods --------------------
-
-    def get_person_data(self, person, collect):
-        """Add data from the database to 'collect' for the given person,
-           using methods from the 'collect' data dict tuple
+    def is_selected(self, genders, year_from, year_to, no_years,
+                    gender, birth, death):
         """
-        for chart in collect:
-            # get the information
-            type_func = chart[2]
-            data_func = chart[3]
-            obj = type_func(person)        # e.g. get_date()
-            if obj:
-                value = data_func(obj)        # e.g. get_year()
-            else:
-                value = [_T_("Personal information missing")]
-            # list of information found
-            for key in value:
-                if key in chart[1]:
-                    chart[1][key] += 1
-                else:
-                    chart[1][key] = 1
+        return whether a person of the given gender, birth and death dates
+        has a suitable gender, and was born within the required years
+        """
+        if gender != genders and genders != Person.UNKNOWN:
+            return False
+        if birth is None:
+            return False
+        if birth.get_year_valid():
+            year = gregorian(birth).get_year()
+            return year >= year_from and year <= year_to
+        # if death before range, person's out of range too...
+        if death is None:
+            return False
+        if death.get_year_valid():
+            if gregorian(death).get_year() < year_from:
+                return False
+        # don't accept people not known to be in range
+        return bool(no_years)
 
+    # ----------------- data collection methods --------------------
 
     def collect_data(self, dbase, filter_func, menu, genders,
                      year_from, year_to, no_years, cb_progress, rlocale):
@@ -652,64 +593,55 @@ class Extract:
         cb_progress - callback to indicate progress
         rlocale     - a Locale instance
 
+        The people are read once, into a PersonTable of the columns the
+        selected methods need (those of the selected people only), and the
+        values of each method are counted over these columns.
+
         Returns an array of tuple of:
         - Extraction method title
         - Dict of values with their counts
-        (- Method)
         """
         self.db = dbase        # store for use by methods
         self._locale = rlocale
         self._ = rlocale.translation.sgettext
         self._get_type = rlocale.get_type
 
-        data = []
+        charts = []
+        columns = []
         ext = self.extractors
         # which methods to use
         for name in self.extractors:
             option = menu.get_option_by_name(name)
             if option.get_value() == True:
-                # localized data title, value dict, type and data method
-                data.append((ext[name][1], {}, ext[name][2], ext[name][3]))
+                charts.append(ext[name])
+                columns += [column for column in ext[name][2]
+                            if column not in columns]
 
-        # go through the people and collect data
-        for person_handle in filter_func.apply(dbase,
+        if filter_func.is_empty():
+            people_handles = list(dbase.iter_person_handles())
+        else:
+            people_handles = filter_func.apply(dbase,
                                                dbase.iter_person_handles(),
-                                               cb_progress):
-            cb_progress()
-            person = dbase.get_person_from_handle(person_handle)
-            # check whether person has suitable gender
-            if person.gender != genders and genders != Person.UNKNOWN:
-                continue
-
-            # check whether birth year is within required range
-            birth = self.get_birth(person)
-            if birth:
-                birthdate = birth.get_date_object()
-                if birthdate.get_year_valid():
-                    birthdate = gregorian(birthdate)
-
-                    year = birthdate.get_year()
-                    if not (year >= year_from and year <= year_to):
-                        continue
-                else:
-                    # if death before range, person's out of range too...
-                    death = self.get_death(person)
-                    if death:
-                        deathdate = death.get_date_object()
-                        if deathdate.get_year_valid():
-                            deathdate = gregorian(deathdate)
-
-                            if deathdate.get_year() < year_from:
-                                continue
-                        if not no_years:
-                            # don't accept people not known to be in range
-                            continue
-                    else:
-                        continue
-            else:
-                continue
+                                               cb_progress)
+
+        # the people with suitable gender and birth year
+        people = PersonTable(dbase, ["handle", "gender", "birth", "death"])
+        people.add_people(people_handles, cb_progress)
+        selected = map(partial(self.is_selected, genders, year_from,
+                               year_to, no_years),
+                       people["gender"], people["birth"], people["death"])
 
-            self.get_person_data(person, data)
+        # go through them and collect data
+        table = PersonTable(dbase, columns)
+        table.add_people(compress(people["handle"], selected))
+
+        data = []
+        for (name, title, chart_columns, data_func) in charts:
+            values = [table[column] for column in chart_columns]
+            # localized data title, value dict
+            data.append((title,
+                         dict(Counter(chain.from_iterable(
+                             map(data_func, *values))))))
         return data
 
 # GLOBAL: required so that we get access to _Extract.extractors[]
@@ -0,0 +1,246 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the people table and counts of the Statistics Chart """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from gprime.dbstate import DbState
+from gprime.db import DbTxn
+from gprime.lib import (Person, Surname, Family, FamilyRelType, ChildRef,
+                        Event, EventType, EventRef, EventRoleType, Date)
+from gprime.proxy import PrivateProxyDb, LivingProxyDb
+from gprime.plug.docgen import StyleSheet, PaperStyle, PaperSize
+from gprime.cli.user import User
+from gprime.plugins.docgen.svgdrawdoc import SvgDrawDoc
+from gprime.plugins.lib.libpersontable import PersonTable
+from gprime.plugins.drawreport.statisticschart import StatisticsChart, StatisticsChartOptions
+
+class StatisticsTest(unittest.TestCase):
+    """
+    A couple married in 1972, with a son, and a private woman:
+
+    Anna Smith   female  born 1950-03-10, died 2000-01-05
+    Bob Smith    male    born 1948-05-20, living
+    Carl Smith   male    born 1975-07-01, living
+    Dora Jones   female  born 1960-03-15, living and private
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = DbState().create_database(
+            os.path.join(self.directory, "db"))
+        with DbTxn("Add", self.db, batch=True) as trans:
+            anna = self.add_person(trans, "Anna", "Smith", Person.FEMALE,
+                                   Date(1950, 3, 10), Date(2000, 1, 5))
+            bob = self.add_person(trans, "Bob", "Smith", Person.MALE,
+                                  Date(1948, 5, 20))
+            carl = self.add_person(trans, "Carl", "Smith", Person.MALE,
+                                   Date(1975, 7, 1))
+            dora = self.add_person(trans, "Dora", "Jones", Person.FEMALE,
+                                   Date(1960, 3, 15))
+            dora.set_privacy(True)
+            self.db.commit_person(dora, trans)
+            family = Family()
+            family.set_relationship(FamilyRelType.MARRIED)
+            family.set_father_handle(bob.handle)
+            family.set_mother_handle(anna.handle)
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(carl.handle)
+            family.add_child_ref(child_ref)
+            marriage = self.add_event(trans, EventType.MARRIAGE,
+                                      Date(1972, 6, 3))
+            ref = EventRef()
+            ref.set_reference_handle(marriage.handle)
+            ref.set_role(EventRoleType.FAMILY)
+            family.add_event_ref(ref)
+            self.db.add_family(family, trans)
+            for person in (anna, bob):
+                person.add_family_handle(family.handle)
+                self.db.commit_person(person, trans)
+            carl.add_parent_family_handle(family.handle)
+            self.db.commit_person(carl, trans)
+        self.people = dict((person.get_primary_name().get_first_name(),
+                            person.handle)
+                           for person in (anna, bob, carl, dora))
+
+    def tearDown(self):
+        self.db.close(update=False)
+        shutil.rmtree(self.directory)
+
+    def add_event(self, trans, event_type, date):
+        event = Event()
+        event.set_type(event_type)
+        event.set_date_object(date)
+        self.db.add_event(event, trans)
+        return event
+
+    def add_person(self, trans, first_name, name, gender, birth,
+                   death=None):
+        person = Person()
+        surname = Surname()
+        surname.set_surname(name)
+        person.primary_name.add_surname(surname)
+        person.primary_name.set_first_name(first_name)
+        person.set_gender(gender)
+        for (event_type, date, set_ref) in [
+                (EventType.BIRTH, birth, person.set_birth_ref),
+                (EventType.DEATH, death, person.set_death_ref)]:
+            if date:
+                ref = EventRef()
+                ref.set_reference_handle(
+                    self.add_event(trans, event_type, date).handle)
+                person.add_event_ref(ref)
+                set_ref(ref)
+        self.db.add_person(person, trans)
+        return person
+
+    def table(self, db):
+        """
+        Return the table of the people of db, with their dates as years.
+        """
+        table = PersonTable(db)
+        table.add_people(self.people[name]
+                         for name in ["Anna", "Bob", "Carl", "Dora"])
+        year = lambda date: date.get_year() if date else None
+        columns = dict((name, table[name]) for name in table.names)
+        columns["birth"] = list(map(year, table["birth"]))
+        columns["death"] = list(map(year, table["death"]))
+        columns["families"] = list(map(len, table["families"]))
+        columns["children"] = [list(map(year, dates))
+                               for dates in table["children"]]
+        columns["marriages"] = [[(year(date), place)
+                                 for (date, place) in marriages]
+                                for marriages in table["marriages"]]
+        columns["event_types"] = [list(map(str, types))
+                                  for types in table["event_types"]]
+        self.assertEqual(len(table), len(columns["handle"]))
+        return columns
+
+    def counts(self, private=True, living=LivingProxyDb.MODE_INCLUDE_ALL):
+        """
+        Return the counts of all of the charts of the report, by the
+        non-localized name of the chart.
+        """
+        options = StatisticsChartOptions("statistics_chart", self.db)
+        options.load_previous_values()
+        options.handler.doc = SvgDrawDoc(
+            StyleSheet(), PaperStyle(PaperSize("A4", 29.7, 21.0), 0))
+        options.handler.output = None
+        values = {"incl_private": private, "living_people": living,
+                  "year_from": 1700, "year_to": 2100, "gender":
+                  Person.UNKNOWN, "no_years": False, "filter": 0}
+        for name in options.menu.get_all_option_names():
+            option = options.menu.get_option_by_name(name)
+            if name.startswith("data_"):
+                option.set_value(True)
+            elif name in values:
+                option.set_value(values[name])
+        report = StatisticsChart(self.db, options, User())
+        return dict((name, counts)
+                    for (heading, name, counts, lookup) in report.data)
+
+    def test_table(self):
+        table = self.table(self.db)
+        self.assertEqual(table["first_name"], ["Anna", "Bob", "Carl", "Dora"])
+        self.assertEqual(table["surname"], ["Smith", "Smith", "Smith",
+                                            "Jones"])
+        self.assertEqual(table["gender"], [Person.FEMALE, Person.MALE,
+                                           Person.MALE, Person.FEMALE])
+        self.assertEqual(table["title"], ["", "", "", ""])
+        self.assertEqual(table["birth"], [1950, 1948, 1975, 1960])
+        self.assertEqual(table["death"], [2000, None, None, None])
+        self.assertEqual(table["birth_place"], [None, None, None, None])
+        self.assertEqual(table["families"], [1, 1, 0, 0])
+        self.assertEqual(table["children"], [[1975], [1975], [], []])
+        self.assertEqual(table["marriages"], [[(1972, None)], [(1972, None)],
+                                              [], []])
+        self.assertEqual(table["event_types"], [["Birth", "Death"], ["Birth"],
+                                                ["Birth"], ["Birth"]])
+
+    def test_table_proxies(self):
+        # the people not found through the proxies are skipped:
+        table = self.table(PrivateProxyDb(self.db))
+        self.assertEqual(table["first_name"], ["Anna", "Bob", "Carl"])
+        table = self.table(LivingProxyDb(self.db,
+                                         LivingProxyDb.MODE_EXCLUDE_ALL))
+        self.assertEqual(table["first_name"], ["Anna"])
+        self.assertEqual(table["children"], [[]])
+        # the living have their names, but no events:
+        table = self.table(LivingProxyDb(
+            self.db, LivingProxyDb.MODE_INCLUDE_FULL_NAME_ONLY))
+        self.assertEqual(table["first_name"], ["Anna", "Bob", "Carl", "Dora"])
+        self.assertEqual(table["birth"], [1950, None, None, None])
+        self.assertEqual(table["children"], [[None], [None], [], []])
+
+    def test_counts(self):
+        counts = self.counts()
+        # (the ages are those of today)
+        self.assertEqual(counts.pop("Age")["Already dead"], 1)
+        missing = "Personal information missing"
+        self.assertEqual(counts, {
+            "person|Title": {"(Preferred) title missing": 4},
+            "Surname": {"Smith": 3, "Jones": 1},
+            "Forename": {"Anna": 1, "Bob": 1, "Carl": 1, "Dora": 1},
+            "Gender": {"Women": 2, "Men": 2},
+            "Birth year": {"1948": 1, "1950": 1, "1960": 1, "1975": 1},
+            "Death year": {"2000": 1, missing: 3},
+            "Birth month": {"March": 2, "May": 1, "July": 1},
+            "Death month": {"January": 1, missing: 3},
+            "Birth place": {"Place missing": 4},
+            "Death place": {"Place missing": 1, missing: 3},
+            "Marriage place": {"Place missing": 2, missing: 2},
+            "Number of relationships": {"  1": 2, missing: 2},
+            "Age when first child born": {" 25": 1, " 27": 1, missing: 2},
+            "Age when last child born": {" 25": 1, " 27": 1, missing: 2},
+            "Number of children": {"  1": 2, missing: 2},
+            "Age at marriage": {" 22": 1, " 24": 1, missing: 2},
+            "Age at death": {" 49": 1, "Still alive": 3},
+            "Event type": {"Birth": 4, "Death": 1},
+            })
+
+        counts = self.counts(private=False)
+        self.assertEqual(counts["Surname"], {"Smith": 3})
+        self.assertEqual(counts["Gender"], {"Women": 1, "Men": 2})
+        self.assertEqual(counts["Birth month"],
+                         {"March": 1, "May": 1, "July": 1})
+        self.assertEqual(counts["Event type"], {"Birth": 3, "Death": 1})
+
+        # only Anna is dead, without her living child:
+        counts = self.counts(living=LivingProxyDb.MODE_EXCLUDE_ALL)
+        self.assertEqual(counts["Forename"], {"Anna": 1})
+        self.assertEqual(counts["Number of relationships"], {"  1": 1})
+        self.assertEqual(counts["Number of children"], {missing: 1})
+        self.assertEqual(counts["Age when first child born"], {missing: 1})
+        self.assertEqual(counts["Event type"], {"Birth": 1, "Death": 1})
+
+        # the living have no birth, so they are not counted, but their
+        # family is, without the birth of the child:
+        counts = self.counts(
+            private=False, living=LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY)
+        self.assertEqual(counts["Forename"], {"Anna": 1})
+        self.assertEqual(counts["Number of children"], {"  1": 1})
+        self.assertEqual(counts["Age when first child born"],
+                         {"Children missing": 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,6 +25,7 @@
 #
 #------------------------------------------------------------------------
 import json
+import time
 
 #------------------------------------------------------------------------
 #
@@ -35,11 +36,24 @@ from gprime.plug.utils import OpenFileOrStdout
 from gprime.lib import (Note, Person, Event, Family, Repository, Place,
                         Media, Source, Tag, Citation)
 
+# The order in which the tables are written:
+DELTA_TABLES = ["Note", "Event", "Person", "Family", "Repository", "Place",
+                "Source", "Citation", "Media", "Tag"]
+
 def exportData(db, filename,
-               error_dialog=None, option_box=None, callback=None):
+               error_dialog=None, option_box=None, callback=None, since=None):
+    """
+    Export the database as JSON, one object per line.
+
+    If since (a time in seconds) is given, export only the objects that
+    changed or were removed since then (see exportDelta).
+    """
     if not callable(callback):
         callback = lambda percent: None # dummy
 
+    if since is not None:
+        return exportDelta(db, filename, since, callback)
+
     with OpenFileOrStdout(filename, encoding="utf-8") as fp:
 
         total = (db.get_number_of_notes() +
@@ -141,3 +155,32 @@ def write_line(fp, obj):
     Write a single object to the file.
     """
     fp.write(json.dumps(obj.to_struct(), sort_keys=True) + "\n")
+
+def exportDelta(db, filename, since, callback=None):
+    """
+    Export the objects that changed or were removed at or after since.
+
+    The first line is a Delta object, giving the time of the export as
+    "until": use it as "since" for the next delta. Each removed object
+    is written as a Tombstone object, after the changed objects. The
+    JSON importer applies such a file to a copy of the database.
+    """
+    if not callable(callback):
+        callback = lambda percent: None # dummy
+    until = int(time.time())
+    with OpenFileOrStdout(filename, encoding="utf-8") as fp:
+        fp.write(json.dumps({"_class": "Delta", "since": since,
+                             "until": until}, sort_keys=True) + "\n")
+        for count, table in enumerate(DELTA_TABLES):
+            for obj in db.iter_changed(table, since):
+                write_line(fp, obj)
+            callback(100 * count/(len(DELTA_TABLES) + 1))
+        for (table, handle, deleted) in db.get_tombstones(since):
+            # skip objects that were added again since:
+            if db.get_table_func(table, "has_handle_func")(handle):
+                continue
+            fp.write(json.dumps({"_class": "Tombstone", "obj_class": table,
+                                 "handle": handle, "deleted": deleted},
+                                sort_keys=True) + "\n")
+        callback(100)
+    return True
@@ -97,7 +97,7 @@ class GrampsXmlWriter(UpdateCallback):
     """
 
     def __init__(self, db, strip_photos=0, compress=1, version="unknown",
-                 user=None):
+                 user=None, since=None):
         """
         Initialize, but does not write, an XML file.
 
@@ -107,6 +107,8 @@ class GrampsXmlWriter(UpdateCallback):
         >              1: remove everything expect the filename (eg gpkg)
         >              2: remove leading slash (quick write)
         compress - attempt to compress the database
+        since - if not None, only write the objects changed or removed
+                at or after this time (in seconds): a delta
         """
         UpdateCallback.__init__(self, user.callback)
         self.user = user
@@ -116,6 +118,7 @@ class GrampsXmlWriter(UpdateCallback):
         self.db = db
         self.strip_photos = strip_photos
         self.version = version
+        self.since = since
 
         self.status = None
 
@@ -196,21 +199,48 @@ class GrampsXmlWriter(UpdateCallback):
         g.close()
         return 1
 
+    def get_handles(self, table, handles_func):
+        """
+        Return the sorted handles of the objects of a table to write:
+        all of them, or only the changed ones for a delta.
+        """
+        if self.since is None:
+            return sorted(handles_func())
+        return sorted([obj.handle for obj
+                       in self.db.iter_changed(table, self.since)])
+
     def write_xml_data(self):
 
-        date = time.localtime(time.time())
+        now = time.time()
+        date = time.localtime(now)
         owner = self.db.get_researcher()
 
-        person_len = self.db.get_number_of_people()
-        family_len = self.db.get_number_of_families()
-        event_len = self.db.get_number_of_events()
-        citation_len = self.db.get_number_of_citations()
-        source_len = self.db.get_number_of_sources()
-        place_len = self.db.get_number_of_places()
-        repo_len = self.db.get_number_of_repositories()
-        obj_len = self.db.get_number_of_media()
-        note_len = self.db.get_number_of_notes()
-        tag_len = self.db.get_number_of_tags()
+        person_handles = self.get_handles("Person",
+                                          self.db.get_person_handles)
+        family_handles = self.get_handles("Family",
+                                          self.db.iter_family_handles)
+        event_handles = self.get_handles("Event", self.db.get_event_handles)
+        citation_handles = self.get_handles("Citation",
+                                            self.db.get_citation_handles)
+        source_handles = self.get_handles("Source",
+                                          self.db.get_source_handles)
+        place_handles = self.get_handles("Place", self.db.get_place_handles)
+        repo_handles = self.get_handles("Repository",
+                                        self.db.get_repository_handles)
+        obj_handles = self.get_handles("Media", self.db.get_media_handles)
+        note_handles = self.get_handles("Note", self.db.get_note_handles)
+        tag_handles = self.get_handles("Tag", self.db.get_tag_handles)
+
+        person_len = len(person_handles)
+        family_len = len(family_handles)
+        event_len = len(event_handles)
+        citation_len = len(citation_handles)
+        source_len = len(source_handles)
+        place_len = len(place_handles)
+        repo_len = len(repo_handles)
+        obj_len = len(obj_handles)
+        note_len = len(note_handles)
+        tag_len = len(tag_handles)
 
         total_steps = (person_len + family_len + event_len + citation_len +
                        source_len + place_len + repo_len + obj_len + note_len +
@@ -242,6 +272,9 @@ class GrampsXmlWriter(UpdateCallback):
         self.write_line("resphone", owner.get_phone(),3)
         self.write_line("resemail", owner.get_email(),3)
         self.g.write("    </researcher>\n")
+        if self.since is not None:
+            self.g.write('    <delta since="%d" until="%d"/>\n'
+                         % (self.since, now))
         self.write_metadata()
         self.g.write("  </header>\n")
 
@@ -252,7 +285,7 @@ class GrampsXmlWriter(UpdateCallback):
         # Write table objects
         if tag_len > 0:
             self.g.write("  <tags>\n")
-            for key in sorted(self.db.get_tag_handles()):
+            for key in tag_handles:
                 tag = self.db.get_tag_from_handle(key)
                 if tag:
                     self.write_tag(tag, 2)
@@ -262,7 +295,7 @@ class GrampsXmlWriter(UpdateCallback):
         # Write primary objects
         if event_len > 0:
             self.g.write("  <events>\n")
-            for handle in sorted(self.db.get_event_handles()):
+            for handle in event_handles:
                 event = self.db.get_event_from_handle(handle)
                 if event:
                     self.write_event(event,2)
@@ -276,7 +309,7 @@ class GrampsXmlWriter(UpdateCallback):
                 self.g.write(' home="_%s"' % person.handle)
             self.g.write('>\n')
 
-            for handle in sorted(self.db.get_person_handles()):
+            for handle in person_handles:
                 person = self.db.get_person_from_handle(handle)
                 if person:
                     self.write_person(person, 2)
@@ -285,7 +318,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if family_len > 0:
             self.g.write("  <families>\n")
-            for handle in sorted(self.db.iter_family_handles()):
+            for handle in family_handles:
                 family = self.db.get_family_from_handle(handle)
                 if family:
                     self.write_family(family,2)
@@ -294,7 +327,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if citation_len > 0:
             self.g.write("  <citations>\n")
-            for handle in sorted(self.db.get_citation_handles()):
+            for handle in citation_handles:
                 citation = self.db.get_citation_from_handle(handle)
                 if citation:
                     self.write_citation(citation,2)
@@ -303,7 +336,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if source_len > 0:
             self.g.write("  <sources>\n")
-            for handle in sorted(self.db.get_source_handles()):
+            for handle in source_handles:
                 source = self.db.get_source_from_handle(handle)
                 if source:
                     self.write_source(source,2)
@@ -312,7 +345,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if place_len > 0:
             self.g.write("  <places>\n")
-            for key in sorted(self.db.get_place_handles()):
+            for key in place_handles:
                 # try:
                 place = self.db.get_place_from_handle(key)
                 if place:
@@ -322,7 +355,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if obj_len > 0:
             self.g.write("  <objects>\n")
-            for handle in sorted(self.db.get_media_handles()):
+            for handle in obj_handles:
                 obj = self.db.get_media_from_handle(handle)
                 if obj:
                     self.write_object(obj,2)
@@ -331,7 +364,7 @@ class GrampsXmlWriter(UpdateCallback):
 
         if repo_len > 0:
             self.g.write("  <repositories>\n")
-            for key in sorted(self.db.get_repository_handles()):
+            for key in repo_handles:
                 repo = self.db.get_repository_from_handle(key)
                 if repo:
                     self.write_repository(repo,2)
@@ -340,13 +373,16 @@ class GrampsXmlWriter(UpdateCallback):
 
         if note_len > 0:
             self.g.write("  <notes>\n")
-            for key in sorted(self.db.get_note_handles()):
+            for key in note_handles:
                 note = self.db.get_note_from_handle(key)
                 if note:
                     self.write_note(note, 2)
                 self.update()
             self.g.write("  </notes>\n")
 
+        if self.since is not None:
+            self.write_tombstones()
+
         # Data is written, now write bookmarks.
         self.write_bookmarks()
         self.write_namemaps()
@@ -356,6 +392,21 @@ class GrampsXmlWriter(UpdateCallback):
 #        self.status.end()
 #        self.status = None
 
+    def write_tombstones(self):
+        """
+        Write the objects removed since the start of the delta.
+        """
+        tombstones = [(table, handle, deleted) for (table, handle, deleted)
+                      in self.db.get_tombstones(self.since)
+                      if not self.db.get_table_func(table,
+                                                    "has_handle_func")(handle)]
+        if tombstones:
+            self.g.write("  <tombstones>\n")
+            for (table, handle, deleted) in tombstones:
+                self.g.write('    <tombstone handle="_%s" class="%s" '
+                             'deleted="%d"/>\n' % (handle, table, deleted))
+            self.g.write("  </tombstones>\n")
+
     def write_metadata(self):
         """ Method to write out metadata of the database
         """
@@ -1324,9 +1375,12 @@ def conf_priv(obj):
 # export_data
 #
 #-------------------------------------------------------------------------
-def export_data(database, filename, user, option_box=None):
+def export_data(database, filename, user, option_box=None, since=None):
     """
     Call the XML writer with the syntax expected by the export plugin.
+
+    If since (a time in seconds) is given, only the objects changed or
+    removed since then are written.
     """
     if os.path.isfile(filename):
         try:
@@ -1342,7 +1396,7 @@ def export_data(database, filename, user, option_box=None):
         database = option_box.get_filtered_database(database)
         compress = compress and option_box.get_use_compression()
 
-    g = XmlWriter(database, user, 0, compress)
+    g = XmlWriter(database, user, 0, compress, since)
     return g.write(filename)
 
 #-------------------------------------------------------------------------
@@ -1355,9 +1409,9 @@ class XmlWriter(GrampsXmlWriter):
     Writes a database to the XML file.
     """
 
-    def __init__(self, dbase, user, strip_photos, compress=1):
+    def __init__(self, dbase, user, strip_photos, compress=1, since=None):
         GrampsXmlWriter.__init__(
-            self, dbase, strip_photos, compress, VERSION, user)
+            self, dbase, strip_photos, compress, VERSION, user, since)
         self.user = user
 
     def write(self, filename):
@@ -54,6 +54,9 @@ def importData(db, filename, user):
         with DbTxn(_("JSON import"), db, batch=True) as trans:
             with OpenFileOrStdin(filename, encoding="utf-8") as fp:
                 line = fp.readline()
+                if line and json.loads(line)["_class"] == "Delta":
+                    apply_delta(db, fp, json.loads(line), trans)
+                    line = None
                 while line:
                     data = json.loads(line)
                     if data["_class"] == "Person":
@@ -94,3 +97,25 @@ def importData(db, filename, user):
 
     db.enable_signals()
     db.request_rebuild()
+
+def apply_delta(db, fp, delta, trans):
+    """
+    Apply a delta file, written by the JSON exporter with since, to a
+    copy of the database: changed objects replace the objects with the
+    same handle (or are added), and tombstones remove objects.
+    """
+    LOG.info("Applying changes from %s to %s", delta["since"], delta["until"])
+    for line in fp:
+        data = json.loads(line)
+        if data["_class"] == "Tombstone":
+            if db.get_table_func(data["obj_class"],
+                                 "has_handle_func")(data["handle"]):
+                db.get_table_func(data["obj_class"],
+                                  "del_func")(data["handle"], trans)
+        elif data["_class"] in db.get_table_names():
+            obj = db.get_table_func(data["_class"],
+                                    "class_func").from_struct(data)
+            db.get_table_func(data["_class"],
+                              "commit_func")(obj, trans, obj.change)
+        else:
+            LOG.warning("ignored: %s", line)
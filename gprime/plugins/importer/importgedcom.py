@@ -39,6 +39,7 @@ _ = glocale.translation.gettext
 from gprime.errors import DbError, GedcomError
 from gprime.plugins.lib.libmixin import DbMixin
 from gprime.plugins.lib import libgedcom
+from gprime.plugins.lib.libcheckpoint import ImportCheckpoint
 from gprime.utils.libformatting import ImportInfo
 from gprime.config import config
 
@@ -47,9 +48,12 @@ from gprime.config import config
 # importData
 #
 #-------------------------------------------------------------------------
-def importData(database, filename, user):
+def importData(database, filename, user, resume=False):
     """
     Try to handle ANSEL encoded files that are not really ANSEL encoded
+
+    If resume is True, continue an interrupted import of the same file
+    from its last checkpoint.
     """
 
     if DbMixin not in database.__class__.__bases__:
@@ -106,15 +110,22 @@ def importData(database, filename, user):
         if code_set:
             stage_one.set_encoding(code_set)
         ifile.seek(0)
+        checkpoint = ImportCheckpoint(database, filename, resume)
+        if resume and not checkpoint.is_resuming():
+            user.notify_error(_("No checkpoint found"),
+                              _("%s will be imported from the start")
+                              % filename)
         if database.get_feature("skip-import-additions"): # don't add source or tags
             gedparse = libgedcom.GedcomParser(
-                database, ifile, filename, user, stage_one, None, None)
+                database, ifile, filename, user, stage_one, None, None,
+                checkpoint=checkpoint)
         else:
             gedparse = libgedcom.GedcomParser(
                 database, ifile, filename, user, stage_one,
                 config.get('preferences.default-source'),
                 (config.get('preferences.tag-on-import-format') if
-                 config.get('preferences.tag-on-import') else None))
+                 config.get('preferences.tag-on-import') else None),
+                checkpoint=checkpoint)
     except IOError as msg:
         user.notify_error(_("%s could not be opened\n") % filename, str(msg))
         return
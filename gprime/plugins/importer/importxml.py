@@ -32,13 +32,12 @@ import os
 import sys
 import time
 from xml.parsers.expat import ExpatError, ParserCreate
-from xml.sax.saxutils import escape
+from xml.sax.saxutils import escape, quoteattr
 from gprime.const import URL_WIKISTRING
 from gprime.const import LOCALE as glocale
 _ = glocale.translation.gettext
 import re
 import logging
-import collections
 LOG = logging.getLogger(".ImportXML")
 
 #-------------------------------------------------------------------------
@@ -76,6 +75,7 @@ from gprime.config import config
 from gprime.plugins.lib import libgrampsxml
 from gprime.plug.utils import version_str_to_tup
 from gprime.plugins.lib.libplaceimport import PlaceImport
+from gprime.plugins.lib.libcheckpoint import ImportCheckpoint
 
 #-------------------------------------------------------------------------
 #
@@ -107,13 +107,22 @@ EVENT_PERSON_STR = _("%(event_name)s of %(person)s")
 HANDLE = 0
 INSTANTIATED = 1
 
+# Checkpoints are made between the primary objects in these elements
+CHECKPOINT_CONTAINERS = ["tags", "events", "people", "families", "citations",
+                         "sources", "places", "objects", "repositories",
+                         "notes"]
+
 #-------------------------------------------------------------------------
 #
 # Importing data into the currently open database.
 # Must takes care of renaming media files according to their new IDs.
 #
 #-------------------------------------------------------------------------
-def importData(database, filename, user):
+def importData(database, filename, user, resume=False):
+    """
+    Import a Gramps XML file. If resume is True, continue an interrupted
+    import of the same file from its last checkpoint.
+    """
     filename = os.path.normpath(filename)
     basefile = os.path.dirname(filename)
     database.smap = {}
@@ -130,12 +139,19 @@ def importData(database, filename, user):
             change = time.time()
         else:
             change = os.path.getmtime(filename)
+        checkpoint = ImportCheckpoint(database, filename, resume)
+        if resume and not checkpoint.is_resuming():
+            user.notify_error(_("No checkpoint found"),
+                              _("%s will be imported from the start")
+                              % filename)
         if database.get_feature("skip-import-additions"): # don't add source or tags
-            parser = GrampsParser(database, user, change, None)
+            parser = GrampsParser(database, user, change, None,
+                                  checkpoint=checkpoint)
         else:
             parser = GrampsParser(database, user, change,
                                   (config.get('preferences.tag-on-import-format') if
-                                   config.get('preferences.tag-on-import') else None))
+                                   config.get('preferences.tag-on-import') else None),
+                                  checkpoint=checkpoint)
 
         if filename != '-':
             linecounter = LineParser(filename)
@@ -449,9 +465,13 @@ class ImportOpenFileContextManager:
 #-------------------------------------------------------------------------
 class GrampsParser(UpdateCallback):
 
-    def __init__(self, database, user, change, default_tag_format=None):
+    def __init__(self, database, user, change, default_tag_format=None,
+                 checkpoint=None):
         UpdateCallback.__init__(self, user.callback)
         self.user = user
+        self.checkpoint = checkpoint
+        self.elements = []
+        self.byte_offset = 0
         self.__gramps_version = 'unknown'
         self.__xml_version = (1, 0, 0)
         self.stext_list = []
@@ -619,6 +639,7 @@ class GrampsParser(UpdateCallback):
             "comment": (None, self.stop_comment),
             "confidence": (None, self.stop_confidence),
             "created": (self.start_created, None),
+            "delta": (self.start_delta, None),
             "ref": (None, self.stop_ref),
             "database": (self.start_database, self.stop_database),
             "phone": (None, self.stop_phone),
@@ -734,7 +755,7 @@ class GrampsParser(UpdateCallback):
         if (orig_handle in self.import_handles and
                 target in self.import_handles[orig_handle]):
             handle = self.import_handles[handle][target][HANDLE]
-            if not isinstance(prim_obj, collections.Callable):
+            if not callable(prim_obj):
                 # This method is called by a start_<primary_object> method.
                 get_raw_obj_data = {"person": self.db.get_raw_person_data,
                                     "family": self.db.get_raw_family_data,
@@ -778,7 +799,7 @@ class GrampsParser(UpdateCallback):
                 while has_handle_func(handle):
                     handle = create_id()
             self.import_handles[orig_handle] = {target: [handle, False]}
-        if isinstance(prim_obj, collections.Callable): # method is called by a reference
+        if callable(prim_obj): # method is called by a reference
             prim_obj = prim_obj()
         else:
             self.import_handles[orig_handle][target][INSTANTIATED] = True
@@ -863,7 +884,7 @@ class GrampsParser(UpdateCallback):
             handle = create_id()
             while has_handle_func(handle):
                 handle = create_id()
-            if isinstance(prim_obj, collections.Callable):
+            if callable(prim_obj):
                 prim_obj = prim_obj()
             prim_obj.set_handle(handle)
             prim_obj.set_gid(gid)
@@ -914,14 +935,17 @@ class GrampsParser(UpdateCallback):
 
             self.db.disable_signals()
 
-            if self.default_tag and self.default_tag.handle is None:
-                self.db.add_tag(self.default_tag, self.trans)
-
             self.p = ParserCreate()
             self.p.StartElementHandler = self.startElement
             self.p.EndElementHandler = self.endElement
             self.p.CharacterDataHandler = self.characters
-            self.p.ParseFile(ifile)
+            if self.checkpoint and self.checkpoint.is_resuming():
+                self.resume(ifile, self.checkpoint.position,
+                            self.checkpoint.state)
+            else:
+                if self.default_tag and self.default_tag.handle is None:
+                    self.db.add_tag(self.default_tag, self.trans)
+                self.p.ParseFile(ifile)
 
             if len(self.name_formats) > 0:
                 # add new name formats to the existing table
@@ -959,10 +983,124 @@ class GrampsParser(UpdateCallback):
             del self.func_list
             del self.p
             del self.update
+        if self.checkpoint:
+            self.checkpoint.remove()
         self.db.enable_signals()
         self.db.request_rebuild()
         return self.info
 
+    def resume(self, ifile, position, state):
+        """
+        Restore the parser state from a checkpoint, and continue parsing
+        the file at the primary object where the checkpoint was made.
+
+        The parser is first fed the elements enclosing that object, as
+        recorded in the checkpoint, so that it is in the same state as
+        when it reached the object.
+        """
+        self.set_state(state)
+        prefix = '<?xml version="1.0" encoding="UTF-8"?>\n'
+        for (tag, attrs) in position["elements"]:
+            prefix += "<%s%s>" % (tag, "".join(
+                [" %s=%s" % (key, quoteattr(value))
+                 for (key, value) in sorted(attrs.items())]))
+        prefix = prefix.encode("utf-8")
+        self.byte_offset = position["offset"] - len(prefix)
+        self.p.Parse(prefix, False)
+        ifile.seek(position["offset"])
+        self.p.ParseFile(ifile)
+
+    def checkpoint_element(self, tag, attrs):
+        """
+        Keep track of the elements enclosing the primary objects, and make
+        a checkpoint, if one is due, before the next primary object. All
+        previous objects have then been committed.
+        """
+        if self.func_index <= 2:
+            del self.elements[self.func_index - 1:]
+            self.elements.append([tag, attrs])
+        elif (self.func_index == 3 and
+              self.elements[-1][0] in CHECKPOINT_CONTAINERS and
+              self.checkpoint.due()):
+            position = {"offset": self.p.CurrentByteIndex + self.byte_offset,
+                        "elements": self.elements}
+            self.checkpoint.save(self.trans, position, self.get_state())
+
+    def get_state(self):
+        """
+        Return the parser state that is needed to resume the import.
+        """
+        return {
+            "count": self.count,
+            "gid2id": [self.gid2id, self.gid2fid, self.gid2eid, self.gid2pid,
+                       self.gid2oid, self.gid2sid, self.gid2rid,
+                       self.gid2nid],
+            "idswap": [self.idswap, self.fidswap, self.eidswap, self.cidswap,
+                       self.sidswap, self.pidswap, self.oidswap, self.ridswap,
+                       self.nidswap],
+            "import_handles": self.import_handles,
+            "childref_map": [[family_handle, person_handle,
+                              childref.to_struct()]
+                             for ((family_handle, person_handle), childref)
+                             in self.childref_map.items()],
+            "places": [[handle, list(location)] for (handle, location)
+                       in self.place_import.handle2loc.items()],
+            "name_formats": self.name_formats,
+            "name_formats_map": list(self.name_formats_map.items()),
+            "home": self.home,
+            "mediapath": self.mediapath,
+            "researcher": [self.resname, self.resaddr, self.reslocality,
+                           self.rescity, self.resstate, self.rescon,
+                           self.respos, self.resphone, self.resemail],
+            "gramps_version": self.__gramps_version,
+            "num_srcs": getattr(self, "num_srcs", 0),
+            "num_places": getattr(self, "num_places", 0),
+            "replace_import_handle": self.replace_import_handle,
+            "import_researcher": self.import_researcher,
+            "all_abs": self.all_abs,
+            "info": vars(self.info),
+            "default_tag": (self.default_tag.handle if self.default_tag
+                            else None),
+        }
+
+    def set_state(self, state):
+        """
+        Restore the parser state saved by get_state.
+        """
+        self.count = state["count"]
+        (self.gid2id, self.gid2fid, self.gid2eid, self.gid2pid,
+         self.gid2oid, self.gid2sid, self.gid2rid,
+         self.gid2nid) = state["gid2id"]
+        (self.idswap, self.fidswap, self.eidswap, self.cidswap,
+         self.sidswap, self.pidswap, self.oidswap, self.ridswap,
+         self.nidswap) = state["idswap"]
+        self.import_handles = state["import_handles"]
+        self.childref_map = {(family_handle, person_handle):
+                             ChildRef.from_struct(struct)
+                             for (family_handle, person_handle, struct)
+                             in state["childref_map"]}
+        for (handle, location) in state["places"]:
+            self.place_import.store_location(tuple(location), handle)
+        self.name_formats = [tuple(name_format)
+                             for name_format in state["name_formats"]]
+        self.name_formats_map = dict(state["name_formats_map"])
+        self.home = state["home"]
+        self.mediapath = state["mediapath"]
+        (self.resname, self.resaddr, self.reslocality, self.rescity,
+         self.resstate, self.rescon, self.respos, self.resphone,
+         self.resemail) = state["researcher"]
+        self.stop_research(None)
+        self.__gramps_version = state["gramps_version"]
+        self.num_srcs = state["num_srcs"]
+        self.num_places = state["num_places"]
+        self.replace_import_handle = state["replace_import_handle"]
+        self.import_researcher = state["import_researcher"]
+        self.all_abs = state["all_abs"]
+        vars(self.info).update(state["info"])
+        if state["default_tag"]:
+            self.default_tag = self.db.get_tag_from_handle(
+                state["default_tag"])
+
     def start_database(self, attrs):
         """
         Get the xml version of the file.
@@ -997,6 +1135,18 @@ class GrampsParser(UpdateCallback):
         if 'version' in attrs:
             self.__gramps_version = attrs.get('version')
 
+    def start_delta(self, attrs):
+        """
+        A delta file (only the changes since a given time) cannot be
+        imported as a family tree.
+        """
+        raise GrampsImportError(
+            _("The file is a delta export"),
+            _("The file only contains the changes since %s. Export the "
+              "changes as JSON to apply them to a copy of the family tree."
+             ) % time.strftime("%Y-%m-%d %H:%M:%S",
+                               time.localtime(int(attrs.get("since", 0)))))
+
     def stop_header(self, *dummy):
         """
         Check the version of Gramps and XML.
@@ -3099,6 +3249,8 @@ class GrampsParser(UpdateCallback):
         self.func_list[self.func_index] = (self.func, self.tlist)
         self.func_index += 1
         self.tlist = []
+        if self.checkpoint:
+            self.checkpoint_element(tag, attrs)
 
         try:
             f, self.func = self.func_map[tag]
@@ -0,0 +1,123 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for resuming interrupted imports from their checkpoints """
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gprime.db import make_database
+from gprime.cli.user import User
+from gprime.plugins.lib.libcheckpoint import ImportCheckpoint
+from gprime.plugins.importer import importgedcom, importxml
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..",
+                           "example")
+
+class Interrupted(Exception):
+    """ The import process was killed """
+
+class ImportCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saves = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_db(self):
+        path = tempfile.mkdtemp(dir=self.directory)
+        db = make_database("dbapi")
+        db.write_version(path)
+        db.load(path)
+        return db
+
+    @staticmethod
+    def get_gids(db):
+        """
+        Return the ids of the objects (the names of the tags), by table,
+        with the duplicates.
+        """
+        return {table: sorted(getattr(obj, "gid", None) or obj.get_name()
+                              for obj in db.get_table_func(table,
+                                                           "iter_func")())
+                for table in db.get_table_names()}
+
+    def run_import(self, module, filename, db, interrupt=None):
+        """
+        Import a file, with a checkpoint before each record; if interrupt
+        is given, the import stops right after that many checkpoints.
+        """
+        save = ImportCheckpoint.save
+
+        def checkpoint(checkpoint, *args):
+            result = save(checkpoint, *args)
+            self.saves += 1
+            if self.saves == interrupt:
+                raise Interrupted()
+            return result
+
+        self.saves = 0
+        with mock.patch.object(ImportCheckpoint, "due", lambda self: True), \
+             mock.patch.object(ImportCheckpoint, "save", checkpoint):
+            module.importData(db, filename, User(quiet=True))
+
+    def check_resume(self, module, filename):
+        db = self.make_db()
+        self.run_import(module, filename, db)
+        expected = self.get_gids(db)
+        checkpoints = self.saves
+        db.close()
+        self.assertGreater(checkpoints, 2)
+
+        db = self.make_db()
+        path = db.get_save_path()
+        self.assertRaises(Interrupted, self.run_import, module, filename, db,
+                          checkpoints // 2)
+        partial = self.get_gids(db)
+        db.close()
+        self.assertLess(sum(map(len, partial.values())),
+                        sum(map(len, expected.values())))
+
+        db = make_database("dbapi")
+        db.load(path)
+        module.importData(db, filename, User(quiet=True), resume=True)
+        gids = self.get_gids(db)
+        db.close()
+        self.assertEqual(gids, expected)
+        for (table, table_gids) in gids.items():
+            self.assertEqual(len(table_gids), len(set(table_gids)), table)
+        self.assertFalse(os.path.exists(os.path.join(
+            path, ImportCheckpoint.FILENAME)))
+
+    def test_gedcom(self):
+        self.check_resume(importgedcom, os.path.join(EXAMPLE_DIR, "gedcom",
+                                                     "sample.ged"))
+
+    def test_xml(self):
+        self.check_resume(importxml, os.path.join(EXAMPLE_DIR, "gramps",
+                                                  "data.gramps"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1779,6 +1779,16 @@ links (like ODF) and write PDF from that format.
         if not self._elements_to_paginate:
             #this is a self._doc where nothing has been added. Empty page.
             return True
+        self.paginate_next(layout, page_width, page_height, dpi_x, dpi_y)
+        return len(self._elements_to_paginate) == 0
+
+    def paginate_next(self, layout, page_width, page_height, dpi_x, dpi_y):
+        """Fit the next element to paginate to the last page.
+
+        The element is divided if needed, and a new page is started when
+        the last one is full.
+
+        """
         elem = self._elements_to_paginate.pop(0)
         (e1, e2), e1_h = elem.divide(layout,
                                      page_width,
@@ -1802,8 +1812,6 @@ links (like ODF) and write PDF from that format.
             self._pages.append(GtkDocDocument())
             self._available_height = page_height
 
-        return len(self._elements_to_paginate) == 0
-
     def draw_page(self, page_nr, cr, layout, width, height, dpi_x, dpi_y):
         """Draw a page on a Cairo context.
         """
@@ -0,0 +1,160 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Checkpoints for resumable imports.
+
+An importer periodically makes the objects it has written so far durable
+(see :meth:`.DbGeneric.transaction_checkpoint`) and records where it is
+in the input file, together with the state it needs to carry on (the
+xref to handle maps, etc.). If the import is interrupted, it can then be
+started again with resume=True and continue from the last checkpoint.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard Python modules
+#
+#-------------------------------------------------------------------------
+import os
+import time
+import json
+import logging
+
+LOG = logging.getLogger(".ImportCheckpoint")
+
+#-------------------------------------------------------------------------
+#
+# ImportCheckpoint
+#
+#-------------------------------------------------------------------------
+class ImportCheckpoint:
+    """
+    The checkpoint of one import, kept in the family tree directory.
+    """
+    FILENAME = "import-checkpoint.json"
+    VERSION = 1
+
+    def __init__(self, database, filename, resume=False, interval=30):
+        """
+        :param database: the database being imported into
+        :param filename: the file being imported
+        :param resume: if True, load the last checkpoint of this file
+        :param interval: seconds between checkpoints
+        """
+        self.database = database
+        self.source = self.get_source_id(filename)
+        self.interval = interval
+        self.last_time = time.time()
+        self.state = None
+        self.position = None
+        directory = database.get_save_path()
+        if directory and os.path.isdir(directory):
+            self.path = os.path.join(directory, self.FILENAME)
+        else:
+            self.path = None
+        if resume:
+            self.load()
+        else:
+            self.remove()
+
+    @staticmethod
+    def get_source_id(filename):
+        """
+        Identify the input file, so that a checkpoint is never applied to
+        a different file.
+        """
+        if filename == "-" or not os.path.exists(filename):
+            return None
+        stat = os.stat(filename)
+        return [os.path.abspath(filename), stat.st_size, int(stat.st_mtime)]
+
+    def is_resuming(self):
+        """
+        Return True if a checkpoint was loaded.
+        """
+        return self.state is not None
+
+    def load(self):
+        """
+        Load the checkpoint of the input file, if there is one.
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as fp:
+            data = json.load(fp)
+        if data.get("version") != self.VERSION:
+            LOG.warning("Ignoring checkpoint with unknown version")
+        elif data.get("source") != self.source:
+            LOG.warning("Ignoring checkpoint of a different file: %s",
+                        data.get("source"))
+        else:
+            self.position = data["position"]
+            self.state = data["state"]
+            LOG.info("Resuming import from %s (%s)", self.position,
+                     data.get("counts"))
+
+    def due(self):
+        """
+        Return True if it is time for a new checkpoint.
+        """
+        return (self.source is not None and self.path is not None and
+                time.time() - self.last_time >= self.interval)
+
+    def save(self, transaction, position, state):
+        """
+        Commit the objects written so far, and record the position in the
+        input file and the importer state.
+
+        :param transaction: the running (batch) transaction
+        :param position: where to continue reading the input file
+        :param state: json-serializable state of the importer
+        """
+        self.last_time = time.time()
+        if not self.database.transaction_checkpoint(transaction):
+            return False
+        data = {
+            "version": self.VERSION,
+            "source": self.source,
+            "position": position,
+            "state": state,
+            "counts": self.get_counts(),
+            "time": self.last_time,
+        }
+        temp = self.path + ".tmp"
+        with open(temp, "w") as fp:
+            json.dump(data, fp)
+        os.replace(temp, self.path)
+        LOG.debug("Import checkpoint at %s", position)
+        return True
+
+    def get_counts(self):
+        """
+        Return the number of committed objects, by table.
+        """
+        return {table: self.database.get_table_func(table, "count_func")()
+                for table in self.database.get_table_names()}
+
+    def remove(self):
+        """
+        Remove the checkpoint, when the import completed.
+        """
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
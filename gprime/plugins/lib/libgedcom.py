@@ -743,6 +743,8 @@ class Lexer:
         self.cnv = None
         self.cnt = 0
         self.index = 0
+        self.want_mark = False
+        self.mark = None
         self.func_map = {
             TOKEN_CONT : self.__fix_token_cont,
             TOKEN_CONC : self.__fix_token_conc,
@@ -778,8 +780,31 @@ class Lexer:
             new_value = line[2] + data[2]
         self.current_list[0] = (line[0], line[1], new_value, line[3], line[4])
 
+    def mark_next_record(self):
+        """
+        Record the file position of the next level 0 line read from the
+        file. The (line number, position) pair is then available as
+        self.mark, for checkpoints.
+        """
+        self.want_mark = True
+        self.mark = None
+
+    def seek(self, position, line_number):
+        """
+        Continue reading at a position previously found with
+        mark_next_record, which is the start of the given line number.
+        """
+        self.ifile.seek(position)
+        self.current_list = []
+        self.eof = False
+        self.want_mark = False
+        self.mark = None
+        self.index = line_number - 1
+
     def __readahead(self):
         while len(self.current_list) < 5:
+            if self.want_mark:
+                position = self.ifile.tell()
             line = self.ifile.readline()
             self.index += 1
             if not line:
@@ -831,6 +856,9 @@ class Lexer:
 
             token = TOKENS.get(tag, TOKEN_UNKNOWN)
             data = (level, token, line_value, tag, self.index)
+            if self.want_mark and level == 0:
+                self.mark = (self.index, position)
+                self.want_mark = False
 
             func = self.func_map.get(data[1])
             if func:
@@ -1095,6 +1123,12 @@ class BaseReader:
     def reset(self):
         self.ifile.seek(0)
 
+    def tell(self):
+        return self.ifile.tell()
+
+    def seek(self, position):
+        self.ifile.seek(position)
+
     def readline(self):
         raise NotImplementedError()
 
@@ -1605,7 +1639,9 @@ class IdFinder:
         """
         Initialize the object.
         """
-        self.ids = set(keys)
+        # the database may give the keys as bytes or as str:
+        self.ids = set(key.decode('utf-8') if isinstance(key, bytes) else key
+                       for key in keys)
         self.index = 0
         self.prefix = prefix
 
@@ -1618,11 +1654,10 @@ class IdFinder:
         @rtype: str
         """
         index = self.prefix % self.index
-        # self.ids contains 'bytes' data
-        while index.encode('utf-8') in self.ids:
+        while index in self.ids:
             self.index += 1
             index = self.prefix % self.index
-        self.ids.add(index.encode('utf-8'))
+        self.ids.add(index)
         self.index += 1
         return index
 
@@ -1748,9 +1783,10 @@ class GedcomParser(UpdateCallback):
         return name
 
     def __init__(self, dbase, ifile, filename, user, stage_one,
-                 default_source, default_tag_format=None):
+                 default_source, default_tag_format=None, checkpoint=None):
         UpdateCallback.__init__(self, user.callback)
         self.user = user
+        self.checkpoint = checkpoint
         self.set_total(stage_one.get_line_count())
         self.repo2id = {}
         self.trans = None
@@ -2569,7 +2605,7 @@ class GedcomParser(UpdateCallback):
         data = next(cursor)
         while data:
             (handle, val) = data
-            self.place_names[val[2]].append(handle)
+            self.place_names[val["title"]].append(handle)
             data = next(cursor)
         cursor.close()
 
@@ -2620,10 +2656,14 @@ class GedcomParser(UpdateCallback):
             self.want_parse_warnings = False
             self.__parse_header()
             self.want_parse_warnings = True
-            if self.use_def_src:
-                self.dbase.add_source(self.def_src, self.trans)
-            if self.default_tag and self.default_tag.handle is None:
-                self.dbase.add_tag(self.default_tag, self.trans)
+            if self.checkpoint and self.checkpoint.is_resuming():
+                self.__resume(self.checkpoint.position,
+                              self.checkpoint.state)
+            else:
+                if self.use_def_src:
+                    self.dbase.add_source(self.def_src, self.trans)
+                if self.default_tag and self.default_tag.handle is None:
+                    self.dbase.add_tag(self.default_tag, self.trans)
             self.__parse_record()
             self.__parse_trailer()
             for title, handle in self.inline_srcs.items():
@@ -2635,6 +2675,8 @@ class GedcomParser(UpdateCallback):
 
             self.place_import.generate_hierarchy(self.trans)
 
+        if self.checkpoint:
+            self.checkpoint.remove()
         if not self.dbase.get_feature("skip-check-xref"):
             self.__check_xref()
         self.dbase.enable_signals()
@@ -2651,6 +2693,72 @@ class GedcomParser(UpdateCallback):
         self.user.info(message, "".join(self.errors),
                        parent=parent_window, monospaced=True)
 
+    def __checkpoint(self, line):
+        """
+        Called at the start of each level 0 record. When a checkpoint is
+        due, ask the lexer for the position of the next record; when that
+        record is reached, everything before it has been committed, so
+        save the checkpoint there.
+        """
+        mark = self.lexer.mark
+        if mark and mark[0] == line.line:
+            self.checkpoint.save(self.trans, mark, self.__get_state())
+            self.lexer.mark = None
+        elif not self.lexer.want_mark and not mark and self.checkpoint.due():
+            self.lexer.mark_next_record()
+
+    def __get_state(self):
+        """
+        Return the parser state that is needed to resume the import.
+        """
+        return {
+            "count": self.count,
+            "number_of_errors": self.number_of_errors,
+            "def_src": self.def_src.handle if self.use_def_src else None,
+            "default_tag": (self.default_tag.handle if self.default_tag
+                            else None),
+            "id_maps": [self.pid_map.swap, self.fid_map.swap,
+                        self.sid_map.swap, self.oid_map.swap,
+                        self.rid_map.swap, self.nid_map.swap],
+            "id2id": [self.gid2id, self.oid2id, self.sid2id, self.lid2id,
+                      self.fid2id, self.rid2id, self.nid2id],
+            "repo2id": self.repo2id,
+            "inline_srcs": list(self.inline_srcs.items()),
+            "media_map": self.media_map,
+            "note_type_map": self.note_type_map,
+            "places": [[handle, list(location)] for (handle, location)
+                       in self.place_import.handle2loc.items()],
+        }
+
+    def __resume(self, mark, state):
+        """
+        Restore the parser state from a checkpoint, and continue reading
+        the file at the record where the checkpoint was made.
+        """
+        self.count = state["count"]
+        self.number_of_errors = state["number_of_errors"]
+        if state["def_src"]:
+            self.def_src = self.dbase.get_source_from_handle(state["def_src"])
+        if state["default_tag"]:
+            self.default_tag = self.dbase.get_tag_from_handle(
+                state["default_tag"])
+        for (id_map, swap) in zip([self.pid_map, self.fid_map,
+                                   self.sid_map, self.oid_map,
+                                   self.rid_map, self.nid_map],
+                                  state["id_maps"]):
+            id_map.swap = swap
+        (self.gid2id, self.oid2id, self.sid2id, self.lid2id,
+         self.fid2id, self.rid2id, self.nid2id) = state["id2id"]
+        self.repo2id = state["repo2id"]
+        self.inline_srcs = OrderedDict(state["inline_srcs"])
+        self.media_map = state["media_map"]
+        self.note_type_map = state["note_type_map"]
+        for (handle, location) in state["places"]:
+            self.place_import.store_location(tuple(location), handle)
+        line_number, position = mark
+        self.lexer.seek(position, line_number)
+        self.backoff = False
+
     def __clean_up(self):
         """
         Break circular references to parsing methods stored in dictionaries
@@ -3403,6 +3511,8 @@ class GedcomParser(UpdateCallback):
             if not line or line.token == TOKEN_TRLR:
                 self._backup()
                 break
+            if self.checkpoint:
+                self.__checkpoint(line)
             if line.token == TOKEN_UNKNOWN:
                 state = CurrentState()
                 self.__add_msg(_("Unknown tag"), line, state)
@@ -157,7 +157,8 @@ class HtmlBackend(DocBackend):
     """
     Implementation for html pages
     Contrary to other backends, we do not write to file but to a Html object
-    instead, writing out the file on close.
+    instead, writing out the file on close, or while the page is made
+    (see open_stream).
     """
 
     STYLETAG_TO_PROPERTY = {
@@ -190,6 +191,8 @@ class HtmlBackend(DocBackend):
 
     ESCAPE_FUNC = lambda self: escape
 
+    INDENT = '  '
+
     def __init__(self, filename=None):
         """
         @param filename: path name of the file the backend works on
@@ -201,6 +204,8 @@ class HtmlBackend(DocBackend):
         self._subdir = None
         self.title = None
         self.build_link = None
+        self.__stream = None # open element, and indentation of its contents
+        self.__rest = []     # items still to write after it, and their tabs
 
     def _create_xmltag(self, tagtype, value):
         """
@@ -275,11 +280,75 @@ class HtmlBackend(DocBackend):
         """
         self.html_body += obj
 
+    def __tabs(self, html, tabs):
+        """
+        The indentation of the items of an Html object, as in Html.write
+        """
+        if html.indent is None:
+            return ''
+        elif html.indent:
+            return tabs + self.INDENT
+        return tabs
+
+    def __write_item(self, item, tabs):
+        """ write an item of an Html object, as in Html.write
+        """
+        if isinstance(item, Html):
+            item.write(self.__write, indent=self.INDENT, tabs=tabs)
+        else:
+            self.__write(tabs + str(item))
+
+    def open_stream(self, *path):
+        """
+        Start writing the page to the file while it is made, rather than on
+        close: path is a chain of nested Html objects of the page (such as
+        the body, and a div of it), and the page is written up to the
+        contents of the last one, which stays open. Its contents are then
+        written by flush as they are completed, and the rest of the page
+        on close.
+        """
+        html, tabs = self.html_page, ''
+        for child in path:
+            tabs = self.__tabs(html, tabs)
+            items = html[:]
+            index = [id(item) for item in items].index(id(child))
+            for item in items[:index]:
+                self.__write_item(item, tabs)
+            self.__rest.insert(0, (items[index + 1:], tabs))
+            html = child
+        self.__write_item(html[0], self.__tabs(html, tabs))
+        self.__rest.insert(0, (html[-1:], self.__tabs(html, tabs)))
+        self.__stream = (html, self.__tabs(html, tabs))
+
+    def is_streaming(self):
+        """
+        Is the page written while it is made? (see open_stream)
+        """
+        return self.__stream is not None
+
+    def flush(self):
+        """
+        Write the contents of the open element of the page (see open_stream)
+        to the file, and remove them from it.
+        """
+        html, tabs = self.__stream
+        for item in html.inside:
+            self.__write_item(item, tabs)
+        del html.inside
+
     def close(self):
         """
         write out the html to the page
         """
-        self.html_page.write(self.__write, indent='  ')
+        if self.__stream is None:
+            self.html_page.write(self.__write, indent=self.INDENT)
+        else:
+            self.flush()
+            for items, tabs in self.__rest:
+                for item in items:
+                    self.__write_item(item, tabs)
+            self.__stream = None
+            self.__rest = []
         DocBackend.close(self)
 
     def datadir(self):
@@ -0,0 +1,175 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+A table of the data of many people, for reports that make statistics or
+records of them.
+
+The people are read once, and each attribute the report asks for goes in
+a column: a list with a value per person, in the order of the people.
+The report then counts or compares the values of the columns, rather
+than going back to the database for each figure.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from gprime.lib import FamilyRelType, EventType, EventRoleType
+from gprime.display.place import displayer as _pd
+
+#-------------------------------------------------------------------------
+#
+# PersonTable
+#
+#-------------------------------------------------------------------------
+class PersonTable:
+    """
+    Columns of the data of people. The columns are:
+
+    handle       -- the handle of the person
+    gender       -- Person.MALE, FEMALE or UNKNOWN
+    title, first_name, surname -- of the primary name
+    birth, death -- the Date of the birth (death) event, None if there is
+                    no such event
+    birth_place, death_place -- the displayed place of the birth (death)
+                    event, None if it has no place (or there is no event)
+    families     -- the handles of the families the person is a parent in
+    children     -- for each child of those families, the Date of their
+                    birth, None if there is no birth event
+    marriages    -- (Date, displayed place) of the marriage events of
+                    the families where the couple is married; the place
+                    is None if the event has no place
+    event_types  -- the EventType of each event of the person
+    """
+    COLUMNS = ("handle", "gender", "title", "first_name", "surname",
+               "birth", "death", "birth_place", "death_place", "families",
+               "children", "marriages", "event_types")
+
+    def __init__(self, db, columns=COLUMNS):
+        """
+        :param db: the database to read the people from (with the proxies
+                   of the report)
+        :param columns: the names of the columns to make
+        """
+        self.db = db
+        self.names = list(columns)
+        self.columns = dict([(name, []) for name in self.names])
+        self.__readers = [(self.columns[name].append,
+                           getattr(self, "_read_" + name))
+                          for name in self.names]
+
+    def __len__(self):
+        return len(self.columns[self.names[0]]) if self.names else 0
+
+    def __getitem__(self, name):
+        """
+        Return the column of the given name.
+        """
+        return self.columns[name]
+
+    def add_people(self, handles, callback=None):
+        """
+        Read the people of the given handles into the table, skipping
+        those that are not found. callback is called for each handle.
+        """
+        get_person = self.db.get_person_from_handle
+        for handle in handles:
+            if callback:
+                callback()
+            person = get_person(handle)
+            if person is None:
+                continue
+            for (append, read) in self.__readers:
+                append(read(person))
+
+    # ------------------------- helpers -------------------------------
+
+    def _event(self, ref):
+        return self.db.get_event_from_handle(ref.ref) if ref else None
+
+    def _date(self, event):
+        return event.get_date_object() if event else None
+
+    def _place(self, event):
+        if event and event.get_place_handle():
+            return _pd.display_event(self.db, event)
+        return None
+
+    # ------------------------- columns -------------------------------
+
+    def _read_handle(self, person):
+        return person.handle
+
+    def _read_gender(self, person):
+        return person.gender
+
+    def _read_title(self, person):
+        return person.get_primary_name().get_title()
+
+    def _read_first_name(self, person):
+        return person.get_primary_name().get_first_name()
+
+    def _read_surname(self, person):
+        return person.get_primary_name().get_surname()
+
+    def _read_birth(self, person):
+        return self._date(self._event(person.get_birth_ref()))
+
+    def _read_death(self, person):
+        return self._date(self._event(person.get_death_ref()))
+
+    def _read_birth_place(self, person):
+        return self._place(self._event(person.get_birth_ref()))
+
+    def _read_death_place(self, person):
+        return self._place(self._event(person.get_death_ref()))
+
+    def _read_families(self, person):
+        return person.get_family_handle_list()
+
+    def _read_children(self, person):
+        dates = []
+        for family_handle in person.get_family_handle_list():
+            family = self.db.get_family_from_handle(family_handle)
+            for child_ref in family.get_child_ref_list():
+                child = self.db.get_person_from_handle(child_ref.ref)
+                dates.append(self._date(self._event(child.get_birth_ref())))
+        return dates
+
+    def _read_marriages(self, person):
+        marriages = []
+        for family_handle in person.get_family_handle_list():
+            family = self.db.get_family_from_handle(family_handle)
+            if int(family.get_relationship()) != FamilyRelType.MARRIED:
+                continue
+            for event_ref in family.get_event_ref_list():
+                event = self.db.get_event_from_handle(event_ref.ref)
+                if (event.get_type() == EventType.MARRIAGE and
+                        (event_ref.get_role() == EventRoleType.FAMILY or
+                         event_ref.get_role() == EventRoleType.PRIMARY)):
+                    marriages.append((event.get_date_object(),
+                                      self._place(event)))
+        return marriages
+
+    def _read_event_types(self, person):
+        return [self.db.get_event_from_handle(ref.ref).get_type()
+                for ref in person.get_event_ref_list()]
@@ -249,3 +249,20 @@ authors = ["The Gramps project"],
 authors_email = ["http://gramps-project.org"],
 )
 
+
+#------------------------------------------------------------------------
+#
+# libcheckpoint
+#
+#------------------------------------------------------------------------
+register(GENERAL,
+id    = 'libcheckpoint',
+name  = "Import checkpoint lib",
+description =  _("Provides checkpoints for resumable imports.") ,
+version = '1.0',
+gprime_target_version = MODULE_VERSION,
+status = STABLE,
+fname = 'libcheckpoint.py',
+authors = ["The Gramps project"],
+authors_email = ["http://gramps-project.org"],
+)
@@ -27,6 +27,7 @@
 #
 #------------------------------------------------------------------------
 import datetime
+import heapq
 
 #------------------------------------------------------------------------
 #
@@ -72,6 +73,13 @@ RECORDS = [
     (_T_("Couple with smallest age difference"), 'family_smallestagediff',  True),
     (_T_("Couple with biggest age difference"),  'family_biggestagediff',   True)]
 
+# The records of the lowest values; the others are of the highest ones:
+LOWEST_RECORDS = ['person_youngestliving', 'person_youngestdied',
+                  'person_youngestmarried', 'person_youngestdivorced',
+                  'person_youngestfather', 'person_youngestmother',
+                  'family_youngestmarried', 'family_smallestagediff',
+                  'family_shortest']
+
 #------------------------------------------------------------------------
 #
 # Global functions
@@ -95,8 +103,11 @@ def _find_death_date(db, person):
 
 def find_records(db, filter, top_size, callname,
                  trans_text=glocale.translation.sgettext, name_format=None,
-                 living_mode=LivingProxyDb.MODE_INCLUDE_ALL):
+                 living_mode=LivingProxyDb.MODE_INCLUDE_ALL, prefetch=None):
     """
+    Find the records of the people of the filter, and of the families
+    with a parent in it, in one pass over each.
+
     @param trans_text: allow deferred translation of strings
     @type trans_text: a Locale sgettext instance
     trans_text is a defined keyword (see po/update_po.py, po/genpot.sh)
@@ -104,144 +115,143 @@ def find_records(db, filter, top_size, callname,
     :type name_format: None or int
     :param living_mode: enable optional control of living people's records
     :type living_mode: int
+    :param prefetch: optional function to load the people at once, given
+                     their handles (see SnapshotDb.prefetch)
+    :returns: a (translated title, record name, records) tuple for each
+              of RECORDS, the records being (sort value, value, name,
+              'Person' or 'Family', handle) tuples, best first
     """
 
-    def get_unfiltered_person_from_handle(person_handle):
-        if living_mode == LivingProxyDb.MODE_INCLUDE_ALL:
-            return db.get_person_from_handle(person_handle)
-        else: # we are in the proxy so get the person before proxy changes
-            return db.get_unfiltered_person(person_handle)
-
     today = datetime.date.today()
     today_date = Date(today.year, today.month, today.day)
 
+    records = {}
+    for (text, varname, default) in RECORDS:
+        records[varname] = _Top(top_size,
+                                highest=varname not in LOWEST_RECORDS)
+
+    # What is known of the people, each found once (by handle):
+    births = {}
+    deaths = {}
+    names = {}
+    alive = {}
+
+    def get_birth_date(person):
+        if person.handle not in births:
+            # FIXME this should check for a "fallback" birth also/instead
+            birth_ref = person.get_birth_ref()
+            if birth_ref:
+                births[person.handle] = db.get_event_from_handle(
+                    birth_ref.ref).get_date_object()
+            else:
+                births[person.handle] = None
+        return births[person.handle]
+
+    def get_death_date(person):
+        if person.handle not in deaths:
+            deaths[person.handle] = _find_death_date(db, person)
+        return deaths[person.handle]
+
+    def get_name(person):
+        if person.handle not in names:
+            names[person.handle] = _get_styled_primary_name(
+                person, callname, trans_text=trans_text,
+                name_format=name_format)
+        return names[person.handle]
+
+    def is_alive(person_handle):
+        if person_handle not in alive:
+            if living_mode == LivingProxyDb.MODE_INCLUDE_ALL:
+                person = db.get_person_from_handle(person_handle)
+            else: # we are in the proxy so get the person before proxy changes
+                person = db.get_unfiltered_person(person_handle)
+            alive[person_handle] = probably_alive(person, db)
+        return alive[person_handle]
+
     # Person records
-    person_youngestliving = []
-    person_oldestliving = []
-    person_youngestdied = []
-    person_oldestdied = []
-    person_youngestmarried = []
-    person_oldestmarried = []
-    person_youngestdivorced = []
-    person_oldestdivorced = []
-    person_youngestfather = []
-    person_youngestmother = []
-    person_oldestfather = []
-    person_oldestmother = []
-
-    person_handle_list = db.iter_person_handles()
-
-    if filter:
-        person_handle_list = filter.apply(db, person_handle_list)
+    if filter and not filter.is_empty():
+        person_handle_list = filter.apply(db, db.iter_person_handles())
+        # the families of the filter have a parent in it:
+        people = set(person_handle_list)
+    else:
+        person_handle_list = list(db.iter_person_handles())
+        people = None
+    if prefetch:
+        prefetch(person_handle_list)
 
     for person_handle in person_handle_list:
         person = db.get_person_from_handle(person_handle)
-        unfil_person = get_unfiltered_person_from_handle(person_handle)
         if person is None:
             continue
 
-        # FIXME this should check for a "fallback" birth also/instead
-        birth_ref = person.get_birth_ref()
-
-        if not birth_ref:
-            # No birth event, so we can't calculate any age.
-            continue
-
-        birth = db.get_event_from_handle(birth_ref.ref)
-        birth_date = birth.get_date_object()
-
-        death_date = _find_death_date(db, person)
-
+        birth_date = get_birth_date(person)
         if not _good_date(birth_date):
             # Birth date unknown or incomplete, so we can't calculate any age.
             continue
 
-        name = _get_styled_primary_name(person, callname,
-                                        trans_text=trans_text,
-                                        name_format=name_format)
+        death_date = get_death_date(person)
+
+        name = get_name(person)
 
         if death_date is None:
-            if probably_alive(unfil_person, db):
+            if is_alive(person_handle):
                 # Still living, look for age records
-                _record(person_youngestliving, person_oldestliving,
-                        today_date - birth_date, name, 'Person', person_handle,
-                        top_size)
+                _record(records['person_youngestliving'],
+                        records['person_oldestliving'],
+                        today_date - birth_date, name, 'Person', person_handle)
         elif _good_date(death_date):
             # Already died, look for age records
-            _record(person_youngestdied, person_oldestdied,
-                    death_date - birth_date, name, 'Person', person_handle,
-                    top_size)
+            _record(records['person_youngestdied'],
+                    records['person_oldestdied'],
+                    death_date - birth_date, name, 'Person', person_handle)
 
         for family_handle in person.get_family_handle_list():
             family = db.get_family_from_handle(family_handle)
 
-            marriage_date = None
-            divorce_date = None
-            for event_ref in family.get_event_ref_list():
-                event = db.get_event_from_handle(event_ref.ref)
-                if (event.get_type().is_marriage() and
-                    (event_ref.get_role().is_family() or
-                     event_ref.get_role().is_primary())):
-                    marriage_date = event.get_date_object()
-                elif (event.get_type().is_divorce() and
-                      (event_ref.get_role().is_family() or
-                       event_ref.get_role().is_primary())):
-                    divorce_date = event.get_date_object()
+            (marriage_date, divorce) = _find_marriage(db, family)
+            divorce_date = divorce.get_date_object() if divorce else None
 
             if _good_date(marriage_date):
-                _record(person_youngestmarried, person_oldestmarried,
+                _record(records['person_youngestmarried'],
+                        records['person_oldestmarried'],
                         marriage_date - birth_date,
-                        name, 'Person', person_handle, top_size)
+                        name, 'Person', person_handle)
 
             if _good_date(divorce_date):
-                _record(person_youngestdivorced, person_oldestdivorced,
+                _record(records['person_youngestdivorced'],
+                        records['person_oldestdivorced'],
                         divorce_date - birth_date,
-                        name, 'Person', person_handle, top_size)
+                        name, 'Person', person_handle)
+
+            if person.get_gender() == person.MALE:
+                (youngest, oldest) = (records['person_youngestfather'],
+                                      records['person_oldestfather'])
+            elif person.get_gender() == person.FEMALE:
+                (youngest, oldest) = (records['person_youngestmother'],
+                                      records['person_oldestmother'])
+            else:
+                continue
 
             for child_ref in family.get_child_ref_list():
                 if person.get_gender() == person.MALE:
                     relation = child_ref.get_father_relation()
-                elif person.get_gender() == person.FEMALE:
-                    relation = child_ref.get_mother_relation()
                 else:
-                    continue
+                    relation = child_ref.get_mother_relation()
                 if relation != ChildRefType.BIRTH:
                     continue
 
                 child = db.get_person_from_handle(child_ref.ref)
-
-                # FIXME this should check for a "fallback" birth also/instead
-                child_birth_ref = child.get_birth_ref()
-                if not child_birth_ref:
+                if child is None:
                     continue
-
-                child_birth = db.get_event_from_handle(child_birth_ref.ref)
-                child_birth_date = child_birth.get_date_object()
-
+                child_birth_date = get_birth_date(child)
                 if not _good_date(child_birth_date):
                     continue
 
-                if person.get_gender() == person.MALE:
-                    _record(person_youngestfather, person_oldestfather,
-                            child_birth_date - birth_date,
-                            name, 'Person', person_handle, top_size)
-                elif person.get_gender() == person.FEMALE:
-                    _record(person_youngestmother, person_oldestmother,
-                            child_birth_date - birth_date,
-                            name, 'Person', person_handle, top_size)
-
+                _record(youngest, oldest, child_birth_date - birth_date,
+                        name, 'Person', person_handle)
 
     # Family records
-    family_mostchildren = []
-    family_youngestmarried = []
-    family_oldestmarried = []
-    family_shortest = []
-    family_longest = []
-    family_smallestagediff = []
-    family_biggestagediff = []
-
     for family in db.iter_families():
-        #family = db.get_family_from_handle(family_handle)
         if living_mode != LivingProxyDb.MODE_INCLUDE_ALL:
             # FIXME no iter_families method in LivingProxyDb so do it this way
             family = db.get_family_from_handle(family.get_handle())
@@ -254,73 +264,45 @@ def find_records(db, filter, top_size, callname,
             continue
 
         # Test if either father or mother are in filter
-        if filter:
-            if not filter.apply(db, [father_handle, mother_handle]):
-                continue
+        if (people is not None and father_handle not in people and
+                mother_handle not in people):
+            continue
 
         father = db.get_person_from_handle(father_handle)
-        unfil_father = get_unfiltered_person_from_handle(father_handle)
         if father is None:
             continue
         mother = db.get_person_from_handle(mother_handle)
-        unfil_mother = get_unfiltered_person_from_handle(mother_handle)
         if mother is None:
             continue
 
         name = StyledText(trans_text("%(father)s and %(mother)s")) % {
-                'father': _get_styled_primary_name(father, callname,
-                                                   trans_text=trans_text,
-                                                   name_format=name_format),
-                'mother': _get_styled_primary_name(mother, callname,
-                                                   trans_text=trans_text,
-                                                   name_format=name_format)}
+                'father': get_name(father),
+                'mother': get_name(mother)}
 
         if (living_mode == LivingProxyDb.MODE_INCLUDE_ALL
-            or (not probably_alive(unfil_father, db) and
-                not probably_alive(unfil_mother, db))):
-            _record(None, family_mostchildren,
+            or (not is_alive(father_handle) and
+                not is_alive(mother_handle))):
+            _record(None, records['family_mostchildren'],
                     len(family.get_child_ref_list()),
-                    name, 'Family', family.handle, top_size)
+                    name, 'Family', family.handle)
 
-        father_birth_ref = father.get_birth_ref()
-        if father_birth_ref:
-            father_birth_date = db.get_event_from_handle(father_birth_ref.ref).get_date_object()
-        else:
-            father_birth_date = None
-
-        mother_birth_ref = mother.get_birth_ref()
-        if mother_birth_ref:
-            mother_birth_date = db.get_event_from_handle(mother_birth_ref.ref).get_date_object()
-        else:
-            mother_birth_date = None
+        father_birth_date = get_birth_date(father)
+        mother_birth_date = get_birth_date(mother)
 
         if _good_date(father_birth_date) and _good_date(mother_birth_date):
             if father_birth_date >> mother_birth_date:
-                _record(family_smallestagediff, family_biggestagediff,
+                _record(records['family_smallestagediff'],
+                        records['family_biggestagediff'],
                         father_birth_date - mother_birth_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family.handle)
             elif mother_birth_date >> father_birth_date:
-                _record(family_smallestagediff, family_biggestagediff,
+                _record(records['family_smallestagediff'],
+                        records['family_biggestagediff'],
                         mother_birth_date - father_birth_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family.handle)
 
-        marriage_date = None
-        divorce = None
-        divorce_date = None
-        for event_ref in family.get_event_ref_list():
-            event = db.get_event_from_handle(event_ref.ref)
-            if (event.get_type().is_marriage() and
-                (event_ref.get_role().is_family() or
-                 event_ref.get_role().is_primary())):
-                marriage_date = event.get_date_object()
-            if (event and event.get_type().is_divorce() and
-                (event_ref.get_role().is_family() or
-                 event_ref.get_role().is_primary())):
-                divorce = event
-                divorce_date = event.get_date_object()
-
-        father_death_date = _find_death_date(db, father)
-        mother_death_date = _find_death_date(db, mother)
+        (marriage_date, divorce) = _find_marriage(db, family)
+        divorce_date = divorce.get_date_object() if divorce else None
 
         if not _good_date(marriage_date):
             # Not married or marriage date unknown
@@ -330,12 +312,15 @@ def find_records(db, filter, top_size, callname,
             # Divorced but date unknown or inexact
             continue
 
-        if (not probably_alive(unfil_father, db)
+        father_death_date = get_death_date(father)
+        mother_death_date = get_death_date(mother)
+
+        if (not is_alive(father_handle)
                 and not _good_date(father_death_date)):
             # Father died but death date unknown or inexact
             continue
 
-        if (not probably_alive(unfil_mother, db)
+        if (not is_alive(mother_handle)
                 and not _good_date(mother_death_date)):
             # Mother died but death date unknown or inexact
             continue
@@ -344,11 +329,11 @@ def find_records(db, filter, top_size, callname,
             and father_death_date is None
             and mother_death_date is None):
             # Still married and alive
-            if (probably_alive(unfil_father, db)
-                    and probably_alive(unfil_mother, db)):
-                _record(family_youngestmarried, family_oldestmarried,
+            if is_alive(father_handle) and is_alive(mother_handle):
+                _record(records['family_youngestmarried'],
+                        records['family_oldestmarried'],
                         today_date - marriage_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family.handle)
         elif (_good_date(divorce_date) or
               _good_date(father_death_date) or
               _good_date(mother_death_date)):
@@ -366,14 +351,31 @@ def find_records(db, filter, top_size, callname,
                     end = divorce_date
             duration = end - marriage_date
 
-            _record(family_shortest, family_longest,
-                    duration, name, 'Family', family.handle, top_size)
-    #python 3 workaround: assign locals to tmp so we work with runtime version
-    tmp = locals()
-    return [(trans_text(text), varname, tmp[varname])
-                for (text, varname, default) in RECORDS]
+            _record(records['family_shortest'], records['family_longest'],
+                    duration, name, 'Family', family.handle)
 
-def _record(lowest, highest, value, text, handle_type, handle, top_size):
+    return [(trans_text(text), varname, records[varname].get_records())
+            for (text, varname, default) in RECORDS]
+
+def _find_marriage(db, family):
+    """
+    Return the date of the (last) marriage event of the family, and its
+    (last) divorce event, or None for each.
+    """
+    marriage_date = None
+    divorce = None
+    for event_ref in family.get_event_ref_list():
+        if not (event_ref.get_role().is_family() or
+                event_ref.get_role().is_primary()):
+            continue
+        event = db.get_event_from_handle(event_ref.ref)
+        if event.get_type().is_marriage():
+            marriage_date = event.get_date_object()
+        elif event.get_type().is_divorce():
+            divorce = event
+    return (marriage_date, divorce)
+
+def _record(lowest, highest, value, text, handle_type, handle):
 
     if value < 0: # ignore erroneous data
         return # (since the data-verification tool already finds it)
@@ -386,20 +388,52 @@ def _record(lowest, highest, value, text, handle_type, handle, top_size):
         high_value = value
 
     if lowest is not None:
-        lowest.append((high_value, value, text, handle_type, handle))
-        lowest.sort(key=lambda a: a[0])   # FIXME: Ist das lambda notwendig?
-        for i in range(top_size, len(lowest)):
-            if lowest[i-1][0] < lowest[i][0]:
-                del lowest[i:]
-                break
+        lowest.add(high_value, (high_value, value, text, handle_type, handle))
 
     if highest is not None:
-        highest.append((low_value, value, text, handle_type, handle))
-        highest.sort(reverse=True)
-        for i in range(top_size, len(highest)):
-            if highest[i-1][0] > highest[i][0]:
-                del highest[i:]
-                break
+        highest.add(low_value, (low_value, value, text, handle_type, handle))
+
+class _Top:
+    """
+    The records of one kind: the top_size lowest (or highest) ones, and
+    all of those that tie with the last of them. They are kept in a heap,
+    the last first, so that a value that does not make it is dropped at
+    once.
+    """
+    def __init__(self, top_size, highest):
+        self.top_size = top_size
+        self.sign = 1 if highest else -1
+        self.heap = [] # (sign * value, number, record)
+        self.ties = [] # those out of the heap that tie with the last one
+        self.number = 0
+
+    def add(self, value, record):
+        self.number += 1
+        entry = (self.sign * value, self.number, record)
+        if len(self.heap) < self.top_size:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] == self.heap[0][0]:
+            self.ties.append(entry)
+        elif entry[0] > self.heap[0][0]:
+            last = heapq.heapreplace(self.heap, entry)
+            if last[0] == self.heap[0][0]:
+                self.ties.append(last)
+            else:
+                self.ties = []
+
+    def get_records(self):
+        """
+        Return the records, best first; those of the same value in the
+        order they were found.
+        """
+        records = [record for (value, number, record)
+                   in sorted(self.heap + self.ties,
+                             key=lambda entry: entry[1])]
+        if self.sign > 0:
+            records.sort(reverse=True)
+        else:
+            records.sort(key=lambda record: record[0])
+        return records
 
 #------------------------------------------------------------------------
 #
@@ -62,7 +62,7 @@ from gprime.plug.report import stdoptions
 from gprime.plugins.lib.libnarrate import Narrator
 from gprime.display.place import displayer as _pd
 from gprime.display.name import displayer as _nd
-from gprime.proxy import CacheProxyDb
+from gprime.proxy import CacheProxyDb, SnapshotDb
 
 #------------------------------------------------------------------------
 #
@@ -140,6 +140,8 @@ class DetDescendantReport(Report):
 
         self._locale = self.set_locale(get_value('trans'))
 
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, menu)
         stdoptions.run_living_people_option(self, menu, self._locale)
         self.database = CacheProxyDb(self.database)
@@ -312,6 +314,9 @@ class DetDescendantReport(Report):
         """
         This function is called by the report system and writes the report.
         """
+        # Load the descendants (and the parents of their spouses) at once:
+        self.snapshot.prefetch([self.center_person.get_handle()], ancestors=2,
+                               descendants=self.max_generations)
         if self.numbering == "Henry":
             self.apply_henry_filter(self.center_person.get_handle(), 1, "1")
         elif self.numbering == "Modified Henry":
@@ -49,7 +49,7 @@ from gprime.plug.docgen import (IndexMark, FontStyle, ParagraphStyle,
                                     FONT_SANS_SERIF, FONT_SERIF,
                                     INDEX_TYPE_TOC, PARA_ALIGN_CENTER)
 from gprime.display.place import displayer as _pd
-from gprime.proxy import CacheProxyDb
+from gprime.proxy import CacheProxyDb, SnapshotDb
 
 #------------------------------------------------------------------------
 #
@@ -89,6 +89,8 @@ class FamilyGroup(Report):
         self._locale = self.set_locale(lang)
         self._ = self._locale.translation.sgettext # needed for English
 
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, menu)
         stdoptions.run_living_people_option(self, menu, self._locale)
         self.database = CacheProxyDb(self.database)
@@ -663,6 +665,11 @@ class FamilyGroup(Report):
                                      self.db.get_number_of_families()) as step:
                 fam_list = self.filter.apply(self.db, flist, step)
         if fam_list:
+            # Load the families (with the parents of the spouses, and the
+            # families of the children) at once:
+            self.snapshot.prefetch(family_handles=fam_list, ancestors=2,
+                                   descendants=(None if self.recursive
+                                                else 2))
             with self._user.progress(_('Family Group Report'),
                                      _('Writing families'),
                                      len(fam_list)) as step:
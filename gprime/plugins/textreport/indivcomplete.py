@@ -58,7 +58,7 @@ from gprime.plug.report import endnotes as Endnotes
 from gprime.plug.report import stdoptions
 from gprime.utils.file import media_path_full
 from gprime.utils.lds import TEMPLES
-from gprime.proxy import CacheProxyDb
+from gprime.proxy import CacheProxyDb, SnapshotDb
 
 #------------------------------------------------------------------------
 #
@@ -129,6 +129,8 @@ class IndivCompleteReport(Report):
         lang = menu.get_option_by_name('trans').get_value()
         self._locale = self.set_locale(lang)
 
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, menu)
         stdoptions.run_living_people_option(self, menu, self._locale)
         self.database = CacheProxyDb(self.database)
@@ -773,6 +775,8 @@ class IndivCompleteReport(Report):
             ind_list = self.filter.apply(self._db, plist)
         else:
             ind_list = plist
+        # Load the people and their families at once:
+        self.snapshot.prefetch(ind_list)
 
         for count, person_handle in enumerate(ind_list):
             self.person = self._db.get_person_from_handle(person_handle)
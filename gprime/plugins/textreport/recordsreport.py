@@ -52,7 +52,7 @@ from gprime.plug.report import MenuReportOptions
 from gprime.plug.report import stdoptions
 from gprime.lib import Span
 from gprime.errors import ReportError
-from gprime.proxy import LivingProxyDb, CacheProxyDb
+from gprime.proxy import LivingProxyDb, CacheProxyDb, SnapshotDb
 
 #------------------------------------------------------------------------
 #
@@ -78,6 +78,9 @@ class RecordsReport(Report):
         lang = options.menu.get_option_by_name('trans').get_value()
         self._locale = self.set_locale(lang)
 
+        # the people are read in bulk, below the proxies:
+        self.snapshot = SnapshotDb(self.database)
+        self.database = self.snapshot
         stdoptions.run_private_data_option(self, menu)
         living_opt = stdoptions.run_living_people_option(self, menu,
                                                          self._locale)
@@ -105,6 +108,13 @@ class RecordsReport(Report):
 
         self._nf = stdoptions.run_name_format_option(self, menu)
 
+    def prefetch(self, people):
+        """
+        Load the people, and the events their records are found from,
+        at once.
+        """
+        self.snapshot.prefetch(people, tables=["Event"])
+
     def write_report(self):
         """
         Build the actual report.
@@ -113,7 +123,8 @@ class RecordsReport(Report):
         records = find_records(self.database, self.filter,
                                self.top_size, self.callname,
                                trans_text=self._, name_format=self._nf,
-                               living_mode=self._lv)
+                               living_mode=self._lv,
+                               prefetch=self.prefetch)
 
         self.doc.start_paragraph('REC-Title')
         title = self._("Records")
@@ -0,0 +1,130 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for writing only the changed pages of the web calendar """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from gprime.dbstate import DbState
+from gprime.db import DbTxn
+from gprime.lib import Person, Surname, Event, EventType, EventRef, Date
+from gprime.plug import CATEGORY_WEB
+from gprime.cli.grampscli import CLIManager
+from gprime.cli.user import User
+from gprime.cli.plug import cl_report
+
+# the people, and the month of their birth in 1990:
+PEOPLE = [("Smith", 3), ("Jones", 5), ("Garner", 8)]
+
+class WebCalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.target = os.path.join(self.directory, "web")
+        dbstate = DbState()
+        CLIManager(dbstate, False, User()).do_reg_plugins(dbstate, None)
+        # the report reads the web resources of the plugins when imported:
+        from gprime.plugins.webreport import webcal
+        self.webcal = webcal
+        self.db = dbstate.create_database(os.path.join(self.directory, "db"))
+        self.people = {}
+        self.events = {}
+        with DbTxn("Add", self.db, batch=True) as trans:
+            for (name, month) in PEOPLE:
+                event = Event()
+                event.set_type(EventType.BIRTH)
+                event.set_date_object(Date(1990, month, 10))
+                self.db.add_event(event, trans)
+                person = Person()
+                surname = Surname()
+                surname.set_surname(name)
+                person.primary_name.add_surname(surname)
+                person.primary_name.set_first_name("Lewis")
+                ref = EventRef()
+                ref.set_reference_handle(event.handle)
+                person.add_event_ref(ref)
+                person.set_birth_ref(ref)
+                self.db.add_person(person, trans)
+                self.people[name] = person
+                self.events[name] = event
+        self.written = []
+        create_file = webcal.WebCalReport.create_file
+        def record(report, fname, subdir):
+            self.written.append(report.page_path(fname, subdir))
+            return create_file(report, fname, subdir)
+        webcal.WebCalReport.create_file = record
+        self.addCleanup(setattr, webcal.WebCalReport, "create_file",
+                        create_file)
+
+    def tearDown(self):
+        self.db.close(update=False)
+        shutil.rmtree(self.directory)
+
+    def run_report(self, **options):
+        """
+        Write the calendar, and return the pages written.
+        """
+        options.update(target=self.target, start_year="2026",
+                       makeoneday="True")
+        self.written = []
+        cl_report(self.db, "WebCal", CATEGORY_WEB, self.webcal.WebCalReport,
+                  self.webcal.WebCalOptions, options, None)
+        return set(self.written)
+
+    def pages(self):
+        return set(os.path.relpath(os.path.join(root, name), self.target)
+                   for (root, dirs, files) in os.walk(self.target)
+                   for name in files
+                   if name.endswith(".html"))
+
+    def test_changes(self):
+        first = self.run_report()
+        self.assertEqual(first, self.pages())
+        self.assertIn("2026/20260510.html", first)
+        # nothing changed:
+        self.assertEqual(self.run_report(), set())
+
+        with DbTxn("Edit", self.db, batch=True) as trans:
+            event = self.db.get_event_from_handle(self.events["Jones"].handle)
+            event.set_date_object(Date(1990, 6, 10))
+            self.db.commit_event(event, trans)
+            self.db.remove_person(self.people["Garner"].handle, trans)
+        # the months and days of the birthdays that moved or went, the
+        # year, and the day before them (it links to the next day):
+        self.assertEqual(self.run_report(),
+                         {"2026/May.html", "2026/June.html",
+                          "2026/August.html", "2026/fullyearlinked.html",
+                          "2026/20260310.html", "2026/20260610.html"})
+        self.assertEqual(first - self.pages(),
+                         {"2026/20260510.html", "2026/20260810.html"})
+
+        # another filter, or other options, make all of the pages again:
+        third = self.run_report(filter="1", pid=self.people["Smith"].gid)
+        self.assertEqual(third, self.pages())
+        self.assertNotIn("2026/20260610.html", third)
+        fourth = self.run_report(filter="1", pid=self.people["Smith"].gid,
+                                 title="Birthdays")
+        self.assertEqual(fourth, third)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,6 +35,8 @@ Web Calendar generator.
 import os, shutil
 import datetime
 import calendar # Python module
+import hashlib
+import json
 
 #------------------------------------------------------------------------
 # Set up logging
@@ -57,6 +59,7 @@ from gprime.plug.report import Report
 from gprime.plug.report import utils
 from gprime.plug.report import MenuReportOptions
 from gprime.plug.report import stdoptions
+from gprime.proxy.proxybase import ProxyDbBase
 from gprime.plug.menu import (BooleanOption, NumberOption, StringOption,
                                   EnumeratedListOption, FilterOption,
                                   PersonOption, DestinationOption, NoteOption)
@@ -69,7 +72,7 @@ from gprime.display.name import displayer as _nd
 import gprime.plugins.lib.libholiday as libholiday
 from gprime.plugins.lib.libhtml import Html, xml_lang
 from gprime.plugins.lib.libhtmlconst import _CHARACTER_SETS, _CC, _COPY_OPTIONS
-from gprime.gui.pluginmanager import GuiPluginManager
+from gprime.plug import BasePluginManager
 
 from gprime.lib.date import gregorian
 
@@ -89,7 +92,11 @@ _WEB_EXT = ['.html', '.htm', '.shtml', '.php', '.php3', '.cgi']
 _CALENDARSCREEN = 'calendar-screen.css'
 _CALENDARPRINT = 'calendar-print.css'
 
-PLUGMAN = GuiPluginManager.get_instance()
+# The manifest of the pages, in the target directory (see write_report)
+_MANIFEST = '.webcal-manifest.json'
+_TMP = '.tmp'
+
+PLUGMAN = BasePluginManager.get_instance()
 CSS = PLUGMAN.process_plugin_data('WEBSTUFF')
 
 def _escape(string):
@@ -185,6 +192,19 @@ class WebCalReport(Report):
         self.calendar = {}
         self.holidays = {}
 
+        # The manifest of the last run, and what goes in the manifest of
+        # this one: the people read (with the objects read for them, and
+        # what they added to the calendar), and the digests of the inputs
+        # of the pages written. Pages with the same inputs as in the last
+        # run are not written again.
+        self.basedb = self.database
+        while isinstance(self.basedb, ProxyDbBase):
+            self.basedb = self.basedb.db
+        self.manifest = {"people": {}, "pages": {}}
+        self.stamp = None
+        self.people = {}
+        self.pages = {}
+
         calendar.setfirstweekday(DOW_GRAMPS2ISO[self.start_dow])
 
     def get_note_format(self, note):
@@ -386,23 +406,95 @@ class WebCalReport(Report):
         subdir -- any subdirs to be added
         """
 
-        fname = os.path.join(self.html_dir, subdir, fname)
-
-        if not _has_webpage_extension(fname):
-            fname += self.ext
+        fname = os.path.join(self.html_dir, self.page_path(fname, subdir))
 
         destdir = os.path.dirname(fname)
 
         if not os.path.isdir(destdir):
             os.makedirs(destdir)
 
-        output_file = open(fname, 'w', encoding=self.encoding,
+        # written next to the page, which it replaces when closed:
+        output_file = open(fname + _TMP, 'w', encoding=self.encoding,
                            errors='xmlcharrefreplace')
         return output_file
 
     def close_file(self, output_file):
         """ will close whatever filename is passed to it """
         output_file.close()
+        os.replace(output_file.name, output_file.name[:-len(_TMP)])
+
+    def page_path(self, fname, subdir):
+        """
+        The path of a page, relative to the html_dir tree.
+        """
+        fname = os.path.join(subdir, fname)
+        if not _has_webpage_extension(fname):
+            fname += self.ext
+        return fname
+
+    def page_unchanged(self, fname, subdir, *inputs):
+        """
+        Record the digest of what a page is made from, for the manifest.
+        Return True if the last run wrote the page from the same inputs,
+        and it is still there: then it need not be written again.
+
+        fname, subdir -- as for create_file()
+        inputs -- the data shown on the page (beyond the options)
+        """
+        path = self.page_path(fname, subdir)
+        digest = _digest(*inputs)
+        self.pages[path] = digest
+        return (self.manifest["pages"].get(path) == digest and
+                os.path.exists(os.path.join(self.html_dir, path)))
+
+    def manifest_key(self):
+        """
+        What all of the pages depend on: the version, the database, the
+        options and the filter. The manifest of a run with another key
+        is not used.
+        """
+        menu = self.options.menu
+        values = [(name, menu.get_option_by_name(name).get_value())
+                  for name in sorted(menu.get_all_option_names())]
+        rules = [(rule.__class__.__name__, rule.list)
+                 for rule in self.filter.get_rules()]
+        return _digest(VERSION, self.basedb.get_save_path(), values,
+                       self.filter.get_name(), self.filter.get_logical_op(),
+                       self.filter.get_invert(), rules)
+
+    def load_manifest(self):
+        """
+        Read the manifest of the last run, if it was made with the same
+        key. The pages it lists are removed by save_manifest() if this run
+        no longer makes them.
+        """
+        self.stamp = self.basedb.get_change_stamp()
+        fname = os.path.join(self.html_dir, _MANIFEST)
+        try:
+            with open(fname, encoding="utf-8") as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            return
+        self.manifest["old_pages"] = list(manifest.get("pages", {}))
+        if manifest.get("key") == self.manifest_key():
+            self.manifest.update(manifest)
+
+    def save_manifest(self):
+        """
+        Write the manifest of this run, and remove the pages of the last
+        run that were not made again.
+        """
+        for path in self.manifest.get("old_pages", []):
+            fname = os.path.join(self.html_dir, path)
+            if path not in self.pages and os.path.isfile(fname):
+                os.remove(fname)
+        fname = os.path.join(self.html_dir, _MANIFEST)
+        with open(fname + _TMP, "w", encoding="utf-8") as fp:
+            json.dump({"key": self.manifest_key(),
+                       "stamp": self.stamp,
+                       "people": self.people,
+                       "pages": self.pages}, fp, default=_struct)
+        os.replace(fname + _TMP, fname)
 
     def write_header(self, nr_up, title, body_id=None, add_print=True):
         """
@@ -966,6 +1058,20 @@ class WebCalReport(Report):
 
             for month in range(1, 13):
                 cal_fname = self.rlocale.date_displayer.long_months[int(month)]
+
+                # create note section for webcalendar()
+                # One has to be minused because the array starts at zero,
+                # but January =1
+                note = self.month_notes[month-1].strip()
+                if note:
+                    note = self.database.get_note_from_gid(note)
+                    note = self.get_note_format(note)
+
+                if self.page_unchanged(cal_fname, str(year), year, month,
+                                       self.calendar.get(month),
+                                       self.holidays.get(month), str(note)):
+                    step()
+                    continue
                 open_file = self.create_file(cal_fname, str(year))
 
                 # Add xml, doctype, meta and stylesheets
@@ -987,14 +1093,6 @@ class WebCalReport(Report):
                 monthly_calendar = self.calendar_build("wc", year, month)
                 content += monthly_calendar
 
-                # create note section for webcalendar()
-                # One has to be minused because the array starts at zero,
-                # but January =1
-                note = self.month_notes[month-1].strip()
-                if note:
-                    note = self.database.get_note_from_gid(note)
-                    note = self.get_note_format(note)
-
                 # table foot  section
                 cal_foot = Html("tfoot")
                 monthly_calendar += cal_foot
@@ -1049,7 +1147,9 @@ class WebCalReport(Report):
         with self._user.progress(_("Web Calendar Report"),
                 _('Creating Year At A Glance calendar'), 12) as step:
 
-            open_file = self.create_file('fullyearlinked', str(year))
+            # the page is made anyway, as it makes the One Day pages:
+            unchanged = self.page_unchanged('fullyearlinked', str(year), year,
+                                            self.calendar, self.holidays)
 
             # page title
             title = self._("%(year)d, At A Glance") % {'year' : year}
@@ -1095,7 +1195,9 @@ class WebCalReport(Report):
 
             # send calendar page to web output
             # and close the file
-            self.XHTMLWriter(yearglance, open_file)
+            if not unchanged:
+                open_file = self.create_file('fullyearlinked', str(year))
+                self.XHTMLWriter(yearglance, open_file)
 
     def one_day(self, event_date, fname_date, day_list):
         """
@@ -1117,6 +1219,15 @@ class WebCalReport(Report):
         year = event_date.get_year()
         month = event_date.get_month()
 
+        evt = fname_date[:8]
+        found = (evt, None, None)
+        for event in self.event_list:
+            if event[0] == evt:
+                found = event
+                break
+        if self.page_unchanged(fname_date, str(year), day_list, found):
+            return
+
         one_day_file = self.create_file(fname_date, str(year))
 
         # page title
@@ -1137,12 +1248,6 @@ class WebCalReport(Report):
         # set date display as in user prevferences
         content = Html("div", class_="content", id="OneDay")
         body += content
-        evt = fname_date[:8]
-        found = (evt, None, None)
-        for event in self.event_list:
-            if event[0] == evt:
-                found = event
-                break
         my_title = Html()
         url = "#"
         if found[1] is not None:
@@ -1261,180 +1366,242 @@ class WebCalReport(Report):
         """
         This method runs through the data, and collects the relevant dates
         and text.
+
+        What each person adds to the calendar is kept in the manifest,
+        with the people, families and events read for it, and reused if
+        none of these changed since the last run.
         """
         db = self.database
 
-        people = db.iter_person_handles()
-        with self._user.progress(_("Web Calendar Report"),
-                                  _('Applying Filter...'),
-                                  db.get_number_of_people()) as step:
-            people = self.filter.apply(db, people, step)
+        changed = self.get_changes()
+        if changed == {} and self.manifest["people"]:
+            # nothing changed, the filter would keep the same people:
+            people = list(self.manifest["people"])
+        elif self.filter.is_empty():
+            # the filter keeps everyone, no need to read them all for it:
+            people = list(db.iter_person_handles())
+        else:
+            people = db.iter_person_handles()
+            with self._user.progress(_("Web Calendar Report"),
+                                      _('Applying Filter...'),
+                                      db.get_number_of_people()) as step:
+                people = self.filter.apply(db, people, step)
 
         with self._user.progress(_("Web Calendar Report"),
                 _("Reading database..."), len(people)) as step:
-            for person in map(db.get_person_from_handle, people):
+            for handle in people:
                 step()
 
-                family_list = person.get_family_handle_list()
-                birth_ref = person.get_birth_ref()
-                birth_date = Date()
-                if birth_ref:
-                    birth_event = db.get_event_from_handle(birth_ref.ref)
-                    birth_date = birth_event.get_date_object()
-
-                death_ref = person.get_death_ref()
-                person_death = Date()
-                age_at_death = None
-                if death_ref and birth_date:
-                    death_event = db.get_event_from_handle(death_ref.ref)
-                    death_date = death_event.get_date_object()
-                    person_death = death_date
-                    if (birth_date != Date() and birth_date.is_valid()
-                                             and death_date):
-                        age_at_death = death_date - birth_date
-                        age_at_death = age_at_death.format(dlocale=self.rlocale)
-
-                # determine birthday information???
-                if (self.birthday and birth_date is not Date()
-                    and birth_date.is_valid()):
-                    birth_date = gregorian(birth_date)
-
-                    year = birth_date.get_year()
-                    month = birth_date.get_month()
-                    day = birth_date.get_day()
-
-                    # date to figure if someone is still alive
-                    # current year of calendar, month nd day is their birth
-                    # month and birth day
-                    prob_alive_date = Date(this_year, month, day)
-
-                    # add some things to handle maiden name:
-                    father_surname = None # husband, actually
-                    if person.gender == Person.FEMALE:
-
-                        # get husband's last name:
-                        if self.maiden_name in ['spouse_first', 'spouse_last']:
-                            if family_list:
-                                if self.maiden_name == 'spouse_first':
-                                    fhandle = family_list[0]
-                                else:
-                                    fhandle = family_list[-1]
-                                fam = db.get_family_from_handle(fhandle)
-                                father_handle = fam.get_father_handle()
-                                mother_handle = fam.get_mother_handle()
-                                if mother_handle == person.handle:
-                                    if father_handle:
-                                        father = db.get_person_from_handle(
-                                                                  father_handle)
-                                        if father is not None:
-                                            father_surname = _regular_surname(
-                                                      person.gender,
-                                                      father.get_primary_name())
-                    short_name = self.get_name(person, father_surname)
-                    alive = probably_alive(person, db, prob_alive_date)
-                    if (self.alive and alive) or not self.alive:
-
-                        # add link to NarrativeWeb
-                        if self.link_to_narweb:
-                            prfx = self.narweb_prefix
-                            text = str(Html("a", short_name,
-                                        href=self.build_url_fname_html(
-                                                                  person.handle,
-                                                                  "ppl",
-                                                                  prefix=prfx)))
-                        else:
-                            text = short_name
-                        if age_at_death is None:
-                            self.add_day_item(text, year, month, day,
-                                              'Birthday',
-                                              age_at_death, birth_date)
-                        else:
-                            self.add_day_item(text, year, month, day,
-                                              'Birthday',
-                                              age_at_death, person_death)
+                entry = self.manifest["people"].get(handle)
+                # (the change times are in whole seconds, an object changed
+                # in the second of the last run may have the same one)
+                if (entry is None or changed is None or
+                        not changed.keys().isdisjoint(entry["read"])):
+                    read = {}
+                    items = self.read_person(_ReadRecorder(db, read),
+                                             _ReadRecorder(self.basedb, read),
+                                             handle, this_year)
+                    entry = {"read": read, "items": items}
+                else:
+                    items = [tuple(item[:6]) + (Date.from_struct(item[6]),)
+                             for item in entry["items"]]
+                self.people[handle] = entry
+                for item in items:
+                    self.add_day_item(*item)
 
-                # add anniversary if requested
-                if self.anniv:
-                    for fhandle in family_list:
+    def get_changes(self):
+        """
+        Return the people, families and events changed or removed since
+        the last run, as a dict of handle: change time (None if removed),
+        or None if there is no last run to compare with.
+        """
+        stamp = self.manifest.get("stamp")
+        if stamp is None:
+            return None
+        elif tuple(stamp) == tuple(self.stamp):
+            return {}
+        changed = {}
+        since = int(stamp[1]) # the changes are stored in whole seconds
+        for (table, handle, deleted) in self.basedb.get_tombstones(since):
+            changed[handle] = None
+        for table in ["Person", "Family", "Event"]:
+            for obj in self.basedb.iter_changed(table, since):
+                changed[obj.handle] = obj.change
+        return changed
+
+    def read_person(self, db, alive_db, handle, this_year):
+        """
+        Return what a person adds to the calendar, as a list of the
+        arguments of add_day_item().
+
+        alive_db -- the database without the proxies, as used by
+                    probably_alive()
+        """
+        items = []
+        person = db.get_person_from_handle(handle)
+
+        family_list = person.get_family_handle_list()
+        birth_ref = person.get_birth_ref()
+        birth_date = Date()
+        if birth_ref:
+            birth_event = db.get_event_from_handle(birth_ref.ref)
+            birth_date = birth_event.get_date_object()
+
+        death_ref = person.get_death_ref()
+        person_death = Date()
+        age_at_death = None
+        if death_ref and birth_date:
+            death_event = db.get_event_from_handle(death_ref.ref)
+            death_date = death_event.get_date_object()
+            person_death = death_date
+            if (birth_date != Date() and birth_date.is_valid()
+                                     and death_date):
+                age_at_death = death_date - birth_date
+                age_at_death = age_at_death.format(dlocale=self.rlocale)
+
+        # determine birthday information???
+        if (self.birthday and birth_date is not Date()
+            and birth_date.is_valid()):
+            birth_date = gregorian(birth_date)
+
+            year = birth_date.get_year()
+            month = birth_date.get_month()
+            day = birth_date.get_day()
+
+            # date to figure if someone is still alive
+            # current year of calendar, month nd day is their birth
+            # month and birth day
+            prob_alive_date = Date(this_year, month, day)
+
+            # add some things to handle maiden name:
+            father_surname = None # husband, actually
+            if person.gender == Person.FEMALE:
+
+                # get husband's last name:
+                if self.maiden_name in ['spouse_first', 'spouse_last']:
+                    if family_list:
+                        if self.maiden_name == 'spouse_first':
+                            fhandle = family_list[0]
+                        else:
+                            fhandle = family_list[-1]
                         fam = db.get_family_from_handle(fhandle)
                         father_handle = fam.get_father_handle()
                         mother_handle = fam.get_mother_handle()
-                        if father_handle == person.handle:
-                            spouse_handle = mother_handle
-                        else:
-                            continue # with next person if this was
-                                     # the marriage event
-                        if spouse_handle:
-                            spouse = db.get_person_from_handle(spouse_handle)
-                            if spouse:
-                                spouse_name = self.get_name(spouse)
-                                short_name = self.get_name(person)
-                                death_ref = spouse.get_death_ref()
-                                spouse_death = Date()
-                                if death_ref:
-                                    death_event = db.get_event_from_handle(
-                                                                  death_ref.ref)
-                                    death_date = death_event.get_date_object()
-                                    if (death_date != Date() and
-                                        death_date.is_valid()):
-                                        spouse_death = death_date
-                            first_died = Date()
-                            if person_death == Date():
-                                first_died = spouse_death
-                            elif spouse_death != Date():
-                                first_died = person_death if spouse_death\
-                                                > person_death else spouse_death
-                            else:
-                                first_died = person_death
-
-                            # will return a marriage event or False if not
-                            # married any longer
-                            marriage_event = get_marriage_event(db, fam)
-                            if marriage_event:
-                                event_date = marriage_event.get_date_object()
-                                if (event_date is not Date() and
-                                    event_date.is_valid()):
-                                    event_date = gregorian(event_date)
-                                    year = event_date.get_year()
-                                    month = event_date.get_month()
-                                    day = event_date.get_day()
-
-                                    # date to figure if someone is still alive
-                                    prob_alive_date = Date(this_year,
-                                                           month, day)
-                                    wedding_age = None
-                                    if first_died != Date():
-                                        wedding_age = first_died - event_date
-                                        wedding_age = wedding_age.format(
-                                            dlocale=self.rlocale)
-
-                                    if self.link_to_narweb:
-                                        spouse_name = str(Html("a", spouse_name,
-                                                 href=self.build_url_fname_html(
-                                                    spouse_handle, 'ppl',
-                                                    prefix=self.narweb_prefix)))
-                                        short_name = str(Html("a", short_name,
-                                                 href=self.build_url_fname_html(
-                                                    person.handle, 'ppl',
-                                                    prefix=self.narweb_prefix)))
-
-                                    alive1 = probably_alive(person, db,
-                                                            prob_alive_date)
-                                    alive2 = probably_alive(spouse, db,
-                                                            prob_alive_date)
-                                    if first_died == Date():
-                                        first_died = Date(0, 0, 0)
-                                    if ((self.alive and alive1
-                                         and alive2) or not self.alive):
-
-                                        mg = self._('%(spouse)s and %(person)s')
-                                        text = mg % {'spouse' : spouse_name,
-                                                     'person' : short_name}
-
-                                        self.add_day_item(text, year, month,
-                                                          day, 'Anniversary',
-                                                          wedding_age,
-                                                          first_died)
+                        if mother_handle == person.handle:
+                            if father_handle:
+                                father = db.get_person_from_handle(
+                                                          father_handle)
+                                if father is not None:
+                                    father_surname = _regular_surname(
+                                              person.gender,
+                                              father.get_primary_name())
+            short_name = self.get_name(person, father_surname)
+            alive = probably_alive(person, alive_db, prob_alive_date)
+            if (self.alive and alive) or not self.alive:
+
+                # add link to NarrativeWeb
+                if self.link_to_narweb:
+                    prfx = self.narweb_prefix
+                    text = str(Html("a", short_name,
+                                href=self.build_url_fname_html(
+                                                          person.handle,
+                                                          "ppl",
+                                                          prefix=prfx)))
+                else:
+                    text = short_name
+                if age_at_death is None:
+                    items.append((text, year, month, day,
+                                  'Birthday',
+                                  age_at_death, birth_date))
+                else:
+                    items.append((text, year, month, day,
+                                  'Birthday',
+                                  age_at_death, person_death))
+
+        # add anniversary if requested
+        if self.anniv:
+            for fhandle in family_list:
+                fam = db.get_family_from_handle(fhandle)
+                father_handle = fam.get_father_handle()
+                mother_handle = fam.get_mother_handle()
+                if father_handle == person.handle:
+                    spouse_handle = mother_handle
+                else:
+                    continue # with next person if this was
+                             # the marriage event
+                if spouse_handle:
+                    spouse = db.get_person_from_handle(spouse_handle)
+                    if spouse:
+                        spouse_name = self.get_name(spouse)
+                        short_name = self.get_name(person)
+                        death_ref = spouse.get_death_ref()
+                        spouse_death = Date()
+                        if death_ref:
+                            death_event = db.get_event_from_handle(
+                                                          death_ref.ref)
+                            death_date = death_event.get_date_object()
+                            if (death_date != Date() and
+                                death_date.is_valid()):
+                                spouse_death = death_date
+                    first_died = Date()
+                    if person_death == Date():
+                        first_died = spouse_death
+                    elif spouse_death != Date():
+                        first_died = person_death if spouse_death\
+                                        > person_death else spouse_death
+                    else:
+                        first_died = person_death
+
+                    # will return a marriage event or False if not
+                    # married any longer
+                    marriage_event = get_marriage_event(db, fam)
+                    if marriage_event:
+                        event_date = marriage_event.get_date_object()
+                        if (event_date is not Date() and
+                            event_date.is_valid()):
+                            event_date = gregorian(event_date)
+                            year = event_date.get_year()
+                            month = event_date.get_month()
+                            day = event_date.get_day()
+
+                            # date to figure if someone is still alive
+                            prob_alive_date = Date(this_year,
+                                                   month, day)
+                            wedding_age = None
+                            if first_died != Date():
+                                wedding_age = first_died - event_date
+                                wedding_age = wedding_age.format(
+                                    dlocale=self.rlocale)
+
+                            if self.link_to_narweb:
+                                spouse_name = str(Html("a", spouse_name,
+                                         href=self.build_url_fname_html(
+                                            spouse_handle, 'ppl',
+                                            prefix=self.narweb_prefix)))
+                                short_name = str(Html("a", short_name,
+                                         href=self.build_url_fname_html(
+                                            person.handle, 'ppl',
+                                            prefix=self.narweb_prefix)))
+
+                            alive1 = probably_alive(person, alive_db,
+                                                    prob_alive_date)
+                            alive2 = probably_alive(spouse, alive_db,
+                                                    prob_alive_date)
+                            if first_died == Date():
+                                first_died = Date(0, 0, 0)
+                            if ((self.alive and alive1
+                                 and alive2) or not self.alive):
+
+                                mg = self._('%(spouse)s and %(person)s')
+                                text = mg % {'spouse' : spouse_name,
+                                             'person' : short_name}
+
+                                items.append((text, year, month,
+                                              day, 'Anniversary',
+                                              wedding_age,
+                                              first_died))
+
+        return items
 
     def write_footer(self, nr_up):
         """
@@ -1491,6 +1658,8 @@ class WebCalReport(Report):
         """
         The short method that runs through each month and creates a page.
         """
+        self.load_manifest()
+
         # get data from database for birthdays/ anniversaries
         self.collect_data(self.start_year)
 
@@ -1546,10 +1715,14 @@ class WebCalReport(Report):
             if self.home_link:
                 self.create_page_index()
 
+        self.save_manifest()
+
     def create_page_index(self):
         """
         Create the page index called by the narrativeweb.
         """
+        if self.page_unchanged('index', ""):
+            return
         output_file = self.create_file('index', "")
 
         # page title
@@ -1937,6 +2110,45 @@ def get_first_day_of_month(year, month):
     current_ord = current_date.toordinal() - monthinfo[0].count(0)
     return current_date, current_ord, monthinfo
 
+def _struct(obj):
+    """
+    The JSON form of the dates in the manifest and in the inputs of pages.
+    """
+    return obj.to_struct()
+
+def _digest(*inputs):
+    """
+    A digest of the inputs of a page (see WebCalReport.page_unchanged).
+    """
+    data = json.dumps(inputs, default=_struct, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+class _ReadRecorder:
+    """
+    Stands in for a database, and records the change time of the people,
+    families and events read through it, by handle (None for the ones
+    not found, as a proxy may hide them).
+    """
+    def __init__(self, db, read):
+        self.db = db
+        self.read = read
+
+    def __getattr__(self, attr):
+        return getattr(self.db, attr)
+
+    def __record(self, handle, obj):
+        self.read[handle] = obj.change if obj is not None else None
+        return obj
+
+    def get_person_from_handle(self, handle):
+        return self.__record(handle, self.db.get_person_from_handle(handle))
+
+    def get_family_from_handle(self, handle):
+        return self.__record(handle, self.db.get_family_from_handle(handle))
+
+    def get_event_from_handle(self, handle):
+        return self.__record(handle, self.db.get_event_from_handle(handle))
+
 def _has_webpage_extension(url):
     """
     determine if a filename has an extension or not...
@@ -41,3 +41,22 @@ plg.category =  CATEGORY_WEB
 plg.reportclass = 'WebCalReport'
 plg.optionclass = 'WebCalOptions'
 plg.report_modes = [REPORT_MODE_GUI, REPORT_MODE_CLI]
+
+#------------------------------------------------------------------------
+#
+# Web resources
+#
+#------------------------------------------------------------------------
+
+register(GENERAL,
+id    = 'system webstuff',
+category = "WEBSTUFF",
+name  = "Webstuff",
+description =  _("Provides a collection of resources for the web"),
+version = '1.0',
+gprime_target_version = MODULE_VERSION,
+status = STABLE,
+fname = 'webstuff.py',
+load_on_reg = True,
+process = 'process_list',
+  )
@@ -0,0 +1,126 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+The style sheets and images of the web reports.
+"""
+
+#------------------------------------------------------------------------
+#
+# Python modules
+#
+#------------------------------------------------------------------------
+import os
+from functools import partial
+
+#------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#------------------------------------------------------------------------
+from gprime.const import DATA_DIR, IMAGE_DIR
+from gprime.const import LOCALE as glocale
+_ = glocale.translation.sgettext
+
+def get_css_files():
+    """
+    Return the resources, as lists of: id, user selectable?, translated
+    name, full path, navigation menus?, images, javascript.
+    """
+    path_css = partial(os.path.join, DATA_DIR, "css")
+    path_img = partial(os.path.join, IMAGE_DIR)
+    mainz_images = [path_img("Web_Mainz_Bkgd.png"),
+                    path_img("Web_Mainz_Header.png"),
+                    path_img("Web_Mainz_Mid.png"),
+                    path_img("Web_Mainz_MidLight.png")]
+    return [
+        ["Basic-Ash", 1, _("Basic-Ash"),
+         path_css("Web_Basic-Ash.css"), None, [], []],
+        ["Basic-Blue", 1, _("Basic-Blue"),
+         path_css("Web_Basic-Blue.css"), True, [], []],
+        ["Basic-Cypress", 1, _("Basic-Cypress"),
+         path_css("Web_Basic-Cypress.css"), None, [], []],
+        ["Basic-Lilac", 1, _("Basic-Lilac"),
+         path_css("Web_Basic-Lilac.css"), None, [], []],
+        ["Basic-Peach", 1, _("Basic-Peach"),
+         path_css("Web_Basic-Peach.css"), None, [], []],
+        ["Basic-Spruce", 1, _("Basic-Spruce"),
+         path_css("Web_Basic-Spruce.css"), None, [], []],
+        ["Mainz", 1, _("Mainz"),
+         path_css("Web_Mainz.css"), None, mainz_images, []],
+        ["Nebraska", 1, _("Nebraska"),
+         path_css("Web_Nebraska.css"), None, [], []],
+        ["Visually", 1, _("Visually Impaired"),
+         path_css("Web_Visually.css"), True, [], []],
+        ["No style sheet", 1, _("No style sheet"), [], None, [], []],
+        ["Horizontal-Menus", 0, "Horizontal Menus",
+         path_css("Web_Horizontal-Menus.css"), None, [], []],
+        ["Vertical-Menus", 0, "Vertical Menus",
+         path_css("Web_Vertical-Menus.css"), None, [], []],
+        ["Fade-Menus", 0, "Fade In/Out Menus",
+         path_css("Web_Fade-Menus.css"), None, [], []],
+        ["DropDown-Menus", 0, "Drop-Down Menus",
+         path_css("Web_DropDown-Menus.css"), None, [], []],
+        ["Citations-Animated", 0, "Animated Citations",
+         path_css("Web_Citations-Animated.css"), None, [], []],
+        ["Citations-Outline", 0, "Outline Citations",
+         path_css("Web_Citations-Outline.css"), None, [], []],
+        ["ancestortree", 0, "ancestortree",
+         path_css("ancestortree.css"), None,
+         [path_img("Web_Gender_Female.png"),
+          path_img("Web_Gender_Male.png")], []],
+        ["behaviour", 0, "Behaviour",
+         path_css("behaviour.css"), None, [], []],
+        ["NarrativeMaps", 0, "",
+         path_css("narrative-maps.css"), None, [], []],
+        ["Print-Default", 0, "Print-Default",
+         path_css("Web_Print-Default.css"), None, [], []],
+        ["favicon", 0, "FavIcon",
+         path_img("favicon.ico"), None, [], []],
+        ["favicon2", 0, "FavIcon2",
+         path_img("favicon2.ico"), None, [], []],
+        ["Copyright", 0, "Copyright",
+         path_img("somerights20.gif"), None, [], []],
+        ]
+
+def load_on_reg(dbstate, uistate, plugin):
+    """
+    Runs when plugin is registered.
+    """
+    return get_css_files()
+
+def process_list(data):
+    """
+    Return the resources by id, as dicts. They are those of load_on_reg,
+    or all of them when the plugins were not loaded on registration (as
+    on the command line).
+    """
+    retval = {}
+    for row in data or get_css_files():
+        retval[row[0]] = {
+            "id": row[0],
+            "user": row[1],
+            "translation": row[2],
+            "filename": row[3],
+            "navigation": row[4],
+            "images": row[5],
+            "javascript": row[6],
+            }
+    return retval
@@ -0,0 +1,181 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Proxy class for the Gramps databases. Holds a read-only snapshot of the
+objects a report needs, loaded in bulk before the report runs.
+"""
+
+import itertools
+import functools
+
+from ..db.exceptions import DbWriteFailure
+
+# The tables of the objects that people and families refer to:
+SECONDARY_TABLES = ["Event", "Place", "Citation", "Source", "Repository",
+                    "Media", "Note", "Tag"]
+
+class SnapshotDb:
+    """
+    A read-only proxy for a database, which holds the objects that a
+    report needs in memory.
+
+    prefetch() loads the people that a report reaches from its root
+    people or families, with all of the objects they refer to, many at
+    a time (see DbReadBase.iter_raw_data). Lookups of objects that were
+    not prefetched go to the database, and are kept too.
+
+    Put it below the other proxies of a report, so that these filter
+    the objects of the snapshot.
+    """
+    def __init__(self, database):
+        self.db = database
+        self.objects = {table: {} for table in ["Person", "Family"] +
+                        SECONDARY_TABLES}
+        self.misses = 0 # lookups of objects that were not prefetched
+
+    def __getattr__(self, attr):
+        """
+        If an attribute isn't found here, use the self.db
+        version; the database cannot be changed through a snapshot.
+        """
+        if attr.startswith(("add_", "commit_", "remove_")):
+            raise DbWriteFailure("A report snapshot is read-only", attr)
+        return getattr(self.db, attr)
+
+    def get_table_func(self, table=None, func=None):
+        if func == "handle_func" and table in self.objects:
+            return functools.partial(self._get, table)
+        return self.db.get_table_func(table, func)
+
+    def _get(self, table, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        obj = self.objects[table].get(handle)
+        if obj is None:
+            self.misses += 1
+            obj = self.db.get_table_func(table, "handle_func")(handle)
+            if obj is not None:
+                self.objects[table][handle] = obj
+        return obj
+
+    def get_person_from_handle(self, handle):
+        return self._get("Person", handle)
+
+    def get_family_from_handle(self, handle):
+        return self._get("Family", handle)
+
+    def get_event_from_handle(self, handle):
+        return self._get("Event", handle)
+
+    def get_place_from_handle(self, handle):
+        return self._get("Place", handle)
+
+    def get_citation_from_handle(self, handle):
+        return self._get("Citation", handle)
+
+    def get_source_from_handle(self, handle):
+        return self._get("Source", handle)
+
+    def get_repository_from_handle(self, handle):
+        return self._get("Repository", handle)
+
+    def get_media_from_handle(self, handle):
+        return self._get("Media", handle)
+
+    def get_note_from_handle(self, handle):
+        return self._get("Note", handle)
+
+    def get_tag_from_handle(self, handle):
+        return self._get("Tag", handle)
+
+    def _load(self, table, handles):
+        """
+        Load the objects of table with the given handles that are not
+        loaded yet, and return those of them that exist.
+        """
+        objects = self.objects[table]
+        missing = set([handle for handle in handles
+                       if handle and handle not in objects])
+        if missing:
+            class_func = self.db.get_table_func(table, "class_func")
+            for (handle, data) in self.db.iter_raw_data(table, missing):
+                objects[handle] = class_func.create(data, self)
+        return [objects[handle] for handle in handles if handle in objects]
+
+    def prefetch(self, person_handles=(), family_handles=(), ancestors=1,
+                 descendants=1, tables=None):
+        """
+        Load the root people of person_handles and the parents of the
+        root families of family_handles; the given number of generations
+        of their ancestors and of their descendants (the roots being the
+        first), or all of them for None; the parents, spouses and children
+        of all of those; and the objects of tables (all of
+        SECONDARY_TABLES by default) that they refer to, directly or
+        through each other.
+        """
+        roots = set(person_handles)
+        for family in self._load("Family", family_handles):
+            roots.update([family.father_handle, family.mother_handle])
+        roots.discard(None)
+        roots.discard("")
+        reached = set()
+        for (generations, get_families, get_relatives) in [
+                (descendants, lambda person: person.family_list,
+                 lambda family: [ref.ref for ref in family.child_ref_list]),
+                (ancestors, lambda person: person.parent_family_list,
+                 lambda family: [family.father_handle,
+                                 family.mother_handle])]:
+            generation = roots
+            for number in (itertools.count() if generations is None
+                           else range(generations)):
+                people = self._load("Person", generation)
+                reached.update(generation)
+                if number + 1 == generations:
+                    break
+                families = self._load("Family", [
+                    handle for person in people
+                    for handle in get_families(person)])
+                generation = set([handle for family in families
+                                  for handle in get_relatives(family)
+                                  if handle and handle not in reached])
+                if not generation:
+                    break
+        # The close relatives of the people reached:
+        people = self._load("Person", reached)
+        families = self._load("Family", set(
+            [handle for person in people
+             for handle in person.family_list + person.parent_family_list]))
+        people += self._load("Person", set(
+            [handle for family in families
+             for handle in ([family.father_handle, family.mother_handle] +
+                            [ref.ref for ref in family.child_ref_list])]))
+        # The objects they refer to:
+        tables = SECONDARY_TABLES if tables is None else tables
+        found = people + families
+        while found:
+            wanted = {}
+            for obj in found:
+                for (table, handle) in obj.get_referenced_handles_recursively():
+                    if table in tables and handle not in self.objects[table]:
+                        wanted.setdefault(table, set()).add(handle)
+            found = []
+            for (table, handles) in wanted.items():
+                found += self._load(table, handles)
@@ -0,0 +1,109 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the report snapshot """
+
+import unittest
+
+from gprime.lib import Person, Family, ChildRef, Event, EventRef, Place, Note
+from gprime.db import DbTxn
+from gprime.db.exceptions import DbWriteFailure
+from gprime.app.dictionarydb import DictionaryDb
+from gprime.plugins.db.dbapi.inmemorydb import InMemoryDB
+from gprime.proxy import SnapshotDb, PrivateProxyDb
+
+class SnapshotTest(unittest.TestCase):
+
+    def make_tree(self, db):
+        """
+        Add four generations of one child each, the second one born in
+        a place, and return the handles of the people.
+        """
+        with DbTxn("Add", db, batch=True) as trans:
+            place = Place()
+            db.add_place(place, trans)
+            note = Note()
+            note.set("Born at home")
+            db.add_note(note, trans)
+            event = Event()
+            event.set_place_handle(place.handle)
+            event.add_note(note.handle)
+            db.add_event(event, trans)
+            people = []
+            for number in range(4):
+                person = Person()
+                if number == 1:
+                    event_ref = EventRef()
+                    event_ref.set_reference_handle(event.handle)
+                    person.add_event_ref(event_ref)
+                db.add_person(person, trans)
+                people.append(person)
+            for (parent, child) in zip(people, people[1:]):
+                family = Family()
+                family.set_father_handle(parent.handle)
+                child_ref = ChildRef()
+                child_ref.set_reference_handle(child.handle)
+                family.add_child_ref(child_ref)
+                db.add_family(family, trans)
+                parent.add_family_handle(family.handle)
+                db.commit_person(parent, trans)
+                child.add_parent_family_handle(family.handle)
+                db.commit_person(child, trans)
+        return ([person.handle for person in people], event.handle,
+                place.handle, note.handle)
+
+    def check_prefetch(self, db):
+        (people, event, place, note) = self.make_tree(db)
+        snapshot = SnapshotDb(db)
+        snapshot.prefetch([people[0]], descendants=2)
+        # two generations, and the children of the second:
+        self.assertEqual(set(snapshot.objects["Person"]), set(people[:3]))
+        self.assertEqual(len(snapshot.objects["Family"]), 2)
+        for (table, handle) in [("Event", event), ("Place", place),
+                                ("Note", note)]:
+            self.assertEqual(list(snapshot.objects[table]), [handle])
+        self.assertEqual(snapshot.get_person_from_handle(people[1]).handle,
+                         people[1])
+        self.assertEqual(snapshot.misses, 0)
+        # read through, behind other proxies:
+        proxy = PrivateProxyDb(snapshot)
+        self.assertEqual(proxy.get_person_from_handle(people[3]).handle,
+                         people[3])
+        self.assertEqual(snapshot.misses, 2) # and the family of its parents
+        self.assertIn(people[3], snapshot.objects["Person"])
+        self.assertRaises(DbWriteFailure, getattr, snapshot, "commit_person")
+        snapshot = SnapshotDb(db)
+        snapshot.prefetch([people[3]], ancestors=None, descendants=0,
+                          tables=[])
+        self.assertEqual(set(snapshot.objects["Person"]), set(people))
+        self.assertEqual(snapshot.objects["Event"], {})
+
+    def test_prefetch(self):
+        db = DictionaryDb()
+        db.load(None)
+        self.check_prefetch(db)
+
+    def test_prefetch_sqlite(self):
+        db = InMemoryDB()
+        db.load(None)
+        self.check_prefetch(db)
+
+if __name__ == "__main__":
+    unittest.main()
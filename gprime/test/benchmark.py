@@ -0,0 +1,247 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Import and export throughput benchmark.
+
+A synthetic tree (see :mod:`gprime.test.synthetic`) is written in each
+file format, then imported into each database backend. The import,
+reindex_reference_map, rebuild_secondary and the exporters are timed,
+and the results are written as JSON:
+
+    python -m gprime.test.benchmark --people 5000 --output results.json
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import os
+import sys
+import time
+import json
+import shutil
+import platform
+import argparse
+import tempfile
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from gprime.const import VERSION
+from gprime.dbstate import DbState
+from gprime.cli.user import User
+from gprime.cli.grampscli import CLIManager
+from gprime.plug import BasePluginManager
+from gprime.db import make_database
+from gprime.test.synthetic import SyntheticTree
+
+BACKENDS = ["dictionarydb", "sqlite"]
+FORMATS = ["ged", "gramps", "json"]
+
+class Benchmark:
+    """
+    Runs the benchmark for a synthetic tree, collecting the results.
+    """
+    def __init__(self, tree, directory, user=None):
+        self.tree = tree
+        self.directory = directory
+        self.user = user or User(quiet=True)
+        self.results = []
+        dbstate = DbState()
+        climanager = CLIManager(dbstate, setloader=False, user=self.user)
+        climanager.do_reg_plugins(dbstate, None)
+        self.pmgr = BasePluginManager.get_instance()
+
+    def get_function(self, plugin_list, extension, attribute):
+        """
+        Load a plugin once, so that loading is not part of the timings.
+        """
+        for pdata in plugin_list:
+            if pdata.extension == extension:
+                mod = self.pmgr.load_plugin(pdata)
+                if mod:
+                    return getattr(mod, getattr(pdata, attribute))
+        raise Exception("No plugin for '%s' files" % extension)
+
+    def get_importer(self, extension):
+        return self.get_function(self.pmgr.get_reg_importers(), extension,
+                                 "import_function")
+
+    def get_exporter(self, extension):
+        return self.get_function(self.pmgr.get_reg_exporters(), extension,
+                                 "export_function")
+
+    def make_db(self, backend):
+        """
+        Return a new, empty database of the given backend.
+        """
+        if backend == "dictionarydb":
+            from gprime.app.dictionarydb import DictionaryDb
+            db = DictionaryDb()
+            db.load(None)
+        elif backend == "sqlite":
+            path = tempfile.mkdtemp(dir=self.directory)
+            db = make_database("dbapi")
+            db.write_version(path)
+            db.load(path)
+        else:
+            raise Exception("Invalid backend: '%s'" % backend)
+        return db
+
+    @staticmethod
+    def count_objects(db):
+        return sum(db.get_table_func(table, "count_func")()
+                   for table in db.get_table_names())
+
+    @staticmethod
+    def time(function, *args):
+        """
+        Return the time, in seconds, that a function call takes.
+        """
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def rebuild(db, function):
+        """
+        Run a maintenance function, such as reindex_reference_map, and
+        commit its changes, as they are made outside of a transaction.
+        """
+        function(lambda *args: None)
+        db.transaction_backend_commit()
+
+    def record(self, backend, format, operation, seconds, objects):
+        """
+        Record the result of one operation.
+        """
+        result = {
+            "backend": backend,
+            "format": format,
+            "operation": operation,
+            "seconds": round(seconds, 6),
+            "objects": objects,
+            "objects_per_second": (round(objects / seconds, 1)
+                                   if seconds else None),
+        }
+        self.results.append(result)
+        return result
+
+    def write_files(self, formats):
+        """
+        Write the synthetic tree in each of the formats.
+        """
+        filenames = {}
+        for format in formats:
+            filenames[format] = os.path.join(self.directory,
+                                             "synthetic.%s" % format)
+            self.tree.write(filenames[format])
+        return filenames
+
+    def run(self, backends=None, formats=None):
+        """
+        Import each file into each backend, then reindex, rebuild and
+        export it again in each format.
+        """
+        backends = backends or BACKENDS
+        formats = formats or FORMATS
+        filenames = self.write_files(formats)
+        for backend in backends:
+            for format in formats:
+                db = self.make_db(backend)
+                try:
+                    seconds = self.time(self.get_importer(format), db,
+                                        filenames[format], self.user)
+                    count = self.count_objects(db)
+                    self.record(backend, format, "import", seconds, count)
+                    seconds = self.time(self.rebuild, db,
+                                        db.reindex_reference_map)
+                    self.record(backend, format, "reindex_reference_map",
+                                seconds, count)
+                    seconds = self.time(self.rebuild, db,
+                                        db.rebuild_secondary)
+                    self.record(backend, format, "rebuild_secondary",
+                                seconds, count)
+                    for export_format in formats:
+                        output = os.path.join(self.directory, "export.%s" %
+                                              export_format)
+                        seconds = self.time(self.get_exporter(export_format),
+                                            db, output, self.user)
+                        self.record(backend, format, "export_" + export_format,
+                                    seconds, count)
+                finally:
+                    db.close()
+        return self.results
+
+    def get_report(self):
+        """
+        Return the machine-readable report of the results.
+        """
+        return {
+            "version": VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "tree": self.tree.get_parameters(),
+            "results": self.results,
+        }
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Import and export throughput benchmark")
+    parser.add_argument("--people", type=int, default=1000)
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--events", type=int, default=3,
+                        help="events per person")
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--media", type=int, default=50)
+    parser.add_argument("--places", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="comma-separated: %s" % ", ".join(BACKENDS))
+    parser.add_argument("--formats", default=",".join(FORMATS),
+                        help="comma-separated: %s" % ", ".join(FORMATS))
+    parser.add_argument("--output", default=None,
+                        help="JSON file for the report (default stdout)")
+    args = parser.parse_args(args)
+    tree = SyntheticTree(people=args.people, generations=args.generations,
+                         events=args.events, notes=args.notes,
+                         media=args.media, places=args.places,
+                         seed=args.seed)
+    directory = tempfile.mkdtemp()
+    try:
+        benchmark = Benchmark(tree, directory)
+        benchmark.run(args.backends.split(","), args.formats.split(","))
+    finally:
+        shutil.rmtree(directory)
+    report = benchmark.get_report()
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
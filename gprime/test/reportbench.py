@@ -0,0 +1,490 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Report performance benchmark.
+
+Every registered text, drawing and graph report is run, through
+run_report, on synthetic trees (see :mod:`gprime.test.synthetic`) of
+increasing size in an SQLite database. Each report runs in a process of
+its own, which records its wall time, its peak resident memory and the
+number of SQL queries it made:
+
+    python -m gprime.test.reportbench --people 10000,100000,1000000 \\
+        --budgets budgets.json --output results.json
+
+The budgets are a JSON object, by report id ("*" for all reports):
+
+    {"*": {"seconds_per_person": 0.001, "peak_rss_mb": 2000},
+     "records": {"queries_per_person": 5}}
+
+with the keys "seconds", "queries" and "peak_rss_mb", and the scaled
+"seconds_per_person" and "queries_per_person". The exit status is 1 when
+a report is over a budget (or times out).
+
+Two results, or two git revisions (run on the same trees), are
+compared in a table:
+
+    python -m gprime.test.reportbench --compare old.json new.json
+    python -m gprime.test.reportbench --revisions v0.5,HEAD --people 10000
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import os
+import sys
+import time
+import json
+import shutil
+import tarfile
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from contextlib import redirect_stdout
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+# Only modules that older revisions have too: this script runs them.
+from gprime.const import VERSION
+from gprime.dbstate import DbState
+from gprime.cli.user import User
+from gprime.cli.grampscli import CLIManager
+from gprime.cli.plug import run_report
+from gprime.plug import (BasePluginManager, CATEGORY_TEXT, CATEGORY_DRAW,
+                         CATEGORY_GRAPHVIZ)
+from gprime.db import make_database
+
+SIZES = [10000, 100000, 1000000]
+TIMEOUT = 3600 # seconds, for each report
+# The output format of each category of report; graphs are written as
+# DOT, so that the Graphviz layout is not part of the timings.
+FORMATS = {
+    CATEGORY_TEXT: "txt",
+    CATEGORY_DRAW: "svg",
+    CATEGORY_GRAPHVIZ: "dot",
+}
+# The options of the reports that are not about the person given by pid:
+REPORT_OPTIONS = {
+    "family_descend_chart": {"pid": "F00000"},
+}
+BUDGETS = {
+    "seconds": ("seconds", False),
+    "queries": ("queries", False),
+    "peak_rss_mb": ("peak_rss_mb", False),
+    "seconds_per_person": ("seconds", True),
+    "queries_per_person": ("queries", True),
+}
+
+def get_peak_rss():
+    """
+    Return the peak resident memory of the process, in MB, or None if
+    it is not known.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin": # bytes, rather than kB
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+def call(function, args, timeout=None):
+    """
+    Return function(*args), called in a forked process, so that its
+    memory is its own; or in this process where there is no fork. An
+    exception in the function is raised as a RuntimeError, and
+    TimeoutError is raised after timeout seconds. What the function
+    prints goes to stderr, leaving stdout to the JSON report.
+    """
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        with redirect_stdout(sys.stderr):
+            return function(*args)
+    (reader, writer) = context.Pipe(duplex=False)
+
+    def target():
+        try:
+            with redirect_stdout(sys.stderr):
+                value = function(*args)
+            writer.send((True, value))
+        except BaseException as err:
+            writer.send((False, "%s: %s" % (type(err).__name__, err)))
+
+    process = context.Process(target=target)
+    process.start()
+    writer.close()
+    try:
+        if not reader.poll(timeout):
+            process.terminate()
+            raise TimeoutError()
+        (success, value) = reader.recv()
+    except EOFError:
+        (success, value) = (False, "exited with %s" % process.exitcode)
+    finally:
+        process.join()
+        reader.close()
+    if not success:
+        raise RuntimeError(value)
+    return value
+
+class QueryCounter:
+    """
+    Counts the SQL queries made on a DB-API database.
+    """
+    def __init__(self, db):
+        self.count = 0
+        dbapi = getattr(db, "dbapi", None)
+        if dbapi is None:
+            self.count = None
+            return
+        execute = dbapi.execute
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return execute(*args, **kwargs)
+
+        dbapi.execute = counted
+
+def run_one(path, name, options):
+    """
+    Run a report on the database of path, and return its measures.
+    """
+    db = make_database("dbapi")
+    db.load(path)
+    try:
+        queries = QueryCounter(db)
+        rss = get_peak_rss()
+        start = time.perf_counter()
+        clr = run_report(db, name, **options)
+        seconds = time.perf_counter() - start
+        peak = get_peak_rss()
+    finally:
+        db.close()
+    return {
+        "status": "ok" if clr is not None else "error",
+        "seconds": round(seconds, 6),
+        "queries": queries.count,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": (round(peak - rss, 1)
+                          if peak is not None else None),
+    }
+
+class ReportBench:
+    """
+    Runs the reports on databases of synthetic trees, collecting the
+    results.
+    """
+    def __init__(self, directory, user=None, reports=None, timeout=TIMEOUT):
+        self.directory = directory
+        self.user = user or User(quiet=True)
+        self.timeout = timeout
+        self.results = []
+        self.trees = []
+        dbstate = DbState()
+        climanager = CLIManager(dbstate, setloader=False, user=self.user)
+        climanager.do_reg_plugins(dbstate, None)
+        self.pmgr = BasePluginManager.get_instance()
+        self.reports = [pdata for pdata in self.pmgr.get_reg_reports()
+                        if pdata.category in FORMATS and
+                        (reports is None or pdata.id in reports)]
+
+    def make_db(self, people, filename=None, seed=0):
+        """
+        Make an SQLite database of a synthetic tree, or of the tree in a
+        Gramps XML file; return its path.
+        """
+        path = tempfile.mkdtemp(dir=self.directory)
+        start = time.perf_counter()
+        call(self._populate, (path, people, filename, seed))
+        self.trees.append({
+            "people": people,
+            "file": filename,
+            "seconds": round(time.perf_counter() - start, 6),
+        })
+        return path
+
+    def _populate(self, path, people, filename, seed):
+        db = make_database("dbapi")
+        db.write_version(path)
+        db.load(path)
+        try:
+            if filename:
+                for pdata in self.pmgr.get_reg_importers():
+                    if pdata.extension == "gramps":
+                        mod = self.pmgr.load_plugin(pdata)
+                        import_function = getattr(mod, pdata.import_function)
+                        import_function(db, filename, self.user)
+                        break
+            else:
+                # only in the revisions that have it:
+                from gprime.test.synthetic import SyntheticTree
+                SyntheticTree(people=people, seed=seed).populate(db)
+        finally:
+            db.close()
+
+    def run(self, people, filename=None, seed=0):
+        """
+        Run every report on a tree of the number of people.
+        """
+        path = self.make_db(people, filename, seed)
+        # the report of the person in the middle, with ancestors and
+        # descendants:
+        pid = "I%05d" % (people // 2)
+        try:
+            for pdata in self.reports:
+                result = {
+                    "people": people,
+                    "report": pdata.id,
+                    "category": FORMATS[pdata.category],
+                }
+                # load the plugin once, so that loading is not timed:
+                if not self.pmgr.load_plugin(pdata):
+                    result["status"] = "error"
+                    self.results.append(result)
+                    continue
+                output = os.path.join(self.directory, "report.%s" %
+                                      FORMATS[pdata.category])
+                options = {"off": FORMATS[pdata.category], "of": output,
+                           "pid": pid}
+                options.update(REPORT_OPTIONS.get(pdata.id, {}))
+                try:
+                    result.update(call(run_one, (path, pdata.id, options),
+                                       self.timeout))
+                except TimeoutError:
+                    result["status"] = "timeout"
+                except RuntimeError as err:
+                    result["status"] = "error"
+                    result["message"] = str(err)
+                self.results.append(result)
+        finally:
+            shutil.rmtree(path)
+        return self.results
+
+    def get_report(self):
+        """
+        Return the machine-readable report of the results.
+        """
+        return {
+            "version": VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "trees": self.trees,
+            "results": self.results,
+        }
+
+#-------------------------------------------------------------------------
+#
+# Budgets and comparisons
+#
+#-------------------------------------------------------------------------
+def check_budgets(results, budgets):
+    """
+    Return the messages of the results that are over their budgets (see
+    the module documentation).
+    """
+    failures = []
+    for result in results:
+        budget = dict(budgets.get("*", {}))
+        budget.update(budgets.get(result["report"], {}))
+        name = "%s (%d people)" % (result["report"], result["people"])
+        if result["status"] == "timeout":
+            failures.append("%s: timed out" % name)
+            continue
+        for (key, limit) in sorted(budget.items()):
+            if key not in BUDGETS:
+                raise ValueError("Invalid budget: '%s'" % key)
+            (measure, scaled) = BUDGETS[key]
+            value = result.get(measure)
+            if scaled:
+                limit *= result["people"]
+            if value is not None and value > limit:
+                failures.append("%s: %s %s > %s" % (name, measure, value,
+                                                    round(limit, 6)))
+    return failures
+
+def compare(old, new):
+    """
+    Return the rows of the comparison of two reports of results, as
+    (people, report, (old, new) seconds, (old, new) queries, (old, new)
+    peak RSS) tuples.
+    """
+    measures = ["seconds", "queries", "peak_rss_mb"]
+    old_results = {(result["people"], result["report"]): result
+                   for result in old["results"]}
+    new_results = {(result["people"], result["report"]): result
+                   for result in new["results"]}
+    rows = []
+    for key in sorted(set(old_results) | set(new_results)):
+        row = list(key)
+        for measure in measures:
+            row.append(tuple(results[key].get(measure)
+                             if key in results else None
+                             for results in (old_results, new_results)))
+        rows.append(tuple(row))
+    return rows
+
+def format_table(rows, old_name="old", new_name="new"):
+    """
+    Return the text of the table of the rows of compare().
+    """
+    def pair(values, ratio=False):
+        (old, new) = ["-" if value is None else str(value)
+                      for value in values]
+        text = "%s / %s" % (old, new)
+        if ratio and all(values) and values[0] > 0:
+            text += " (%.2fx)" % (values[1] / values[0])
+        return text
+
+    header = ("people", "report", "seconds", "queries", "peak RSS MB")
+    lines = [header, ("", "", "%s / %s" % (old_name, new_name), "", "")]
+    for (people, report, seconds, queries, rss) in rows:
+        lines.append((str(people), report, pair(seconds, True),
+                      pair(queries, True), pair(rss)))
+    widths = [max(len(line[column]) for line in lines)
+              for column in range(len(header))]
+    return "\n".join("  ".join(text.ljust(width) for (text, width)
+                               in zip(line, widths)).rstrip()
+                     for line in lines)
+
+def run_revisions(revisions, args, directory):
+    """
+    Run the benchmark in a checkout of each git revision, with this
+    script and on the same trees; return the reports by revision.
+    """
+    from gprime.test.synthetic import SyntheticTree
+    source = os.path.dirname(os.path.abspath(__file__))
+    top = subprocess.check_output(["git", "rev-parse", "--show-toplevel"],
+                                  cwd=source).decode().strip()
+    files = []
+    for people in args.people:
+        filename = os.path.join(directory, "synthetic-%d.gramps" % people)
+        SyntheticTree(people=people, seed=args.seed).write(filename)
+        files.append(filename)
+    reports = {}
+    for revision in revisions:
+        checkout = tempfile.mkdtemp(dir=directory)
+        archive = subprocess.Popen(["git", "archive", revision], cwd=top,
+                                   stdout=subprocess.PIPE)
+        with tarfile.open(fileobj=archive.stdout, mode="r|") as tar:
+            tar.extractall(checkout)
+        if archive.wait() != 0:
+            raise Exception("Invalid revision: '%s'" % revision)
+        output = os.path.join(directory, "results.json")
+        command = [sys.executable, os.path.abspath(__file__),
+                   "--people", ",".join(str(people) for people in args.people),
+                   "--tree-files", ",".join(files),
+                   "--timeout", str(args.timeout), "--output", output]
+        if args.reports:
+            command += ["--reports", args.reports]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [checkout] + os.environ.get("PYTHONPATH", "").split(os.pathsep)))
+        subprocess.check_call(command, cwd=checkout, env=env)
+        with open(output) as fp:
+            reports[revision] = json.load(fp)
+        shutil.rmtree(checkout)
+    return reports
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Report performance benchmark")
+    parser.add_argument("--people",
+                        default=",".join(str(size) for size in SIZES),
+                        help="comma-separated sizes of the trees")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reports", default=None,
+                        help="comma-separated report ids (default all)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help="seconds for each report")
+    parser.add_argument("--budgets", default=None,
+                        help="JSON file of the budgets")
+    parser.add_argument("--tree-files", default=None,
+                        help="comma-separated Gramps XML files of the trees")
+    parser.add_argument("--revisions", default=None,
+                        help="the two git revisions to compare, as OLD,NEW")
+    parser.add_argument("--compare", nargs=2, default=None,
+                        metavar=("OLD", "NEW"),
+                        help="compare two JSON files of results")
+    parser.add_argument("--output", default=None,
+                        help="JSON file for the report (default stdout)")
+    args = parser.parse_args(args)
+    args.people = [int(people) for people in args.people.split(",")]
+    budgets = {}
+    if args.budgets:
+        with open(args.budgets) as fp:
+            budgets = json.load(fp)
+
+    if args.compare:
+        reports = []
+        for filename in args.compare:
+            with open(filename) as fp:
+                reports.append(json.load(fp))
+        print(format_table(compare(*reports), *args.compare))
+        return 0
+
+    directory = tempfile.mkdtemp()
+    try:
+        if args.revisions:
+            revisions = args.revisions.split(",")
+            if len(revisions) != 2:
+                parser.error("--revisions needs two revisions")
+            reports = run_revisions(revisions, args, directory)
+            print(format_table(compare(*[reports[revision]
+                                         for revision in revisions]),
+                               *revisions))
+            report = reports[revisions[1]]
+        else:
+            files = (args.tree_files.split(",") if args.tree_files
+                     else [None] * len(args.people))
+            bench = ReportBench(directory,
+                                reports=(args.reports.split(",")
+                                         if args.reports else None),
+                                timeout=args.timeout)
+            for (people, filename) in zip(args.people, files):
+                bench.run(people, filename, args.seed)
+            report = bench.get_report()
+    finally:
+        shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    elif not args.revisions:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    failures = check_budgets(report["results"], budgets)
+    for failure in failures:
+        print("Over budget: %s" % failure, file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
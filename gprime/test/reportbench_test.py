@@ -0,0 +1,61 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the budgets and comparisons of the report benchmark """
+
+import unittest
+
+from .reportbench import check_budgets, compare, format_table
+
+def result(report, people, seconds, queries, status="ok"):
+    return {"report": report, "people": people, "status": status,
+            "seconds": seconds, "queries": queries, "peak_rss_mb": 50.0}
+
+class ReportBenchTest(unittest.TestCase):
+
+    def test_budgets(self):
+        results = [result("records", 1000, 2.0, 3000),
+                   result("summary", 1000, 0.5, 900),
+                   result("timeline", 2000, None, None, "timeout")]
+        budgets = {"*": {"seconds_per_person": 0.001},
+                   "records": {"queries_per_person": 2}}
+        self.assertEqual(check_budgets(results, budgets), [
+            "records (1000 people): queries 3000 > 2000",
+            "records (1000 people): seconds 2.0 > 1.0",
+            "timeline (2000 people): timed out"])
+        self.assertEqual(check_budgets(results[:2], {}), [])
+        self.assertRaises(ValueError, check_budgets, results,
+                          {"*": {"minutes": 1}})
+
+    def test_compare(self):
+        old = {"results": [result("records", 1000, 2.0, 3000)]}
+        new = {"results": [result("records", 1000, 1.0, 1000),
+                           result("summary", 1000, 0.5, 900)]}
+        rows = compare(old, new)
+        self.assertEqual(rows, [
+            (1000, "records", (2.0, 1.0), (3000, 1000), (50.0, 50.0)),
+            (1000, "summary", (None, 0.5), (None, 900), (None, 50.0))])
+        table = format_table(rows, "A", "B").splitlines()
+        self.assertEqual(len(table), 4)
+        self.assertIn("2.0 / 1.0 (0.50x)", table[2])
+        self.assertIn("- / 0.5", table[3])
+
+if __name__ == "__main__":
+    unittest.main()
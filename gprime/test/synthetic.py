@@ -0,0 +1,252 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Deterministic synthetic family trees, for benchmarks.
+
+The same parameters (and seed) always give the same tree, with the same
+handles, ids and change times, so that timings of different versions
+can be compared.
+
+>>> tree = SyntheticTree(people=1000, generations=6)
+>>> tree.populate(database)
+>>> tree.write("/tmp/tree.ged")
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import random
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from gprime.lib import (Person, Family, Event, EventRef, EventType, Place,
+                        PlaceName, PlaceType, Note, Media, MediaRef, Name,
+                        Surname, Date, ChildRef)
+from gprime.db import DbTxn
+
+FIRST_NAMES = [["Anna", "Maria", "Elin", "Karin", "Sara", "Ida", "Emma",
+                "Hanna", "Alice", "Ebba"],
+               ["Erik", "Lars", "Karl", "Johan", "Anders", "Nils", "Per",
+                "Olof", "Gustav", "Sven"]]
+SURNAMES = ["Smith", "Garner", "Andersson", "Johansson", "Zieliński",
+            "Müller", "Dubois", "Rossi", "Novak", "O'Brien", "Lindqvist",
+            "Nguyen", "García", "Kowalski", "Jensen", "Murphy"]
+PLACE_NAMES = ["Springfield", "Riverside", "Fairview", "Madison", "Georgetown",
+               "Salem", "Franklin", "Clinton", "Greenville", "Bristol"]
+EXTRA_EVENTS = [EventType.RESIDENCE, EventType.OCCUPATION, EventType.CENSUS,
+                EventType.BAPTISM, EventType.BURIAL, EventType.EDUCATION]
+
+CHANGE_TIME = 1483228800 # 2017-01-01, so that exports do not vary
+
+class SyntheticTree:
+    """
+    A family tree of the given size, generated from a seed.
+
+    :param people: number of people
+    :param generations: number of generations the people are spread over
+    :param events: number of events per person (birth, death, others)
+    :param notes: number of notes, attached to people in turn
+    :param media: number of media objects, attached to people in turn
+    :param places: number of places, used by the events
+    :param seed: seed of the random generator
+    """
+    def __init__(self, people=1000, generations=5, events=3, notes=100,
+                 media=50, places=100, seed=0):
+        self.people = people
+        self.generations = max(1, generations)
+        self.events = events
+        self.notes = notes
+        self.media = media
+        self.places = max(1, places)
+        self.seed = seed
+
+    def get_parameters(self):
+        """
+        Return the parameters of the tree, as a dictionary.
+        """
+        return {"people": self.people, "generations": self.generations,
+                "events": self.events, "notes": self.notes,
+                "media": self.media, "places": self.places,
+                "seed": self.seed}
+
+    def populate(self, db):
+        """
+        Add the tree to a (normally empty) database, in one batch
+        transaction. Returns the number of objects added.
+        """
+        rand = random.Random(self.seed)
+        count = 0
+        with DbTxn("Synthetic tree", db, batch=True) as trans:
+            place_handles = []
+            for index in range(self.places):
+                place = Place()
+                place.handle = "PL%010d" % index
+                place.gid = "P%05d" % index
+                name = "%s %d" % (PLACE_NAMES[index % len(PLACE_NAMES)],
+                                  index // len(PLACE_NAMES))
+                place.set_name(PlaceName(value=name))
+                place.set_title(name)
+                place.set_type(PlaceType(PlaceType.CITY))
+                self._add(db.add_place, place, trans)
+                place_handles.append(place.handle)
+            note_handles = []
+            for index in range(self.notes):
+                note = Note("Note %d: %s" % (index, " ".join(
+                    rand.choice(SURNAMES) for i in range(20))))
+                note.handle = "N%010d" % index
+                note.gid = "N%05d" % index
+                self._add(db.add_note, note, trans)
+                note_handles.append(note.handle)
+            media_handles = []
+            for index in range(self.media):
+                media = Media()
+                media.handle = "M%010d" % index
+                media.gid = "O%05d" % index
+                media.set_path("photos/photo%05d.jpg" % index)
+                media.set_mime_type("image/jpeg")
+                media.set_description("Photo %d" % index)
+                self._add(db.add_media, media, trans)
+                media_handles.append(media.handle)
+            count += len(place_handles) + len(note_handles) + len(media_handles)
+            people = []
+            event_index = 0
+            size = max(1, self.people // self.generations)
+            for index in range(self.people):
+                generation = min(index // size, self.generations - 1)
+                gender = index % 2
+                person = Person()
+                person.handle = "I%010d" % index
+                person.gid = "I%05d" % index
+                person.set_gender(Person.MALE if gender else Person.FEMALE)
+                name = Name()
+                name.set_first_name(rand.choice(FIRST_NAMES[gender]))
+                surname = Surname()
+                surname.set_surname(rand.choice(SURNAMES))
+                name.add_surname(surname)
+                person.set_primary_name(name)
+                year = 1700 + 25 * generation + rand.randint(0, 20)
+                for number in range(self.events):
+                    event = Event()
+                    event.handle = "E%010d" % event_index
+                    event.gid = "E%05d" % event_index
+                    event_index += 1
+                    if number == 0:
+                        event.set_type(EventType(EventType.BIRTH))
+                        event_year = year
+                    elif number == 1:
+                        event.set_type(EventType(EventType.DEATH))
+                        event_year = year + rand.randint(1, 90)
+                    else:
+                        event.set_type(EventType(rand.choice(EXTRA_EVENTS)))
+                        event_year = year + rand.randint(0, 60)
+                    date = Date()
+                    date.set_yr_mon_day(event_year, rand.randint(1, 12),
+                                        rand.randint(1, 28))
+                    event.set_date_object(date)
+                    event.set_place_handle(rand.choice(place_handles))
+                    self._add(db.add_event, event, trans)
+                    count += 1
+                    ref = EventRef()
+                    ref.ref = event.handle
+                    if number == 0:
+                        person.set_birth_ref(ref)
+                    elif number == 1:
+                        person.set_death_ref(ref)
+                    else:
+                        person.add_event_ref(ref)
+                if note_handles and index < 2 * len(note_handles):
+                    person.add_note(note_handles[index % len(note_handles)])
+                if media_handles and index < 2 * len(media_handles):
+                    ref = MediaRef()
+                    ref.ref = media_handles[index % len(media_handles)]
+                    person.add_media_reference(ref)
+                people.append((generation, person))
+            count += self._add_families(db, trans, people, rand)
+            for generation, person in people:
+                self._add(db.add_person, person, trans)
+            count += len(people)
+        return count
+
+    def _add(self, add_func, obj, trans):
+        obj.change = CHANGE_TIME
+        add_func(obj, trans, set_gid=False)
+
+    def _add_families(self, db, trans, people, rand):
+        """
+        Marry the women and men of each generation in pairs, and give
+        the families of a generation the people of the next generation
+        as children.
+        """
+        families = {}
+        index = 0
+        for generation in range(self.generations):
+            members = [person for (gen, person) in people if gen == generation]
+            women = [person for person in members
+                     if person.gender == Person.FEMALE]
+            men = [person for person in members
+                   if person.gender == Person.MALE]
+            families[generation] = []
+            for mother, father in zip(women, men):
+                family = Family()
+                family.handle = "F%010d" % index
+                family.gid = "F%05d" % index
+                index += 1
+                family.set_mother_handle(mother.handle)
+                family.set_father_handle(father.handle)
+                mother.add_family_handle(family.handle)
+                father.add_family_handle(family.handle)
+                families[generation].append(family)
+        for generation in range(1, self.generations):
+            parents = families[generation - 1]
+            if not parents:
+                continue
+            children = [person for (gen, person) in people
+                        if gen == generation]
+            for child in children:
+                family = rand.choice(parents)
+                ref = ChildRef()
+                ref.ref = child.handle
+                family.add_child_ref(ref)
+                child.add_parent_family_handle(family.handle)
+        count = 0
+        for generation in range(self.generations):
+            for family in families[generation]:
+                self._add(db.add_family, family, trans)
+                count += 1
+        return count
+
+    def write(self, filename):
+        """
+        Write the tree to a file, in the format given by its extension
+        (eg, .ged, .gramps or .json).
+        """
+        from gprime.app.dictionarydb import DictionaryDb
+        from gprime.app.forms.actionform import export_file
+        from gprime.cli.user import User
+        db = DictionaryDb()
+        db.load(None)
+        self.populate(db)
+        return export_file(db, filename, User(quiet=True))
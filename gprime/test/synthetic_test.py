@@ -0,0 +1,58 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the synthetic tree generator """
+
+import unittest
+
+from gprime.app.dictionarydb import DictionaryDb
+from .synthetic import SyntheticTree
+
+class SyntheticTreeTest(unittest.TestCase):
+
+    def make_db(self, tree):
+        db = DictionaryDb()
+        db.load(None)
+        tree.populate(db)
+        return db
+
+    def test_counts(self):
+        tree = SyntheticTree(people=40, generations=4, events=3, notes=5,
+                             media=2, places=3)
+        db = self.make_db(tree)
+        self.assertEqual(db.get_number_of_people(), 40)
+        self.assertEqual(db.get_number_of_events(), 120)
+        self.assertEqual(db.get_number_of_notes(), 5)
+        self.assertEqual(db.get_number_of_media(), 2)
+        self.assertEqual(db.get_number_of_places(), 3)
+        self.assertEqual(db.get_number_of_families(), 20)
+
+    def test_deterministic(self):
+        first = self.make_db(SyntheticTree(people=30, seed=1))
+        second = self.make_db(SyntheticTree(people=30, seed=1))
+        other = self.make_db(SyntheticTree(people=30, seed=2))
+        people = [person.to_struct() for person in first.iter_people()]
+        self.assertEqual(
+            people, [person.to_struct() for person in second.iter_people()])
+        self.assertNotEqual(
+            people, [person.to_struct() for person in other.iter_people()])
+
+if __name__ == "__main__":
+    unittest.main()
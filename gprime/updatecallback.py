@@ -32,7 +32,6 @@ other Gramps baggage.
 #
 #-------------------------------------------------------------------------
 import time
-import collections
 import logging
 _LOG = logging.getLogger(".gen")
 
@@ -54,7 +53,7 @@ class UpdateCallback:
         :param interval: number of seconds at most between the updates
         :type interval: int
         """
-        if isinstance(callback, collections.Callable):
+        if callable(callback):
             # callback is really callable
             self.update = self.update_real
             self.callback = callback
@@ -38,11 +38,13 @@ class LRU:
     """
     Implementation of a length-limited O(1) LRU cache
     """
-    def __init__(self, count):
+    def __init__(self, count, callback=None):
         """
-        Set count to 0 or 1 to disable.
+        Set count to 0 or 1 to disable. If given, callback(key, value) is
+        called with each item that is removed to make room for a new one.
         """
         self.count = count
+        self.callback = callback
         self.data = {}
         self.first = None
         self.last = None
@@ -85,6 +87,8 @@ class LRU:
             lnk.next = None
             if lnk.value[0] in self.data:
                 del self.data[lnk.value[0]]
+            if self.callback:
+                self.callback(*lnk.value)
             del lnk
 
     def __delitem__(self, obj):